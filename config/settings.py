@@ -33,6 +33,18 @@ class Settings:
     PDF_REPORTS_DIR = PROJECT_ROOT / "pdf_reports"
     DATA_DIR = PROJECT_ROOT / "data"
     LOGS_DIR = PROJECT_ROOT / "logs"
+    OUTPUT_DIR = PROJECT_ROOT / "output"
+    CHARTS_DIR = OUTPUT_DIR / "charts"
+
+    # 分析结果持久化目录（模型注册表、预测状态、批量预测输出）
+    MODELS_DIR = OUTPUT_DIR / "models"
+    FORECAST_STATE_DIR = OUTPUT_DIR / "forecast_state"
+    PREDICTIONS_DIR = OUTPUT_DIR / "predictions"
+
+    # 分群结果存储：保留时长（小时）与最多保留的结果数
+    SEGMENTS_DIR = OUTPUT_DIR / "segments"
+    SEGMENT_RESULT_TTL_HOURS = float(os.getenv("SEGMENT_RESULT_TTL_HOURS", 24))
+    SEGMENT_MAX_RESULTS = int(os.getenv("SEGMENT_MAX_RESULTS", 100))
     
     # 上传配置
     UPLOAD_DIR = DATA_DIR / "uploads"
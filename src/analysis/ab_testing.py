@@ -0,0 +1,423 @@
+#!/usr/bin/env python3
+"""
+多指标 × 多分群 A/B 测试
+一次分组聚合得到每个 (分群, 实验组) 的充分统计量（计数、和、平方和、比率指标的交叉积），
+在此基础上向量化计算全部 指标 × 分群 × 实验组 的 Welch t 检验、多重检验校正与置信区间；
+Bootstrap 区间按索引矩阵批量重抽样，序贯监控只需累加新批次的充分统计量
+"""
+
+from typing import Dict, List, Any, Optional, Tuple
+
+# 条件导入
+try:
+    import pandas as pd
+    import numpy as np
+    PANDAS_AVAILABLE = True
+except ImportError:
+    PANDAS_AVAILABLE = False
+
+try:
+    from scipy import stats
+    SCIPY_AVAILABLE = True
+except ImportError:
+    SCIPY_AVAILABLE = False
+
+OVERALL_SEGMENT = 'overall'
+CORRECTION_METHODS = ['holm', 'bh', 'bonferroni', 'none']
+DEFAULT_BOOTSTRAP = 1000
+# 单批重抽样的索引矩阵元素上限（控制内存）
+BOOTSTRAP_BATCH_ELEMENTS = 1 << 22
+# 序贯检验混合先验的尺度：相对对照组均值的效应量
+DEFAULT_MIXTURE_EFFECT = 0.05
+
+
+def _metric_columns(metrics: List[str], ratio_metrics: Optional[Dict[str, Tuple[str, str]]]) -> List[str]:
+    """计算所需的原始列（去重且保持顺序）"""
+    columns = list(metrics)
+    for numerator, denominator in (ratio_metrics or {}).values():
+        columns.extend([numerator, denominator])
+    return list(dict.fromkeys(columns))
+
+
+def sufficient_statistics(data: Any, variant_col: str, metrics: List[str],
+                          segment_col: Optional[str] = None,
+                          ratio_metrics: Optional[Dict[str, Tuple[str, str]]] = None) -> Any:
+    """
+    一次分组聚合计算充分统计量（指标缺失值按 0 处理，如无订单用户的 GMV）
+
+    Args:
+        data: 明细数据（每行一个实验单元，如用户）
+        variant_col: 实验组列
+        metrics: 均值型指标列
+        segment_col: 分群列，为空时只有整体
+        ratio_metrics: 比率型指标 {名称: (分子列, 分母列)}，如客单价 = gmv / orders
+
+    Returns:
+        以 (segment, variant) 为索引的 DataFrame，列为 n、sum:列、sumsq:列、cross:名称；含 overall 分群
+    """
+    columns = _metric_columns(metrics, ratio_metrics)
+    values = data[columns].apply(pd.to_numeric, errors='coerce').fillna(0.0)
+    parts = {'n': np.ones(len(data))}
+    for col in columns:
+        parts[f'sum:{col}'] = values[col].to_numpy(dtype=float)
+        parts[f'sumsq:{col}'] = parts[f'sum:{col}'] ** 2
+    for name, (numerator, denominator) in (ratio_metrics or {}).items():
+        parts[f'cross:{name}'] = parts[f'sum:{numerator}'] * parts[f'sum:{denominator}']
+
+    frame = pd.DataFrame(parts, index=data.index)
+    variants = data[variant_col].astype(str)
+    by_variant = frame.groupby(variants.to_numpy(), sort=True).sum()
+    overall = pd.concat({OVERALL_SEGMENT: by_variant}, names=['segment', 'variant'])
+    if segment_col is None:
+        return overall
+
+    segments = data[segment_col].astype(str).to_numpy()
+    by_segment = frame.groupby([segments, variants.to_numpy()], sort=True).sum()
+    by_segment.index.names = ['segment', 'variant']
+    return pd.concat([overall, by_segment])
+
+
+def adjust_p_values(p_values: Any, method: str = 'holm') -> Any:
+    """
+    多重检验校正
+
+    Args:
+        p_values: p 值数组（NaN 不参与校正）
+        method: holm（控制 FWER）、bh（Benjamini-Hochberg，控制 FDR）、bonferroni、none
+
+    Returns:
+        校正后的 p 值数组
+    """
+    if method not in CORRECTION_METHODS:
+        raise ValueError(f"不支持的校正方法: {method}")
+    p_values = np.asarray(p_values, dtype=float)
+    adjusted = np.full_like(p_values, np.nan)
+    valid = np.flatnonzero(~np.isnan(p_values))
+    m = len(valid)
+    if m == 0 or method == 'none':
+        return p_values.copy()
+
+    p = p_values[valid]
+    if method == 'bonferroni':
+        adjusted[valid] = np.minimum(p * m, 1.0)
+        return adjusted
+
+    order = np.argsort(p, kind='stable')
+    ranked = p[order]
+    if method == 'holm':
+        stepped = np.maximum.accumulate(ranked * (m - np.arange(m)))
+    else:
+        stepped = np.minimum.accumulate((ranked * m / np.arange(1, m + 1))[::-1])[::-1]
+    result = np.empty(m)
+    result[order] = np.minimum(stepped, 1.0)
+    adjusted[valid] = result
+    return adjusted
+
+
+def _moments(stats_frame: Any, metrics: List[str],
+             ratio_metrics: Optional[Dict[str, Tuple[str, str]]]) -> Dict[str, Any]:
+    """由充分统计量计算各指标的均值与均值估计的方差（比率指标用 delta 方法）"""
+    n = stats_frame['n'].to_numpy(dtype=float)
+    safe_n = np.maximum(n, 1)
+    dof = np.maximum(n - 1, 1)
+    result = {}
+
+    def mean_var(col):
+        total = stats_frame[f'sum:{col}'].to_numpy()
+        mean = total / safe_n
+        var = np.maximum(stats_frame[f'sumsq:{col}'].to_numpy() - total * mean, 0) / dof
+        return mean, var
+
+    for metric in metrics:
+        mean, var = mean_var(metric)
+        result[metric] = (mean, var / safe_n)
+
+    for name, (numerator, denominator) in (ratio_metrics or {}).items():
+        mean_y, var_y = mean_var(numerator)
+        mean_x, var_x = mean_var(denominator)
+        covariance = (stats_frame[f'cross:{name}'].to_numpy() - n * mean_x * mean_y) / dof
+        with np.errstate(divide='ignore', invalid='ignore'):
+            ratio = mean_y / mean_x
+            variance = (var_y - 2 * ratio * covariance + ratio ** 2 * var_x) / (safe_n * mean_x ** 2)
+        result[name] = (ratio, np.maximum(variance, 0))
+    return result
+
+
+def compare_variants(stats_frame: Any, metrics: List[str], control: str,
+                     ratio_metrics: Optional[Dict[str, Tuple[str, str]]] = None,
+                     confidence_level: float = 0.95, correction: str = 'holm') -> Any:
+    """
+    向量化比较所有 分群 × 指标 × 实验组 与对照组
+
+    Args:
+        stats_frame: sufficient_statistics 的结果
+        metrics: 均值型指标
+        control: 对照组标签
+        ratio_metrics: 比率型指标
+        confidence_level: 置信水平
+        correction: 多重检验校正方法
+
+    Returns:
+        每行一个比较的 DataFrame：segment、metric、variant、样本量、均值、差值、相对差值(%)、
+        标准误、t 统计量、自由度、p_value、p_value_adjusted、ci_lower/ci_upper（差值的 Welch 区间）、is_significant
+    """
+    moments = _moments(stats_frame, metrics, ratio_metrics)
+    index = stats_frame.index
+    segments = index.get_level_values('segment').to_numpy()
+    variants = index.get_level_values('variant').to_numpy()
+    counts = stats_frame['n'].to_numpy()
+
+    # 每行对应的对照组行号
+    if str(control) not in set(variants):
+        raise ValueError(f"数据中没有对照组: {control}")
+    control_rows = pd.Series(np.arange(len(index)), index=index).xs(str(control), level='variant')
+    control_position = pd.Series(segments).map(control_rows).to_numpy(dtype=float)
+    rows = np.flatnonzero((variants != str(control)) & ~np.isnan(control_position))
+    controls = control_position[rows].astype(int)
+
+    frames = []
+    for metric, (mean, var_of_mean) in moments.items():
+        difference = mean[rows] - mean[controls]
+        variance = var_of_mean[rows] + var_of_mean[controls]
+        se = np.sqrt(variance)
+        # Welch–Satterthwaite 自由度
+        with np.errstate(divide='ignore', invalid='ignore'):
+            t_stat = difference / se
+            df = variance ** 2 / (var_of_mean[rows] ** 2 / np.maximum(counts[rows] - 1, 1)
+                                  + var_of_mean[controls] ** 2 / np.maximum(counts[controls] - 1, 1))
+            relative = np.where(mean[controls] != 0, difference / mean[controls] * 100, np.nan)
+        p_value = 2 * stats.t.sf(np.abs(t_stat), df)
+        critical = stats.t.ppf(0.5 + confidence_level / 2, df)
+        frames.append(pd.DataFrame({
+            'segment': segments[rows],
+            'metric': metric,
+            'variant': variants[rows],
+            'control_size': counts[controls].astype(int),
+            'treatment_size': counts[rows].astype(int),
+            'control_mean': mean[controls],
+            'treatment_mean': mean[rows],
+            'absolute_difference': difference,
+            'relative_difference': relative,
+            'standard_error': se,
+            't_statistic': t_stat,
+            'df': df,
+            'p_value': p_value,
+            'ci_lower': difference - critical * se,
+            'ci_upper': difference + critical * se
+        }))
+
+    results = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+    if len(results):
+        results['p_value_adjusted'] = adjust_p_values(results['p_value'].to_numpy(), correction)
+        results['is_significant'] = results['p_value_adjusted'] < 1 - confidence_level
+    return results
+
+
+def bootstrap_intervals(data: Any, variant_col: str, metrics: List[str], control: str,
+                        segment_col: Optional[str] = None,
+                        ratio_metrics: Optional[Dict[str, Tuple[str, str]]] = None,
+                        n_boot: int = DEFAULT_BOOTSTRAP, confidence_level: float = 0.95,
+                        random_state: int = 42) -> Any:
+    """
+    Bootstrap 百分位置信区间
+
+    每个 (分群, 实验组) 的行只切片一次，按 (重抽样次数, 组内行数) 的索引矩阵分批重抽样，
+    所有指标共用同一索引矩阵；差值分布为实验组与对照组各自独立重抽样的均值之差
+
+    Args:
+        data: 明细数据
+        variant_col: 实验组列
+        metrics: 均值型指标
+        control: 对照组标签
+        segment_col: 分群列
+        ratio_metrics: 比率型指标
+        n_boot: 重抽样次数
+        confidence_level: 置信水平
+        random_state: 随机种子
+
+    Returns:
+        DataFrame：segment、metric、variant、bootstrap_ci_lower、bootstrap_ci_upper、relative_ci_lower、relative_ci_upper
+    """
+    rng = np.random.default_rng(random_state)
+    columns = _metric_columns(metrics, ratio_metrics)
+    values = data[columns].apply(pd.to_numeric, errors='coerce').fillna(0.0).to_numpy(dtype=float)
+    variants = data[variant_col].astype(str).to_numpy()
+    column_index = {col: i for i, col in enumerate(columns)}
+    names = list(metrics) + list(ratio_metrics or {})
+
+    def replicate(rows):
+        """一组数据的 (重抽样次数, 指标数) 重抽样统计量"""
+        group = values[rows]
+        n = len(group)
+        sums = np.empty((n_boot, len(columns)))
+        batch = max(1, BOOTSTRAP_BATCH_ELEMENTS // max(n, 1))
+        for start in range(0, n_boot, batch):
+            size = min(batch, n_boot - start)
+            index = rng.integers(0, n, size=(size, n))
+            for j in range(len(columns)):
+                sums[start:start + size, j] = group[:, j][index].sum(axis=1)
+        estimates = [sums[:, column_index[m]] / n for m in metrics]
+        for numerator, denominator in (ratio_metrics or {}).values():
+            with np.errstate(divide='ignore', invalid='ignore'):
+                estimates.append(sums[:, column_index[numerator]] / sums[:, column_index[denominator]])
+        return np.column_stack(estimates)
+
+    segment_groups = {OVERALL_SEGMENT: np.arange(len(data))}
+    if segment_col is not None:
+        segment_codes, segment_labels = pd.factorize(data[segment_col].astype(str), sort=True)
+        order = np.argsort(segment_codes, kind='stable')
+        bounds = np.cumsum(np.bincount(segment_codes, minlength=len(segment_labels)))
+        for code, label in enumerate(segment_labels):
+            segment_groups[label] = order[(bounds[code - 1] if code else 0):bounds[code]]
+
+    tail = (1 - confidence_level) / 2 * 100
+    records = []
+    for segment, rows in segment_groups.items():
+        segment_variants = variants[rows]
+        control_rows = rows[segment_variants == str(control)]
+        if len(control_rows) == 0:
+            continue
+        control_boot = replicate(control_rows)
+        for variant in sorted(set(segment_variants) - {str(control)}):
+            treatment_boot = replicate(rows[segment_variants == variant])
+            difference = treatment_boot - control_boot
+            with np.errstate(divide='ignore', invalid='ignore'):
+                relative = difference / control_boot * 100
+            lower, upper = np.nanpercentile(difference, [tail, 100 - tail], axis=0)
+            rel_lower, rel_upper = np.nanpercentile(relative, [tail, 100 - tail], axis=0)
+            for j, metric in enumerate(names):
+                records.append({
+                    'segment': segment, 'metric': metric, 'variant': variant,
+                    'bootstrap_ci_lower': lower[j], 'bootstrap_ci_upper': upper[j],
+                    'relative_ci_lower': rel_lower[j], 'relative_ci_upper': rel_upper[j]
+                })
+    return pd.DataFrame(records)
+
+
+def multi_metric_ab_test(data: Any, variant_col: str, metrics: List[str], control: Optional[str] = None,
+                         segment_col: Optional[str] = None,
+                         ratio_metrics: Optional[Dict[str, Tuple[str, str]]] = None,
+                         confidence_level: float = 0.95, correction: str = 'holm',
+                         n_boot: int = DEFAULT_BOOTSTRAP, random_state: int = 42) -> Any:
+    """
+    多指标 × 多分群 A/B 测试
+
+    Args:
+        data: 明细数据（每行一个实验单元）
+        variant_col: 实验组列
+        metrics: 均值型指标（转化率等 0/1 指标按均值检验）
+        control: 对照组标签，默认取排序后的第一个组
+        segment_col: 分群列
+        ratio_metrics: 比率型指标 {名称: (分子列, 分母列)}
+        confidence_level: 置信水平
+        correction: 多重检验校正方法
+        n_boot: Bootstrap 次数，0 表示不计算 Bootstrap 区间
+        random_state: 随机种子
+
+    Returns:
+        compare_variants 的结果，n_boot > 0 时合并 Bootstrap 区间列
+    """
+    if control is None:
+        control = sorted(data[variant_col].astype(str).unique())[0]
+    stats_frame = sufficient_statistics(data, variant_col, metrics, segment_col, ratio_metrics)
+    results = compare_variants(stats_frame, metrics, str(control), ratio_metrics, confidence_level, correction)
+    if n_boot and len(results):
+        intervals = bootstrap_intervals(data, variant_col, metrics, str(control), segment_col, ratio_metrics,
+                                        n_boot, confidence_level, random_state)
+        results = results.merge(intervals, on=['segment', 'metric', 'variant'], how='left')
+    return results
+
+
+class SequentialABTest:
+    """
+    序贯 A/B 监控
+
+    每批数据只累加充分统计量，任一时刻的检验结果由累计统计量直接得到；
+    p 值为混合序贯概率比检验（mSPRT）的随时有效 p 值（各次查看取累计最小值），可随时查看而不膨胀第一类错误
+    """
+
+    def __init__(self, variant_col: str, metrics: List[str], control: str,
+                 segment_col: Optional[str] = None,
+                 ratio_metrics: Optional[Dict[str, Tuple[str, str]]] = None,
+                 confidence_level: float = 0.95, correction: str = 'holm',
+                 mixture_effect: float = DEFAULT_MIXTURE_EFFECT):
+        """
+        初始化
+
+        Args:
+            variant_col: 实验组列
+            metrics: 均值型指标
+            control: 对照组标签
+            segment_col: 分群列
+            ratio_metrics: 比率型指标
+            confidence_level: 置信水平
+            correction: 多重检验校正方法（作用于随时有效 p 值）
+            mixture_effect: mSPRT 混合先验标准差（相对对照组均值的效应量）
+        """
+        self.variant_col = variant_col
+        self.metrics = list(metrics)
+        self.control = str(control)
+        self.segment_col = segment_col
+        self.ratio_metrics = dict(ratio_metrics or {})
+        self.confidence_level = confidence_level
+        self.correction = correction
+        self.mixture_effect = mixture_effect
+        self.statistics = None
+        self.looks = 0
+        self._running_p = {}
+
+    def update(self, batch: Any) -> 'SequentialABTest':
+        """
+        累加一批新数据
+
+        Args:
+            batch: 新到达的明细数据
+
+        Returns:
+            自身
+        """
+        batch_stats = sufficient_statistics(batch, self.variant_col, self.metrics,
+                                            self.segment_col, self.ratio_metrics)
+        self.statistics = batch_stats if self.statistics is None else self.statistics.add(batch_stats, fill_value=0)
+        return self
+
+    def merge(self, other: 'SequentialABTest') -> 'SequentialABTest':
+        """合并另一个监控器（如其他分区）的累计统计量"""
+        if other.statistics is not None:
+            self.statistics = other.statistics if self.statistics is None else \
+                self.statistics.add(other.statistics, fill_value=0)
+        return self
+
+    def results(self) -> Any:
+        """
+        按累计数据给出当前检验结果（每调用一次记为一次查看）
+
+        Returns:
+            compare_variants 的结果，另含 always_valid_p_value、always_valid_p_adjusted、is_significant（基于随时有效 p 值）
+        """
+        if self.statistics is None:
+            return pd.DataFrame()
+        self.looks += 1
+        results = compare_variants(self.statistics.sort_index(), self.metrics, self.control,
+                                   self.ratio_metrics, self.confidence_level, 'none')
+        if len(results) == 0:
+            return results
+
+        variance = results['standard_error'].to_numpy() ** 2
+        tau2 = (self.mixture_effect * results['control_mean'].abs()).to_numpy() ** 2
+        tau2 = np.where(tau2 > 0, tau2, variance)
+        with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+            log_lr = (0.5 * np.log(variance / (variance + tau2))
+                      + tau2 * results['absolute_difference'].to_numpy() ** 2 / (2 * variance * (variance + tau2)))
+            p_now = np.minimum(1.0, np.exp(-log_lr))
+        p_now = np.where(np.isfinite(p_now), p_now, 1.0)
+
+        keys = list(zip(results['segment'], results['metric'], results['variant']))
+        always_valid = np.array([min(self._running_p.get(key, 1.0), p) for key, p in zip(keys, p_now)])
+        self._running_p.update(zip(keys, always_valid))
+
+        results['always_valid_p_value'] = always_valid
+        results['always_valid_p_adjusted'] = adjust_p_values(always_valid, self.correction)
+        results['is_significant'] = results['always_valid_p_adjusted'] < 1 - self.confidence_level
+        results['look'] = self.looks
+        return results
@@ -8,7 +8,7 @@ import os
 import json
 import math
 import statistics
-from typing import Dict, List, Any, Optional, Tuple
+from typing import Dict, List, Any, Optional, Tuple, Union
 from datetime import datetime, timedelta
 from collections import defaultdict
 
@@ -28,15 +28,57 @@ try:
 except ImportError:
     SKLEARN_AVAILABLE = False
 
+from .anomaly_detection import detect_anomalies, DEFAULT_THRESHOLDS
+from .trend_kernels import (
+    least_squares_slope, window_change_scores, pelt_change_points, describe_change_points,
+    CHANGE_POINT_METHODS
+)
+from .seasonality import detect_seasonality
+from .correlation import blocked_correlation, DEFAULT_BLOCK_SIZE
+from .cohort import cohort_retention, dense_table, DEFAULT_CHUNK_SIZE
+from .segmentation import ScalableSegmenter, segment_profiles, DEFAULT_SAMPLE_SIZE
+from .result_cache import ResultCache, cached_analysis, DEFAULT_MAX_BYTES
+
 class AdvancedAnalyticsEngine:
     """高级分析引擎"""
     
-    def __init__(self):
-        self.analysis_cache = {}
+    def __init__(self, cache_max_bytes: int = DEFAULT_MAX_BYTES, cache_dir: Optional[str] = None):
+        """
+        初始化分析引擎
+
+        Args:
+            cache_max_bytes: 结果缓存内存上限
+            cache_dir: 结果缓存持久化目录，为空时仅缓存在内存
+        """
+        self.analysis_cache = ResultCache(max_bytes=cache_max_bytes, cache_dir=cache_dir)
         self.model_performance = {}
-        
-    def correlation_analysis(self, data: Any, features: List[str]) -> Dict[str, Any]:
-        """相关性分析"""
+    
+    def cache_stats(self) -> Dict[str, Any]:
+        """结果缓存命中统计"""
+        return self.analysis_cache.stats()
+    
+    def clear_cache(self, include_disk: bool = True):
+        """清空结果缓存"""
+        self.analysis_cache.clear(include_disk=include_disk)
+        
+    @cached_analysis
+    def correlation_analysis(self, data: Any, features: List[str], method: str = 'pearson',
+                             threshold: float = 0.7, block_size: int = DEFAULT_BLOCK_SIZE,
+                             include_matrix: bool = True) -> Dict[str, Any]:
+        """
+        相关性分析
+
+        按列分块计算相关矩阵并直接提取强相关对，宽表（上千列）时可关闭 include_matrix 以节省内存；
+        超出内存的数据可用 correlation.streaming_correlation 按行分块累积
+
+        Args:
+            data: 数据
+            features: 特征列
+            method: pearson 或 spearman
+            threshold: 强相关阈值（|r| > threshold）
+            block_size: 列分块大小
+            include_matrix: 是否在结果中返回完整相关矩阵
+        """
         correlation_results = {
             'correlation_matrix': {},
             'strong_correlations': [],
@@ -45,23 +87,26 @@ class AdvancedAnalyticsEngine:
         }
         
         if PANDAS_AVAILABLE and hasattr(data, 'corr'):
-            # 使用pandas计算相关性
             numeric_data = data[features].select_dtypes(include=[np.number])
-            corr_matrix = numeric_data.corr()
+            columns = list(numeric_data.columns)
+            blocked = blocked_correlation(numeric_data.to_numpy(dtype=float), method=method,
+                                          block_size=block_size, threshold=threshold,
+                                          return_matrix=include_matrix)
             
-            correlation_results['correlation_matrix'] = corr_matrix.to_dict()
+            if include_matrix:
+                correlation_results['correlation_matrix'] = pd.DataFrame(
+                    blocked['matrix'], index=columns, columns=columns
+                ).to_dict()
             
-            # 找出强相关性
-            for i in range(len(corr_matrix.columns)):
-                for j in range(i+1, len(corr_matrix.columns)):
-                    corr_value = corr_matrix.iloc[i, j]
-                    if abs(corr_value) > 0.7:
-                        correlation_results['strong_correlations'].append({
-                            'feature1': corr_matrix.columns[i],
-                            'feature2': corr_matrix.columns[j],
-                            'correlation': corr_value,
-                            'strength': 'strong' if abs(corr_value) > 0.8 else 'moderate'
-                        })
+            # 强相关对（分块时已用上三角掩码提取）
+            pairs = blocked['pairs']
+            for i, j, corr_value in zip(pairs['i'], pairs['j'], pairs['correlation']):
+                correlation_results['strong_correlations'].append({
+                    'feature1': columns[i],
+                    'feature2': columns[j],
+                    'correlation': float(corr_value),
+                    'strength': 'strong' if abs(corr_value) > 0.8 else 'moderate'
+                })
             
             # 生成洞察
             if correlation_results['strong_correlations']:
@@ -134,8 +179,14 @@ class AdvancedAnalyticsEngine:
         
         return correlation_matrix
     
-    def trend_analysis(self, data: Any, metric: str, time_column: str = 'date') -> Dict[str, Any]:
-        """趋势分析"""
+    @cached_analysis
+    def trend_analysis(self, data: Any, metric: str, time_column: str = 'date',
+                       change_point_method: str = 'window') -> Dict[str, Any]:
+        """
+        趋势分析
+
+        change_point_method 为 window（累积和滑窗对比）或 pelt（惩罚最优划分）
+        """
         trend_results = {
             'trend_direction': 'stable',
             'trend_strength': 0.0,
@@ -165,11 +216,12 @@ class AdvancedAnalyticsEngine:
                 
                 # 季节性检测
                 if len(values) >= 12:  # 至少一年数据
-                    seasonal_pattern = self._detect_seasonality(values)
+                    times = sorted_data[time_column].values if time_column in sorted_data else None
+                    seasonal_pattern = self._detect_seasonality(values, times)
                     trend_results['seasonal_pattern'] = seasonal_pattern
                 
                 # 变化点检测
-                change_points = self._detect_change_points(values)
+                change_points = self._detect_change_points(values, method=change_point_method)
                 trend_results['change_points'] = change_points
                 
                 # 简单预测
@@ -189,67 +241,126 @@ class AdvancedAnalyticsEngine:
             
         return trend_results
     
-    def _calculate_slope(self, values: List[float]) -> float:
-        """计算斜率"""
-        n = len(values)
-        if n < 2:
-            return 0.0
+    @cached_analysis
+    def batch_trend_analysis(self, data: Any, series_columns: Union[str, List[str]],
+                             metrics: Union[str, List[str]], time_column: str = 'date',
+                             forecast_periods: int = 3, change_point_method: str = 'window',
+                             n_jobs: int = 1) -> Any:
+        """
+        多序列批量趋势分析
+        
+        Args:
+            data: 长表数据，每个 序列键 × 指标 构成一条序列
+            series_columns: 序列键列（如 store_id）
+            metrics: 指标列
+            time_column: 时间列
+            forecast_periods: 预测期数
+            change_point_method: window 或 pelt
+            n_jobs: 进程分片数
+            
+        Returns:
+            每条序列一行的列式结果表，简化模式下返回空字典
+        """
+        if not (PANDAS_AVAILABLE and hasattr(data, 'groupby')):
+            return {}
+        
+        from .batch_trend import BatchTrendAnalyzer
+        
+        return BatchTrendAnalyzer(
+            series_columns, metrics, time_column=time_column, forecast_periods=forecast_periods,
+            change_point_method=change_point_method, n_jobs=n_jobs
+        ).analyze(data)
+    
+    @cached_analysis
+    def batch_forecast(self, data: Any, series_columns: Union[str, List[str]], value_column: str,
+                       time_column: str = 'date', horizon: int = 30, period: Optional[int] = None,
+                       confidence: float = 0.95) -> Any:
+        """
+        多序列批量 Holt-Winters 预测
+        
+        Args:
+            data: 长表数据，每个序列键构成一条序列
+            series_columns: 序列键列（如 store_id）
+            value_column: 预测的数值列
+            time_column: 时间列
+            horizon: 预测步数
+            period: 季节周期，为空时按数据频率取默认值
+            confidence: 区间置信水平
+            
+        Returns:
+            每条序列 × 预测步一行的长表（forecast、lower、upper），简化模式下返回空字典
+        """
+        if not (PANDAS_AVAILABLE and hasattr(data, 'groupby')):
+            return {}
         
-        x = list(range(n))
-        x_mean = statistics.mean(x)
-        y_mean = statistics.mean(values)
+        from .holt_winters import batch_forecast
         
-        numerator = sum((x[i] - x_mean) * (values[i] - y_mean) for i in range(n))
-        denominator = sum((x[i] - x_mean) ** 2 for i in range(n))
+        return batch_forecast(data, series_columns, value_column, time_column=time_column,
+                              horizon=horizon, period=period, confidence=confidence)
+    
+    def _calculate_slope(self, values: List[float]) -> float:
+        """计算斜率（最小二乘）"""
+        if len(values) < 2:
+            return 0.0
         
-        return numerator / denominator if denominator != 0 else 0.0
+        return least_squares_slope(values)
     
-    def _detect_seasonality(self, values: List[float]) -> Dict[str, Any]:
-        """检测季节性"""
-        # 简化季节性检测
-        cycle_length = 12  # 假设月度数据
-        seasonal_strength = 0.0
-        
-        if len(values) >= cycle_length * 2:
-            # 计算季节性强度
-            monthly_means = []
-            for month in range(cycle_length):
-                month_values = [values[i] for i in range(month, len(values), cycle_length)]
-                if month_values:
-                    monthly_means.append(statistics.mean(month_values))
+    def _detect_seasonality(self, values: List[float], times: Any = None) -> Dict[str, Any]:
+        """
+        检测季节性（周期图找候选周期，自相关确认强度，缺失日期先补齐）
+        
+        Args:
+            values: 按时间排序的指标值
+            times: 对应的时间值，用于补齐缺失日期
             
-            if monthly_means:
-                overall_mean = statistics.mean(monthly_means)
-                seasonal_strength = statistics.stdev(monthly_means) / overall_mean if overall_mean > 0 else 0
+        Returns:
+            季节性字典（detected/strength/cycle_length/pattern/spectral_share）
+        """
+        seasonality = detect_seasonality(values, times)
         
         return {
-            'detected': seasonal_strength > 0.1,
-            'strength': seasonal_strength,
-            'cycle_length': cycle_length,
-            'pattern': 'monthly' if seasonal_strength > 0.1 else 'none'
+            'detected': seasonality['detected'],
+            'strength': seasonality['strength'],
+            'cycle_length': seasonality['period'],
+            'pattern': seasonality['pattern'],
+            'spectral_share': seasonality['spectral_share']
         }
     
-    def _detect_change_points(self, values: List[float]) -> List[Dict[str, Any]]:
-        """检测变化点"""
-        change_points = []
-        window_size = max(3, len(values) // 10)
-        
-        for i in range(window_size, len(values) - window_size):
-            before_mean = statistics.mean(values[i-window_size:i])
-            after_mean = statistics.mean(values[i:i+window_size])
-            
-            change_magnitude = abs(after_mean - before_mean) / before_mean if before_mean > 0 else 0
+    def _detect_change_points(self, values: List[float], method: str = 'window',
+                              threshold: float = 0.2, penalty: Optional[float] = None) -> List[Dict[str, Any]]:
+        """
+        检测变化点
+        
+        Args:
+            values: 按时间排序的指标值
+            method: window 为前后窗口均值对比（累积和实现，O(n)）；pelt 为惩罚最优划分
+            threshold: window 模式下判定为变化点的相对变化幅度
+            penalty: pelt 模式下每个变化点的惩罚，默认按 BIC 估计
             
-            if change_magnitude > 0.2:  # 20%以上变化
-                change_points.append({
-                    'position': i,
-                    'change_magnitude': change_magnitude,
-                    'direction': 'increase' if after_mean > before_mean else 'decrease',
-                    'before_value': before_mean,
-                    'after_value': after_mean
-                })
+        Returns:
+            变化点列表
+        """
+        if method not in CHANGE_POINT_METHODS:
+            raise ValueError(f"不支持的变化点检测方法: {method}")
+        
+        if method == 'pelt':
+            min_size = max(3, len(values) // 20)
+            return describe_change_points(values, pelt_change_points(values, penalty, min_size=min_size))
         
-        return change_points
+        window_size = max(3, len(values) // 10)
+        scores = window_change_scores(values, window_size)
+        hits = np.flatnonzero(scores['magnitude'] > threshold)  # 默认20%以上变化
+        
+        return [
+            {
+                'position': int(scores['positions'][i]),
+                'change_magnitude': float(scores['magnitude'][i]),
+                'direction': 'increase' if scores['after'][i] > scores['before'][i] else 'decrease',
+                'before_value': float(scores['before'][i]),
+                'after_value': float(scores['after'][i])
+            }
+            for i in hits
+        ]
     
     def _simple_forecast(self, values: List[float], periods: int) -> List[Dict[str, Any]]:
         """简单预测"""
@@ -328,8 +439,25 @@ class AdvancedAnalyticsEngine:
             ]
         }
     
-    def cohort_analysis(self, data: Any, user_id_col: str, date_col: str, value_col: str) -> Dict[str, Any]:
-        """队列分析"""
+    @cached_analysis
+    def cohort_analysis(self, data: Any, user_id_col: str, date_col: str, value_col: str,
+                        freq: str = 'M', chunk_size: int = DEFAULT_CHUNK_SIZE,
+                        max_dense_cohorts: int = 120) -> Dict[str, Any]:
+        """
+        队列分析
+
+        日期转为整数月/周/日编码后向量化计算队列与期数，按数据块累积 用户 × 周期 去重表，
+        可处理数千万行订单；稀疏长表始终返回，队列数不超过 max_dense_cohorts 时另给出宽表
+
+        Args:
+            data: 订单数据，或 DataFrame 分块的可迭代对象（如 pd.read_csv(chunksize=...)）
+            user_id_col: 用户ID列
+            date_col: 日期列
+            value_col: 收入列（用于收入留存）
+            freq: 队列周期 M（月）/ W（周）/ D（日）
+            chunk_size: DataFrame 输入时的分块行数
+            max_dense_cohorts: 生成宽表的最大队列数
+        """
         cohort_results = {
             'cohort_table': {},
             'retention_rates': {},
@@ -337,36 +465,23 @@ class AdvancedAnalyticsEngine:
             'recommendations': []
         }
         
-        if PANDAS_AVAILABLE and hasattr(data, 'groupby'):
+        is_chunks = not hasattr(data, 'groupby') and hasattr(data, '__iter__') and not isinstance(data, (dict, str))
+        if PANDAS_AVAILABLE and (hasattr(data, 'groupby') or is_chunks):
             try:
-                # 创建队列表
-                data[date_col] = pd.to_datetime(data[date_col])
-                data['period'] = data[date_col].dt.to_period('M')
-                
-                # 获取用户首次活跃时间
-                user_first_period = data.groupby(user_id_col)['period'].min().reset_index()
-                user_first_period.columns = [user_id_col, 'cohort']
+                long_table = cohort_retention(data, user_id_col, date_col, value_col, freq=freq,
+                                              chunk_size=chunk_size)
+                cohort_results['cohort_long'] = long_table
+                cohort_results['cohort_count'] = int(long_table['cohort'].nunique())
                 
-                # 合并数据
-                df_cohort = data.merge(user_first_period, on=user_id_col)
-                df_cohort['period_number'] = (df_cohort['period'] - df_cohort['cohort']).apply(attrgetter('n'))
-                
-                # 计算队列大小
-                cohort_sizes = df_cohort.groupby('cohort')[user_id_col].nunique()
-                
-                # 计算留存
-                cohort_table = df_cohort.groupby(['cohort', 'period_number'])[user_id_col].nunique().reset_index()
-                cohort_table = cohort_table.pivot(index='cohort', columns='period_number', values=user_id_col)
-                
-                # 计算留存率
-                cohort_sizes_df = cohort_sizes.to_frame(name='cohort_size')
-                retention_table = cohort_table.divide(cohort_sizes_df['cohort_size'], axis=0)
-                
-                cohort_results['cohort_table'] = cohort_table.to_dict()
-                cohort_results['retention_rates'] = retention_table.to_dict()
+                # 队列数较少时给出 队列 × 期数 宽表
+                if cohort_results['cohort_count'] <= max_dense_cohorts:
+                    cohort_results['cohort_table'] = dense_table(long_table, 'users').to_dict()
+                    cohort_results['retention_rates'] = dense_table(long_table, 'retention_rate').to_dict()
+                    if value_col is not None:
+                        cohort_results['revenue_retention'] = dense_table(long_table, 'revenue_retention').to_dict()
                 
                 # 生成洞察
-                self._generate_cohort_insights(cohort_results, retention_table)
+                self._generate_cohort_insights(cohort_results, long_table)
                 
             except Exception as e:
                 cohort_results['cohort_insights'].append(f"队列分析出错: {str(e)}")
@@ -404,26 +519,35 @@ class AdvancedAnalyticsEngine:
             ]
         }
     
-    def _generate_cohort_insights(self, cohort_results: Dict[str, Any], retention_table: Any):
-        """生成队列洞察"""
+    def _generate_cohort_insights(self, cohort_results: Dict[str, Any], long_table: Any):
+        """生成队列洞察（基于队列长表）"""
         insights = []
         
         try:
-            # 第一月留存率
-            first_month_retention = retention_table.iloc[:, 1].mean() if retention_table.shape[1] > 1 else 0
+            first_period = long_table[long_table['period_number'] == 1].set_index('cohort')['retention_rate']
+            
+            # 第一期留存率
+            first_month_retention = first_period.mean() if len(first_period) else 0
             insights.append(f"平均首月留存率: {first_month_retention:.1%}")
             
             # 留存趋势
-            if retention_table.shape[1] > 3:
-                latest_cohort = retention_table.iloc[-1, :]
-                retention_trend = "上升" if latest_cohort.iloc[1] > latest_cohort.iloc[2] else "下降"
+            if long_table['period_number'].max() > 2:
+                latest = long_table[long_table['cohort_code'] == long_table['cohort_code'].max()]
+                rates = latest.set_index('period_number')['retention_rate']
+                retention_trend = "上升" if rates.get(1, np.nan) > rates.get(2, np.nan) else "下降"
                 insights.append(f"最新队列留存趋势: {retention_trend}")
             
             # 最佳队列
-            if retention_table.shape[0] > 1:
-                best_cohort = retention_table.iloc[:, 1].idxmax()
+            if cohort_results.get('cohort_count', 0) > 1 and len(first_period):
+                best_cohort = first_period.idxmax()
                 insights.append(f"表现最佳队列: {best_cohort}")
             
+            # 收入留存
+            if 'revenue_retention' in long_table:
+                revenue_first = long_table.loc[long_table['period_number'] == 1, 'revenue_retention'].mean()
+                if pd.notna(revenue_first):
+                    insights.append(f"平均首月收入留存率: {revenue_first:.1%}")
+            
         except Exception as e:
             insights.append(f"洞察生成出错: {str(e)}")
         
@@ -436,8 +560,17 @@ class AdvancedAnalyticsEngine:
             "针对性改进低留存期的用户体验"
         ]
     
-    def anomaly_detection(self, data: Any, metric: str, method: str = 'statistical') -> Dict[str, Any]:
-        """异常检测"""
+    @cached_analysis
+    def anomaly_detection(self, data: Any, metric: str, method: str = 'statistical',
+                          group_column: Optional[str] = None, time_column: Optional[str] = None,
+                          threshold: Optional[float] = None, window: int = 14,
+                          alpha: float = 0.1) -> Dict[str, Any]:
+        """
+        异常检测
+
+        支持 statistical(3σ) / iqr / rolling_mad(滚动中位数-MAD) / ewma(EWMA控制限)，
+        指定 group_column 时按门店、品类等序列分别计算基准；增量场景使用 OnlineAnomalyDetector
+        """
         anomaly_results = {
             'anomalies_detected': [],
             'anomaly_score': 0.0,
@@ -447,49 +580,58 @@ class AdvancedAnalyticsEngine:
         }
         
         if PANDAS_AVAILABLE and hasattr(data, metric):
-            values = data[metric].values
+            values = data[metric].to_numpy(dtype=float)
+            multiplier = DEFAULT_THRESHOLDS.get(method, 0.0) if threshold is None else threshold
+            groups = data[group_column].to_numpy() if group_column else None
+            order_keys = data[time_column].to_numpy() if time_column else None
             
-            if method == 'statistical':
-                # 统计方法：使用3σ准则
-                mean_val = np.mean(values)
-                std_val = np.std(values)
-                threshold = 3 * std_val
-                
-                anomalies = []
-                for i, value in enumerate(values):
-                    if abs(value - mean_val) > threshold:
-                        anomalies.append({
-                            'index': i,
-                            'value': value,
-                            'deviation': abs(value - mean_val),
-                            'type': 'high' if value > mean_val else 'low'
-                        })
-                
-                anomaly_results['anomalies_detected'] = anomalies
-                anomaly_results['threshold_used'] = threshold
-                anomaly_results['anomaly_score'] = len(anomalies) / len(values)
-                
-            elif method == 'iqr':
-                # IQR方法
-                q1 = np.percentile(values, 25)
-                q3 = np.percentile(values, 75)
-                iqr = q3 - q1
-                lower_bound = q1 - 1.5 * iqr
-                upper_bound = q3 + 1.5 * iqr
-                
-                anomalies = []
-                for i, value in enumerate(values):
-                    if value < lower_bound or value > upper_bound:
-                        anomalies.append({
-                            'index': i,
-                            'value': value,
-                            'bound_exceeded': 'lower' if value < lower_bound else 'upper',
-                            'type': 'low' if value < lower_bound else 'high'
-                        })
-                
-                anomaly_results['anomalies_detected'] = anomalies
-                anomaly_results['threshold_used'] = f"IQR: [{lower_bound:.2f}, {upper_bound:.2f}]"
-                anomaly_results['anomaly_score'] = len(anomalies) / len(values)
+            detection = detect_anomalies(
+                values, groups=groups, order_keys=order_keys, method=method,
+                threshold=threshold, window=window, alpha=alpha
+            )
+            mask = detection['mask']
+            flagged = np.flatnonzero(mask)
+            flagged_values = values[flagged]
+            center = detection['center'][flagged]
+            lower = detection['lower'][flagged]
+            upper = detection['upper'][flagged]
+            is_high = flagged_values > upper
+            
+            records = {
+                'index': flagged.tolist(),
+                'value': flagged_values.tolist(),
+                'type': np.where(is_high, 'high', 'low').tolist()
+            }
+            if method == 'iqr':
+                records['bound_exceeded'] = np.where(is_high, 'upper', 'lower').tolist()
+            else:
+                records['deviation'] = np.abs(flagged_values - center).tolist()
+            if method in ('rolling_mad', 'ewma'):
+                records['expected'] = center.tolist()
+                records['score'] = detection['score'][flagged].tolist()
+            if group_column:
+                records['group'] = detection['uniques'][detection['codes'][flagged]].tolist()
+            
+            keys = list(records.keys())
+            anomaly_results['anomalies_detected'] = [
+                dict(zip(keys, row)) for row in zip(*records.values())
+            ]
+            anomaly_results['anomaly_score'] = len(flagged) / len(values) if len(values) else 0.0
+            
+            if group_column:
+                counts = np.bincount(detection['codes'][flagged], minlength=len(detection['uniques']))
+                anomaly_results['anomalies_by_group'] = {
+                    group: int(count) for group, count in zip(detection['uniques'], counts) if count > 0
+                }
+                anomaly_results['threshold_used'] = multiplier
+            elif method == 'statistical':
+                anomaly_results['threshold_used'] = multiplier * np.std(values)
+            elif method == 'iqr' and len(values):
+                anomaly_results['threshold_used'] = (
+                    f"IQR: [{detection['lower'][0]:.2f}, {detection['upper'][0]:.2f}]"
+                )
+            else:
+                anomaly_results['threshold_used'] = multiplier
         
         else:
             # 简化异常检测
@@ -544,8 +686,24 @@ class AdvancedAnalyticsEngine:
         
         anomaly_results['insights'] = insights
     
-    def advanced_segmentation(self, data: Any, features: List[str], n_segments: int = 4) -> Dict[str, Any]:
-        """高级用户分群"""
+    @cached_analysis
+    def advanced_segmentation(self, data: Any, features: List[str], n_segments: int = 4,
+                              mode: str = 'auto', strata_column: Optional[str] = None,
+                              sample_size: int = DEFAULT_SAMPLE_SIZE) -> Dict[str, Any]:
+        """
+        高级用户分群
+
+        小数据在全量标准化特征上训练 KMeans；超过 SCALABLE_ROW_THRESHOLD 行时自动改为
+        分层样本训练（给出 strata_column 时）或 MiniBatchKMeans 增量训练，再按块为全量数据分配标签
+
+        Args:
+            data: 数据
+            features: 分群特征
+            n_segments: 分群数
+            mode: auto / full / sample / minibatch
+            strata_column: 分层抽样列（如 region）
+            sample_size: 分层样本量
+        """
         segmentation_results = {
             'segments': {},
             'segment_profiles': {},
@@ -555,47 +713,17 @@ class AdvancedAnalyticsEngine:
         
         if SKLEARN_AVAILABLE and PANDAS_AVAILABLE and hasattr(data, 'shape'):
             try:
-                from sklearn.cluster import KMeans
-                
                 # 准备数据
                 feature_data = data[features].select_dtypes(include=[np.number])
+                strata = data[strata_column] if strata_column else None
                 
-                # 标准化
-                scaler = StandardScaler()
-                scaled_data = scaler.fit_transform(feature_data.fillna(0))
-                
-                # K-means聚类
-                kmeans = KMeans(n_clusters=n_segments, random_state=42)
-                clusters = kmeans.fit_predict(scaled_data)
-                
-                # 分析分群
-                data_with_clusters = data.copy()
-                data_with_clusters['segment'] = clusters
+                # 标准化 + 聚类
+                segmenter = ScalableSegmenter(n_segments=n_segments, mode=mode, sample_size=sample_size)
+                clusters = segmenter.fit_predict(feature_data, strata=strata)
+                segmentation_results['segmentation_mode'] = segmenter.fitted_mode
                 
-                for segment_id in range(n_segments):
-                    segment_data = data_with_clusters[data_with_clusters['segment'] == segment_id]
-                    
-                    # 计算分群特征
-                    segment_profile = {}
-                    for feature in features:
-                        if feature in segment_data.columns:
-                            if segment_data[feature].dtype in ['int64', 'float64']:
-                                segment_profile[feature] = {
-                                    'mean': segment_data[feature].mean(),
-                                    'median': segment_data[feature].median(),
-                                    'std': segment_data[feature].std()
-                                }
-                            else:
-                                segment_profile[feature] = {
-                                    'mode': segment_data[feature].mode().iloc[0] if not segment_data[feature].mode().empty else 'Unknown',
-                                    'unique_count': segment_data[feature].nunique()
-                                }
-                    
-                    segmentation_results['segments'][f'segment_{segment_id}'] = {
-                        'size': len(segment_data),
-                        'percentage': len(segment_data) / len(data) * 100
-                    }
-                    segmentation_results['segment_profiles'][f'segment_{segment_id}'] = segment_profile
+                # 分组聚合计算分群规模与画像
+                segmentation_results.update(segment_profiles(data, clusters, features, n_segments))
                 
                 # 生成洞察
                 self._generate_segmentation_insights(segmentation_results)
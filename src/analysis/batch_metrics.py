@@ -0,0 +1,334 @@
+#!/usr/bin/env python3
+"""
+门店级批量指标分析
+一次分组计算得到所有门店的 MetricsAnalyzer.analyze() 等价结果
+"""
+
+import os
+from typing import Dict, List, Any
+from dataclasses import dataclass, field
+from concurrent.futures import ProcessPoolExecutor
+
+# 条件导入
+try:
+    import pandas as pd
+    import numpy as np
+    PANDAS_AVAILABLE = True
+except ImportError:
+    PANDAS_AVAILABLE = False
+
+from .metrics_analyzer import (
+    MetricsAnalyzer, GMVMetrics, CategoryMetrics, RegionMetrics, SimpleDataProcessor, grouped_gini
+)
+from .gmv_decomposition import (
+    lmdi_decompose, contribution_shares, funnel_columns, funnel_factors, DRIVER_FACTORS, RESIDUAL
+)
+
+# 门店×维度表的指标：前两个按和汇总，其余按均值汇总（与 MetricsAnalyzer 的品类/区域指标一致）
+SUM_METRICS = ['gmv', 'dau']
+MEAN_METRICS = ['frequency', 'order_price', 'conversion_rate']
+DRIVER_METRICS = ['dau', 'frequency', 'order_price', 'conversion_rate']
+
+
+@dataclass
+class BatchAnalysisResult:
+    """批量分析结果（列式存储，每张表一行对应一个门店或门店×维度）"""
+    group_column: str
+    gmv_metrics: Any
+    category_metrics: Any
+    region_metrics: Any
+    top_declining_categories: Any
+    top_declining_regions: Any
+    improvement_triggers: Any
+    extra_tables: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def groups(self) -> List[Any]:
+        """结果中包含的门店列表"""
+        if PANDAS_AVAILABLE and hasattr(self.gmv_metrics, 'index'):
+            return self.gmv_metrics.index.tolist()
+        return list(self.gmv_metrics.keys())
+
+    def get_group_analysis(self, group: Any) -> Dict[str, Any]:
+        """
+        还原单个门店的分析结果，结构与 MetricsAnalyzer.analyze() 相同
+
+        Args:
+            group: 门店ID
+
+        Returns:
+            单门店分析结果字典
+        """
+        if not (PANDAS_AVAILABLE and hasattr(self.gmv_metrics, 'loc')):
+            return self.gmv_metrics[group]
+
+        row = self.gmv_metrics.loc[group]
+        gmv_metrics = {
+            metric: GMVMetrics(
+                current=row[f'{metric}_current'],
+                previous=row[f'{metric}_previous'],
+                change_rate=row[f'{metric}_change_rate'],
+                contribution=row[f'{metric}_contribution']
+            )
+            for metric in ['gmv'] + DRIVER_METRICS
+        }
+
+        gc = self.group_column
+        category_rows = self.category_metrics[self.category_metrics[gc] == group]
+        region_rows = self.region_metrics[self.region_metrics[gc] == group]
+        category_metrics = [
+            CategoryMetrics(**{k: r[k] for k in CategoryMetrics.__dataclass_fields__})
+            for r in category_rows.rename(columns={'category': 'name'}).to_dict('records')
+        ]
+        region_metrics = [
+            RegionMetrics(**{k: r[k] for k in RegionMetrics.__dataclass_fields__})
+            for r in region_rows.rename(columns={'region': 'name'}).to_dict('records')
+        ]
+
+        def _top_list(table: Any) -> List[Dict]:
+            rows = table[table[gc] == group]
+            return [
+                {'name': name, 'decline_rate': f"{rate:.2f}"}
+                for name, rate in zip(rows['name'], rows['decline_rate'])
+            ]
+
+        result = {
+            'gmv_metrics': gmv_metrics,
+            'category_metrics': category_metrics,
+            'region_metrics': region_metrics,
+            'top_declining_categories': _top_list(self.top_declining_categories),
+            'top_declining_regions': _top_list(self.top_declining_regions),
+            'improvement_suggestions': MetricsAnalyzer.generate_improvement_suggestions(gmv_metrics)
+        }
+        for name, table in self.extra_tables.items():
+            if hasattr(table, 'loc') and group in table.index:
+                result[name] = table.loc[group].to_dict()
+        return result
+
+
+def _safe_rate(numerator: Any, denominator: Any) -> Any:
+    """向量化安全除法，返回百分比，分母为0时取0"""
+    numerator = np.asarray(numerator, dtype=float)
+    denominator = np.asarray(denominator, dtype=float)
+    out = np.zeros(np.broadcast(numerator, denominator).shape)
+    np.divide(numerator, denominator, out=out, where=denominator != 0)
+    return out * 100
+
+
+def _aggregate_period(data: Any, keys: List[str]) -> Any:
+    """对单期数据按 keys 一次性分组聚合全部驱动指标"""
+    spec = {metric: 'sum' for metric in SUM_METRICS}
+    spec.update({metric: 'mean' for metric in MEAN_METRICS})
+    spec = {col: how for col, how in spec.items() if col in data.columns}
+    return data.groupby(keys, sort=False, observed=True).agg(spec)
+
+
+class BatchMetricsAnalyzer:
+    """批量指标分析器（按门店等维度一次性分组计算）"""
+
+    def __init__(self, current_data: Any, previous_data: Any,
+                 group_column: str = 'store_id', top_n: int = 3, n_jobs: int = 1):
+        """
+        初始化批量分析器
+
+        Args:
+            current_data: 当前期数据（需包含 group_column 列）
+            previous_data: 上期数据
+            group_column: 分组列名，默认按门店
+            top_n: 每个门店返回的下降品类/区域数量
+            n_jobs: 进程分片数，1 表示在当前进程内计算，-1 表示使用全部CPU
+        """
+        self.current_data = current_data
+        self.previous_data = previous_data
+        self.group_column = group_column
+        self.top_n = top_n
+        self.n_jobs = (os.cpu_count() or 1) if n_jobs == -1 else max(1, n_jobs)
+
+    def analyze(self) -> BatchAnalysisResult:
+        """
+        执行批量分析（支持简化模式）
+
+        Returns:
+            BatchAnalysisResult 列式结果
+        """
+        if not (PANDAS_AVAILABLE and hasattr(self.current_data, 'groupby')):
+            return self._simple_analyze()
+
+        if self.n_jobs > 1:
+            return self._sharded_analyze()
+
+        return self._analyze_frames(self.current_data, self.previous_data)
+
+    def _analyze_frames(self, current: Any, previous: Any) -> BatchAnalysisResult:
+        """在一对数据帧上完成全部分组计算"""
+        gc = self.group_column
+        gmv_table = self._gmv_table(current, previous)
+
+        category_table = self._dimension_table(current, previous, 'category')
+        region_table = self._dimension_table(current, previous, 'region')
+
+        triggers = pd.DataFrame({
+            'order_price_declined': gmv_table['order_price_change_rate'] < 0,
+            'conversion_rate_declined': gmv_table['conversion_rate_change_rate'] < 0
+        }, index=gmv_table.index)
+
+        return BatchAnalysisResult(
+            group_column=gc,
+            gmv_metrics=gmv_table,
+            category_metrics=category_table,
+            region_metrics=region_table,
+            top_declining_categories=self._top_declining(category_table, 'category'),
+            top_declining_regions=self._top_declining(region_table, 'region'),
+            improvement_triggers=triggers,
+            extra_tables={'gini': self._gini_table(current, gmv_table.index)}
+        )
+
+    def _gini_table(self, current: Any, index: Any) -> Any:
+        """每个门店内品类间、区域间笔单价的基尼系数"""
+        gc = self.group_column
+        table = pd.DataFrame(index=index)
+        for dimension in ['category', 'region']:
+            prices = current.groupby([gc, dimension], observed=True)['order_price'].mean().reset_index()
+            gini = grouped_gini(prices['order_price'].to_numpy(), prices[gc].to_numpy())
+            table[f'{dimension}_gini'] = gini.reindex(index, fill_value=0.0)
+        return table
+
+    def _gmv_table(self, current: Any, previous: Any) -> Any:
+        """计算每个门店的GMV驱动指标表"""
+        gc = self.group_column
+        cur = funnel_columns(current, DRIVER_FACTORS).groupby(current[gc], sort=False, observed=True).sum()
+        prev = funnel_columns(previous, DRIVER_FACTORS).groupby(previous[gc], sort=False, observed=True).sum()
+        cur, prev = cur.align(prev, join='outer', fill_value=0)
+        # 口径与 MetricsAnalyzer.calculate_gmv_metrics 保持一致：由漏斗量的门店合计推出驱动因子
+        current_values, current_factors = funnel_factors(cur, DRIVER_FACTORS)
+        previous_values, previous_factors = funnel_factors(prev, DRIVER_FACTORS)
+        current_values['gmv'] = cur['gmv'].to_numpy(dtype=float)
+        previous_values['gmv'] = prev['gmv'].to_numpy(dtype=float)
+
+        table = pd.DataFrame(index=cur.index)
+        for metric in ['gmv'] + DRIVER_METRICS:
+            table[f'{metric}_current'] = current_values[metric]
+            table[f'{metric}_previous'] = previous_values[metric]
+            table[f'{metric}_change_rate'] = _safe_rate(
+                table[f'{metric}_current'] - table[f'{metric}_previous'],
+                table[f'{metric}_previous']
+            )
+
+        # 所有门店一次性做LMDI分解
+        gmv_change = table['gmv_current'].to_numpy() - table['gmv_previous'].to_numpy()
+        effects = lmdi_decompose(
+            table['gmv_current'].to_numpy(), table['gmv_previous'].to_numpy(),
+            current_factors, previous_factors
+        )
+        shares = contribution_shares(effects, gmv_change)
+        table['gmv_contribution'] = 100.0
+        for metric in DRIVER_METRICS:
+            table[f'{metric}_contribution'] = shares[metric]
+        for name in DRIVER_METRICS + [RESIDUAL]:
+            table[f'{name}_effect'] = effects[name]
+        return table
+
+    def _dimension_table(self, current: Any, previous: Any, dimension: str) -> Any:
+        """计算门店×维度（品类/区域）的指标表，仅保留两期都存在的组合"""
+        gc = self.group_column
+        keys = [gc, dimension]
+        cur = _aggregate_period(current, keys)
+        prev = _aggregate_period(previous, keys)
+        joined = cur.join(prev, how='inner', lsuffix='_cur', rsuffix='_prev').reset_index()
+
+        current_price = joined['order_price_cur'].to_numpy(dtype=float)
+        previous_price = joined['order_price_prev'].to_numpy(dtype=float)
+        change_value = current_price - previous_price
+
+        table = pd.DataFrame({
+            gc: joined[gc],
+            dimension: joined[dimension],
+            'current_price': current_price,
+            'previous_price': previous_price,
+            'change_rate': _safe_rate(change_value, previous_price)
+        })
+
+        if dimension == 'category':
+            store_cur_gmv = current.groupby(gc, observed=True)['gmv'].sum()
+            store_prev_gmv = previous.groupby(gc, observed=True)['gmv'].sum()
+            current_share = _safe_rate(joined['gmv_cur'], joined[gc].map(store_cur_gmv))
+            previous_share = _safe_rate(joined['gmv_prev'], joined[gc].map(store_prev_gmv))
+            table['current_share'] = current_share
+            table['previous_share'] = previous_share
+            table['structure_change'] = _safe_rate(current_share - previous_share, previous_share)
+            table['contribution'] = table['change_rate'] * current_share / 100
+        else:
+            table['change_value'] = change_value
+            table['current_rate'] = joined['conversion_rate_cur'].to_numpy(dtype=float)
+            table['previous_rate'] = joined['conversion_rate_prev'].to_numpy(dtype=float)
+        return table
+
+    def _top_declining(self, table: Any, dimension: str) -> Any:
+        """每个门店下降最显著的前 top_n 个维度值"""
+        gc = self.group_column
+        declining = table.loc[table['change_rate'] < 0, [gc, dimension, 'change_rate']]
+        declining = declining.sort_values([gc, 'change_rate'], kind='stable')
+        top = declining.groupby(gc, sort=False, observed=True).head(self.top_n).copy()
+        top['rank'] = top.groupby(gc, sort=False, observed=True).cumcount() + 1
+        return top.rename(columns={dimension: 'name', 'change_rate': 'decline_rate'}).reset_index(drop=True)
+
+    def _sharded_analyze(self) -> BatchAnalysisResult:
+        """按门店哈希分片，在多个进程中并行计算后合并"""
+        gc = self.group_column
+        all_groups = pd.Index(self.current_data[gc].unique()).union(self.previous_data[gc].unique())
+        shard_of = pd.Series(np.arange(len(all_groups)) % self.n_jobs, index=all_groups)
+        cur_shard = self.current_data[gc].map(shard_of).to_numpy()
+        prev_shard = self.previous_data[gc].map(shard_of).to_numpy()
+
+        shards = [
+            (self.current_data[cur_shard == i], self.previous_data[prev_shard == i])
+            for i in range(self.n_jobs)
+        ]
+        config = {'group_column': gc, 'top_n': self.top_n}
+
+        with ProcessPoolExecutor(max_workers=self.n_jobs) as executor:
+            parts = list(executor.map(_analyze_shard, shards, [config] * len(shards)))
+
+        return BatchAnalysisResult(
+            group_column=gc,
+            gmv_metrics=pd.concat([p.gmv_metrics for p in parts]),
+            category_metrics=pd.concat([p.category_metrics for p in parts], ignore_index=True),
+            region_metrics=pd.concat([p.region_metrics for p in parts], ignore_index=True),
+            top_declining_categories=pd.concat([p.top_declining_categories for p in parts], ignore_index=True),
+            top_declining_regions=pd.concat([p.top_declining_regions for p in parts], ignore_index=True),
+            improvement_triggers=pd.concat([p.improvement_triggers for p in parts]),
+            extra_tables={
+                name: pd.concat([p.extra_tables[name] for p in parts]) for name in parts[0].extra_tables
+            }
+        )
+
+    def _simple_analyze(self) -> BatchAnalysisResult:
+        """简化模式：逐门店调用 MetricsAnalyzer"""
+        processor = SimpleDataProcessor()
+        current_groups = processor.group_by(processor.to_dict_list(self.current_data), self.group_column)
+        previous_groups = processor.group_by(processor.to_dict_list(self.previous_data), self.group_column)
+
+        results = {}
+        for group, rows in current_groups.items():
+            analyzer = MetricsAnalyzer(rows, previous_groups.get(group, []))
+            results[group] = analyzer.analyze()
+
+        return BatchAnalysisResult(
+            group_column=self.group_column,
+            gmv_metrics=results,
+            category_metrics=None,
+            region_metrics=None,
+            top_declining_categories=None,
+            top_declining_regions=None,
+            improvement_triggers={
+                group: result['improvement_suggestions'] for group, result in results.items()
+            }
+        )
+
+
+def _analyze_shard(frames: Any, config: Dict[str, Any]) -> BatchAnalysisResult:
+    """进程池工作函数：分析一个门店分片"""
+    current, previous = frames
+    analyzer = BatchMetricsAnalyzer(current, previous, group_column=config['group_column'],
+                                    top_n=config['top_n'])
+    return analyzer._analyze_frames(current, previous)
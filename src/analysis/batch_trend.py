@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+多序列批量趋势分析
+对 门店 × 指标 等成千上万条序列一次性计算趋势方向、斜率、变化点、季节性与短期预测，
+结果与逐条调用 AdvancedAnalyticsEngine.trend_analysis 一致，以列式表返回
+"""
+
+import os
+from typing import Dict, List, Any, Union
+from concurrent.futures import ProcessPoolExecutor
+
+# 条件导入
+try:
+    import pandas as pd
+    import numpy as np
+    PANDAS_AVAILABLE = True
+except ImportError:
+    PANDAS_AVAILABLE = False
+
+from .trend_kernels import (
+    least_squares_slope, window_change_scores, pelt_change_points, describe_change_points,
+    CHANGE_POINT_METHODS
+)
+from .seasonality import seasonality_batch, infer_step, time_steps, regularize_rows, pattern_name
+
+# 与 AdvancedAnalyticsEngine.trend_analysis 保持一致的判定口径
+SLOPE_THRESHOLD = 0.05
+CHANGE_THRESHOLD = 0.2
+SEASONAL_MIN_POINTS = 12
+
+
+class BatchTrendAnalyzer:
+    """批量趋势分析器（按序列长度分桶，在二维矩阵上向量化计算）"""
+
+    def __init__(self, series_columns: Union[str, List[str]], metrics: Union[str, List[str]],
+                 time_column: str = 'date', forecast_periods: int = 3,
+                 change_point_method: str = 'window', n_jobs: int = 1):
+        """
+        初始化批量趋势分析器
+
+        Args:
+            series_columns: 序列键列（如 store_id），可为多列
+            metrics: 需要分析的指标列，每个 序列键 × 指标 构成一条序列
+            time_column: 时间列
+            forecast_periods: 预测期数
+            change_point_method: window 或 pelt
+            n_jobs: 进程分片数，1 表示在当前进程内计算，-1 表示使用全部CPU
+        """
+        if change_point_method not in CHANGE_POINT_METHODS:
+            raise ValueError(f"不支持的变化点检测方法: {change_point_method}")
+        self.series_columns = [series_columns] if isinstance(series_columns, str) else list(series_columns)
+        self.metrics = [metrics] if isinstance(metrics, str) else list(metrics)
+        self.time_column = time_column
+        self.forecast_periods = forecast_periods
+        self.change_point_method = change_point_method
+        self.n_jobs = (os.cpu_count() or 1) if n_jobs == -1 else max(1, n_jobs)
+
+    def analyze(self, data: Any) -> Any:
+        """
+        执行批量趋势分析
+
+        Args:
+            data: 长表数据，包含序列键列、时间列与指标列
+
+        Returns:
+            DataFrame，每行一条序列（序列键 + metric），包含 n_points、slope、trend_direction、
+            trend_strength、change_point_count、last_change_*、seasonal_*、forecast_1..k
+        """
+        if self.n_jobs > 1:
+            return self._sharded_analyze(data)
+        return self._analyze_frame(data)
+
+    def _analyze_frame(self, data: Any) -> Any:
+        """在单个数据帧上完成全部指标的批量计算"""
+        keys = self.series_columns
+        ordered = data.sort_values(keys + [self.time_column], kind='stable')
+        tables = []
+        for metric in self.metrics:
+            subset = ordered.loc[ordered[metric].notna(), keys + [self.time_column, metric]]
+            table = self._analyze_metric(subset, metric)
+            table.insert(len(keys), 'metric', metric)
+            tables.append(table)
+        result = pd.concat(tables, ignore_index=True)
+        return result.sort_values(keys + ['metric'], kind='stable').reset_index(drop=True)
+
+    def _analyze_metric(self, subset: Any, metric: str) -> Any:
+        """单个指标：按序列长度分桶后在 (序列数, 长度) 矩阵上计算"""
+        keys = self.series_columns
+        values = subset[metric].to_numpy(dtype=float)
+        series_codes = subset.groupby(keys, sort=False, observed=True).ngroup().to_numpy()
+        boundaries = np.flatnonzero(np.r_[True, series_codes[1:] != series_codes[:-1]])
+        lengths = np.diff(np.r_[boundaries, len(values)])
+
+        parts = []
+        for length in np.unique(lengths):
+            members = np.flatnonzero(lengths == length)
+            starts = boundaries[members]
+            matrix = values[starts[:, None] + np.arange(length)]
+            part = self._analyze_matrix(matrix)
+            part.index = members
+            parts.append(part)
+
+        table = pd.concat(parts).sort_index()
+        for column, column_values in self._seasonality(subset, values, boundaries, lengths).items():
+            table[column] = column_values
+        key_frame = subset.iloc[boundaries][keys].reset_index(drop=True)
+        return pd.concat([key_frame, table.reset_index(drop=True)], axis=1)
+
+    def _seasonality(self, subset: Any, values: Any, boundaries: Any, lengths: Any) -> Dict[str, Any]:
+        """
+        按补齐缺失日期后的跨度分桶，批量做周期图季节性检测（与 _detect_seasonality 口径一致）
+        """
+        n_series = len(boundaries)
+        series_of = np.repeat(np.arange(n_series), lengths)
+        times = subset[self.time_column]
+        if not (pd.api.types.is_datetime64_any_dtype(times) or pd.api.types.is_numeric_dtype(times)):
+            times = pd.to_datetime(times)
+        step, freq = infer_step(times)
+        steps = time_steps(times, times.iloc[boundaries].to_numpy()[series_of], step)
+        spans = steps[boundaries + lengths - 1] + 1
+
+        period = np.zeros(n_series, dtype=np.int64)
+        strength = np.zeros(n_series)
+        detected = np.zeros(n_series, dtype=bool)
+        eligible = lengths >= SEASONAL_MIN_POINTS
+        for span in np.unique(spans[eligible]):
+            members = np.flatnonzero(eligible & (spans == span))
+            rows = np.full(n_series, -1, dtype=np.int64)
+            rows[members] = np.arange(len(members))
+            points = rows[series_of] >= 0
+            matrix = regularize_rows(values[points], rows[series_of][points], steps[points],
+                                     len(members), int(span))
+            result = seasonality_batch(matrix)
+            period[members] = result['period']
+            strength[members] = result['strength']
+            detected[members] = result['detected']
+
+        names = {p: pattern_name(p, freq) for p in np.unique(period)}
+        return {
+            'seasonal_detected': detected,
+            'seasonal_strength': strength,
+            'seasonal_cycle_length': period,
+            'seasonal_pattern': [names[p] for p in period]
+        }
+
+    def _analyze_matrix(self, matrix: Any) -> Any:
+        """同长度序列矩阵（每行一条序列）的全部趋势指标"""
+        n_series, length = matrix.shape
+        table = pd.DataFrame({'n_points': np.full(n_series, length)})
+
+        slope = least_squares_slope(matrix) if length > 1 else np.zeros(n_series)
+        table['slope'] = slope
+        table['trend_strength'] = np.abs(slope)
+        table['trend_direction'] = np.select(
+            [slope > SLOPE_THRESHOLD, slope < -SLOPE_THRESHOLD], ['increasing', 'decreasing'], 'stable'
+        )
+
+        for column, values in self._change_points(matrix).items():
+            table[column] = values
+        for column, values in self._forecast(matrix).items():
+            table[column] = values
+        return table
+
+    def _change_points(self, matrix: Any) -> Dict[str, Any]:
+        """变化点数量与最近一个变化点"""
+        n_series, length = matrix.shape
+        count = np.zeros(n_series, dtype=np.int64)
+        position = np.full(n_series, -1, dtype=np.int64)
+        magnitude = np.zeros(n_series)
+        increase = np.zeros(n_series, dtype=bool)
+
+        if self.change_point_method == 'window':
+            scores = window_change_scores(matrix, max(3, length // 10))
+            hits = scores['magnitude'] > CHANGE_THRESHOLD
+            if hits.shape[1]:
+                count = hits.sum(axis=1)
+                last = hits.shape[1] - 1 - np.argmax(hits[:, ::-1], axis=1)
+                rows = np.arange(n_series)
+                found = count > 0
+                position = np.where(found, scores['positions'][last], -1)
+                magnitude = np.where(found, scores['magnitude'][rows, last], 0.0)
+                increase = found & (scores['after'][rows, last] > scores['before'][rows, last])
+        else:
+            min_size = max(3, length // 20)
+            for i, row in enumerate(matrix):
+                points = describe_change_points(row, pelt_change_points(row, min_size=min_size))
+                count[i] = len(points)
+                if points:
+                    position[i] = points[-1]['position']
+                    magnitude[i] = points[-1]['change_magnitude']
+                    increase[i] = points[-1]['direction'] == 'increase'
+
+        direction = pd.Series(np.where(increase, 'increase', 'decrease')).where(count > 0)
+        return {
+            'change_point_count': count,
+            'last_change_position': position,
+            'last_change_direction': direction.to_numpy(),
+            'last_change_magnitude': magnitude
+        }
+
+    def _forecast(self, matrix: Any) -> Dict[str, Any]:
+        """末期值加近三期平均变化的线性外推（与 _simple_forecast 口径一致）"""
+        n_series, length = matrix.shape
+        forecast = {}
+        if length < 3:
+            for period in range(1, self.forecast_periods + 1):
+                forecast[f'forecast_{period}'] = np.full(n_series, np.nan)
+            return forecast
+
+        trend = (matrix[:, -1] - matrix[:, -3]) / 2
+        for period in range(1, self.forecast_periods + 1):
+            forecast[f'forecast_{period}'] = matrix[:, -1] + period * trend
+        return forecast
+
+    def _sharded_analyze(self, data: Any) -> Any:
+        """按序列键哈希分片，在多个进程中并行计算后合并"""
+        keys = self.series_columns
+        codes = data.groupby(keys, sort=False, observed=True).ngroup().to_numpy()
+        shards = [data[codes % self.n_jobs == i] for i in range(self.n_jobs)]
+        config = {
+            'series_columns': keys,
+            'metrics': self.metrics,
+            'time_column': self.time_column,
+            'forecast_periods': self.forecast_periods,
+            'change_point_method': self.change_point_method
+        }
+
+        with ProcessPoolExecutor(max_workers=self.n_jobs) as executor:
+            parts = list(executor.map(_analyze_shard, shards, [config] * len(shards)))
+
+        result = pd.concat([p for p in parts if len(p)], ignore_index=True)
+        return result.sort_values(keys + ['metric'], kind='stable').reset_index(drop=True)
+
+
+def _analyze_shard(data: Any, config: Dict[str, Any]) -> Any:
+    """进程池工作函数：分析一个序列分片"""
+    if len(data) == 0:
+        return pd.DataFrame()
+    return BatchTrendAnalyzer(**config)._analyze_frame(data)
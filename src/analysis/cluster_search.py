@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+最优聚类数搜索
+在多个进程中并行评估各个 k，轮廓系数在固定大小的样本上计算（避免 O(n²)），
+得分明显下降后提前停止
+"""
+
+import os
+from typing import Dict, Any
+from concurrent.futures import ProcessPoolExecutor
+
+# 条件导入
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+try:
+    from sklearn.cluster import KMeans
+    from sklearn.metrics import silhouette_score
+    from threadpoolctl import threadpool_limits
+    SKLEARN_AVAILABLE = True
+except ImportError:
+    SKLEARN_AVAILABLE = False
+
+DEFAULT_MIN_K = 2
+DEFAULT_MAX_K = 10
+DEFAULT_SAMPLE_SIZE = 5000
+# 得分低于当前最优该幅度即视为下降，连续下降 patience 个 k 后停止
+SCORE_TOLERANCE = 0.05
+DEFAULT_PATIENCE = 2
+# 行数低于该值时在当前进程内计算（进程启动开销大于收益）
+PARALLEL_MIN_ROWS = 20000
+
+# 工作进程内共享的数据（由进程池 initializer 设置，每个进程只传输一次）
+_worker_data = None
+_worker_sample = None
+
+
+def silhouette_sample_index(n_rows: int, sample_size: int = DEFAULT_SAMPLE_SIZE, random_state: int = 42) -> Any:
+    """
+    轮廓系数样本行号（所有 k 共用同一样本，得分可比）
+
+    Args:
+        n_rows: 总行数
+        sample_size: 样本量
+        random_state: 随机种子
+
+    Returns:
+        已排序的行号数组
+    """
+    if n_rows <= sample_size:
+        return np.arange(n_rows)
+    return np.sort(np.random.default_rng(random_state).choice(n_rows, sample_size, replace=False))
+
+
+def sampled_silhouette(data: Any, labels: Any, sample: Any) -> float:
+    """
+    样本上的轮廓系数
+
+    Args:
+        data: 特征矩阵
+        labels: 全部行的聚类标签
+        sample: 样本行号
+
+    Returns:
+        轮廓系数，样本中不足2个簇时为 -1
+    """
+    sample_labels = labels[sample]
+    n_clusters = len(np.unique(sample_labels))
+    if n_clusters < 2 or n_clusters >= len(sample):
+        return -1.0
+    return float(silhouette_score(data[sample], sample_labels))
+
+
+def evaluate_k(data: Any, k: int, sample: Any, random_state: int = 42) -> Dict[str, Any]:
+    """
+    训练 k 簇 KMeans 并评估
+
+    Args:
+        data: 特征矩阵
+        k: 聚类数
+        sample: 轮廓系数样本行号
+        random_state: 随机种子
+
+    Returns:
+        {'k', 'inertia', 'silhouette'}
+    """
+    model = KMeans(n_clusters=k, random_state=random_state)
+    labels = model.fit_predict(data)
+    return {'k': k, 'inertia': float(model.inertia_), 'silhouette': sampled_silhouette(data, labels, sample)}
+
+
+def _init_worker(data: Any, sample: Any):
+    """进程池初始化：保存数据并限制每个进程的 BLAS/OpenMP 线程数，避免超额订阅"""
+    global _worker_data, _worker_sample
+    _worker_data, _worker_sample = data, sample
+    threadpool_limits(1)
+
+
+def _evaluate_in_worker(k: int) -> Dict[str, Any]:
+    """进程池工作函数"""
+    return evaluate_k(_worker_data, k, _worker_sample)
+
+
+def search_cluster_count(data: Any, min_k: int = DEFAULT_MIN_K, max_k: int = DEFAULT_MAX_K,
+                         sample_size: int = DEFAULT_SAMPLE_SIZE, n_jobs: int = -1,
+                         patience: int = DEFAULT_PATIENCE, tolerance: float = SCORE_TOLERANCE) -> Dict[str, Any]:
+    """
+    按样本轮廓系数搜索最优聚类数
+
+    k 按进程数分批并行评估，每批结束后按 k 顺序检查：得分连续 patience 个 k 低于当前最优
+    tolerance 以上即停止，之后评估的 k 不参与选择，因此结果与进程数无关
+
+    Args:
+        data: 已标准化的特征矩阵
+        min_k: 最小聚类数
+        max_k: 最大聚类数
+        sample_size: 轮廓系数样本量
+        n_jobs: 进程数，-1 表示全部CPU，1 表示在当前进程内计算
+        patience: 连续下降多少个 k 后停止
+        tolerance: 判定下降的得分差
+
+    Returns:
+        {'best_k', 'scores': [{'k', 'inertia', 'silhouette'}], 'stopped_early'}；
+        可评估的 k 不足时 best_k 为 None
+    """
+    data = np.asarray(data, dtype=float)
+    candidates = list(range(max(2, min_k), min(max_k, len(data) - 1) + 1))
+    if not candidates:
+        return {'best_k': None, 'scores': [], 'stopped_early': False}
+
+    sample = silhouette_sample_index(len(data), sample_size)
+    n_jobs = (os.cpu_count() or 1) if n_jobs == -1 else max(1, n_jobs)
+    n_jobs = min(n_jobs, len(candidates))
+    if len(data) < PARALLEL_MIN_ROWS:
+        n_jobs = 1
+
+    scores, best, declines, stopped = [], None, 0, False
+
+    def accept(result: Dict[str, Any]) -> bool:
+        """按 k 顺序记录结果，返回是否应停止"""
+        nonlocal best, declines
+        scores.append(result)
+        if best is None or result['silhouette'] > best['silhouette']:
+            best, declines = result, 0
+        elif result['silhouette'] < best['silhouette'] - tolerance:
+            declines += 1
+        else:
+            declines = 0
+        return declines >= patience
+
+    if n_jobs == 1:
+        for k in candidates:
+            if accept(evaluate_k(data, k, sample)):
+                stopped = k != candidates[-1]
+                break
+    else:
+        with ProcessPoolExecutor(max_workers=n_jobs, initializer=_init_worker, initargs=(data, sample)) as executor:
+            for start in range(0, len(candidates), n_jobs):
+                wave = candidates[start:start + n_jobs]
+                for result in executor.map(_evaluate_in_worker, wave):
+                    if accept(result):
+                        stopped = result['k'] != candidates[-1]
+                        break
+                if stopped or declines >= patience:
+                    break
+
+    return {'best_k': best['k'], 'scores': scores, 'stopped_early': stopped}
@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+整数周期队列（Cohort）分析
+日期一次性转换为整数月/周/日编码，队列与期数均为向量化整数运算；
+按数据块累积 用户 × 周期 去重表，支持数千万行订单，结果为稀疏长表
+"""
+
+from typing import Any, Optional, Iterable
+
+# 条件导入
+try:
+    import pandas as pd
+    import numpy as np
+    PANDAS_AVAILABLE = True
+except ImportError:
+    PANDAS_AVAILABLE = False
+
+COHORT_FREQUENCIES = ['M', 'W', 'D']
+DEFAULT_CHUNK_SIZE = 5_000_000
+# 待合并的块累计超过该行数时压缩一次
+_COMPACT_ROWS = 2_000_000
+# 1970-01-01 为周四，+3 使每周从周一开始
+_WEEK_OFFSET = 3
+# 缺失日期的编码
+_MISSING_CODE = -(1 << 62)
+
+
+def period_codes(dates: Any, freq: str = 'M') -> Any:
+    """
+    日期转整数周期编码
+
+    Args:
+        dates: 日期序列（可为字符串，将先转换为日期）
+        freq: M（1970-01 起的月数）/ W（周一起始的周数）/ D（天数）
+
+    Returns:
+        int64 编码数组，缺失日期为 _MISSING_CODE
+    """
+    if freq not in COHORT_FREQUENCIES:
+        raise ValueError(f"不支持的队列周期: {freq}")
+    dates = pd.to_datetime(pd.Series(dates)).to_numpy()
+    missing = np.isnat(dates)
+    if freq == 'M':
+        codes = dates.astype('datetime64[M]').astype(np.int64)
+    else:
+        days = dates.astype('datetime64[D]').astype(np.int64)
+        codes = (days + _WEEK_OFFSET) // 7 if freq == 'W' else days
+    codes[missing] = _MISSING_CODE
+    return codes
+
+
+def period_labels(codes: Any, freq: str = 'M') -> Any:
+    """
+    周期编码转标签
+
+    Args:
+        codes: 整数周期编码
+        freq: M / W / D
+
+    Returns:
+        字符串数组：月为 '2024-01'，周为该周周一日期，日为日期
+    """
+    codes = np.asarray(codes, dtype=np.int64)
+    if freq == 'M':
+        return np.datetime_as_string(codes.astype('datetime64[M]'))
+    if freq == 'W':
+        return np.datetime_as_string((codes * 7 - _WEEK_OFFSET).astype('datetime64[D]'))
+    return np.datetime_as_string(codes.astype('datetime64[D]'))
+
+
+def _user_period_pairs(users: Any, periods: Any, values: Optional[Any]) -> Any:
+    """一个数据块内按 用户 × 周期 去重并汇总收入"""
+    user_codes, user_uniques = pd.factorize(users)
+    low = periods.min()
+    span = int(periods.max() - low) + 1
+    key_codes, keys = pd.factorize(user_codes.astype(np.int64) * span + (periods - low))
+    frame = pd.DataFrame({
+        'user': user_uniques.take(keys // span),
+        'period': keys % span + low
+    })
+    if values is not None:
+        frame['revenue'] = np.bincount(key_codes, weights=values, minlength=len(keys))
+    return frame
+
+
+class CohortAccumulator:
+    """按数据块累积队列统计（用户 × 周期 去重表），可直接处理 pd.read_csv(chunksize=...) 的分块"""
+
+    def __init__(self, user_id_col: str, date_col: str, value_col: Optional[str] = None, freq: str = 'M'):
+        """
+        初始化累积器
+
+        Args:
+            user_id_col: 用户ID列
+            date_col: 日期列
+            value_col: 收入列，为空时不计算收入留存
+            freq: 队列周期 M / W / D
+        """
+        if freq not in COHORT_FREQUENCIES:
+            raise ValueError(f"不支持的队列周期: {freq}")
+        self.user_id_col = user_id_col
+        self.date_col = date_col
+        self.value_col = value_col
+        self.freq = freq
+        self.rows_seen = 0
+        self._compacted = None
+        self._pending = []
+        self._pending_rows = 0
+
+    def update(self, chunk: Any) -> 'CohortAccumulator':
+        """
+        累积一个订单数据块
+
+        Args:
+            chunk: 包含用户、日期（及收入）列的数据块
+
+        Returns:
+            自身，便于链式调用
+        """
+        periods = period_codes(chunk[self.date_col], self.freq)
+        users = chunk[self.user_id_col].to_numpy()
+        keep = (periods != _MISSING_CODE) & pd.notna(users)
+        self.rows_seen += len(chunk)
+        if not keep.any():
+            return self
+
+        values = None
+        if self.value_col is not None:
+            values = pd.to_numeric(chunk[self.value_col], errors='coerce').fillna(0).to_numpy(dtype=float)[keep]
+        pairs = _user_period_pairs(users[keep], periods[keep], values)
+        self._pending.append(pairs)
+        self._pending_rows += len(pairs)
+        if self._pending_rows > max(_COMPACT_ROWS, len(self._compacted) if self._compacted is not None else 0):
+            self._compact()
+        return self
+
+    def _compact(self):
+        """合并已累积的块，跨块重复的 用户 × 周期 只保留一行"""
+        parts = ([self._compacted] if self._compacted is not None else []) + self._pending
+        self._pending, self._pending_rows = [], 0
+        if not parts:
+            return
+        combined = pd.concat(parts, ignore_index=True)
+        if len(parts) > 1:
+            values = combined['revenue'].to_numpy() if 'revenue' in combined else None
+            combined = _user_period_pairs(combined['user'].to_numpy(), combined['period'].to_numpy(), values)
+        self._compacted = combined
+
+    def result(self) -> Any:
+        """
+        计算队列长表
+
+        Returns:
+            DataFrame（仅含非空单元格），列为 cohort、cohort_code、period_number、users、cohort_size、
+            retention_rate，给出收入列时另有 revenue、revenue_retention；按 cohort_code、period_number 排序
+        """
+        self._compact()
+        pairs = self._compacted
+        if pairs is None or len(pairs) == 0:
+            columns = ['cohort', 'cohort_code', 'period_number', 'users', 'cohort_size', 'retention_rate']
+            if self.value_col is not None:
+                columns += ['revenue', 'revenue_retention']
+            return pd.DataFrame(columns=columns)
+        return cohort_long_table(pairs, self.freq)
+
+
+def cohort_long_table(pairs: Any, freq: str = 'M') -> Any:
+    """
+    由去重后的 用户 × 周期 表计算队列长表
+
+    Args:
+        pairs: 含 user、period（整数编码）及可选 revenue 列的 DataFrame，用户 × 周期 唯一
+        freq: 周期编码口径
+
+    Returns:
+        队列长表，列同 CohortAccumulator.result
+    """
+    periods = pairs['period'].to_numpy(dtype=np.int64)
+    user_codes = pd.factorize(pairs['user'])[0]
+    cohorts = pd.Series(periods).groupby(user_codes).transform('min').to_numpy()
+    period_number = periods - cohorts
+
+    width = int(period_number.max()) + 1
+    cell_codes, cells = pd.factorize((cohorts - cohorts.min()) * width + period_number, sort=True)
+    table = pd.DataFrame({
+        'cohort_code': cells // width + cohorts.min(),
+        'period_number': cells % width,
+        'users': np.bincount(cell_codes, minlength=len(cells))
+    })
+
+    # 每个队列第0期即全部用户
+    first = table['period_number'].to_numpy() == 0
+    starts = np.cumsum(first) - 1
+    table['cohort_size'] = table['users'].to_numpy()[first][starts]
+    table['retention_rate'] = table['users'] / table['cohort_size']
+    if 'revenue' in pairs:
+        table['revenue'] = np.bincount(cell_codes, weights=pairs['revenue'].to_numpy(dtype=float),
+                                       minlength=len(cells))
+        base_revenue = table['revenue'].to_numpy()[first][starts]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            table['revenue_retention'] = np.where(base_revenue != 0, table['revenue'] / base_revenue, np.nan)
+
+    table.insert(0, 'cohort', period_labels(table['cohort_code'].to_numpy(), freq))
+    return table
+
+
+def cohort_retention(data: Any, user_id_col: str, date_col: str, value_col: Optional[str] = None,
+                     freq: str = 'M', chunk_size: int = DEFAULT_CHUNK_SIZE) -> Any:
+    """
+    计算队列留存长表
+
+    Args:
+        data: 订单 DataFrame，或 DataFrame 分块的可迭代对象
+        user_id_col: 用户ID列
+        date_col: 日期列
+        value_col: 收入列
+        freq: 队列周期 M / W / D
+        chunk_size: DataFrame 输入时的分块行数
+
+    Returns:
+        队列长表（见 CohortAccumulator.result）
+    """
+    accumulator = CohortAccumulator(user_id_col, date_col, value_col, freq)
+    chunks: Iterable[Any] = (data.iloc[start:start + chunk_size] for start in range(0, len(data), chunk_size)) \
+        if hasattr(data, 'iloc') else data
+    for chunk in chunks:
+        accumulator.update(chunk)
+    return accumulator.result()
+
+
+def dense_table(long_table: Any, value: str) -> Any:
+    """
+    长表转 队列 × 期数 的宽表
+
+    Args:
+        long_table: 队列长表
+        value: 取值列，如 users / retention_rate / revenue_retention
+
+    Returns:
+        以 cohort 为索引、period_number 为列的 DataFrame
+    """
+    return long_table.pivot(index='cohort', columns='period_number', values=value)
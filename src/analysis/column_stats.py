@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+数据剖析的共享列统计
+一次计算缺失计数、去重数、describe 统计量、四分位距边界、异常值计数与高阶矩，
+供数据质量、有效性、异常值与分布分析共用；缺失共现用按行打包的位图计算
+"""
+
+from dataclasses import dataclass, field
+from typing import Dict, List, Any, Optional
+
+# 条件导入
+try:
+    import pandas as pd
+    import numpy as np
+    PANDAS_AVAILABLE = True
+except ImportError:
+    PANDAS_AVAILABLE = False
+
+from .sketches import ColumnMoments
+
+# 异常值样本（行号与取值）保留条数
+OUTLIER_SAMPLE_SIZE = 10
+IQR_MULTIPLIER = 1.5
+EXTREME_IQR_MULTIPLIER = 3.0
+
+
+def pack_masks(masks: Any) -> Any:
+    """
+    将 (行数, 列数) 布尔矩阵按列打包为 64 位字
+
+    Args:
+        masks: 布尔矩阵
+
+    Returns:
+        (列数, 字数) uint64 矩阵
+    """
+    packed = np.packbits(np.ascontiguousarray(masks.T), axis=1)
+    padding = (-packed.shape[1]) % 8
+    if padding:
+        packed = np.pad(packed, ((0, 0), (0, padding)))
+    return np.ascontiguousarray(packed).view(np.uint64)
+
+
+def _popcount_lookup(words: Any) -> Any:
+    """逐元素统计置位数（按字节查表，用于没有 np.bitwise_count 的 NumPy 版本）"""
+    as_bytes = words.view(np.uint8).reshape(words.shape + (words.dtype.itemsize,))
+    return _POPCOUNT_TABLE[as_bytes].sum(axis=-1)
+
+
+if PANDAS_AVAILABLE:
+    _POPCOUNT_TABLE = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+    popcount = getattr(np, 'bitwise_count', _popcount_lookup)
+
+
+def missing_cooccurrence(nulls: Any) -> Any:
+    """
+    两两同时缺失的行数
+
+    只为部分缺失的列计算（无缺失或全部缺失的列缺失指示为常量，相关系数无定义），
+    其余非对角元素为 0
+
+    Args:
+        nulls: (行数, 列数) 缺失布尔矩阵
+
+    Returns:
+        (列数, 列数) int64 矩阵，对角线为各列缺失数
+    """
+    n_rows, n_columns = nulls.shape
+    counts = nulls.sum(axis=0)
+    result = np.zeros((n_columns, n_columns), dtype=np.int64)
+    result[np.diag_indices(n_columns)] = counts
+
+    partial = np.flatnonzero((counts > 0) & (counts < n_rows))
+    if len(partial) > 1:
+        packed = pack_masks(nulls[:, partial])
+        for position, column in enumerate(partial[:-1]):
+            shared = popcount(packed[position] & packed[position + 1:]).sum(axis=1, dtype=np.int64)
+            result[column, partial[position + 1:]] = shared
+            result[partial[position + 1:], column] = shared
+    return result
+
+
+@dataclass
+class ColumnStatistics:
+    """一次计算、多处共用的列统计"""
+    n_rows: int
+    columns: List[Any]
+    null_counts: Any
+    nunique: Any
+    missing_cooccurrence: Any
+    numeric_columns: List[Any] = field(default_factory=list)
+    summary: Any = None
+    skewness: Dict[Any, float] = field(default_factory=dict)
+    kurtosis: Dict[Any, float] = field(default_factory=dict)
+    outliers: Dict[Any, Dict[str, Any]] = field(default_factory=dict)
+    extreme_outlier_counts: Dict[Any, int] = field(default_factory=dict)
+
+    def non_null(self, column: Any) -> int:
+        """非缺失值个数"""
+        return int(self.n_rows - self.null_counts[column])
+
+    def describe(self) -> Dict[Any, Dict[str, float]]:
+        """与 DataFrame.describe().to_dict() 相同结构的数值列统计摘要"""
+        return self.summary.to_dict() if self.summary is not None else {}
+
+
+def compute_column_statistics(data: Any, numeric_cols: Optional[List[Any]] = None) -> ColumnStatistics:
+    """
+    计算共享列统计
+
+    Args:
+        data: DataFrame
+        numeric_cols: 数值列，默认按 select_dtypes(np.number) 选取
+
+    Returns:
+        ColumnStatistics
+    """
+    if numeric_cols is None:
+        numeric_cols = data.select_dtypes(include=[np.number]).columns
+    numeric_cols = list(numeric_cols)
+    n_rows = len(data)
+
+    nulls = data.isnull().to_numpy()
+    stats = ColumnStatistics(
+        n_rows=n_rows,
+        columns=list(data.columns),
+        null_counts=pd.Series(nulls.sum(axis=0), index=data.columns),
+        nunique=data.nunique(),
+        missing_cooccurrence=missing_cooccurrence(nulls),
+        numeric_columns=numeric_cols
+    )
+    if not numeric_cols or n_rows == 0:
+        return stats
+
+    matrix = data[numeric_cols].to_numpy(dtype=float)
+    moments = ColumnMoments(len(numeric_cols))
+    moments.add(matrix)
+    quartiles = data[numeric_cols].quantile([0.25, 0.5, 0.75]).to_numpy(dtype=float)
+    q1, median, q3 = quartiles
+    with np.errstate(invalid='ignore'):
+        std = moments.std()
+    counts = moments.n
+    stats.summary = pd.DataFrame(
+        [counts, np.where(counts > 0, moments.mean, np.nan), std,
+         np.where(counts > 0, moments.min, np.nan), q1, median, q3, np.where(counts > 0, moments.max, np.nan)],
+        index=['count', 'mean', 'std', 'min', '25%', '50%', '75%', 'max'], columns=numeric_cols
+    )
+    stats.skewness = dict(zip(numeric_cols, moments.skewness().tolist()))
+    stats.kurtosis = dict(zip(numeric_cols, moments.kurtosis().tolist()))
+
+    # 四分位距边界与异常值计数按矩阵整体比较（NaN 比较结果为 False）
+    iqr = q3 - q1
+    lower, upper = q1 - IQR_MULTIPLIER * iqr, q3 + IQR_MULTIPLIER * iqr
+    outlier_mask = (matrix < lower) | (matrix > upper)
+    extreme_mask = (matrix < q1 - EXTREME_IQR_MULTIPLIER * iqr) | (matrix > q3 + EXTREME_IQR_MULTIPLIER * iqr)
+    outlier_counts = outlier_mask.sum(axis=0)
+    extreme_counts = extreme_mask.sum(axis=0)
+
+    index = data.index
+    for position, column in enumerate(numeric_cols):
+        stats.extreme_outlier_counts[column] = int(extreme_counts[position])
+        if counts[position] <= 4:
+            continue
+        rows = np.flatnonzero(outlier_mask[:, position])[:OUTLIER_SAMPLE_SIZE]
+        stats.outliers[column] = {
+            'count': int(outlier_counts[position]),
+            'lower_bound': float(lower[position]),
+            'upper_bound': float(upper[position]),
+            'indices': index[rows].tolist(),
+            'values': [float(v) for v in matrix[rows, position]]
+        }
+    return stats
@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+"""
+宽表分块相关性计算
+按列分块做矩阵乘法计算相关系数，用上三角掩码直接提取强相关对；
+Spearman 只对每列排序一次；流式模式按行分块累积充分统计量，可跨分区精确合并
+"""
+
+from typing import Dict, List, Any, Optional
+
+# 条件导入
+try:
+    import pandas as pd
+    import numpy as np
+    PANDAS_AVAILABLE = True
+except ImportError:
+    PANDAS_AVAILABLE = False
+
+CORRELATION_METHODS = ['pearson', 'spearman']
+DEFAULT_BLOCK_SIZE = 256
+
+
+def rank_columns(values: Any) -> Any:
+    """
+    对每列求平均秩（缺失值保持为 NaN），Spearman 相关即秩的 Pearson 相关
+
+    Args:
+        values: (行数, 列数) 数值矩阵
+
+    Returns:
+        同形状的秩矩阵
+    """
+    return pd.DataFrame(values).rank(method='average', axis=0).to_numpy(dtype=float)
+
+
+def _pairwise_tile(x: Any, y: Any, x_valid: Any, y_valid: Any) -> Any:
+    """含缺失值时按成对完整观测计算一个分块的相关系数"""
+    xv = x_valid.astype(float)
+    yv = y_valid.astype(float)
+    n = xv.T @ yv
+    sx = x.T @ yv
+    sy = xv.T @ y
+    sxx = (x * x).T @ yv
+    syy = xv.T @ (y * y)
+    sxy = x.T @ y
+    return _correlation_from_sums(n, sx, sy, sxx, syy, sxy)
+
+
+def _correlation_from_sums(n: Any, sx: Any, sy: Any, sxx: Any, syy: Any, sxy: Any) -> Any:
+    """由成对充分统计量计算相关系数，观测不足或方差为0时为 NaN"""
+    cov = n * sxy - sx * sy
+    var_x = n * sxx - sx * sx
+    var_y = n * syy - sy * sy
+    denominator = np.sqrt(np.clip(var_x, 0, None) * np.clip(var_y, 0, None))
+    result = np.full(np.shape(cov), np.nan)
+    np.divide(cov, denominator, out=result, where=(denominator > 0) & (n >= 2))
+    return np.clip(result, -1.0, 1.0)
+
+
+def blocked_correlation(values: Any, method: str = 'pearson', block_size: int = DEFAULT_BLOCK_SIZE,
+                        threshold: Optional[float] = None, return_matrix: bool = True) -> Dict[str, Any]:
+    """
+    分块计算相关矩阵并提取强相关对
+
+    无缺失值时对标准化后的列做分块矩阵乘法；有缺失值时按成对完整观测计算（与 pandas.corr 一致）。
+    只计算上三角分块，return_matrix=False 时不保留完整矩阵，内存只与分块大小相关
+
+    Args:
+        values: (行数, 列数) 数值矩阵
+        method: pearson 或 spearman（每列只排序一次）
+        block_size: 列分块大小
+        threshold: 强相关阈值（|r| > threshold），为空时不提取
+        return_matrix: 是否返回完整相关矩阵
+
+    Returns:
+        {'matrix': 相关矩阵或 None, 'pairs': {'i', 'j', 'correlation'} 按 (i, j) 排序的强相关对}
+    """
+    if method not in CORRELATION_METHODS:
+        raise ValueError(f"不支持的相关性方法: {method}")
+
+    values = np.asarray(values, dtype=float)
+    if method == 'spearman':
+        values = rank_columns(values)
+    n_rows, n_cols = values.shape
+
+    valid = ~np.isnan(values)
+    has_missing = not valid.all()
+    if has_missing:
+        # 按列均值平移后再累积，避免大数值下的精度损失
+        centered = np.where(valid, values - np.nanmean(values, axis=0), 0.0)
+    else:
+        centered = values - values.mean(axis=0)
+        norms = np.sqrt((centered * centered).sum(axis=0))
+        constant = norms == 0
+        standardized = centered / np.where(constant, 1.0, norms)
+
+    matrix = np.empty((n_cols, n_cols)) if return_matrix else None
+    pair_i, pair_j, pair_r = [], [], []
+
+    for start_i in range(0, n_cols, block_size):
+        stop_i = min(start_i + block_size, n_cols)
+        for start_j in range(start_i, n_cols, block_size):
+            stop_j = min(start_j + block_size, n_cols)
+            if has_missing:
+                tile = _pairwise_tile(centered[:, start_i:stop_i], centered[:, start_j:stop_j],
+                                      valid[:, start_i:stop_i], valid[:, start_j:stop_j])
+            else:
+                tile = np.clip(standardized[:, start_i:stop_i].T @ standardized[:, start_j:stop_j], -1.0, 1.0)
+                tile[constant[start_i:stop_i], :] = np.nan
+                tile[:, constant[start_j:stop_j]] = np.nan
+                if n_rows < 2:
+                    tile[:] = np.nan
+
+            if return_matrix:
+                matrix[start_i:stop_i, start_j:stop_j] = tile
+                matrix[start_j:stop_j, start_i:stop_i] = tile.T
+
+            if threshold is not None:
+                mask = np.abs(tile) > threshold
+                if start_i == start_j:
+                    mask = np.triu(mask, k=1)
+                rows, cols = np.nonzero(mask)
+                pair_i.append(rows + start_i)
+                pair_j.append(cols + start_j)
+                pair_r.append(tile[rows, cols])
+
+    if return_matrix:
+        diagonal = np.diagonal(matrix).copy()
+        np.fill_diagonal(matrix, np.where(np.isnan(diagonal), np.nan, 1.0))
+
+    return {'matrix': matrix, 'pairs': _sorted_pairs(pair_i, pair_j, pair_r)}
+
+
+def _sorted_pairs(pair_i: List[Any], pair_j: List[Any], pair_r: List[Any]) -> Dict[str, Any]:
+    """合并各分块提取的相关对并按 (i, j) 排序"""
+    if not pair_i:
+        return {'i': np.zeros(0, dtype=np.int64), 'j': np.zeros(0, dtype=np.int64), 'correlation': np.zeros(0)}
+    i = np.concatenate(pair_i)
+    j = np.concatenate(pair_j)
+    r = np.concatenate(pair_r)
+    order = np.lexsort((j, i))
+    return {'i': i[order], 'j': j[order], 'correlation': r[order]}
+
+
+def matrix_pairs(matrix: Any, lower: Optional[float] = None, upper: Optional[float] = None) -> Dict[str, Any]:
+    """
+    用上三角掩码从已有相关矩阵中提取相关对
+
+    Args:
+        matrix: 相关矩阵
+        lower: 提取 |r| > lower 的相关对
+        upper: 提取 |r| < upper 的相关对（与 lower 同时给出时取交集）
+
+    Returns:
+        {'i', 'j', 'correlation'}，按 (i, j) 排序
+    """
+    matrix = np.asarray(matrix, dtype=float)
+    magnitude = np.abs(matrix)
+    mask = np.triu(np.ones(matrix.shape, dtype=bool), k=1) & ~np.isnan(matrix)
+    if lower is not None:
+        mask &= magnitude > lower
+    if upper is not None:
+        mask &= magnitude < upper
+    i, j = np.nonzero(mask)
+    return {'i': i, 'j': j, 'correlation': matrix[i, j]}
+
+
+class StreamingCorrelation:
+    """按行分块累积充分统计量的流式 Pearson 相关（支持缺失值与跨分区合并）"""
+
+    def __init__(self, columns: List[str]):
+        """
+        初始化累积器
+
+        Args:
+            columns: 参与计算的列名
+        """
+        self.columns = list(columns)
+        p = len(self.columns)
+        self.shift = None
+        self.n = np.zeros((p, p))
+        self.sx = np.zeros((p, p))     # sx[i, j] = Σ(x_i - a_i)，仅统计 i、j 均有值的行
+        self.sxx = np.zeros((p, p))    # sxx[i, j] = Σ(x_i - a_i)²，同上
+        self.sxy = np.zeros((p, p))    # sxy[i, j] = Σ(x_i - a_i)(x_j - a_j)
+        self.rows = 0
+
+    def update(self, chunk: Any) -> 'StreamingCorrelation':
+        """
+        累积一个行分块
+
+        Args:
+            chunk: DataFrame（按列名取列）或 (行数, 列数) 数组
+
+        Returns:
+            自身，便于链式调用
+        """
+        values = chunk[self.columns].to_numpy(dtype=float) if hasattr(chunk, 'columns') \
+            else np.asarray(chunk, dtype=float)
+        if len(values) == 0:
+            return self
+
+        valid = ~np.isnan(values)
+        if self.shift is None:
+            # 以首个分块的列均值作为平移基准
+            with np.errstate(invalid='ignore'):
+                means = np.nanmean(np.where(valid.any(axis=0), values, 0.0), axis=0)
+            self.shift = np.nan_to_num(means)
+
+        x = np.where(valid, values - self.shift, 0.0)
+        if valid.all():
+            column_sum = x.sum(axis=0)
+            column_sq = (x * x).sum(axis=0)
+            self.n += len(values)
+            self.sx += column_sum[:, None]
+            self.sxx += column_sq[:, None]
+        else:
+            v = valid.astype(float)
+            self.n += v.T @ v
+            self.sx += x.T @ v
+            self.sxx += (x * x).T @ v
+        self.sxy += x.T @ x
+        self.rows += len(values)
+        return self
+
+    def _rebase(self, shift: Any):
+        """将统计量换算到新的平移基准（精确变换）"""
+        if self.shift is None:
+            self.shift = np.asarray(shift, dtype=float).copy()
+            return
+        d = self.shift - shift
+        sx_old = self.sx
+        self.sxy = self.sxy + d[None, :] * sx_old + d[:, None] * sx_old.T + self.n * np.outer(d, d)
+        self.sxx = self.sxx + 2 * d[:, None] * sx_old + self.n * (d * d)[:, None]
+        self.sx = sx_old + self.n * d[:, None]
+        self.shift = np.asarray(shift, dtype=float).copy()
+
+    def merge(self, other: 'StreamingCorrelation') -> 'StreamingCorrelation':
+        """
+        合并另一个分区的累积器（结果与在全部数据上计算一致）
+
+        Args:
+            other: 相同列的累积器
+
+        Returns:
+            自身
+        """
+        if other.columns != self.columns:
+            raise ValueError("合并的累积器列不一致")
+        if other.shift is None:
+            return self
+        if self.shift is None:
+            self._rebase(other.shift)
+        aligned = StreamingCorrelation(other.columns)
+        aligned.shift = other.shift
+        aligned.n, aligned.sx, aligned.sxx, aligned.sxy = other.n, other.sx, other.sxx, other.sxy
+        aligned._rebase(self.shift)
+
+        self.n = self.n + aligned.n
+        self.sx = self.sx + aligned.sx
+        self.sxx = self.sxx + aligned.sxx
+        self.sxy = self.sxy + aligned.sxy
+        self.rows += other.rows
+        return self
+
+    def correlation(self) -> Any:
+        """
+        当前累积数据上的相关矩阵
+
+        Returns:
+            (列数, 列数) 相关矩阵
+        """
+        matrix = _correlation_from_sums(self.n, self.sx, self.sx.T, self.sxx, self.sxx.T, self.sxy)
+        diagonal = np.diagonal(matrix).copy()
+        np.fill_diagonal(matrix, np.where(np.isnan(diagonal), np.nan, 1.0))
+        return matrix
+
+    def strong_pairs(self, threshold: float = 0.7) -> Dict[str, Any]:
+        """当前累积数据上 |r| > threshold 的相关对"""
+        return matrix_pairs(self.correlation(), lower=threshold)
+
+
+def streaming_correlation(chunks: Any, columns: List[str]) -> StreamingCorrelation:
+    """
+    对行分块迭代器（如 pd.read_csv(chunksize=...)）累积相关统计量
+
+    Args:
+        chunks: 可迭代的数据分块
+        columns: 参与计算的列名
+
+    Returns:
+        StreamingCorrelation 累积器
+    """
+    accumulator = StreamingCorrelation(columns)
+    for chunk in chunks:
+        accumulator.update(chunk)
+    return accumulator
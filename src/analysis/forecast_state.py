@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+预测状态持久化
+按序列保存 Holt-Winters 的拟合状态（水平/趋势/季节、平滑参数、误差累计）与上次全量拟合的分析结果，
+历史观测以定长浮点追加写入；新数据到达时只需加载状态并推进新增的点，
+按计划（距上次全量拟合的点数）或检测到漂移（近期一步误差显著放大）时才读取全部历史重新拟合
+"""
+
+import os
+import re
+import json
+import tempfile
+import threading
+from typing import Dict, Any, Optional
+
+# 条件导入
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+from .model_registry import _json_default
+
+STATE_SUFFIX = '.json'
+HISTORY_SUFFIX = '.values'
+DEFAULT_REFIT_INTERVAL = 28
+DEFAULT_DRIFT_THRESHOLD = 4.0
+# 漂移判定所需的最少新增误差个数
+DRIFT_MIN_POINTS = 7
+
+
+def drift_ratio(record: Dict[str, Any], state: Dict[str, Any]) -> Optional[float]:
+    """
+    上次全量拟合之后的一步误差均方与拟合时样本内误差均方之比
+
+    Args:
+        record: 状态记录（含 fit_sse、fit_errors）
+        state: 推进后的预测器状态（含累计 sse、n_errors）
+
+    Returns:
+        比值；新增误差少于 DRIFT_MIN_POINTS 个时为 None
+    """
+    recent = int(np.sum(state['n_errors'])) - record['fit_errors']
+    if recent < DRIFT_MIN_POINTS or record['fit_errors'] == 0:
+        return None
+    recent_mse = (float(np.sum(state['sse'])) - record['fit_sse']) / recent
+    fit_mse = record['fit_sse'] / record['fit_errors']
+    return recent_mse / fit_mse if fit_mse > 0 else float('inf')
+
+
+class ForecastStateStore:
+    """按序列键存储预测状态记录（JSON）与规整后的历史观测（float64 追加文件）"""
+
+    def __init__(self, root_dir: str):
+        """
+        初始化状态存储
+
+        Args:
+            root_dir: 存储目录（每条序列一个 .json 状态文件和一个 .values 历史文件）
+        """
+        self.root_dir = root_dir
+        self._lock = threading.Lock()
+
+    def _path(self, key: str, suffix: str) -> str:
+        return os.path.join(self.root_dir, re.sub(r'[^\w\-.]', '_', str(key)) + suffix)
+
+    def load(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        读取序列的状态记录
+
+        Args:
+            key: 序列键
+
+        Returns:
+            状态记录，不存在时为 None
+        """
+        path = self._path(key, STATE_SUFFIX)
+        if not os.path.exists(path):
+            return None
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+
+    def history(self, key: str, n_obs: Optional[int] = None) -> Any:
+        """
+        读取规整后的历史观测（缺失时间点为 NaN）
+
+        Args:
+            key: 序列键
+            n_obs: 读取的点数，默认取状态记录中的 n_obs（忽略未提交的尾部写入）
+
+        Returns:
+            一维数组
+        """
+        if n_obs is None:
+            record = self.load(key)
+            n_obs = record['n_obs'] if record else 0
+        path = self._path(key, HISTORY_SUFFIX)
+        if not os.path.exists(path):
+            return np.empty(0)
+        return np.fromfile(path, dtype=np.float64, count=n_obs)
+
+    def save(self, key: str, record: Dict[str, Any], values: Any, offset: int = 0) -> None:
+        """
+        写入历史观测与状态记录
+
+        先把 values 写到历史文件的第 offset 个点之后（截断其后的内容），再原子替换状态文件；
+        两步之间中断时，历史文件多出的尾部会在下次写入时被截断
+
+        Args:
+            key: 序列键
+            record: 状态记录（n_obs 应等于 offset + len(values)）
+            values: 新增的规整观测
+            offset: 写入位置；0 表示整体重写（全量拟合）
+        """
+        os.makedirs(self.root_dir, exist_ok=True)
+        values = np.asarray(values, dtype=np.float64)
+        history_path = self._path(key, HISTORY_SUFFIX)
+        with self._lock:
+            with open(history_path, 'r+b' if offset and os.path.exists(history_path) else 'wb') as f:
+                f.truncate(offset * values.itemsize)
+                f.seek(0, os.SEEK_END)
+                values.tofile(f)
+
+            fd, temp_path = tempfile.mkstemp(prefix='.tmp-', dir=self.root_dir)
+            try:
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    json.dump(record, f, ensure_ascii=False, default=_json_default)
+                os.replace(temp_path, self._path(key, STATE_SUFFIX))
+            except Exception:
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+                raise
+
+    def delete(self, key: str) -> None:
+        """删除序列的状态与历史"""
+        with self._lock:
+            for suffix in (STATE_SUFFIX, HISTORY_SUFFIX):
+                path = self._path(key, suffix)
+                if os.path.exists(path):
+                    os.remove(path)
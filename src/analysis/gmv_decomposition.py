@@ -0,0 +1,326 @@
+#!/usr/bin/env python3
+"""
+GMV变化驱动因素分解（对数平均迪氏指数，LMDI）
+将 GMV = DAU × 转化率 × 频次 × 笔单价 × 残差项 的变化量精确拆分为各因素效应之和，
+可对任意维度分组一次性向量化计算；分组因子由漏斗量（DAU、买家数、订单数）的分组和推出，
+使因子乘积严格等于分组GMV
+"""
+
+import math
+from typing import Dict, List, Any, Optional
+
+# 条件导入
+try:
+    import pandas as pd
+    import numpy as np
+    PANDAS_AVAILABLE = True
+except ImportError:
+    PANDAS_AVAILABLE = False
+
+# 乘法分解因子；GMV与因子乘积之间的差异归入残差项，保证各效应之和严格等于GMV变化量
+DRIVER_FACTORS = ['dau', 'conversion_rate', 'frequency', 'order_price']
+RESIDUAL = 'residual'
+
+# 零值替代（Ang & Liu 小值策略），使新增/消失的分组也能参与对数分解
+EPSILON = 1e-10
+
+# 按GMV推算订单数（GMV / 笔单价）的汇总列，用于笔单价展示值
+IMPLIED_ORDERS = 'implied_orders'
+
+
+def funnel_columns(data: Any, factors: List[str]) -> Any:
+    """
+    逐行计算漏斗量，供分组求和
+
+    各因子依次累乘得到 DAU → 买家数（×转化率）→ 订单数（×频次）；笔单价不参与累乘，
+    另记按GMV推算的订单数。所有列均可直接相加，分组汇总只需一次 sum
+
+    Args:
+        data: 明细数据（DataFrame）
+        factors: 漏斗顺序的因子列
+
+    Returns:
+        DataFrame，包含 gmv、各因子的 {因子}_volume 列，以及 implied_orders 列（含笔单价时）
+    """
+    columns = {'gmv': data['gmv'].astype(float)}
+    volume = None
+    for factor in factors:
+        if factor == 'order_price':
+            price = data['order_price'].to_numpy(dtype=float)
+            orders = np.zeros(len(price))
+            np.divide(columns['gmv'].to_numpy(), price, out=orders, where=price != 0)
+            columns[IMPLIED_ORDERS] = pd.Series(orders, index=data.index)
+            continue
+        volume = data[factor].astype(float) if volume is None else volume * data[factor]
+        columns[f'{factor}_volume'] = volume
+    return pd.DataFrame(columns)
+
+
+def funnel_sums(rows: List[Dict[str, Any]], factors: List[str]) -> Dict[str, float]:
+    """
+    简化模式：对字典列表逐行累计漏斗量，口径同 funnel_columns
+
+    Args:
+        rows: 明细数据字典列表
+        factors: 漏斗顺序的因子列
+
+    Returns:
+        {列名: 合计值}
+    """
+    sums = {'gmv': 0.0}
+    for row in rows:
+        gmv = float(row.get('gmv') or 0)
+        sums['gmv'] += gmv
+        volume = None
+        for factor in factors:
+            value = float(row.get(factor) or 0)
+            if factor == 'order_price':
+                sums[IMPLIED_ORDERS] = sums.get(IMPLIED_ORDERS, 0.0) + (gmv / value if value else 0.0)
+                continue
+            volume = value if volume is None else volume * value
+            key = f'{factor}_volume'
+            sums[key] = sums.get(key, 0.0) + volume
+    return sums
+
+
+def _ratio(numerator: Any, denominator: Any) -> Any:
+    """安全除法（标量或数组），分母为0时取0"""
+    if not PANDAS_AVAILABLE:
+        return numerator / denominator if denominator else 0.0
+    numerator = np.asarray(numerator, dtype=float)
+    denominator = np.asarray(denominator, dtype=float)
+    out = np.zeros(np.broadcast(numerator, denominator).shape)
+    np.divide(numerator, denominator, out=out, where=denominator != 0)
+    return out
+
+
+def funnel_factors(sums: Any, factors: List[str]) -> Any:
+    """
+    由漏斗量的合计值还原各因子
+
+    首个因子取合计值本身，其余取相邻两级之比（即以上一级为权重的加权平均），
+    笔单价的分解口径为 GMV / 订单数，因此各分解因子之积严格等于GMV，残差项为0；
+    明细数据中GMV与因子乘积的偏差全部计入笔单价效应
+
+    Args:
+        sums: funnel_columns 分组求和结果（Series、DataFrame 或 funnel_sums 的字典）
+        factors: 漏斗顺序的因子列
+
+    Returns:
+        (values, drivers)：values 为展示口径（笔单价取按订单加权的平均值），
+        drivers 为参与分解的因子值；除笔单价外两者相同
+    """
+    values, drivers = {}, {}
+    below = None
+    for factor in factors:
+        if factor == 'order_price':
+            values[factor] = _ratio(sums['gmv'], sums[IMPLIED_ORDERS])
+            drivers[factor] = sums['gmv'] if below is None else _ratio(sums['gmv'], below)
+            continue
+        volume = sums[f'{factor}_volume']
+        if PANDAS_AVAILABLE:
+            volume = np.asarray(volume, dtype=float)
+        values[factor] = drivers[factor] = volume if below is None else _ratio(volume, below)
+        below = volume
+    return values, drivers
+
+
+def log_mean(a: Any, b: Any) -> Any:
+    """
+    对数平均 L(a, b) = (a - b) / (ln a - ln b)，a == b 时取 a
+
+    Args:
+        a: 当前值（标量或数组，需为正数）
+        b: 上期值
+
+    Returns:
+        对数平均值
+    """
+    if not PANDAS_AVAILABLE:
+        if a == b:
+            return float(a)
+        return (a - b) / (math.log(a) - math.log(b))
+
+    a = np.asarray(a, dtype=float)
+    b = np.asarray(b, dtype=float)
+    diff = np.log(a) - np.log(b)
+    out = a.copy()
+    np.divide(a - b, diff, out=out, where=np.abs(diff) > 1e-12)
+    return out
+
+
+def lmdi_decompose(current_gmv: Any, previous_gmv: Any,
+                   current_factors: Dict[str, Any], previous_factors: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    对一组（或多组）GMV变化做加性LMDI分解
+
+    效应_k = L(GMV_1, GMV_0) × ln(x_k1 / x_k0)，残差项 r = GMV / Π x_k 的效应同理计算，
+    因此对每个分组都有 Σ效应 = GMV_1 - GMV_0
+
+    Args:
+        current_gmv: 当前期GMV（标量或按分组对齐的数组）
+        previous_gmv: 上期GMV
+        current_factors: 当前期因子值 {因子名: 标量或数组}
+        previous_factors: 上期因子值
+
+    Returns:
+        {因子名: 效应值, 'residual': 残差效应}，形状与输入一致
+    """
+    if not PANDAS_AVAILABLE:
+        return _lmdi_decompose_simple(current_gmv, previous_gmv, current_factors, previous_factors)
+
+    def positive(values: Any) -> Any:
+        values = np.asarray(values, dtype=float)
+        return np.where(values > 0, values, EPSILON)
+
+    gmv_1 = positive(current_gmv)
+    gmv_0 = positive(previous_gmv)
+    weight = log_mean(gmv_1, gmv_0)
+    # 两期GMV均为0的分组没有变化可分解
+    weight = np.where((gmv_1 <= EPSILON) & (gmv_0 <= EPSILON), 0.0, weight)
+
+    effects = {}
+    residual_log = np.log(gmv_1) - np.log(gmv_0)
+    for factor in current_factors:
+        log_ratio = np.log(positive(current_factors[factor])) - np.log(positive(previous_factors[factor]))
+        effects[factor] = weight * log_ratio
+        residual_log = residual_log - log_ratio
+    effects[RESIDUAL] = weight * residual_log
+    return effects
+
+
+def _lmdi_decompose_simple(current_gmv: float, previous_gmv: float,
+                           current_factors: Dict[str, float],
+                           previous_factors: Dict[str, float]) -> Dict[str, float]:
+    """简化模式：单组标量LMDI分解"""
+    def positive(value: Any) -> float:
+        value = float(value or 0)
+        return value if value > 0 else EPSILON
+
+    gmv_1 = positive(current_gmv)
+    gmv_0 = positive(previous_gmv)
+    weight = 0.0 if gmv_1 <= EPSILON and gmv_0 <= EPSILON else log_mean(gmv_1, gmv_0)
+
+    effects = {}
+    residual_log = math.log(gmv_1) - math.log(gmv_0)
+    for factor in current_factors:
+        log_ratio = math.log(positive(current_factors[factor])) - math.log(positive(previous_factors[factor]))
+        effects[factor] = weight * log_ratio
+        residual_log -= log_ratio
+    effects[RESIDUAL] = weight * residual_log
+    return effects
+
+
+def contribution_shares(effects: Dict[str, Any], gmv_change: Any) -> Dict[str, Any]:
+    """
+    将效应换算为占GMV变化量的百分比（同一分组内各项之和为100）
+
+    Args:
+        effects: lmdi_decompose 的返回值
+        gmv_change: GMV变化量
+
+    Returns:
+        {因子名: 贡献度百分比}
+    """
+    if not PANDAS_AVAILABLE:
+        return {
+            name: (effect / gmv_change * 100) if gmv_change != 0 else 0.0
+            for name, effect in effects.items()
+        }
+
+    change = np.asarray(gmv_change, dtype=float)
+    shares = {}
+    for name, effect in effects.items():
+        effect = np.asarray(effect, dtype=float)
+        out = np.zeros(np.broadcast(effect, change).shape)
+        np.divide(effect, change, out=out, where=change != 0)
+        shares[name] = out * 100
+    return shares
+
+
+class GMVDecomposer:
+    """按维度分组的GMV驱动因素分解器"""
+
+    def __init__(self, current_data: Any, previous_data: Any,
+                 factors: Optional[List[str]] = None):
+        """
+        初始化分解器
+
+        Args:
+            current_data: 当前期明细数据（DataFrame）
+            previous_data: 上期明细数据
+            factors: 参与分解的因子列（漏斗顺序，笔单价在最后），默认取数据中存在的
+                DAU/转化率/频次/笔单价
+        """
+        self.current_data = current_data
+        self.previous_data = previous_data
+        candidates = factors or DRIVER_FACTORS
+        self.factors = [f for f in candidates if f in current_data.columns and f in previous_data.columns]
+
+    def _aggregate(self, data: Any, dimensions: List[str]) -> Any:
+        """按维度一次性汇总GMV与各级漏斗量"""
+        columns = funnel_columns(data, self.factors)
+        if not dimensions:
+            return columns.sum().to_frame().T
+        return columns.groupby([data[d] for d in dimensions], observed=True).sum()
+
+    def decompose(self, dimensions: Optional[List[str]] = None) -> Any:
+        """
+        按维度分组分解GMV变化
+
+        每个分组内各效应之和等于该分组GMV变化量；各分组GMV变化量之和等于总变化量，
+        因此同一下钻层级的效应可直接相加
+
+        Args:
+            dimensions: 分组维度列表，为空时分解总体
+
+        Returns:
+            DataFrame，每行一个分组，包含 gmv_current/gmv_previous/gmv_change、
+            各因子的 {因子}_effect 与 {因子}_contribution，以及 share_of_total
+        """
+        dimensions = list(dimensions or [])
+        current = self._aggregate(self.current_data, dimensions)
+        previous = self._aggregate(self.previous_data, dimensions)
+        current, previous = current.align(previous, join='outer', fill_value=0)
+
+        gmv_current = current['gmv'].to_numpy(dtype=float)
+        gmv_previous = previous['gmv'].to_numpy(dtype=float)
+        gmv_change = gmv_current - gmv_previous
+
+        effects = lmdi_decompose(
+            gmv_current, gmv_previous,
+            funnel_factors(current, self.factors)[1],
+            funnel_factors(previous, self.factors)[1]
+        )
+        shares = contribution_shares(effects, gmv_change)
+
+        table = pd.DataFrame({
+            'gmv_current': gmv_current,
+            'gmv_previous': gmv_previous,
+            'gmv_change': gmv_change
+        }, index=current.index if dimensions else pd.Index(['total']))
+        for name in self.factors + [RESIDUAL]:
+            table[f'{name}_effect'] = effects[name]
+        for name in self.factors + [RESIDUAL]:
+            table[f'{name}_contribution'] = shares[name]
+
+        total_change = gmv_change.sum()
+        table['share_of_total'] = gmv_change / total_change * 100 if total_change != 0 else 0.0
+        return table
+
+    def decompose_levels(self, levels: Optional[Dict[str, List[str]]] = None) -> Dict[str, Any]:
+        """
+        对多个下钻层级分别分解
+
+        Args:
+            levels: {层级名: 维度列表}，默认 总体/品类/区域
+
+        Returns:
+            {层级名: 分解结果表}
+        """
+        if levels is None:
+            levels = {'total': []}
+            for dimension in ['category', 'region', 'store_id']:
+                if dimension in self.current_data.columns:
+                    levels[dimension] = [dimension]
+        return {name: self.decompose(dimensions) for name, dimensions in levels.items()}
@@ -0,0 +1,416 @@
+#!/usr/bin/env python3
+"""
+批量 Holt-Winters 指数平滑预测
+水平 / 趋势（可阻尼）/ 加法季节三分量的递推按时间步推进、在 (参数组合 × 序列) 矩阵上向量化计算，
+成千上万条序列一次拟合；每条序列按样本内一步误差平方和从参数网格中选出最优组合。
+滚动起点回测只在首个起点拟合一次，之后用新观测继续推进已拟合的状态，不再重新拟合
+"""
+
+import statistics
+from typing import Dict, List, Any, Optional, Union
+
+# 条件导入
+try:
+    import pandas as pd
+    import numpy as np
+    PANDAS_AVAILABLE = True
+except ImportError:
+    PANDAS_AVAILABLE = False
+
+from .seasonality import infer_step, time_steps
+
+# 误差修正形式 ETS(A,Ad,A) 的平滑参数网格：
+# level += φ·trend + α·e，trend = φ·trend + β·e，season += γ·e
+DEFAULT_PARAM_GRID = {
+    'alpha': [0.05, 0.2, 0.5],
+    'beta': [0.0, 0.02],
+    'gamma': [0.05, 0.2],
+    'phi': [0.9, 0.98]
+}
+# 各数据频率的默认季节周期
+DEFAULT_PERIODS = {'D': 7, 'W': 52, 'M': 12, 'Q': 4}
+# 每块同时拟合的序列数（控制 参数组合 × 序列 状态矩阵的大小）
+DEFAULT_SERIES_CHUNK = 4096
+MIN_POINTS = 3
+
+
+def _nanmean(values: Any, axis: int) -> Any:
+    """忽略缺失值的均值（全缺失时为 NaN，且不产生警告）"""
+    observed = ~np.isnan(values)
+    counts = observed.sum(axis=axis)
+    sums = np.where(observed, values, 0.0).sum(axis=axis)
+    return np.where(counts > 0, sums / np.maximum(counts, 1), np.nan)
+
+
+def default_period(freq: Optional[str]) -> Optional[int]:
+    """按数据频率给出默认季节周期（未知频率不建季节分量）"""
+    return DEFAULT_PERIODS.get(freq)
+
+
+def initial_state(matrix: Any, period: int) -> Dict[str, Any]:
+    """
+    由前两个季节周期估计初始状态
+
+    Args:
+        matrix: (序列数, 长度) 观测矩阵，缺失值为 NaN
+        period: 季节周期，1 表示无季节分量
+
+    Returns:
+        {'level', 'trend', 'season'}；level 对应首个观测之前一期，season 形状为 (period, 序列数)
+    """
+    n_series, length = matrix.shape
+    block = period if period > 1 else max(1, min(length // 2, 12))
+    first = _nanmean(matrix[:, :block], axis=1)
+    if length >= 2 * block:
+        trend = (_nanmean(matrix[:, block:2 * block], axis=1) - first) / block
+    else:
+        trend = np.zeros(n_series)
+    fallback = _nanmean(matrix, axis=1)
+    first = np.where(np.isnan(first), fallback, first)
+    first = np.nan_to_num(first)
+    trend = np.nan_to_num(trend)
+    # first 为第一段的均值，对应时刻 (block-1)/2；回推到首个观测之前一期
+    level = first - trend * ((block - 1) / 2 + 1)
+
+    season = np.zeros((period, n_series))
+    if period > 1:
+        cycles = min(2, length // period)
+        span = cycles * period
+        times = np.arange(span)
+        baseline = first[:, None] + trend[:, None] * (times - (period - 1) / 2)
+        deviations = (matrix[:, :span] - baseline).reshape(n_series, cycles, period)
+        season = np.nan_to_num(_nanmean(deviations, axis=1)).T
+        season -= season.mean(axis=0)
+    return {'level': level, 'trend': trend, 'season': season}
+
+
+def _smooth(values: Any, level: Any, trend: Any, season: Any, start: int,
+            alpha: Any, beta: Any, gamma: Any, phi: Any) -> Any:
+    """
+    按时间步推进平滑递推（原地更新状态），缺失观测只做状态外推
+
+    Args:
+        values: (序列数, 步数) 观测矩阵
+        level / trend: 形状可广播为 (参数组合, 序列数) 或 (序列数,)
+        season: (周期, ...) 季节状态，第 t 步使用 season[t % 周期]
+        start: 首列观测的全局时间步
+        alpha / beta / gamma / phi: 平滑参数，可与状态广播
+
+    Returns:
+        一步预测误差平方和，形状与 level 相同
+    """
+    period = season.shape[0]
+    sse = np.zeros(np.broadcast_shapes(level.shape, values.shape[:1]))
+    for t in range(values.shape[1]):
+        seasonal = season[(start + t) % period]
+        damped = phi * trend
+        error = values[:, t] - (level + damped + seasonal)
+        np.nan_to_num(error, copy=False)
+        sse += error * error
+        level += damped + alpha * error
+        trend[...] = damped + beta * error
+        seasonal += gamma * error
+    return sse
+
+
+class HoltWintersForecaster:
+    """批量 Holt-Winters 预测器：fit 选参并得到末期状态，update 用新观测继续推进，forecast 外推"""
+
+    def __init__(self, period: Optional[int] = None, param_grid: Optional[Dict[str, List[float]]] = None,
+                 chunk_size: int = DEFAULT_SERIES_CHUNK):
+        """
+        初始化预测器
+
+        Args:
+            period: 季节周期，为空或小于 2 时不建季节分量
+            param_grid: 平滑参数网格 {'alpha', 'beta', 'gamma', 'phi'}，缺省项使用默认值
+            chunk_size: 每块同时拟合的序列数
+        """
+        self.period = period if period and period > 1 else 1
+        self.param_grid = {**DEFAULT_PARAM_GRID, **(param_grid or {})}
+        if self.period == 1:
+            self.param_grid['gamma'] = [0.0]
+        self.chunk_size = chunk_size
+        self.state = None
+
+    def fit(self, matrix: Any) -> 'HoltWintersForecaster':
+        """
+        拟合全部序列：每块序列同时跑完全部参数组合，按一步误差平方和逐序列选参
+
+        Args:
+            matrix: (序列数, 长度) 观测矩阵，缺失值为 NaN；单条序列可为一维数组
+
+        Returns:
+            self
+        """
+        matrix = np.atleast_2d(np.asarray(matrix, dtype=float))
+        n_series, length = matrix.shape
+        if length < MIN_POINTS:
+            raise ValueError(f"序列长度至少为 {MIN_POINTS}")
+        if length < 2 * self.period:
+            self.period = 1
+            self.param_grid['gamma'] = [0.0]
+
+        names = ['alpha', 'beta', 'gamma', 'phi']
+        grid = np.array(np.meshgrid(*[self.param_grid[name] for name in names], indexing='ij'),
+                        dtype=float).reshape(len(names), -1)
+        params = {name: grid[i][:, None] for i, name in enumerate(names)}
+        n_params = grid.shape[1]
+
+        state = {
+            'level': np.zeros(n_series), 'trend': np.zeros(n_series),
+            'season': np.zeros((self.period, n_series)), 'sse': np.zeros(n_series),
+            **{name: np.zeros(n_series) for name in names}
+        }
+        for start in range(0, n_series, self.chunk_size):
+            block = slice(start, start + self.chunk_size)
+            values = matrix[block]
+            size = len(values)
+            init = initial_state(values, self.period)
+            level = np.repeat(init['level'][None], n_params, axis=0)
+            trend = np.repeat(init['trend'][None], n_params, axis=0)
+            season = np.repeat(init['season'][:, None], n_params, axis=1)
+            sse = _smooth(values, level, trend, season, 0, **params)
+
+            best = np.argmin(sse, axis=0)
+            columns = np.arange(size)
+            state['level'][block] = level[best, columns]
+            state['trend'][block] = trend[best, columns]
+            state['season'][:, block] = season[:, best, columns]
+            state['sse'][block] = sse[best, columns]
+            for i, name in enumerate(names):
+                state[name][block] = grid[i][best]
+
+        state['n_errors'] = (~np.isnan(matrix)).sum(axis=1)
+        state['n_obs'] = length
+        self.state = state
+        return self
+
+    def update(self, matrix: Any) -> 'HoltWintersForecaster':
+        """
+        用新观测（紧接已拟合区间的后续列）继续推进状态，参数保持不变
+
+        Args:
+            matrix: (序列数, 新增步数) 观测矩阵
+
+        Returns:
+            self
+        """
+        if self.state is None:
+            raise ValueError("请先调用 fit")
+        state = self.state
+        matrix = np.asarray(matrix, dtype=float).reshape(len(state['level']), -1)
+        state['sse'] += _smooth(matrix, state['level'], state['trend'], state['season'], state['n_obs'],
+                                state['alpha'], state['beta'], state['gamma'], state['phi'])
+        state['n_errors'] = state['n_errors'] + (~np.isnan(matrix)).sum(axis=1)
+        state['n_obs'] += matrix.shape[1]
+        return self
+
+    def forecast(self, horizon: int, confidence: float = 0.95) -> Dict[str, Any]:
+        """
+        从当前状态外推
+
+        预测区间按 ETS 加法误差模型的 h 步方差 σ²(1 + Σ_{j<h} c_j²)，
+        c_j = α + β(φ + … + φ^j) + γ·[j 为周期整数倍]
+
+        Args:
+            horizon: 预测步数
+            confidence: 区间置信水平
+
+        Returns:
+            {'forecast', 'lower', 'upper'}，均为 (序列数, horizon) 矩阵
+        """
+        if self.state is None:
+            raise ValueError("请先调用 fit")
+        state = self.state
+        steps = np.arange(1, horizon + 1)
+        phi = state['phi'][:, None]
+        damped_sum = np.cumsum(phi ** steps, axis=1)
+        slots = (state['n_obs'] + steps - 1) % self.period
+        forecast = state['level'][:, None] + damped_sum * state['trend'][:, None] + state['season'][slots].T
+
+        sigma2 = state['sse'] / np.maximum(state['n_errors'], 1)
+        seasonal_hit = (steps % self.period == 0) if self.period > 1 else np.zeros(horizon, dtype=bool)
+        c = (state['alpha'][:, None] + state['beta'][:, None] * damped_sum
+             + state['gamma'][:, None] * seasonal_hit)
+        accumulated = np.concatenate([np.zeros((len(c), 1)), np.cumsum(c[:, :-1] ** 2, axis=1)], axis=1)
+        margin = statistics.NormalDist().inv_cdf(0.5 + confidence / 2) * np.sqrt(sigma2[:, None] * (1 + accumulated))
+        return {'forecast': forecast, 'lower': forecast - margin, 'upper': forecast + margin}
+
+    def parameters(self) -> Any:
+        """每条序列选出的平滑参数与样本内误差"""
+        state = self.state
+        return pd.DataFrame({
+            'alpha': state['alpha'], 'beta': state['beta'], 'gamma': state['gamma'], 'phi': state['phi'],
+            'period': self.period,
+            'rmse': np.sqrt(state['sse'] / np.maximum(state['n_errors'], 1))
+        })
+
+    def state_dict(self) -> Dict[str, Any]:
+        """可 JSON 序列化的拟合状态（数组转为列表）"""
+        if self.state is None:
+            raise ValueError("请先调用 fit")
+        state = {key: value.tolist() if hasattr(value, 'tolist') else value for key, value in self.state.items()}
+        return {'period': self.period, 'state': state}
+
+    @classmethod
+    def from_state(cls, saved: Dict[str, Any]) -> 'HoltWintersForecaster':
+        """
+        由 state_dict 的结果恢复预测器，可直接 update / forecast
+
+        Args:
+            saved: state_dict() 的返回值
+
+        Returns:
+            预测器
+        """
+        model = cls(saved['period'])
+        state = {key: np.asarray(value, dtype=float) for key, value in saved['state'].items() if key != 'n_obs'}
+        state['n_errors'] = state['n_errors'].astype(np.int64)
+        state['n_obs'] = int(saved['state']['n_obs'])
+        model.state = state
+        return model
+
+
+def _errors(forecast: Dict[str, Any], actual: Any) -> Dict[str, Any]:
+    """单个起点的误差分量（缺失的真实值不计入）"""
+    error = forecast['forecast'] - actual
+    observed = ~np.isnan(actual)
+    ape = np.abs(error) / np.abs(actual)
+    ape[~observed | (actual == 0)] = np.nan
+    covered = (actual >= forecast['lower']) & (actual <= forecast['upper'])
+    return {'error': error, 'ape': ape, 'covered': np.where(observed, covered, np.nan), 'actual': actual}
+
+
+def rolling_origin_backtest(matrix: Any, horizon: int, n_origins: int = 3, step: Optional[int] = None,
+                            period: Optional[int] = None, param_grid: Optional[Dict[str, List[float]]] = None,
+                            confidence: float = 0.95) -> Dict[str, Any]:
+    """
+    滚动起点回测
+
+    首个起点之前的数据用于拟合（选参 + 状态），此后每个起点只把上一段观测送入 update 推进状态，
+    因此 n 个起点的总代价约等于一次拟合
+
+    Args:
+        matrix: (序列数, 长度) 观测矩阵；单条序列可为一维数组
+        horizon: 每个起点的预测步数
+        n_origins: 起点个数
+        step: 相邻起点间隔，默认等于 horizon
+        period: 季节周期
+        param_grid: 平滑参数网格
+        confidence: 区间置信水平
+
+    Returns:
+        {'mae', 'rmse', 'mape', 'accuracy_score', 'interval_coverage', 'origins', 'series_mae', 'parameters'}
+    """
+    matrix = np.atleast_2d(np.asarray(matrix, dtype=float))
+    step = step or horizon
+    length = matrix.shape[1]
+    first = length - horizon - (n_origins - 1) * step
+    if first < MIN_POINTS:
+        raise ValueError("序列长度不足以完成滚动起点回测")
+
+    model = HoltWintersForecaster(period, param_grid).fit(matrix[:, :first])
+    origins, parts = [], []
+    origin = first
+    for i in range(n_origins):
+        part = _errors(model.forecast(horizon, confidence), matrix[:, origin:origin + horizon])
+        abs_error = np.abs(part['error'])
+        origins.append({
+            'origin': int(origin),
+            'mae': float(np.nanmean(abs_error)),
+            'rmse': float(np.sqrt(np.nanmean(part['error'] ** 2))),
+            'mape': float(np.nanmean(part['ape']) * 100) if np.isfinite(part['ape']).any() else None
+        })
+        parts.append(part)
+        if i < n_origins - 1:
+            model.update(matrix[:, origin:origin + step])
+            origin += step
+
+    error = np.concatenate([p['error'] for p in parts], axis=1)
+    ape = np.concatenate([p['ape'] for p in parts], axis=1)
+    actual = np.concatenate([p['actual'] for p in parts], axis=1)
+    mae = float(np.nanmean(np.abs(error)))
+    mean_actual = float(np.nanmean(np.abs(actual)))
+    return {
+        'mae': mae,
+        'rmse': float(np.sqrt(np.nanmean(error ** 2))),
+        'mape': float(np.nanmean(ape) * 100) if np.isfinite(ape).any() else None,
+        'accuracy_score': max(0.0, 1 - mae / mean_actual) if mean_actual > 0 else 0.0,
+        'interval_coverage': float(np.nanmean(np.concatenate([p['covered'] for p in parts], axis=1))),
+        'origins': origins,
+        'series_mae': _nanmean(np.abs(error), axis=1),
+        'parameters': model.parameters()
+    }
+
+
+def series_matrix(data: Any, series_columns: Union[str, List[str]], time_column: str,
+                  value_column: str) -> Dict[str, Any]:
+    """
+    长表转为 (序列数, 时间步) 矩阵，所有序列对齐到同一时间轴，缺失日期为 NaN
+
+    Args:
+        data: 长表数据
+        series_columns: 序列键列
+        time_column: 时间列
+        value_column: 数值列
+
+    Returns:
+        {'keys': 序列键 DataFrame, 'matrix', 'times': 时间轴, 'step': 间隔, 'freq': 频率代码}；同一时间点保留最后一个值
+    """
+    keys = [series_columns] if isinstance(series_columns, str) else list(series_columns)
+    subset = data.loc[data[value_column].notna(), keys + [time_column, value_column]]
+    times = subset[time_column]
+    if not (pd.api.types.is_datetime64_any_dtype(times) or pd.api.types.is_numeric_dtype(times)):
+        times = pd.to_datetime(times)
+    step, freq = infer_step(pd.Series(np.unique(times.to_numpy())))
+    origin = times.min()
+    steps = time_steps(times, np.repeat(origin, len(times)), step)
+
+    groups = subset.groupby(keys, sort=True, observed=True)
+    codes = groups.ngroup().to_numpy()
+    matrix = np.full((groups.ngroups, int(steps.max()) + 1), np.nan)
+    matrix[codes, steps] = subset[value_column].to_numpy(dtype=float)
+    key_frame = subset.iloc[np.unique(codes, return_index=True)[1]][keys].reset_index(drop=True)
+    return {
+        'keys': key_frame,
+        'matrix': matrix,
+        'times': pd.Series(origin + np.arange(matrix.shape[1]) * step),
+        'step': step,
+        'freq': freq
+    }
+
+
+def batch_forecast(data: Any, series_columns: Union[str, List[str]], value_column: str,
+                   time_column: str = 'date', horizon: int = 30, period: Optional[int] = None,
+                   confidence: float = 0.95, param_grid: Optional[Dict[str, List[float]]] = None) -> Any:
+    """
+    多序列批量预测
+
+    Args:
+        data: 长表数据，每个序列键构成一条序列
+        series_columns: 序列键列（如 store_id）
+        value_column: 预测的数值列
+        time_column: 时间列
+        horizon: 预测步数
+        period: 季节周期，为空时按数据频率取默认值（日数据为 7）
+        confidence: 区间置信水平
+        param_grid: 平滑参数网格
+
+    Returns:
+        长表：序列键、time_column、step、forecast、lower、upper
+    """
+    table = series_matrix(data, series_columns, time_column, value_column)
+    period = period or default_period(table['freq'])
+    model = HoltWintersForecaster(period, param_grid).fit(table['matrix'])
+    result = model.forecast(horizon, confidence)
+
+    n_series = len(table['keys'])
+    times = table['times']
+    frame = table['keys'].loc[np.repeat(np.arange(n_series), horizon)].reset_index(drop=True)
+    steps = pd.Series(np.tile(np.arange(1, horizon + 1), n_series))
+    frame[time_column] = times.iloc[-1] + steps * table['step']
+    frame['step'] = steps
+    for column in ('forecast', 'lower', 'upper'):
+        frame[column] = result[column].ravel()
+    return frame
@@ -13,6 +13,11 @@ from typing import Dict, List, Tuple, Any, Optional
 from dataclasses import dataclass
 from datetime import datetime
 
+from .gmv_decomposition import (
+    lmdi_decompose, contribution_shares, funnel_columns, funnel_sums, funnel_factors,
+    GMVDecomposer, DRIVER_FACTORS
+)
+
 @dataclass
 class GMVMetrics:
     """GMV相关指标"""
@@ -89,6 +94,87 @@ class SimpleDataProcessor:
         else:
             return data if isinstance(data, list) else []
 
+def grouped_gini(values: Any, groups: Any = None, weights: Any = None) -> Any:
+    """
+    向量化计算多组基尼系数（一次排序，支持权重）
+    
+    先按 (组, 值) 联合排序一次，再用累计和与分组偏移一次性得到每组的洛伦兹曲线面积：
+    G = 1 - Σ w_i (C_{i-1} + C_i) / (W · C_n)，其中 C 为组内加权累计值。
+    
+    Args:
+        values: 数值数组
+        groups: 与 values 等长的分组标签，None 表示整体作为一组
+        weights: 与 values 等长的非负权重，None 表示等权
+        
+    Returns:
+        pandas 可用时返回以组为索引的 Series，否则返回 {组: 基尼系数} 字典；
+        组内总量为0时基尼系数取0
+    """
+    if not NUMPY_AVAILABLE:
+        return _grouped_gini_simple(values, groups, weights)
+    
+    x = np.asarray(values, dtype=float)
+    w = np.ones_like(x) if weights is None else np.asarray(weights, dtype=float)
+    if groups is None:
+        codes = np.zeros(len(x), dtype=np.int64)
+        uniques = np.array([0])
+    elif PANDAS_AVAILABLE:
+        codes, uniques = pd.factorize(np.asarray(groups), sort=True)
+    else:
+        uniques, codes = np.unique(np.asarray(groups), return_inverse=True)
+    
+    if len(x) == 0:
+        result = np.zeros(len(uniques))
+        return pd.Series(result, index=uniques) if PANDAS_AVAILABLE else dict(zip(uniques, result))
+    
+    # 一次排序：先按值排序，再按组稳定排序，得到组内有序的排列（比 lexsort 更快）
+    order = np.argsort(x)
+    order = order[np.argsort(codes[order], kind='stable')]
+    x, w, codes = x[order], w[order], codes[order]
+    
+    starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]])
+    counts = np.diff(np.r_[starts, len(x)])
+    
+    wx = w * x
+    cum = np.cumsum(wx)
+    # 减去组前累计量得到组内累计值
+    cum_in_group = cum - np.repeat(cum[starts] - wx[starts], counts)
+    lorenz = np.add.reduceat(w * (2 * cum_in_group - wx), starts)
+    total_weight = np.add.reduceat(w, starts)
+    total_value = cum_in_group[np.r_[starts[1:], len(x)] - 1]
+    
+    denominator = total_weight * total_value
+    gini = np.zeros(len(uniques))
+    valid = denominator != 0
+    gini[codes[starts][valid]] = 1 - lorenz[valid] / denominator[valid]
+    
+    if PANDAS_AVAILABLE:
+        return pd.Series(gini, index=uniques)
+    return dict(zip(uniques.tolist(), gini.tolist()))
+
+def _grouped_gini_simple(values: Any, groups: Any = None, weights: Any = None) -> Dict[Any, float]:
+    """简化模式的分组加权基尼系数"""
+    values = list(values)
+    groups = [0] * len(values) if groups is None else list(groups)
+    weights = [1.0] * len(values) if weights is None else list(weights)
+    
+    buckets = {}
+    for g, x, w in zip(groups, values, weights):
+        buckets.setdefault(g, []).append((x, w))
+    
+    result = {}
+    for g, pairs in buckets.items():
+        pairs.sort()
+        cumulative = lorenz = total_weight = 0.0
+        for x, w in pairs:
+            previous = cumulative
+            cumulative += w * x
+            lorenz += w * (previous + cumulative)
+            total_weight += w
+        denominator = total_weight * cumulative
+        result[g] = 1 - lorenz / denominator if denominator != 0 else 0.0
+    return result
+
 class MetricsAnalyzer:
     """指标分析类，负责数据分析和洞察生成"""
     
@@ -117,31 +203,19 @@ class MetricsAnalyzer:
         """
         metrics = {}
         
-        # 使用简化处理器或pandas
+        # 使用简化处理器或pandas：汇总GMV与各级漏斗量，由合计值推出各驱动因子
         if PANDAS_AVAILABLE and hasattr(self.current_data, 'sum'):
             # pandas模式
-            current_gmv = self.current_data['gmv'].sum()
-            previous_gmv = self.previous_data['gmv'].sum()
-            current_dau = self.current_data['dau'].sum()
-            previous_dau = self.previous_data['dau'].sum()
-            current_frequency = self.current_data['frequency'].mean()
-            previous_frequency = self.previous_data['frequency'].mean()
-            current_order_price = self.current_data['order_price'].mean()
-            previous_order_price = self.previous_data['order_price'].mean()
-            current_conversion_rate = self.current_data['conversion_rate'].mean()
-            previous_conversion_rate = self.previous_data['conversion_rate'].mean()
+            current_sums = funnel_columns(self.current_data, DRIVER_FACTORS).sum()
+            previous_sums = funnel_columns(self.previous_data, DRIVER_FACTORS).sum()
         else:
             # 简化模式
-            current_gmv = self.processor.sum_column(self.current_dict_list, 'gmv')
-            previous_gmv = self.processor.sum_column(self.previous_dict_list, 'gmv')
-            current_dau = self.processor.sum_column(self.current_dict_list, 'dau')
-            previous_dau = self.processor.sum_column(self.previous_dict_list, 'dau')
-            current_frequency = self.processor.mean_column(self.current_dict_list, 'frequency')
-            previous_frequency = self.processor.mean_column(self.previous_dict_list, 'frequency')
-            current_order_price = self.processor.mean_column(self.current_dict_list, 'order_price')
-            previous_order_price = self.processor.mean_column(self.previous_dict_list, 'order_price')
-            current_conversion_rate = self.processor.mean_column(self.current_dict_list, 'conversion_rate')
-            previous_conversion_rate = self.processor.mean_column(self.previous_dict_list, 'conversion_rate')
+            current_sums = funnel_sums(self.current_dict_list, DRIVER_FACTORS)
+            previous_sums = funnel_sums(self.previous_dict_list, DRIVER_FACTORS)
+        current_gmv = float(current_sums['gmv'])
+        previous_gmv = float(previous_sums['gmv'])
+        current_values, current_factors = funnel_factors(current_sums, DRIVER_FACTORS)
+        previous_values, previous_factors = funnel_factors(previous_sums, DRIVER_FACTORS)
         
         # 安全的除法运算
         def safe_divide(a, b):
@@ -156,37 +230,19 @@ class MetricsAnalyzer:
             contribution=100.0
         )
         
-        dau_change_rate = safe_divide(current_dau - previous_dau, previous_dau)
-        metrics['dau'] = GMVMetrics(
-            current=current_dau,
-            previous=previous_dau,
-            change_rate=dau_change_rate,
-            contribution=safe_divide(dau_change_rate, gmv_change_rate) * 100 if gmv_change_rate != 0 else 0
-        )
-        
-        frequency_change_rate = safe_divide(current_frequency - previous_frequency, previous_frequency)
-        metrics['frequency'] = GMVMetrics(
-            current=current_frequency,
-            previous=previous_frequency,
-            change_rate=frequency_change_rate,
-            contribution=safe_divide(frequency_change_rate, gmv_change_rate) * 100 if gmv_change_rate != 0 else 0
-        )
-        
-        order_price_change_rate = safe_divide(current_order_price - previous_order_price, previous_order_price)
-        metrics['order_price'] = GMVMetrics(
-            current=current_order_price,
-            previous=previous_order_price,
-            change_rate=order_price_change_rate,
-            contribution=safe_divide(order_price_change_rate, gmv_change_rate) * 100 if gmv_change_rate != 0 else 0
-        )
-        
-        conversion_rate_change = safe_divide(current_conversion_rate - previous_conversion_rate, previous_conversion_rate)
-        metrics['conversion_rate'] = GMVMetrics(
-            current=current_conversion_rate,
-            previous=previous_conversion_rate,
-            change_rate=conversion_rate_change,
-            contribution=safe_divide(conversion_rate_change, gmv_change_rate) * 100 if gmv_change_rate != 0 else 0
-        )
+        # 驱动因素贡献度：LMDI加性分解，因子之积等于GMV，各因素贡献度之和为100%
+        effects = lmdi_decompose(current_gmv, previous_gmv, current_factors, previous_factors)
+        shares = contribution_shares(effects, current_gmv - previous_gmv)
+        
+        for metric in ['dau', 'frequency', 'order_price', 'conversion_rate']:
+            current_value = float(current_values[metric])
+            previous_value = float(previous_values[metric])
+            metrics[metric] = GMVMetrics(
+                current=current_value,
+                previous=previous_value,
+                change_rate=safe_divide(current_value - previous_value, previous_value),
+                contribution=float(shares[metric])
+            )
         
         return metrics
     
@@ -343,45 +399,75 @@ class MetricsAnalyzer:
         
         return metrics
     
-    def calculate_gini_coefficient(self, data) -> float:
+    def calculate_gini_coefficient(self, data, weights=None) -> float:
         """
         计算基尼系数（支持简化模式）
         
         Args:
             data: 数据序列或列表
+            weights: 可选权重序列
             
         Returns:
             基尼系数
         """
-        if NUMPY_AVAILABLE and hasattr(data, 'values'):
-            # numpy模式
-            sorted_data = np.sort(data.values if hasattr(data, 'values') else data)
-            n = len(sorted_data)
-            if n == 0:
-                return 0.0
-            index = np.arange(1, n + 1) / n
-            return ((2 * index - n - 1) * sorted_data).sum() / (n * sorted_data.sum())
-        else:
-            # 简化模式
-            if isinstance(data, (list, tuple)):
-                sorted_data = sorted(data)
-            else:
-                # 假设是某种可迭代对象
-                try:
-                    sorted_data = sorted(list(data))
-                except:
-                    return 0.0
-            
-            n = len(sorted_data)
-            if n == 0 or sum(sorted_data) == 0:
-                return 0.0
-            
-            # 简化的基尼系数计算
-            cumsum = 0
-            for i, val in enumerate(sorted_data):
-                cumsum += (2 * (i + 1) - n - 1) * val
+        try:
+            values = data.values if hasattr(data, 'values') else list(data)
+        except TypeError:
+            return 0.0
+        if weights is not None and hasattr(weights, 'values'):
+            weights = weights.values
+        
+        result = grouped_gini(values, weights=weights)
+        return float(result[0]) if len(result) else 0.0
+    
+    def calculate_grouped_gini(self, value_column: str, group_column: str,
+                               across_column: Optional[str] = None, agg: str = 'mean',
+                               weight_column: Optional[str] = None, data: Any = None) -> Dict[Any, float]:
+        """
+        批量计算各组的基尼系数
+        
+        例如 value_column='order_price', group_column='region', across_column='category'
+        表示每个区域内各品类笔单价的集中度；value_column='gmv', group_column='category',
+        across_column='store_id', agg='sum' 表示每个品类在门店间的GMV集中度。
+        
+        Args:
+            value_column: 数值列
+            group_column: 分组列（每组输出一个基尼系数）
+            across_column: 组内先按该列聚合后再计算，None 表示直接使用明细
+            agg: across_column 聚合方式
+            weight_column: 权重列（与 across_column 同时使用时按和聚合）
+            data: 数据，默认使用当前期数据
             
-            return cumsum / (n * sum(sorted_data))
+        Returns:
+            {组: 基尼系数}
+        """
+        data = self.current_data if data is None else data
+        
+        if PANDAS_AVAILABLE and hasattr(data, 'groupby'):
+            if across_column is not None:
+                spec = {value_column: agg}
+                if weight_column:
+                    spec[weight_column] = 'sum'
+                data = data.groupby([group_column, across_column], observed=True).agg(spec).reset_index()
+            weights = data[weight_column].values if weight_column else None
+            return grouped_gini(data[value_column].values, data[group_column].values, weights).to_dict()
+        
+        rows = self.processor.to_dict_list(data)
+        if across_column is not None:
+            buckets = {}
+            for row in rows:
+                buckets.setdefault((row.get(group_column), row.get(across_column)), []).append(row)
+            rows = []
+            for (group, _), items in buckets.items():
+                reducer = self.processor.sum_column if agg == 'sum' else self.processor.mean_column
+                row = {group_column: group, value_column: reducer(items, value_column)}
+                if weight_column:
+                    row[weight_column] = self.processor.sum_column(items, weight_column)
+                rows.append(row)
+        weights = [row.get(weight_column, 0) for row in rows] if weight_column else None
+        return grouped_gini(
+            [row.get(value_column, 0) for row in rows], [row.get(group_column) for row in rows], weights
+        )
     
     def identify_top_declining_categories(self, metrics: List[CategoryMetrics], top_n: int = 3) -> List[Dict]:
         """
@@ -431,7 +517,8 @@ class MetricsAnalyzer:
             for m in declining
         ]
     
-    def generate_improvement_suggestions(self, metrics: Dict[str, GMVMetrics]) -> List[str]:
+    @staticmethod
+    def generate_improvement_suggestions(metrics: Dict[str, GMVMetrics]) -> List[str]:
         """
         生成改进建议
         
@@ -495,6 +582,11 @@ class MetricsAnalyzer:
             category_gini = self.calculate_gini_coefficient(category_prices)
             region_gini = self.calculate_gini_coefficient(region_prices)
         
+        # 分组集中度：各区域内品类间笔单价差异、各品类内区域间笔单价差异，以及转化率维度基尼系数
+        gini_by_region = self.calculate_grouped_gini('order_price', 'region', across_column='category')
+        gini_by_category = self.calculate_grouped_gini('order_price', 'category', across_column='region')
+        conversion_gini = self._calculate_conversion_gini()
+        
         # 识别主要问题
         top_declining_categories = self.identify_top_declining_categories(category_metrics)
         top_declining_regions = self.identify_top_declining_regions(region_metrics)
@@ -502,13 +594,93 @@ class MetricsAnalyzer:
         # 生成改进建议
         improvement_suggestions = self.generate_improvement_suggestions(gmv_metrics)
         
+        # GMV驱动因素分层分解
+        gmv_decomposition = self.decompose_gmv()
+        
+        # GMV变化根因定位
+        root_cause = self.analyze_root_cause()
+        
         return {
             'gmv_metrics': gmv_metrics,
             'category_metrics': category_metrics,
             'region_metrics': region_metrics,
             'category_gini': category_gini,
             'region_gini': region_gini,
+            'gini_by_region': gini_by_region,
+            'gini_by_category': gini_by_category,
+            'category_conversion_gini': conversion_gini['category'],
+            'region_conversion_gini': conversion_gini['region'],
             'top_declining_categories': top_declining_categories,
             'top_declining_regions': top_declining_regions,
-            'improvement_suggestions': improvement_suggestions
-        } 
\ No newline at end of file
+            'improvement_suggestions': improvement_suggestions,
+            'gmv_decomposition': gmv_decomposition,
+            'root_cause': root_cause
+        } 
+    
+    def decompose_gmv(self, levels: Optional[Dict[str, List[str]]] = None) -> Dict[str, Any]:
+        """
+        在总体及各下钻层级上对GMV变化做LMDI加性分解
+        
+        Args:
+            levels: {层级名: 维度列表}，默认 总体/品类/区域/门店（数据中存在的维度）
+            
+        Returns:
+            {层级名: 分解结果表}，简化模式下返回空字典（总体贡献度见 gmv_metrics）
+        """
+        if not (PANDAS_AVAILABLE and hasattr(self.current_data, 'groupby')):
+            return {}
+        
+        return GMVDecomposer(self.current_data, self.previous_data).decompose_levels(levels)
+    
+    def analyze_root_cause(self, metric: str = 'gmv', dimensions: Optional[List[str]] = None,
+                           **kwargs) -> Dict[str, Any]:
+        """
+        在维度组合上自动下钻，定位解释GMV变化的最小细分集合
+        
+        Args:
+            metric: 可加指标列
+            dimensions: 下钻维度，默认 区域/品类/门店类型/渠道 中数据已有的列
+            **kwargs: 传递给 RootCauseAnalyzer 的剪枝与选择参数
+            
+        Returns:
+            根因分析结果字典
+        """
+        from .root_cause import RootCauseAnalyzer
+        
+        return RootCauseAnalyzer(
+            self.current_data, self.previous_data, metric=metric, dimensions=dimensions, **kwargs
+        ).analyze()
+    
+    def _calculate_conversion_gini(self) -> Dict[str, float]:
+        """计算转化率在品类维度和区域维度的基尼系数"""
+        result = {}
+        for dimension in ['category', 'region']:
+            if PANDAS_AVAILABLE and hasattr(self.current_data, 'groupby'):
+                rates = self.current_data.groupby(dimension)['conversion_rate'].mean()
+            else:
+                groups = self.processor.group_by(self.current_dict_list, dimension)
+                rates = [self.processor.mean_column(rows, 'conversion_rate') for rows in groups.values()]
+            result[dimension] = self.calculate_gini_coefficient(rates)
+        return result
+    
+    @staticmethod
+    def analyze_by_group(current_data: Any, previous_data: Any, group_column: str = 'store_id',
+                         top_n: int = 3, n_jobs: int = 1) -> Any:
+        """
+        按门店等维度批量执行分析，避免为每个门店构造分析器
+        
+        Args:
+            current_data: 当前期数据
+            previous_data: 上期数据
+            group_column: 分组列名
+            top_n: 每组返回的下降品类/区域数量
+            n_jobs: 进程分片数
+            
+        Returns:
+            BatchAnalysisResult 列式结果
+        """
+        from .batch_metrics import BatchMetricsAnalyzer
+        
+        return BatchMetricsAnalyzer(
+            current_data, previous_data, group_column=group_column, top_n=top_n, n_jobs=n_jobs
+        ).analyze()
@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+"""
+模型注册表
+将训练好的模型及其预处理参数按版本持久化到磁盘（含训练数据指纹与评估结果），
+训练数据未变化时直接复用已有模型；批量预测按数据块读取与打分，内存占用与总行数无关
+"""
+
+import os
+import re
+import json
+import shutil
+import tempfile
+import threading
+from datetime import datetime
+from typing import Dict, List, Any, Optional, Iterator
+
+# 条件导入
+try:
+    import pandas as pd
+    import numpy as np
+    PANDAS_AVAILABLE = True
+except ImportError:
+    PANDAS_AVAILABLE = False
+
+try:
+    import joblib
+    import sklearn
+    JOBLIB_AVAILABLE = True
+except ImportError:
+    JOBLIB_AVAILABLE = False
+
+try:
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+DEFAULT_CHUNK_SIZE = 100_000
+MODEL_FILE = 'model.joblib'
+METADATA_FILE = 'metadata.json'
+
+
+def _json_default(value: Any) -> Any:
+    """numpy 标量等对象的 JSON 序列化"""
+    if hasattr(value, 'item'):
+        return value.item()
+    return str(value)
+
+
+def iter_chunks(source: Any, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                columns: Optional[List[str]] = None) -> Iterator[Any]:
+    """
+    按块读取待预测数据
+
+    Args:
+        source: DataFrame、DataFrame 可迭代对象，或 CSV/Parquet 文件路径
+        chunk_size: 每块行数
+        columns: 只读取的列（文件输入时生效）
+
+    Returns:
+        DataFrame 数据块迭代器
+    """
+    if isinstance(source, (str, os.PathLike)):
+        path = os.fspath(source)
+        if path.endswith('.parquet'):
+            if not PYARROW_AVAILABLE:
+                raise ImportError("读取 Parquet 文件需要安装 pyarrow")
+            for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size, columns=columns):
+                yield batch.to_pandas()
+        else:
+            yield from pd.read_csv(path, chunksize=chunk_size, usecols=columns)
+    elif hasattr(source, 'iloc'):
+        for start in range(0, len(source), chunk_size):
+            yield source.iloc[start:start + chunk_size]
+    else:
+        yield from source
+
+
+def prepare_features(chunk: Any, preprocessing: Dict[str, Any]) -> Any:
+    """
+    按训练时的预处理参数整理特征
+
+    Args:
+        chunk: 数据块
+        preprocessing: {'features': 特征列, 'fill_values': 缺失值填充值}
+
+    Returns:
+        与训练时列顺序一致的特征 DataFrame
+    """
+    features = preprocessing['features']
+    missing = [col for col in features if col not in chunk.columns]
+    if missing:
+        raise ValueError(f"缺少特征列: {missing}")
+    return chunk[features].apply(pd.to_numeric, errors='coerce').fillna(preprocessing.get('fill_values', {}))
+
+
+def score_chunks(model: Any, preprocessing: Dict[str, Any], chunks: Iterator[Any],
+                 output_path: Optional[str] = None, id_column: Optional[str] = None) -> Dict[str, Any]:
+    """
+    逐块打分
+
+    Args:
+        model: 已训练模型
+        preprocessing: 预处理参数
+        chunks: 数据块迭代器
+        output_path: 结果 CSV 路径，提供时逐块追加写出、不在内存中保留预测值
+        id_column: 随预测值一起输出的标识列
+
+    Returns:
+        {'rows', 'chunks', 'output_path'}，未提供 output_path 时另含 predictions（数组）
+    """
+    rows, n_chunks, collected = 0, 0, []
+    for chunk in chunks:
+        if len(chunk) == 0:
+            continue
+        predictions = model.predict(prepare_features(chunk, preprocessing))
+        if output_path:
+            frame = pd.DataFrame({'prediction': predictions})
+            if id_column:
+                frame.insert(0, id_column, chunk[id_column].to_numpy())
+            frame.to_csv(output_path, mode='w' if n_chunks == 0 else 'a', header=n_chunks == 0, index=False)
+        else:
+            collected.append(np.asarray(predictions))
+        rows += len(chunk)
+        n_chunks += 1
+
+    result = {'rows': rows, 'chunks': n_chunks, 'output_path': output_path}
+    if not output_path:
+        result['predictions'] = np.concatenate(collected) if collected else np.array([])
+    return result
+
+
+class ModelRegistry:
+    """按名称与版本号管理模型文件的注册表"""
+
+    def __init__(self, root_dir: str):
+        """
+        初始化模型注册表
+
+        Args:
+            root_dir: 模型存储目录（每个模型名一个子目录，每个版本一个 vNNNN 目录）
+        """
+        self.root_dir = root_dir
+        self._loaded = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _safe_name(name: str) -> str:
+        return re.sub(r'[^\w\-.]', '_', str(name))
+
+    def _model_dir(self, name: str) -> str:
+        return os.path.join(self.root_dir, self._safe_name(name))
+
+    def versions(self, name: str) -> List[Dict[str, Any]]:
+        """
+        模型的全部版本元数据
+
+        Args:
+            name: 模型名
+
+        Returns:
+            按版本号升序排列的元数据列表
+        """
+        model_dir = self._model_dir(name)
+        if not os.path.isdir(model_dir):
+            return []
+        versions = []
+        for entry in sorted(os.listdir(model_dir)):
+            path = os.path.join(model_dir, entry, METADATA_FILE)
+            if re.fullmatch(r'v\d+', entry) and os.path.exists(path):
+                with open(path, encoding='utf-8') as f:
+                    versions.append(json.load(f))
+        return sorted(versions, key=lambda meta: meta['version'])
+
+    def find(self, name: str, fingerprint: Optional[str], params: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+        """
+        查找训练数据指纹与参数均相同的最新版本
+
+        Args:
+            name: 模型名
+            fingerprint: 训练数据指纹
+            params: 训练参数
+
+        Returns:
+            元数据，未找到时为 None
+        """
+        if fingerprint is None:
+            return None
+        params = json.loads(json.dumps(params or {}, default=_json_default))
+        for meta in reversed(self.versions(name)):
+            if meta.get('data_fingerprint') == fingerprint and meta.get('params', {}) == params:
+                return meta
+        return None
+
+    def register(self, name: str, model: Any, preprocessing: Dict[str, Any],
+                 metadata: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        保存新版本
+
+        先写入临时目录再改名为版本目录，多个进程同时注册时各自取得不同版本号
+
+        Args:
+            name: 模型名
+            model: 已训练模型
+            preprocessing: 预处理参数（特征列、填充值等）
+            metadata: 其他元数据（data_fingerprint、params、results 等）
+
+        Returns:
+            写入的元数据（含 version、created_at）
+        """
+        if not JOBLIB_AVAILABLE:
+            raise ImportError("模型持久化需要安装 scikit-learn/joblib")
+        model_dir = self._model_dir(name)
+        os.makedirs(model_dir, exist_ok=True)
+        meta = dict(metadata or {})
+        meta.update({
+            'name': str(name),
+            'created_at': datetime.now().isoformat(),
+            'sklearn_version': sklearn.__version__,
+            'preprocessing': preprocessing
+        })
+
+        temp_dir = tempfile.mkdtemp(prefix='.tmp-', dir=model_dir)
+        try:
+            joblib.dump(model, os.path.join(temp_dir, MODEL_FILE))
+            version = max([m['version'] for m in self.versions(name)], default=0) + 1
+            while True:
+                meta['version'] = version
+                with open(os.path.join(temp_dir, METADATA_FILE), 'w', encoding='utf-8') as f:
+                    json.dump(meta, f, ensure_ascii=False, indent=2, default=_json_default)
+                target = os.path.join(model_dir, f'v{version:04d}')
+                try:
+                    os.rename(temp_dir, target)
+                    break
+                except OSError:
+                    if not os.path.exists(target):
+                        raise
+                    version += 1
+        except Exception:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+            raise
+
+        with self._lock:
+            self._loaded[(self._safe_name(name), version)] = (model, meta)
+        return json.loads(json.dumps(meta, default=_json_default))
+
+    def load(self, name: str, version: Optional[int] = None) -> Dict[str, Any]:
+        """
+        加载模型（同一进程内已加载的版本直接复用）
+
+        Args:
+            name: 模型名
+            version: 版本号，默认最新版本
+
+        Returns:
+            {'model', 'preprocessing', 'metadata'}
+        """
+        if version is None:
+            versions = self.versions(name)
+            if not versions:
+                raise KeyError(f"模型不存在: {name}")
+            version = versions[-1]['version']
+
+        key = (self._safe_name(name), version)
+        with self._lock:
+            cached = self._loaded.get(key)
+        if cached is None:
+            version_dir = os.path.join(self._model_dir(name), f'v{version:04d}')
+            if not os.path.isdir(version_dir):
+                raise KeyError(f"模型版本不存在: {name} v{version}")
+            with open(os.path.join(version_dir, METADATA_FILE), encoding='utf-8') as f:
+                meta = json.load(f)
+            cached = (joblib.load(os.path.join(version_dir, MODEL_FILE)), meta)
+            with self._lock:
+                self._loaded[key] = cached
+
+        model, meta = cached
+        return {'model': model, 'preprocessing': meta['preprocessing'], 'metadata': meta}
+
+    def batch_predict(self, name: str, source: Any, version: Optional[int] = None,
+                      chunk_size: int = DEFAULT_CHUNK_SIZE, output_path: Optional[str] = None,
+                      id_column: Optional[str] = None) -> Dict[str, Any]:
+        """
+        分块批量预测
+
+        Args:
+            name: 模型名
+            source: DataFrame、数据块迭代器或 CSV/Parquet 文件路径
+            version: 版本号，默认最新版本
+            chunk_size: 每块行数
+            output_path: 结果 CSV 路径（大数据量时建议提供）
+            id_column: 随预测值一起输出的标识列
+
+        Returns:
+            score_chunks 的结果，另含 model_name、model_version
+        """
+        artifact = self.load(name, version)
+        preprocessing = artifact['preprocessing']
+        columns = list(preprocessing['features']) + ([id_column] if id_column else [])
+        result = score_chunks(artifact['model'], preprocessing, iter_chunks(source, chunk_size, columns),
+                              output_path=output_path, id_column=id_column)
+        result.update({'model_name': str(name), 'model_version': artifact['metadata']['version']})
+        return result
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+交叉验证与超参数搜索
+候选参数 × 折 的训练任务在多个进程中并行执行（单个模型不再开线程，避免超额订阅），
+按逐轮增大样本量的连续减半（successive halving）淘汰较弱的参数组合，并受时间预算约束
+"""
+
+import os
+import math
+import time
+from typing import Dict, List, Any, Optional
+
+# 条件导入
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+try:
+    from joblib import Parallel, delayed
+    from sklearn.base import clone
+    from sklearn.metrics import get_scorer
+    from sklearn.model_selection import KFold, StratifiedKFold, ParameterGrid, ParameterSampler
+    SKLEARN_AVAILABLE = True
+except ImportError:
+    SKLEARN_AVAILABLE = False
+
+DEFAULT_CV_FOLDS = 5
+DEFAULT_MAX_CANDIDATES = 9
+HALVING_FACTOR = 3
+# 每轮每折训练集的最少行数
+MIN_RESOURCE_ROWS = 500
+
+RANDOM_FOREST_PARAM_GRID = {
+    'n_estimators': [100, 200],
+    'max_depth': [None, 12, 24],
+    'min_samples_leaf': [1, 5],
+    'max_features': ['sqrt', 0.5]
+}
+
+
+def resolve_n_jobs(n_jobs: Optional[int]) -> int:
+    """将 -1/None 解析为 CPU 核数"""
+    if n_jobs is None or n_jobs < 0:
+        return os.cpu_count() or 1
+    return max(1, n_jobs)
+
+
+def candidate_params(param_grid: Dict[str, List[Any]], max_candidates: int = DEFAULT_MAX_CANDIDATES,
+                     random_state: int = 42) -> List[Dict[str, Any]]:
+    """
+    候选参数组合（组合数超过上限时随机抽取）
+
+    Args:
+        param_grid: 参数网格
+        max_candidates: 候选数上限
+        random_state: 随机种子
+
+    Returns:
+        参数字典列表
+    """
+    grid = ParameterGrid(param_grid)
+    if len(grid) <= max_candidates:
+        return list(grid)
+    return list(ParameterSampler(param_grid, max_candidates, random_state=random_state))
+
+
+def cv_splits(y: Any, folds: int, classification: bool, random_state: int = 42) -> List[Any]:
+    """
+    交叉验证划分（分类任务在各类样本足够时分层）
+
+    Args:
+        y: 目标值
+        folds: 折数
+        classification: 是否分类任务
+        random_state: 随机种子
+
+    Returns:
+        (训练行号, 验证行号) 列表
+    """
+    if classification:
+        _, counts = np.unique(y, return_counts=True)
+        if counts.min() >= folds:
+            splitter = StratifiedKFold(n_splits=folds, shuffle=True, random_state=random_state)
+            return list(splitter.split(np.zeros(len(y)), y))
+    splitter = KFold(n_splits=folds, shuffle=True, random_state=random_state)
+    return list(splitter.split(np.zeros(len(y))))
+
+
+def _fit_and_score(estimator: Any, params: Dict[str, Any], X: Any, y: Any,
+                   train: Any, test: Any, scoring: str) -> float:
+    """并行任务：按参数训练一折并在验证集上评分"""
+    model = clone(estimator).set_params(**params)
+    model.fit(X[train], y[train])
+    return float(get_scorer(scoring)(model, X[test], y[test]))
+
+
+def halving_search(estimator: Any, X: Any, y: Any, param_grid: Dict[str, List[Any]],
+                   scoring: str, classification: bool, folds: int = DEFAULT_CV_FOLDS,
+                   n_jobs: int = -1, time_budget: Optional[float] = None,
+                   max_candidates: int = DEFAULT_MAX_CANDIDATES, factor: int = HALVING_FACTOR,
+                   random_state: int = 42) -> Dict[str, Any]:
+    """
+    连续减半的交叉验证超参数搜索
+
+    第 i 轮在约 n / factor^(轮数-1-i) 行样本上对剩余候选做 k 折交叉验证，保留得分最高的 1/factor；
+    下一轮的预计耗时（按上一轮耗时与样本量、候选数的比例估计）超出时间预算时提前结束
+
+    Args:
+        estimator: 基础模型（支持 n_jobs 参数时按空闲核数设置）
+        X: 特征矩阵
+        y: 目标值
+        param_grid: 参数网格
+        scoring: sklearn 评分名称
+        classification: 是否分类任务
+        folds: 折数
+        n_jobs: 进程数，-1 表示全部CPU
+        time_budget: 时间预算（秒），为空时不限
+        max_candidates: 候选数上限
+        factor: 每轮淘汰比例
+        random_state: 随机种子
+
+    Returns:
+        {'best_params', 'best_score', 'fold_scores', 'rungs', 'n_candidates', 'n_fits',
+         'stopped_by_budget', 'elapsed_seconds'}；第一轮总会完成
+    """
+    started = time.perf_counter()
+    X, y = np.asarray(X), np.asarray(y)
+    n_rows = len(X)
+    n_jobs = resolve_n_jobs(n_jobs)
+    candidates = candidate_params(param_grid, max_candidates, random_state)
+
+    n_rungs = 1 + int(math.floor(math.log(len(candidates), factor))) if len(candidates) > 1 else 1
+    min_rows = min(n_rows, int(MIN_RESOURCE_ROWS * folds / (folds - 1)))
+    resources = [max(min_rows, int(n_rows / factor ** (n_rungs - 1 - i))) for i in range(n_rungs)]
+    order = np.random.default_rng(random_state).permutation(n_rows)
+
+    rungs, best, stopped, last_cost = [], None, False, None
+    for rung, resource in enumerate(resources):
+        if last_cost is not None and time_budget is not None:
+            previous = rungs[-1]
+            estimate = last_cost * resource / previous['rows'] * len(candidates) / len(previous['candidates'])
+            if time.perf_counter() - started + estimate > time_budget:
+                stopped = True
+                break
+
+        rung_started = time.perf_counter()
+        rows = np.sort(order[:resource])
+        X_rung, y_rung = X[rows], y[rows]
+        splits = cv_splits(y_rung, folds, classification, random_state)
+        tasks = [(params, train, test) for params in candidates for train, test in splits]
+
+        # 任务数少于核数时把空闲核分给单个模型（如随机森林的并行建树）
+        outer_jobs = min(n_jobs, len(tasks))
+        base = clone(estimator)
+        if 'n_jobs' in base.get_params():
+            base.set_params(n_jobs=max(1, n_jobs // outer_jobs))
+        scores = Parallel(n_jobs=outer_jobs)(
+            delayed(_fit_and_score)(base, params, X_rung, y_rung, train, test, scoring)
+            for params, train, test in tasks
+        )
+        scores = np.asarray(scores).reshape(len(candidates), len(splits))
+        means = scores.mean(axis=1)
+
+        ranking = np.argsort(-means, kind='stable')
+        best = {'params': candidates[ranking[0]], 'score': float(means[ranking[0]]),
+                'fold_scores': scores[ranking[0]].tolist()}
+        rungs.append({
+            'rung': rung,
+            'rows': int(resource),
+            'candidates': candidates,
+            'mean_scores': means.tolist()
+        })
+        last_cost = time.perf_counter() - rung_started
+        candidates = [candidates[i] for i in ranking[:max(1, math.ceil(len(candidates) / factor))]]
+        if time_budget is not None and time.perf_counter() - started > time_budget:
+            stopped = rung < len(resources) - 1
+            break
+
+    return {
+        'best_params': best['params'] if best else {},
+        'best_score': best['score'] if best else None,
+        'fold_scores': best['fold_scores'] if best else [],
+        'rungs': [{'rung': r['rung'], 'rows': r['rows'], 'n_candidates': len(r['candidates']),
+                   'best_mean_score': max(r['mean_scores'])} for r in rungs],
+        'n_candidates': len(rungs[0]['candidates']) if rungs else 0,
+        'n_fits': sum(len(r['candidates']) for r in rungs) * folds,
+        'stopped_by_budget': stopped,
+        'elapsed_seconds': time.perf_counter() - started
+    }
@@ -49,6 +49,26 @@ except ImportError:
     SCIPY_AVAILABLE = False
     print("⚠️  scipy 未安装，统计分析功能将受限")
 
+from .seasonality import detect_seasonality, regularize_series, infer_step
+from .correlation import blocked_correlation, matrix_pairs
+from .cluster_search import search_cluster_count, silhouette_sample_index, sampled_silhouette
+from .streaming_profile import profile_chunks, missing_patterns, DEFAULT_CHUNK_SIZE as PROFILE_CHUNK_SIZE
+from .column_stats import ColumnStatistics, compute_column_statistics
+from .model_registry import ModelRegistry, iter_chunks, score_chunks, DEFAULT_CHUNK_SIZE as PREDICT_CHUNK_SIZE
+from .result_cache import data_fingerprint
+from .model_search import halving_search, RANDOM_FOREST_PARAM_GRID
+from .ab_testing import multi_metric_ab_test, OVERALL_SEGMENT, DEFAULT_BOOTSTRAP
+from .holt_winters import HoltWintersForecaster, rolling_origin_backtest, default_period
+from .forecast_state import ForecastStateStore, drift_ratio, DEFAULT_REFIT_INTERVAL, DEFAULT_DRIFT_THRESHOLD
+from .segment_store import SegmentAssignmentStore, DEFAULT_PAGE_SIZE, DEFAULT_TTL_HOURS, DEFAULT_MAX_RESULTS
+
+FORECAST_METHODS = ['simple', 'holt_winters']
+# Holt-Winters 滚动起点回测的起点数与拟合所需的最少点数
+FORECAST_BACKTEST_ORIGINS = 3
+MIN_FORECAST_POINTS = 14
+# 细分散点图最多返回的点数
+SEGMENT_VISUALIZATION_POINTS = 2000
+
 @dataclass
 class AnalysisConfig:
     """分析配置"""
@@ -57,6 +77,20 @@ class AnalysisConfig:
     min_sample_size: int = 30
     outlier_threshold: float = 3.0
     correlation_threshold: float = 0.7
+    cluster_min_k: int = 2
+    cluster_max_k: int = 10
+    silhouette_sample_size: int = 5000
+    cluster_n_jobs: int = -1
+    model_registry_dir: Optional[str] = None
+    model_n_jobs: int = -1
+    cv_folds: int = 5
+    search_time_budget: Optional[float] = None
+    forecast_state_dir: Optional[str] = None
+    forecast_refit_interval: int = DEFAULT_REFIT_INTERVAL
+    forecast_drift_threshold: float = DEFAULT_DRIFT_THRESHOLD
+    segment_store_dir: Optional[str] = None
+    segment_ttl_hours: Optional[float] = DEFAULT_TTL_HOURS
+    segment_max_results: Optional[int] = DEFAULT_MAX_RESULTS
 
 class ProfessionalAnalytics:
     """专业级数据分析工具"""
@@ -65,9 +99,32 @@ class ProfessionalAnalytics:
         self.config = config or AnalysisConfig()
         self.models = {}
         self.analysis_history = []
-        
-    def comprehensive_data_profile(self, data: Any, target_column: str = None) -> Dict[str, Any]:
-        """全面数据剖析"""
+        self.last_cluster_search = {}
+        self.model_registry = ModelRegistry(self.config.model_registry_dir) if self.config.model_registry_dir else None
+        self.forecast_states = ForecastStateStore(self.config.forecast_state_dir) if self.config.forecast_state_dir else None
+        self.segment_store = SegmentAssignmentStore(
+            self.config.segment_store_dir, self.config.segment_ttl_hours, self.config.segment_max_results
+        ) if self.config.segment_store_dir else None
+        
+    def comprehensive_data_profile(self, data: Any, target_column: str = None, mode: str = 'full',
+                                   chunk_size: int = PROFILE_CHUNK_SIZE) -> Dict[str, Any]:
+        """
+        全面数据剖析
+
+        Args:
+            data: DataFrame；sketch 模式下也可为 DataFrame 分块迭代器
+            target_column: 目标列
+            mode: full 为精确剖析；sketch 为基于 Sketch 的近似剖析（分位数、去重数近似，按块处理、内存有界）
+            chunk_size: sketch 模式下 DataFrame 输入的分块行数
+
+        Returns:
+            剖析结果
+        """
+        if mode == 'sketch' and PANDAS_AVAILABLE:
+            return self.sketch_data_profile(profile_chunks(data, chunk_size=chunk_size).result())
+        if mode not in ('full', 'sketch'):
+            raise ValueError(f"不支持的剖析模式: {mode}")
+
         profile = {
             'basic_info': {},
             'statistical_summary': {},
@@ -87,23 +144,27 @@ class ProfessionalAnalytics:
                 'data_types': data.dtypes.to_dict()
             }
             
-            # 统计摘要
+            # 共享列统计（缺失、去重、分位数、异常值、矩只计算一次）
             numeric_cols = data.select_dtypes(include=[np.number]).columns
-            profile['statistical_summary'] = data[numeric_cols].describe().to_dict()
+            column_stats = compute_column_statistics(data, numeric_cols)
+            
+            # 统计摘要
+            profile['statistical_summary'] = column_stats.describe()
             
             # 数据质量
-            profile['data_quality'] = self._analyze_data_quality(data)
+            profile['data_quality'] = self._analyze_data_quality(data, column_stats)
             
             # 相关性分析
             if len(numeric_cols) > 1:
-                corr_matrix = data[numeric_cols].corr()
+                blocked = blocked_correlation(data[numeric_cols].to_numpy(dtype=float))
+                corr_matrix = pd.DataFrame(blocked['matrix'], index=numeric_cols, columns=numeric_cols)
                 profile['correlations'] = self._analyze_correlations(corr_matrix)
             
             # 异常值检测
-            profile['outliers'] = self._detect_outliers_comprehensive(data, numeric_cols)
+            profile['outliers'] = self._detect_outliers_comprehensive(data, numeric_cols, column_stats)
             
             # 分布分析
-            profile['distribution_analysis'] = self._analyze_distributions(data, numeric_cols)
+            profile['distribution_analysis'] = self._analyze_distributions(data, numeric_cols, column_stats)
             
             # 生成建议
             profile['recommendations'] = self._generate_data_recommendations(profile)
@@ -114,8 +175,34 @@ class ProfessionalAnalytics:
         
         return profile
     
-    def _analyze_data_quality(self, data: pd.DataFrame) -> Dict[str, Any]:
+    def sketch_data_profile(self, sketch_result: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        由流式剖析结果（StreamingProfile.result()）生成剖析报告，可用于 profile_partitions 的合并结果
+
+        Args:
+            sketch_result: 流式剖析结果
+
+        Returns:
+            与完整剖析结构一致的结果，profile_mode 为 sketch
+        """
+        profile = dict(sketch_result)
+        corr_matrix = profile.pop('correlation_matrix', None)
+        profile['correlations'] = self._analyze_correlations(corr_matrix) if corr_matrix is not None else {}
+
+        quality = profile.get('data_quality', {})
+        if quality:
+            uniqueness = quality.get('uniqueness', {}).get('by_column', {})
+            quality['overall_score'] = np.mean([
+                quality['completeness']['overall_rate'],
+                np.mean(list(uniqueness.values())) if uniqueness else 1.0
+            ])
+        profile['recommendations'] = self._generate_data_recommendations(profile)
+        return profile
+    
+    def _analyze_data_quality(self, data: pd.DataFrame,
+                              column_stats: Optional[ColumnStatistics] = None) -> Dict[str, Any]:
         """分析数据质量"""
+        column_stats = column_stats or compute_column_statistics(data)
         quality_metrics = {
             'completeness': {},
             'uniqueness': {},
@@ -127,26 +214,23 @@ class ProfessionalAnalytics:
         total_cells = len(data) * len(data.columns)
         
         # 完整性
-        missing_count = data.isnull().sum()
+        missing_count = column_stats.null_counts
         completeness = 1 - (missing_count.sum() / total_cells)
         quality_metrics['completeness'] = {
             'overall_rate': completeness,
             'by_column': (1 - missing_count / len(data)).to_dict(),
-            'missing_patterns': self._identify_missing_patterns(data)
+            'missing_patterns': self._identify_missing_patterns(data, column_stats)
         }
         
         # 唯一性
-        uniqueness_scores = {}
-        for col in data.columns:
-            unique_ratio = data[col].nunique() / len(data)
-            uniqueness_scores[col] = unique_ratio
+        uniqueness_scores = (column_stats.nunique / len(data)).to_dict()
         quality_metrics['uniqueness']['by_column'] = uniqueness_scores
         
         # 一致性检查
         quality_metrics['consistency'] = self._check_data_consistency(data)
         
         # 有效性检查
-        quality_metrics['validity'] = self._check_data_validity(data)
+        quality_metrics['validity'] = self._check_data_validity(data, column_stats)
         
         # 总体得分
         scores = [
@@ -159,51 +243,14 @@ class ProfessionalAnalytics:
         
         return quality_metrics
     
-    def _identify_missing_patterns(self, data: pd.DataFrame) -> List[Dict[str, Any]]:
-        """识别缺失值模式"""
-        patterns = []
-        
-        # 完全缺失的列
-        completely_missing = data.columns[data.isnull().all()].tolist()
-        if completely_missing:
-            patterns.append({
-                'type': 'completely_missing',
-                'columns': completely_missing,
-                'severity': 'high'
-            })
-        
-        # 高缺失率的列
-        missing_rates = data.isnull().mean()
-        high_missing = missing_rates[missing_rates > 0.5].index.tolist()
-        if high_missing:
-            patterns.append({
-                'type': 'high_missing_rate',
-                'columns': high_missing,
-                'severity': 'medium'
-            })
-        
-        # 相关缺失模式
-        if len(data.columns) > 1:
-            missing_corr = data.isnull().corr()
-            strong_missing_corr = []
-            for i in range(len(missing_corr.columns)):
-                for j in range(i+1, len(missing_corr.columns)):
-                    corr_val = missing_corr.iloc[i, j]
-                    if abs(corr_val) > 0.5:
-                        strong_missing_corr.append({
-                            'col1': missing_corr.columns[i],
-                            'col2': missing_corr.columns[j],
-                            'correlation': corr_val
-                        })
-            
-            if strong_missing_corr:
-                patterns.append({
-                    'type': 'correlated_missing',
-                    'correlations': strong_missing_corr,
-                    'severity': 'medium'
-                })
-        
-        return patterns
+    def _identify_missing_patterns(self, data: pd.DataFrame,
+                                   column_stats: Optional[ColumnStatistics] = None) -> List[Dict[str, Any]]:
+        """识别缺失值模式（相关缺失由位图共现计数计算，与 isnull().corr() 一致）"""
+        column_stats = column_stats or compute_column_statistics(data, numeric_cols=[])
+        return missing_patterns(
+            column_stats.columns, column_stats.null_counts.to_numpy(),
+            column_stats.missing_cooccurrence, column_stats.n_rows
+        )
     
     def _check_data_consistency(self, data: pd.DataFrame) -> Dict[str, Any]:
         """检查数据一致性"""
@@ -249,8 +296,10 @@ class ProfessionalAnalytics:
         
         return consistency_results
     
-    def _check_data_validity(self, data: pd.DataFrame) -> Dict[str, Any]:
+    def _check_data_validity(self, data: pd.DataFrame,
+                             column_stats: Optional[ColumnStatistics] = None) -> Dict[str, Any]:
         """检查数据有效性"""
+        column_stats = column_stats or compute_column_statistics(data)
         validity_results = {
             'invalid_values': {},
             'range_violations': {},
@@ -263,27 +312,24 @@ class ProfessionalAnalytics:
         
         for col in data.columns:
             col_violations = 0
-            col_total = len(data[col].dropna())
+            col_total = column_stats.non_null(col)
             total_values += col_total
             
-            if data[col].dtype in ['int64', 'float64']:
+            if data[col].dtype in ['int64', 'float64'] and col in column_stats.extreme_outlier_counts:
                 # 检查数值范围
                 if col_total > 0:
-                    negative_count = (data[col] < 0).sum()
-                    if 'rate' in col.lower() or 'percent' in col.lower():
+                    summary = column_stats.summary[col]
+                    if ('rate' in col.lower() or 'percent' in col.lower()) and (summary['min'] < 0 or summary['max'] > 100):
                         # 比率应该在0-1或0-100之间
                         invalid_rate = ((data[col] < 0) | (data[col] > 100)).sum()
-                        if invalid_rate > 0:
-                            validity_results['range_violations'][col] = {
-                                'type': 'percentage_out_of_range',
-                                'count': invalid_rate
-                            }
-                            col_violations += invalid_rate
+                        validity_results['range_violations'][col] = {
+                            'type': 'percentage_out_of_range',
+                            'count': invalid_rate
+                        }
+                        col_violations += invalid_rate
                     
-                    # 检查极端值
-                    q1, q3 = data[col].quantile([0.25, 0.75])
-                    iqr = q3 - q1
-                    extreme_outliers = ((data[col] < q1 - 3*iqr) | (data[col] > q3 + 3*iqr)).sum()
+                    # 检查极端值（3倍四分位距）
+                    extreme_outliers = column_stats.extreme_outlier_counts[col]
                     if extreme_outliers > col_total * 0.05:  # 超过5%
                         validity_results['invalid_values'][col] = {
                             'type': 'extreme_outliers',
@@ -349,8 +395,22 @@ class ProfessionalAnalytics:
         return variants
     
     def advanced_customer_segmentation(self, data: Any, features: List[str], 
-                                     method: str = 'kmeans') -> Dict[str, Any]:
-        """高级客户细分"""
+                                     method: str = 'kmeans', id_column: Optional[str] = None) -> Dict[str, Any]:
+        """
+        高级客户细分
+
+        启用分群结果存储（segment_store_dir）时，逐行标签按 result_id 保存在服务端，
+        结果中只包含汇总画像，标签通过 segment_assignments 分页读取；未启用时 labels 随结果返回
+
+        Args:
+            data: 数据
+            features: 细分特征
+            method: kmeans / dbscan / hierarchical
+            id_column: 行标识列（如 customer_id），分页结果中以其作为 row_id，默认使用行位置
+
+        Returns:
+            细分结果
+        """
         segmentation_results = {
             'segments': {},
             'segment_profiles': {},
@@ -374,9 +434,11 @@ class ProfessionalAnalytics:
                     model = KMeans(n_clusters=optimal_k, random_state=42)
                     labels = model.fit_predict(scaled_data)
                     
-                    # 计算轮廓系数
-                    silhouette_avg = silhouette_score(scaled_data, labels)
+                    # 计算轮廓系数（固定大小样本）
+                    sample = silhouette_sample_index(len(scaled_data), self.config.silhouette_sample_size)
+                    silhouette_avg = sampled_silhouette(scaled_data, labels, sample)
                     segmentation_results['model_performance']['silhouette_score'] = silhouette_avg
+                    segmentation_results['model_performance']['cluster_search'] = self.last_cluster_search.get('scores', [])
                     
                 elif method == 'dbscan':
                     # DBSCAN聚类
@@ -404,8 +466,16 @@ class ProfessionalAnalytics:
                 segmentation_results['segments'] = {
                     'total_segments': len(segment_profiles),
                     'method_used': method,
-                    'labels': labels.tolist()
+                    'total_rows': len(labels)
                 }
+                if self.segment_store is not None:
+                    stored = self.segment_store.save(
+                        labels, row_ids=data[id_column].to_numpy() if id_column else None,
+                        metadata={'method': method, 'features': features, 'id_column': id_column}
+                    )
+                    segmentation_results['segments']['result_id'] = stored['result_id']
+                else:
+                    segmentation_results['segments']['labels'] = labels.tolist()
                 
                 # 生成可视化数据
                 if len(features) >= 2:
@@ -427,24 +497,51 @@ class ProfessionalAnalytics:
         
         return segmentation_results
     
-    def _find_optimal_clusters(self, data: np.ndarray, max_k: int = 10) -> int:
-        """使用肘部法则找到最优聚类数"""
-        inertias = []
-        k_range = range(2, min(max_k + 1, len(data)))
-        
-        for k in k_range:
-            kmeans = KMeans(n_clusters=k, random_state=42)
-            kmeans.fit(data)
-            inertias.append(kmeans.inertia_)
-        
-        # 简化的肘部检测
-        if len(inertias) > 2:
-            # 计算二阶差分
-            second_diff = [inertias[i-1] - 2*inertias[i] + inertias[i+1] for i in range(1, len(inertias)-1)]
-            optimal_k = second_diff.index(max(second_diff)) + 3  # +3 因为从k=2开始，且跳过了首尾
-            return min(optimal_k, max_k)
-        
-        return 4  # 默认值
+    def segment_assignments(self, result_id: str, offset: int = 0, limit: int = DEFAULT_PAGE_SIZE,
+                            segment: Optional[int] = None) -> Dict[str, Any]:
+        """
+        分页读取已保存的分群标签
+
+        Args:
+            result_id: advanced_customer_segmentation 返回的 result_id
+            offset: 起始位置
+            limit: 每页行数
+            segment: 只返回该分群的成员
+
+        Returns:
+            分页结果（total、next_offset、rows）；结果不存在时抛出 KeyError
+        """
+        if self.segment_store is None:
+            raise ValueError("未启用分群结果存储")
+        return self.segment_store.page(result_id, offset=offset, limit=limit, segment=segment)
+
+    def delete_segment_result(self, result_id: str) -> None:
+        """
+        删除已保存的分群结果
+
+        Args:
+            result_id: advanced_customer_segmentation 返回的 result_id；结果不存在时抛出 KeyError
+        """
+        if self.segment_store is None:
+            raise ValueError("未启用分群结果存储")
+        self.segment_store.delete(result_id)
+    
+    def _find_optimal_clusters(self, data: np.ndarray, max_k: Optional[int] = None) -> int:
+        """
+        按样本轮廓系数找到最优聚类数
+
+        各个 k 在多个进程中并行评估，得分明显下降后提前停止；
+        搜索范围、样本量与进程数由 AnalysisConfig 配置，搜索明细保存在 last_cluster_search
+        """
+        search = search_cluster_count(
+            data,
+            min_k=self.config.cluster_min_k,
+            max_k=max_k or self.config.cluster_max_k,
+            sample_size=self.config.silhouette_sample_size,
+            n_jobs=self.config.cluster_n_jobs
+        )
+        self.last_cluster_search = search
+        return search['best_k'] or 4  # 默认值
     
     def _create_segment_profile(self, segment_data: pd.DataFrame, 
                               features: List[str], segment_id: int) -> Dict[str, Any]:
@@ -504,13 +601,13 @@ class ProfessionalAnalytics:
             'feature_names': features
         }
         
-        # 散点图数据
-        for i, (x, y) in enumerate(scaled_data[:, :2]):
+        # 散点图数据（固定大小样本）
+        for i in silhouette_sample_index(len(scaled_data), SEGMENT_VISUALIZATION_POINTS):
             viz_data['scatter_plot'].append({
-                'x': float(x),
-                'y': float(y),
+                'x': float(scaled_data[i, 0]),
+                'y': float(scaled_data[i, 1]),
                 'cluster': int(labels[i]),
-                'index': i
+                'index': int(i)
             })
         
         # 聚类中心
@@ -530,8 +627,33 @@ class ProfessionalAnalytics:
         return viz_data
     
     def predictive_modeling(self, data: Any, target_column: str, 
-                          model_type: str = 'auto') -> Dict[str, Any]:
-        """预测建模"""
+                          model_type: str = 'auto', reuse: bool = True, search: bool = False) -> Dict[str, Any]:
+        """
+        预测建模
+
+        训练结果按目标列名注册到模型注册表；训练数据指纹与参数均未变化时直接加载已有版本，不再重新训练
+
+        Args:
+            data: 训练数据
+            target_column: 目标列
+            model_type: auto/classification/regression
+            reuse: 是否复用已注册的相同数据与参数的模型
+            search: 是否在训练集上做 k 折交叉验证与连续减半超参数搜索（折数、时间预算、进程数见 AnalysisConfig）
+
+        Returns:
+            建模结果，含 model_version 与 reused_model；search 时另含 cross_validation 与 hyperparameter_search
+        """
+        params = {'model_type': model_type}
+        if search:
+            params['search'] = {'cv_folds': self.config.cv_folds, 'time_budget': self.config.search_time_budget}
+        if reuse and self.model_registry is not None and PANDAS_AVAILABLE and hasattr(data, 'columns'):
+            registered = self.model_registry.find(target_column, data_fingerprint(data), params)
+            if registered is not None:
+                artifact = self.model_registry.load(target_column, registered['version'])
+                self.models[target_column] = self._model_entry(artifact['model'], artifact['preprocessing'],
+                                                               registered['version'])
+                return {**registered['results'], 'model_version': registered['version'], 'reused_model': True}
+
         modeling_results = {
             'model_type': model_type,
             'performance_metrics': {},
@@ -547,8 +669,9 @@ class ProfessionalAnalytics:
                 target = data[target_column]
                 features = data.drop(columns=[target_column]).select_dtypes(include=[np.number])
                 
-                # 处理缺失值
-                features = features.fillna(features.mean())
+                # 处理缺失值（填充值随模型保存，批量预测时使用相同的预处理）
+                fill_values = features.mean()
+                features = features.fillna(fill_values)
                 target = target.fillna(target.mean() if target.dtype in ['int64', 'float64'] else target.mode()[0])
                 
                 # 分割数据
@@ -563,11 +686,18 @@ class ProfessionalAnalytics:
                     model_type = 'classification' if is_classification else 'regression'
                 
                 # 选择和训练模型
-                if model_type == 'classification' or is_classification:
+                classification = model_type == 'classification' or is_classification
+                if classification:
                     model = RandomForestClassifier(n_estimators=100, random_state=42)
-                    model.fit(X_train, y_train)
-                    predictions = model.predict(X_test)
-                    
+                else:
+                    model = RandomForestRegressor(n_estimators=100, random_state=42)
+                if search:
+                    model = self._search_model(model, X_train, y_train, classification, modeling_results)
+                model.set_params(n_jobs=self.config.model_n_jobs)
+                model.fit(X_train, y_train)
+                predictions = model.predict(X_test)
+                
+                if classification:
                     # 性能指标
                     modeling_results['performance_metrics'] = {
                         'accuracy': accuracy_score(y_test, predictions),
@@ -577,10 +707,6 @@ class ProfessionalAnalytics:
                     }
                     
                 else:  # 回归
-                    model = RandomForestRegressor(n_estimators=100, random_state=42)
-                    model.fit(X_train, y_train)
-                    predictions = model.predict(X_test)
-                    
                     # 性能指标
                     modeling_results['performance_metrics'] = {
                         'r2_score': r2_score(y_test, predictions),
@@ -607,19 +733,34 @@ class ProfessionalAnalytics:
                     for actual, pred in zip(y_test[:10], predictions[:10])
                 ]
                 
-                # 保存模型
-                self.models[target_column] = {
-                    'model': model,
-                    'scaler': None,
-                    'features': feature_names.tolist(),
-                    'model_type': model_type
-                }
-                
                 # 生成洞察
                 modeling_results['model_insights'] = self._generate_model_insights(
                     modeling_results, is_classification
                 )
                 
+                # 保存模型
+                preprocessing = {
+                    'features': features.columns.tolist(),
+                    'fill_values': {col: float(value) for col, value in fill_values.dropna().items()},
+                    'target_column': target_column,
+                    'model_type': model_type
+                }
+                version = None
+                if self.model_registry is not None:
+                    try:
+                        registered = self.model_registry.register(target_column, model, preprocessing, {
+                            'data_fingerprint': data_fingerprint(data),
+                            'params': params,
+                            'training_rows': len(data),
+                            'results': modeling_results
+                        })
+                        version = registered['version']
+                    except Exception as e:
+                        modeling_results['registry_error'] = f"模型保存失败: {str(e)}"
+                self.models[target_column] = self._model_entry(model, preprocessing, version)
+                modeling_results['model_version'] = version
+                modeling_results['reused_model'] = False
+                
             except Exception as e:
                 modeling_results['error'] = f"建模失败: {str(e)}"
                 modeling_results = self._fallback_modeling(target_column)
@@ -629,6 +770,82 @@ class ProfessionalAnalytics:
         
         return modeling_results
     
+    def _search_model(self, model: Any, X_train: Any, y_train: Any, classification: bool,
+                      modeling_results: Dict[str, Any]) -> Any:
+        """
+        交叉验证超参数搜索，返回按最优参数设置的模型（尚未训练），并把搜索过程写入建模结果
+
+        Args:
+            model: 基础模型
+            X_train: 训练特征
+            y_train: 训练目标
+            classification: 是否分类任务
+            modeling_results: 建模结果
+
+        Returns:
+            设置最优参数后的模型
+        """
+        scoring = 'accuracy' if classification else 'r2'
+        result = halving_search(
+            model, X_train.to_numpy(), y_train.to_numpy(), RANDOM_FOREST_PARAM_GRID, scoring, classification,
+            folds=self.config.cv_folds, n_jobs=self.config.model_n_jobs, time_budget=self.config.search_time_budget
+        )
+        modeling_results['cross_validation'] = {
+            'folds': self.config.cv_folds,
+            'scoring': scoring,
+            'fold_scores': result['fold_scores'],
+            'mean_score': result['best_score'],
+            'std_score': float(np.std(result['fold_scores']))
+        }
+        modeling_results['hyperparameter_search'] = {
+            key: result[key] for key in ['best_params', 'rungs', 'n_candidates', 'n_fits',
+                                         'stopped_by_budget', 'elapsed_seconds']
+        }
+        return model.set_params(**result['best_params'])
+    
+    def _model_entry(self, model: Any, preprocessing: Dict[str, Any], version: Optional[int]) -> Dict[str, Any]:
+        """self.models 中的模型条目"""
+        return {
+            'model': model,
+            'scaler': None,
+            'features': list(preprocessing['features']),
+            'model_type': preprocessing['model_type'],
+            'preprocessing': preprocessing,
+            'version': version
+        }
+    
+    def batch_predict(self, source: Any, target_column: str, version: Optional[int] = None,
+                      chunk_size: int = PREDICT_CHUNK_SIZE, output_path: Optional[str] = None,
+                      id_column: Optional[str] = None) -> Dict[str, Any]:
+        """
+        使用已训练模型分块批量预测
+
+        优先使用模型注册表中的版本（可在新进程中直接打分），未启用注册表时使用本实例训练的模型
+
+        Args:
+            source: DataFrame、数据块迭代器或 CSV/Parquet 文件路径
+            target_column: 模型对应的目标列
+            version: 模型版本，默认最新版本
+            chunk_size: 每块行数
+            output_path: 结果 CSV 路径，提供时逐块写出
+            id_column: 随预测值一起输出的标识列
+
+        Returns:
+            {'rows', 'chunks', 'output_path', 'model_name', 'model_version'}，未提供 output_path 时另含 predictions
+        """
+        if self.model_registry is not None and self.model_registry.versions(target_column):
+            return self.model_registry.batch_predict(target_column, source, version, chunk_size,
+                                                     output_path, id_column)
+        if target_column not in self.models:
+            raise KeyError(f"没有目标列 {target_column} 的已训练模型")
+
+        entry = self.models[target_column]
+        columns = entry['features'] + ([id_column] if id_column else [])
+        result = score_chunks(entry['model'], entry['preprocessing'], iter_chunks(source, chunk_size, columns),
+                              output_path=output_path, id_column=id_column)
+        result.update({'model_name': target_column, 'model_version': entry['version']})
+        return result
+    
     def ab_test_analysis(self, control_data: Any, treatment_data: Any, 
                         metric: str, confidence_level: float = 0.95) -> Dict[str, Any]:
         """A/B测试分析"""
@@ -709,9 +926,83 @@ class ProfessionalAnalytics:
         
         return ab_results
     
+    def multi_metric_ab_analysis(self, data: Any, variant_col: str, metrics: List[str],
+                                 control: Optional[str] = None, segment_col: Optional[str] = None,
+                                 ratio_metrics: Optional[Dict[str, Tuple[str, str]]] = None,
+                                 confidence_level: float = 0.95, correction: str = 'holm',
+                                 n_boot: int = DEFAULT_BOOTSTRAP) -> Dict[str, Any]:
+        """
+        多指标 × 多分群 A/B 测试（一次计算全部组合，含多重检验校正与 Bootstrap 区间）
+
+        Args:
+            data: 明细数据（每行一个实验单元）
+            variant_col: 实验组列
+            metrics: 均值型指标（如 gmv、converted）
+            control: 对照组标签，默认取排序后的第一个组
+            segment_col: 分群列
+            ratio_metrics: 比率型指标 {名称: (分子列, 分母列)}，如 {'客单价': ('gmv', 'orders')}
+            confidence_level: 置信水平
+            correction: 多重检验校正方法（holm/bh/bonferroni/none）
+            n_boot: Bootstrap 次数，0 表示不计算
+
+        Returns:
+            {'results': 每个比较一条记录, 'summary', 'recommendations'}
+        """
+        results = multi_metric_ab_test(data, variant_col, metrics, control, segment_col, ratio_metrics,
+                                       confidence_level, correction, n_boot)
+        significant = results[results['is_significant']] if len(results) else results
+        analysis = {
+            'results': results.to_dict('records'),
+            'summary': {
+                'total_tests': len(results),
+                'significant_tests': len(significant),
+                'correction': correction,
+                'confidence_level': confidence_level,
+                'segments': int(results['segment'].nunique()) if len(results) else 0
+            },
+            'recommendations': []
+        }
+
+        recommendations = analysis['recommendations']
+        recommendations.append(
+            f"共检验 {len(results)} 个 指标×分群×实验组 组合，{correction} 校正后 {len(significant)} 个显著"
+        )
+        overall = significant[significant['segment'] == OVERALL_SEGMENT] if len(significant) else significant
+        for row in overall.itertuples():
+            direction = '提升' if row.absolute_difference > 0 else '下降'
+            recommendations.append(
+                f"{row.variant} 组 {row.metric} 整体{direction} {abs(row.relative_difference):.1f}%"
+                f"（校正后 p={row.p_value_adjusted:.4f}）"
+            )
+        segment_only = significant[significant['segment'] != OVERALL_SEGMENT] if len(significant) else significant
+        if len(segment_only) and not len(overall):
+            recommendations.append("整体无显著差异但部分分群显著，注意分群结论的探索性质，建议单独验证")
+        if not len(significant):
+            recommendations.append("建议增加样本量或延长测试时间")
+        return analysis
+    
     def time_series_forecasting(self, data: Any, date_column: str, 
-                              value_column: str, periods: int = 12) -> Dict[str, Any]:
-        """时间序列预测"""
+                              value_column: str, periods: int = 12, method: str = 'simple',
+                              series_key: Optional[str] = None) -> Dict[str, Any]:
+        """
+        时间序列预测
+
+        Args:
+            data: 数据
+            date_column: 日期列
+            value_column: 数值列
+            periods: 预测期数
+            method: simple 为移动平均加趋势外推；holt_winters 为指数平滑（水平/趋势/季节），
+                    并以滚动起点回测评估性能
+            series_key: holt_winters 方法下的序列键；给出时持久化拟合状态，之后的调用只推进
+                        晚于已存最后时间点的新观测（data 可以只包含新增数据），
+                        按 forecast_refit_interval 计划或检测到漂移时才用全部历史重新拟合
+
+        Returns:
+            预测结果；持久化状态时含 state_update（mode 为 initial / incremental / refit）
+        """
+        if method not in FORECAST_METHODS:
+            raise ValueError(f"不支持的预测方法: {method}")
         forecast_results = {
             'forecast_values': [],
             'trend_analysis': {},
@@ -731,29 +1022,45 @@ class ProfessionalAnalytics:
                 
                 values = ts_data[value_column].dropna()
                 
+                state_update = None
+                if method == 'holt_winters' and series_key is not None and self.forecast_states is not None:
+                    incremental, values, state_update = self._incremental_forecast(
+                        series_key, values, value_column, periods
+                    )
+                    if incremental is not None:
+                        return incremental
+                
                 # 趋势分析
                 forecast_results['trend_analysis'] = self._analyze_trend(values)
                 
                 # 季节性分析
                 forecast_results['seasonality_analysis'] = self._analyze_seasonality(values)
                 
-                # 简单预测模型
-                forecast_values, confidence_intervals = self._simple_forecast(values, periods)
-                
-                forecast_results['forecast_values'] = forecast_values
-                forecast_results['confidence_intervals'] = confidence_intervals
-                
-                # 模型性能评估
-                if len(values) > periods:
-                    forecast_results['model_performance'] = self._evaluate_forecast_performance(
-                        values, periods
-                    )
+                if method == 'holt_winters':
+                    model, series = self._fit_holt_winters(values, forecast_results['seasonality_analysis'])
+                    forecast_results.update(self._holt_winters_forecast(model, series, periods))
+                else:
+                    # 简单预测模型
+                    forecast_values, confidence_intervals = self._simple_forecast(values, periods)
+                    
+                    forecast_results['forecast_values'] = forecast_values
+                    forecast_results['confidence_intervals'] = confidence_intervals
+                    
+                    # 模型性能评估
+                    if len(values) > periods:
+                        forecast_results['model_performance'] = self._evaluate_forecast_performance(
+                            values, periods
+                        )
                 
                 # 生成洞察
                 forecast_results['insights'] = self._generate_forecast_insights(
                     forecast_results, values
                 )
                 
+                if state_update is not None:
+                    forecast_results['state_update'] = state_update
+                    self._save_forecast_state(series_key, value_column, model, series, values, forecast_results)
+                
             except Exception as e:
                 forecast_results['error'] = f"时间序列预测失败: {str(e)}"
                 forecast_results = self._fallback_forecast()
@@ -949,25 +1256,23 @@ class ProfessionalAnalytics:
         }
         
         if hasattr(corr_matrix, 'values'):
-            # 找出强相关性和弱相关性
-            for i in range(len(corr_matrix.columns)):
-                for j in range(i+1, len(corr_matrix.columns)):
-                    corr_value = corr_matrix.iloc[i, j]
-                    col1, col2 = corr_matrix.columns[i], corr_matrix.columns[j]
-                    
-                    if abs(corr_value) > 0.7:
-                        correlation_analysis['strong_correlations'].append({
-                            'feature1': col1,
-                            'feature2': col2,
-                            'correlation': float(corr_value),
-                            'type': 'positive' if corr_value > 0 else 'negative'
-                        })
-                    elif abs(corr_value) < 0.3:
-                        correlation_analysis['weak_correlations'].append({
-                            'feature1': col1,
-                            'feature2': col2,
-                            'correlation': float(corr_value)
-                        })
+            # 用上三角掩码一次提取强相关与弱相关特征对
+            columns = corr_matrix.columns
+            strong = matrix_pairs(corr_matrix.values, lower=0.7)
+            for i, j, corr_value in zip(strong['i'], strong['j'], strong['correlation']):
+                correlation_analysis['strong_correlations'].append({
+                    'feature1': columns[i],
+                    'feature2': columns[j],
+                    'correlation': float(corr_value),
+                    'type': 'positive' if corr_value > 0 else 'negative'
+                })
+            weak = matrix_pairs(corr_matrix.values, upper=0.3)
+            for i, j, corr_value in zip(weak['i'], weak['j'], weak['correlation']):
+                correlation_analysis['weak_correlations'].append({
+                    'feature1': columns[i],
+                    'feature2': columns[j],
+                    'correlation': float(corr_value)
+                })
             
             # 生成洞察
             strong_count = len(correlation_analysis['strong_correlations'])
@@ -985,7 +1290,8 @@ class ProfessionalAnalytics:
         
         return correlation_analysis
     
-    def _detect_outliers_comprehensive(self, data: Any, numeric_cols: List[str]) -> Dict[str, Any]:
+    def _detect_outliers_comprehensive(self, data: Any, numeric_cols: List[str],
+                                       column_stats: Optional[ColumnStatistics] = None) -> Dict[str, Any]:
         """全面异常值检测"""
         outlier_results = {
             'by_column': {},
@@ -996,12 +1302,13 @@ class ProfessionalAnalytics:
         }
         
         if hasattr(data, 'loc'):
+            column_stats = column_stats or compute_column_statistics(data, numeric_cols)
             total_outliers = 0
             
             for col in numeric_cols:
-                col_data = data[col].dropna()
-                if len(col_data) > 0:
-                    col_outliers = self._detect_column_outliers(col_data, col)
+                col_total = column_stats.non_null(col)
+                if col_total > 0:
+                    col_outliers = self._detect_column_outliers(None, col, column_stats)
                     outlier_results['by_column'][col] = col_outliers
                     total_outliers += col_outliers['count']
             
@@ -1009,13 +1316,14 @@ class ProfessionalAnalytics:
             
             # 分析异常值模式
             if total_outliers > 0:
-                outlier_results['outlier_patterns'] = self._analyze_outlier_patterns(data, numeric_cols)
+                outlier_results['outlier_patterns'] = self._analyze_outlier_patterns(data, numeric_cols, column_stats)
                 outlier_results['recommendations'] = self._generate_outlier_recommendations(outlier_results)
         
         return outlier_results
     
-    def _detect_column_outliers(self, series: Any, column_name: str) -> Dict[str, Any]:
-        """单列异常值检测"""
+    def _detect_column_outliers(self, series: Any, column_name: str,
+                                column_stats: Optional[ColumnStatistics] = None) -> Dict[str, Any]:
+        """单列异常值检测（提供共享列统计时直接读取其中的四分位距结果）"""
         outlier_info = {
             'count': 0,
             'percentage': 0.0,
@@ -1024,7 +1332,12 @@ class ProfessionalAnalytics:
             'method': 'iqr'
         }
         
-        if len(series) > 4:
+        if column_stats is not None:
+            shared = column_stats.outliers.get(column_name)
+            if shared is not None:
+                outlier_info.update(shared)
+                outlier_info['percentage'] = shared['count'] / column_stats.non_null(column_name) * 100
+        elif len(series) > 4:
             # IQR方法
             q1 = series.quantile(0.25)
             q3 = series.quantile(0.75)
@@ -1047,7 +1360,8 @@ class ProfessionalAnalytics:
         
         return outlier_info
     
-    def _analyze_distributions(self, data: Any, numeric_cols: List[str]) -> Dict[str, Any]:
+    def _analyze_distributions(self, data: Any, numeric_cols: List[str],
+                               column_stats: Optional[ColumnStatistics] = None) -> Dict[str, Any]:
         """分析数据分布"""
         distribution_analysis = {
             'by_column': {},
@@ -1060,7 +1374,7 @@ class ProfessionalAnalytics:
             for col in numeric_cols:
                 col_data = data[col].dropna()
                 if len(col_data) > 0:
-                    dist_info = self._analyze_single_distribution(col_data, col)
+                    dist_info = self._analyze_single_distribution(col_data, col, column_stats)
                     distribution_analysis['by_column'][col] = dist_info
             
             # 整体模式分析
@@ -1070,12 +1384,19 @@ class ProfessionalAnalytics:
         
         return distribution_analysis
     
-    def _analyze_single_distribution(self, series: Any, column_name: str) -> Dict[str, Any]:
-        """单列分布分析"""
+    def _analyze_single_distribution(self, series: Any, column_name: str,
+                                     column_stats: Optional[ColumnStatistics] = None) -> Dict[str, Any]:
+        """单列分布分析（提供共享列统计时复用其中的均值、中位数、标准差与高阶矩）"""
+        shared = column_stats is not None and column_name in column_stats.skewness
+        if shared:
+            summary = column_stats.summary[column_name]
+            mean, median, std = summary['mean'], summary['50%'], summary['std']
+        else:
+            mean, median, std = series.mean(), series.median(), series.std()
         dist_info = {
-            'mean': float(series.mean()),
-            'median': float(series.median()),
-            'std': float(series.std()),
+            'mean': float(mean),
+            'median': float(median),
+            'std': float(std),
             'skewness': 0.0,
             'kurtosis': 0.0,
             'is_normal': False,
@@ -1085,8 +1406,12 @@ class ProfessionalAnalytics:
         if SCIPY_AVAILABLE and len(series) > 8:
             try:
                 # 计算偏度和峰度
-                dist_info['skewness'] = float(stats.skew(series))
-                dist_info['kurtosis'] = float(stats.kurtosis(series))
+                if shared:
+                    dist_info['skewness'] = float(column_stats.skewness[column_name])
+                    dist_info['kurtosis'] = float(column_stats.kurtosis[column_name])
+                else:
+                    dist_info['skewness'] = float(stats.skew(series))
+                    dist_info['kurtosis'] = float(stats.kurtosis(series))
                 
                 # 正态性检验
                 _, p_value = stats.normaltest(series)
@@ -1105,20 +1430,17 @@ class ProfessionalAnalytics:
         
         return dist_info
     
-    def _analyze_outlier_patterns(self, data: Any, numeric_cols: List[str]) -> List[Dict[str, Any]]:
+    def _analyze_outlier_patterns(self, data: Any, numeric_cols: List[str],
+                                  column_stats: Optional[ColumnStatistics] = None) -> List[Dict[str, Any]]:
         """分析异常值模式"""
         patterns = []
+        column_stats = column_stats or compute_column_statistics(data, numeric_cols)
         
         # 检查多列同时出现异常值的情况
-        outlier_cols = []
-        for col in numeric_cols:
-            col_data = data[col].dropna()
-            if len(col_data) > 0:
-                q1, q3 = col_data.quantile([0.25, 0.75])
-                iqr = q3 - q1
-                outlier_mask = (col_data < q1 - 1.5*iqr) | (col_data > q3 + 1.5*iqr)
-                if outlier_mask.sum() > 0:
-                    outlier_cols.append(col)
+        outlier_cols = [
+            col for col in numeric_cols
+            if column_stats.outliers.get(col, {}).get('count', 0) > 0
+        ]
         
         if len(outlier_cols) > 1:
             patterns.append({
@@ -1203,7 +1525,7 @@ class ProfessionalAnalytics:
         return trend_info
     
     def _analyze_seasonality(self, values: Any) -> Dict[str, Any]:
-        """分析季节性"""
+        """分析季节性（基于周期图，带时间索引时先补齐缺失日期）"""
         seasonality_info = {
             'detected': False,
             'strength': 0.0,
@@ -1211,52 +1533,12 @@ class ProfessionalAnalytics:
             'pattern': 'none'
         }
         
-        if len(values) >= 24:  # 至少两年数据
-            try:
-                # 简单的季节性检测：检查12个月周期
-                values_array = values.values if hasattr(values, 'values') else values
-                
-                # 计算自相关来检测周期性
-                autocorr_12 = self._calculate_autocorrelation(values_array, 12)
-                autocorr_4 = self._calculate_autocorrelation(values_array, 4)  # 季度
-                
-                if abs(autocorr_12) > 0.3:
-                    seasonality_info.update({
-                        'detected': True,
-                        'strength': float(abs(autocorr_12)),
-                        'period': 12,
-                        'pattern': 'annual'
-                    })
-                elif abs(autocorr_4) > 0.3:
-                    seasonality_info.update({
-                        'detected': True,
-                        'strength': float(abs(autocorr_4)),
-                        'period': 4,
-                        'pattern': 'quarterly'
-                    })
-                    
-            except Exception:
-                pass
-        
-        return seasonality_info
-    
-    def _calculate_autocorrelation(self, series: np.ndarray, lag: int) -> float:
-        """计算自相关系数"""
         try:
-            if len(series) <= lag:
-                return 0.0
-            
-            series1 = series[:-lag]
-            series2 = series[lag:]
-            
-            if len(series1) == 0 or len(series2) == 0:
-                return 0.0
-            
-            corr = np.corrcoef(series1, series2)[0, 1]
-            return corr if not np.isnan(corr) else 0.0
-            
+            seasonality_info.update(detect_seasonality(values))
         except Exception:
-            return 0.0
+            pass
+        
+        return seasonality_info
     
     def _simple_forecast(self, values: Any, periods: int) -> Tuple[List[Dict], List[Dict]]:
         """简单预测"""
@@ -1298,6 +1580,152 @@ class ProfessionalAnalytics:
         
         return forecast_values, confidence_intervals
     
+    def _fit_holt_winters(self, values: Any, seasonality: Dict[str, Any]) -> Tuple[Any, Any]:
+        """拟合 Holt-Winters，季节周期取检测结果（未检测到时按数据频率取默认值）"""
+        series, freq = regularize_series(values)
+        period = seasonality.get('period') if seasonality.get('detected') else default_period(freq)
+        return HoltWintersForecaster(period).fit(series), series
+    
+    def _holt_winters_output(self, model: Any, periods: int) -> Dict[str, Any]:
+        """由已拟合（或已推进）的状态外推预测值与置信区间"""
+        result = model.forecast(periods, self.config.confidence_level)
+
+        forecast_values, confidence_intervals = [], []
+        for i in range(periods):
+            forecast_values.append({
+                'period': i + 1,
+                'value': float(result['forecast'][0, i]),
+                'date_offset': i + 1
+            })
+            confidence_intervals.append({
+                'period': i + 1,
+                'lower': float(result['lower'][0, i]),
+                'upper': float(result['upper'][0, i]),
+                'confidence': self.config.confidence_level
+            })
+
+        parameters = model.parameters().iloc[0].to_dict()
+        parameters['period'] = int(parameters['period'])
+        return {
+            'forecast_values': forecast_values,
+            'confidence_intervals': confidence_intervals,
+            'model_parameters': {'method': 'holt_winters', **parameters}
+        }
+    
+    def _holt_winters_forecast(self, model: Any, series: Any, periods: int) -> Dict[str, Any]:
+        """Holt-Winters 预测，并以滚动起点回测评估性能"""
+        output = self._holt_winters_output(model, periods)
+        performance = {}
+        if len(series) > periods + MIN_FORECAST_POINTS:
+            n_origins = max(1, min(FORECAST_BACKTEST_ORIGINS, (len(series) - MIN_FORECAST_POINTS) // periods - 1))
+            backtest = rolling_origin_backtest(series, periods, n_origins=n_origins, period=model.period,
+                                               confidence=self.config.confidence_level)
+            performance = {key: backtest[key] for key in
+                           ('mae', 'rmse', 'mape', 'accuracy_score', 'interval_coverage', 'origins')}
+            performance['mse'] = backtest['rmse'] ** 2
+            performance['method'] = 'rolling_origin'
+
+        output['model_performance'] = performance
+        return output
+    
+    def _incremental_forecast(self, series_key: str, values: Any, value_column: str,
+                              periods: int) -> Tuple[Optional[Dict[str, Any]], Any, Dict[str, Any]]:
+        """
+        用已持久化的状态推进新观测
+
+        Returns:
+            (预测结果, 全量拟合所用的序列, 状态更新说明)；需要全量拟合时预测结果为 None，
+            序列为已存历史与新观测的拼接（首次出现的序列直接使用传入数据）
+        """
+        record = self.forecast_states.load(series_key)
+        if record is None or record.get('value_column') != value_column:
+            return None, values, {'mode': 'initial', 'reason': 'new_series', 'new_points': len(values)}
+
+        start = pd.Timestamp(record['start_time'])
+        step = pd.Timedelta(seconds=record['step_seconds'])
+        last = start + (record['n_obs'] - 1) * step
+        new = values[values.index > last]
+        offsets = np.rint((new.index - last) / step).astype(np.int64)
+        # 距最后一个已存点不足半个步长的观测归入该点（已保存），不再推进状态
+        new = new[offsets >= 1]
+        positions, first = np.unique(offsets[offsets >= 1], return_index=True)
+        segment = np.full(int(positions[-1]) if len(positions) else 0, np.nan)
+        segment[positions - 1] = new.to_numpy(dtype=float)[first]
+
+        model = HoltWintersForecaster.from_state(record['model'])
+        if len(segment):
+            model.update(segment)
+
+        reason = None
+        ratio = drift_ratio(record, model.state)
+        if model.state['n_obs'] - record['fit_n_obs'] >= self.config.forecast_refit_interval:
+            reason = 'schedule'
+        elif ratio is not None and ratio > self.config.forecast_drift_threshold:
+            reason = 'drift'
+        state_update = {'mode': 'refit' if reason else 'incremental', 'reason': reason,
+                        'new_points': len(new), 'drift_ratio': ratio}
+        if reason:
+            history = np.concatenate([self.forecast_states.history(series_key, record['n_obs']), segment])
+            full = pd.Series(history, index=start + np.arange(len(history)) * step)
+            return None, full.dropna(), state_update
+
+        record.update({
+            'model': model.state_dict(),
+            'n_obs': model.state['n_obs'],
+            'updated_at': datetime.now().isoformat()
+        })
+        self.forecast_states.save(series_key, record, segment, offset=model.state['n_obs'] - len(segment))
+
+        forecast_results = dict(record['analysis'])
+        forecast_results.update(self._holt_winters_output(model, periods))
+        forecast_results['state_update'] = state_update
+        return forecast_results, values, state_update
+    
+    def _save_forecast_state(self, series_key: str, value_column: str, model: Any, series: Any,
+                             values: Any, forecast_results: Dict[str, Any]) -> None:
+        """全量拟合后保存状态、规整后的历史与分析结果"""
+        step, _ = infer_step(values.index)
+        state = model.state
+        record = {
+            'series_key': str(series_key),
+            'value_column': value_column,
+            'model': model.state_dict(),
+            'start_time': values.index[0].isoformat(),
+            'step_seconds': step.total_seconds(),
+            'n_obs': state['n_obs'],
+            'fit_n_obs': state['n_obs'],
+            'fit_sse': float(np.sum(state['sse'])),
+            'fit_errors': int(np.sum(state['n_errors'])),
+            'fitted_at': datetime.now().isoformat(),
+            'updated_at': datetime.now().isoformat(),
+            'analysis': {key: forecast_results[key] for key in
+                         ('trend_analysis', 'seasonality_analysis', 'model_performance', 'insights')}
+        }
+        self.forecast_states.save(series_key, record, series)
+    
+    def refresh_forecasts(self, data: Any, series_column: str, date_column: str, value_column: str,
+                          periods: int = 12) -> Dict[Any, Dict[str, Any]]:
+        """
+        增量刷新多条序列的 Holt-Winters 预测
+
+        只处理 data 中出现的序列，每条序列按 time_series_forecasting 的持久化状态推进新增观测
+
+        Args:
+            data: 新增数据（长表，也可包含完整历史）
+            series_column: 序列键列（如 store_id）
+            date_column: 日期列
+            value_column: 数值列
+            periods: 预测期数
+
+        Returns:
+            {序列键: 预测结果}
+        """
+        return {
+            key: self.time_series_forecasting(group, date_column, value_column, periods,
+                                              method='holt_winters', series_key=f'{value_column}:{key}')
+            for key, group in data.groupby(series_column, sort=True)
+        }
+    
     def _evaluate_forecast_performance(self, values: Any, periods: int) -> Dict[str, Any]:
         """评估预测性能"""
         performance = {
@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""
+分析结果缓存
+以 输入数据指纹（形状、类型、内容哈希）+ 分析参数 为键缓存分析结果，
+按内存占用做 LRU 淘汰，可选持久化到磁盘，并统计命中率；
+缓存中保存结果的序列化字节，每次命中都反序列化出独立副本，调用方修改结果不会污染缓存
+"""
+
+import os
+import json
+import pickle
+import hashlib
+import inspect
+import functools
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Callable
+
+# 条件导入
+try:
+    import pandas as pd
+    import numpy as np
+    PANDAS_AVAILABLE = True
+except ImportError:
+    PANDAS_AVAILABLE = False
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+
+def data_fingerprint(data: Any) -> Optional[str]:
+    """
+    数据指纹
+
+    对全部行的内容（含索引）做向量化哈希，任意单元格的变化都会改变指纹
+
+    Args:
+        data: DataFrame
+
+    Returns:
+        十六进制指纹，不支持的输入返回 None
+    """
+    if not PANDAS_AVAILABLE or not isinstance(data, pd.DataFrame):
+        return None
+
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(repr(data.shape).encode())
+
+    index = data.index
+    if isinstance(index, pd.RangeIndex):
+        digest.update(repr((index.start, index.stop, index.step)).encode())
+    else:
+        digest.update(pd.util.hash_pandas_object(index).to_numpy().tobytes())
+
+    # 数值/日期/布尔列直接哈希内存字节，其余列用 pandas 逐值哈希
+    for name, column in data.items():
+        digest.update(repr((name, str(column.dtype))).encode())
+        values = column.to_numpy()
+        if values.dtype.kind not in 'biufcmM':
+            try:
+                values = pd.util.hash_array(values)
+            except TypeError:
+                # 含不可哈希对象（如列表）的列退化为字符串哈希
+                values = pd.util.hash_array(column.astype(str).to_numpy())
+        digest.update(np.ascontiguousarray(values).view(np.uint8))
+    return digest.hexdigest()
+
+
+def make_key(analysis: str, fingerprint: str, params: Dict[str, Any]) -> str:
+    """
+    由分析名、数据指纹与参数生成缓存键
+
+    Args:
+        analysis: 分析名称
+        fingerprint: 数据指纹
+        params: 分析参数
+
+    Returns:
+        缓存键
+    """
+    payload = json.dumps([analysis, fingerprint, params], sort_keys=True, default=repr, ensure_ascii=False)
+    return hashlib.blake2b(payload.encode('utf-8'), digest_size=16).hexdigest()
+
+
+class ResultCache:
+    """按内存占用淘汰的 LRU 结果缓存（线程安全，可选磁盘持久化）"""
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES, cache_dir: Optional[str] = None):
+        """
+        初始化结果缓存
+
+        Args:
+            max_bytes: 内存缓存上限（按结果序列化后的大小计）
+            cache_dir: 磁盘持久化目录，为空时仅缓存在内存
+        """
+        self.max_bytes = max_bytes
+        self.cache_dir = cache_dir
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f'{key}.pkl')
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """
+        读取缓存结果（命中时返回反序列化的独立副本）
+
+        Args:
+            key: 缓存键
+            default: 未命中时的返回值
+
+        Returns:
+            缓存结果或 default
+        """
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                payload = self._entries[key][0]
+            else:
+                payload = None
+        if payload is not None:
+            return pickle.loads(payload)
+
+        if self.cache_dir and os.path.exists(self._path(key)):
+            try:
+                with open(self._path(key), 'rb') as f:
+                    payload = f.read()
+                value = pickle.loads(payload)
+            except Exception:
+                value = None
+            else:
+                with self._lock:
+                    self.disk_hits += 1
+                    self._store(key, payload)
+                return value
+
+        with self._lock:
+            self.misses += 1
+        return default
+
+    def put(self, key: str, value: Any):
+        """
+        写入缓存结果，超出内存上限时淘汰最久未使用的结果
+
+        Args:
+            key: 缓存键
+            value: 结果（需可序列化）
+        """
+        try:
+            payload = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception:
+            return
+        with self._lock:
+            self._store(key, payload)
+        if self.cache_dir:
+            path = self._path(key)
+            temp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+            with open(temp_path, 'wb') as f:
+                f.write(payload)
+            os.replace(temp_path, path)
+
+    def _store(self, key: str, payload: bytes):
+        """写入序列化结果并按大小淘汰（需持有锁）"""
+        size = len(payload)
+        if key in self._entries:
+            self._bytes -= self._entries.pop(key)[1]
+        if size > self.max_bytes:
+            return
+        self._entries[key] = (payload, size)
+        self._bytes += size
+        while self._bytes > self.max_bytes:
+            _, (_, evicted_size) = self._entries.popitem(last=False)
+            self._bytes -= evicted_size
+            self.evictions += 1
+
+    def clear(self, include_disk: bool = True):
+        """
+        清空缓存
+
+        Args:
+            include_disk: 是否同时删除磁盘上的缓存文件
+        """
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+        if include_disk and self.cache_dir:
+            for name in os.listdir(self.cache_dir):
+                if name.endswith('.pkl'):
+                    os.remove(os.path.join(self.cache_dir, name))
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._entries
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        命中统计
+
+        Returns:
+            {'hits', 'disk_hits', 'misses', 'hit_rate', 'evictions', 'entries', 'bytes', 'max_bytes'}
+        """
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                'hits': self.hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'hit_rate': (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes
+            }
+
+
+def cached_analysis(method: Callable) -> Callable:
+    """
+    分析方法缓存装饰器
+
+    被装饰方法的第一个参数为数据，其余参数（含默认值）参与缓存键；
+    实例需有 analysis_cache（ResultCache）属性，数据无法生成指纹（如分块迭代器）时直接计算。
+
+    指纹不按数据对象记忆：每次调用（包括命中）都对全部行重新哈希，并反序列化结果副本，
+    命中耗时随行数线性增长（百万行约 0.2 秒），换取原地修改过的数据也不会命中旧结果
+    """
+    signature = inspect.signature(method)
+
+    @functools.wraps(method)
+    def wrapper(self, data, *args, **kwargs):
+        cache = getattr(self, 'analysis_cache', None)
+        fingerprint = data_fingerprint(data) if isinstance(cache, ResultCache) else None
+        if fingerprint is None:
+            return method(self, data, *args, **kwargs)
+
+        bound = signature.bind(self, data, *args, **kwargs)
+        bound.apply_defaults()
+        params = {name: value for name, value in list(bound.arguments.items())[2:]}
+        key = make_key(method.__name__, fingerprint, params)
+
+        sentinel = object()
+        result = cache.get(key, sentinel)
+        if result is sentinel:
+            result = method(self, data, *args, **kwargs)
+            cache.put(key, result)
+        return result
+
+    return wrapper
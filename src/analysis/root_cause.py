@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+"""
+GMV变化根因定位
+在 区域 × 品类 × 门店类型 × 渠道 等维度组合上自动下钻，
+找出解释大部分GMV变化的最小细分集合
+"""
+
+from itertools import combinations
+from typing import Dict, List, Any, Optional, Tuple
+
+# 条件导入
+try:
+    import pandas as pd
+    import numpy as np
+    PANDAS_AVAILABLE = True
+except ImportError:
+    PANDAS_AVAILABLE = False
+
+from .metrics_analyzer import SimpleDataProcessor
+
+DEFAULT_DIMENSIONS = ['region', 'category', 'store_type', 'channel']
+
+
+class RootCauseAnalyzer:
+    """维度下钻根因分析器"""
+
+    def __init__(self, current_data: Any, previous_data: Any, metric: str = 'gmv',
+                 dimensions: Optional[List[str]] = None, min_contribution: float = 0.1,
+                 max_depth: int = 3, coverage_target: float = 0.8, max_causes: int = 5,
+                 specificity_ratio: float = 0.9):
+        """
+        初始化根因分析器
+
+        Args:
+            current_data: 当前期明细数据
+            previous_data: 上期明细数据
+            metric: 可加指标列（默认GMV）
+            dimensions: 参与下钻的维度，默认取数据中存在的 区域/品类/门店类型/渠道
+            min_contribution: 剪枝阈值，细分变化占总变化的比例低于该值时不再展开
+            max_depth: 最大组合维度数
+            coverage_target: 根因集合需要解释的总变化比例
+            max_causes: 最多返回的根因数量
+            specificity_ratio: 子细分变化达到父细分该比例时，用更精确的子细分替代父细分
+        """
+        self.current_data = current_data
+        self.previous_data = previous_data
+        self.metric = metric
+        self.min_contribution = min_contribution
+        self.max_depth = max_depth
+        self.coverage_target = coverage_target
+        self.max_causes = max_causes
+        self.specificity_ratio = specificity_ratio
+
+        columns = self._columns(current_data)
+        candidates = dimensions or DEFAULT_DIMENSIONS
+        self.dimensions = [d for d in candidates if d in columns]
+
+    @staticmethod
+    def _columns(data: Any) -> List[str]:
+        """获取数据列名（兼容字典列表）"""
+        if hasattr(data, 'columns'):
+            return list(data.columns)
+        rows = SimpleDataProcessor.to_dict_list(data)
+        return list(rows[0].keys()) if rows else []
+
+    def analyze(self) -> Dict[str, Any]:
+        """
+        执行根因下钻
+
+        Returns:
+            根因分析结果字典
+        """
+        result = {
+            'metric': self.metric,
+            'dimensions': self.dimensions,
+            'total_current': 0.0,
+            'total_previous': 0.0,
+            'total_change': 0.0,
+            'total_change_rate': 0.0,
+            'root_causes': [],
+            'explained_ratio': 0.0,
+            'segments_evaluated': 0,
+            'insights': []
+        }
+
+        if not self.dimensions:
+            result['insights'].append("数据中缺少可下钻的维度列")
+            return result
+
+        cube = self._build_cube()
+        total_current = float(sum(cube['current']))
+        total_previous = float(sum(cube['previous']))
+        total_change = total_current - total_previous
+        result.update({
+            'total_current': total_current,
+            'total_previous': total_previous,
+            'total_change': total_change,
+            'total_change_rate': (total_change / total_previous * 100) if total_previous != 0 else 0.0
+        })
+
+        if total_change == 0:
+            result['insights'].append(f"{self.metric} 无变化，无需根因定位")
+            return result
+
+        candidates, evaluated = self._search(cube, total_change)
+        causes = self._select(candidates, total_change)
+
+        result['segments_evaluated'] = evaluated
+        result['root_causes'] = causes
+        result['explained_ratio'] = sum(c['contribution'] for c in causes) / 100
+        result['insights'] = self._generate_insights(result)
+        return result
+
+    def _build_cube(self) -> Any:
+        """按全部下钻维度预聚合两期可加指标，后续所有下钻都在该立方体上完成"""
+        if PANDAS_AVAILABLE and hasattr(self.current_data, 'groupby'):
+            current = self.current_data.groupby(self.dimensions, observed=True)[self.metric].sum()
+            previous = self.previous_data.groupby(self.dimensions, observed=True)[self.metric].sum()
+            cube = pd.concat([current.rename('current'), previous.rename('previous')], axis=1)
+            return cube.fillna(0.0).reset_index()
+
+        cube = {}
+        for column, data in (('current', self.current_data), ('previous', self.previous_data)):
+            for row in SimpleDataProcessor.to_dict_list(data):
+                key = tuple(row.get(d) for d in self.dimensions)
+                cell = cube.setdefault(key, {'current': 0.0, 'previous': 0.0})
+                cell[column] += row.get(self.metric, 0) or 0
+        keys = list(cube.keys())
+        table = {d: [k[i] for k in keys] for i, d in enumerate(self.dimensions)}
+        table['current'] = [cube[k]['current'] for k in keys]
+        table['previous'] = [cube[k]['previous'] for k in keys]
+        return table
+
+    def _search(self, cube: Any, total_change: float) -> Tuple[List[Dict[str, Any]], int]:
+        """
+        逐层下钻：第 k 层只在第 k-1 层通过阈值的细分内部展开
+        """
+        threshold = abs(total_change) * self.min_contribution
+        passed = {}      # 维度组合 -> 通过阈值的细分键集合
+        candidates = []
+        evaluated = 0
+
+        for depth in range(1, min(self.max_depth, len(self.dimensions)) + 1):
+            level_passed = False
+            for combo in combinations(self.dimensions, depth):
+                parents = [tuple(d for d in combo if d != removed) for removed in combo] if depth > 1 else []
+                if depth > 1 and not any(passed.get(p) for p in parents):
+                    continue
+
+                count, segments = self._aggregate(cube, combo, parents, passed, total_change, threshold)
+                evaluated += count
+
+                keep = set()
+                for key, current, previous in segments:
+                    keep.add(key)
+                    candidates.append({
+                        'segment': dict(zip(combo, key)),
+                        'current': float(current),
+                        'previous': float(previous),
+                        'change': float(current - previous)
+                    })
+                if keep:
+                    passed[combo] = keep
+                    level_passed = True
+
+            if not level_passed:
+                break
+
+        return candidates, evaluated
+
+    def _aggregate(self, cube: Any, combo: Tuple[str, ...], parents: List[Tuple[str, ...]],
+                   passed: Dict[Tuple[str, ...], set], total_change: float,
+                   threshold: float) -> Tuple[int, List[Tuple[tuple, float, float]]]:
+        """
+        在立方体上按维度组合聚合
+
+        只聚合至少一个父细分通过阈值的行，并只返回与总变化同向且超过阈值的细分
+
+        Returns:
+            (评估的细分数, [(细分键, 当前值, 上期值)])
+        """
+        columns = list(combo)
+
+        if PANDAS_AVAILABLE and hasattr(cube, 'groupby'):
+            table = cube
+            if parents:
+                mask = np.zeros(len(cube), dtype=bool)
+                for parent in parents:
+                    keys = passed.get(parent)
+                    if not keys:
+                        continue
+                    index = pd.MultiIndex.from_frame(cube[list(parent)])
+                    mask |= index.isin(list(keys))
+                table = cube[mask]
+            if table.empty:
+                return 0, []
+            grouped = table.groupby(columns, observed=True)[['current', 'previous']].sum()
+            change = grouped['current'].to_numpy() - grouped['previous'].to_numpy()
+            significant = grouped[(change * total_change > 0) & (np.abs(change) >= threshold)]
+            keys = [k if isinstance(k, tuple) else (k,) for k in significant.index]
+            return len(grouped), list(zip(keys, significant['current'].to_numpy(), significant['previous'].to_numpy()))
+
+        totals = {}
+        for i in range(len(cube['current'])):
+            row = {d: cube[d][i] for d in self.dimensions}
+            if parents and not any(
+                tuple(row[d] for d in parent) in passed.get(parent, ()) for parent in parents
+            ):
+                continue
+            key = tuple(row[d] for d in columns)
+            cell = totals.setdefault(key, [0.0, 0.0])
+            cell[0] += cube['current'][i]
+            cell[1] += cube['previous'][i]
+        significant = [
+            (key, cur, prev) for key, (cur, prev) in totals.items()
+            if (cur - prev) * total_change > 0 and abs(cur - prev) >= threshold
+        ]
+        return len(totals), significant
+
+    def _select(self, candidates: List[Dict[str, Any]], total_change: float) -> List[Dict[str, Any]]:
+        """贪心选择互不重叠且尽量精确的细分，直到解释足够比例的变化"""
+        def is_descendant(child: Dict[str, Any], parent: Dict[str, Any]) -> bool:
+            return (len(child['segment']) > len(parent['segment']) and
+                    all(child['segment'].get(d) == v for d, v in parent['segment'].items()))
+
+        def overlaps(a: Dict[str, Any], b: Dict[str, Any]) -> bool:
+            # 两个细分在任一共同维度上取值不同即互斥
+            return not any(d in b['segment'] and b['segment'][d] != v for d, v in a['segment'].items())
+
+        ordered = sorted(candidates, key=lambda c: (-abs(c['change']), len(c['segment'])))
+        selected = []
+        explained = 0.0
+
+        for candidate in ordered:
+            if any(overlaps(candidate, s) for s in selected):
+                continue
+
+            # 用变化量接近的更细粒度子细分替代
+            refined = candidate
+            for child in ordered:
+                if (is_descendant(child, refined) and
+                        abs(child['change']) >= abs(refined['change']) * self.specificity_ratio):
+                    refined = child
+
+            selected.append(refined)
+            explained += refined['change'] / total_change
+            if explained >= self.coverage_target or len(selected) >= self.max_causes:
+                break
+
+        return [self._format_cause(c, total_change) for c in selected]
+
+    @staticmethod
+    def _format_cause(candidate: Dict[str, Any], total_change: float) -> Dict[str, Any]:
+        """格式化根因条目"""
+        previous = candidate['previous']
+        return {
+            'segment': candidate['segment'],
+            'label': ' & '.join(f"{d}={v}" for d, v in candidate['segment'].items()),
+            'current': candidate['current'],
+            'previous': previous,
+            'change': candidate['change'],
+            'change_rate': (candidate['change'] / previous * 100) if previous != 0 else 0.0,
+            'contribution': candidate['change'] / total_change * 100
+        }
+
+    def _generate_insights(self, result: Dict[str, Any]) -> List[str]:
+        """生成根因洞察"""
+        insights = []
+        direction = "下降" if result['total_change'] < 0 else "增长"
+        causes = result['root_causes']
+
+        if not causes:
+            insights.append(f"{self.metric}{direction}分散在各细分中，未发现集中的根因")
+            return insights
+
+        insights.append(
+            f"{len(causes)} 个细分解释了 {result['explained_ratio']:.1%} 的{self.metric}{direction}"
+        )
+        for cause in causes[:3]:
+            insights.append(f"{cause['label']}: 变化 {cause['change']:,.2f}，贡献 {cause['contribution']:.1f}%")
+        return insights
@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+"""
+基于周期图(FFT)的季节性检测
+一次 FFT 得到全部频率的功率与全部滞后的自相关，O(n log n) 找出主周期及其强度；
+支持缺失日期补齐，并可对多条等长序列批量计算
+"""
+
+from typing import Dict, Any, Optional, Tuple
+
+# 条件导入
+try:
+    import pandas as pd
+    import numpy as np
+    PANDAS_AVAILABLE = True
+except ImportError:
+    PANDAS_AVAILABLE = False
+
+# 自相关强度阈值（与原固定滞后检测口径一致），短序列另按 2/√n 的显著性界提高
+STRENGTH_THRESHOLD = 0.3
+# 每条序列评估的周期图峰值数
+TOP_CANDIDATES = 5
+# 至少需要的点数（且每个候选周期至少完整出现两次）
+MIN_POINTS = 12
+# 较短周期的自相关达到最优周期该比例时，优先选择较短周期（避免选中倍周期）
+HARMONIC_RATIO = 0.9
+
+# 不同数据频率下常见周期的名称
+_PATTERN_NAMES = {
+    'D': {7: 'weekly', 30: 'monthly', 31: 'monthly', 91: 'quarterly', 365: 'annual'},
+    'W': {4: 'monthly', 13: 'quarterly', 52: 'annual'},
+    'M': {3: 'quarterly', 6: 'semiannual', 12: 'annual'},
+    'Q': {2: 'semiannual', 4: 'annual'}
+}
+_DEFAULT_PATTERN_NAMES = {4: 'quarterly', 7: 'weekly', 12: 'annual'}
+
+
+def pattern_name(period: Optional[int], freq: Optional[str] = None) -> str:
+    """
+    周期名称
+
+    Args:
+        period: 周期长度（以数据间隔为单位）
+        freq: 数据频率（D/W/M/Q），未知时按月度/日度常见周期命名
+
+    Returns:
+        周期名称，如 weekly / annual，无法命名时返回 '{period}-period'
+    """
+    if not period:
+        return 'none'
+    names = _PATTERN_NAMES.get(freq, _DEFAULT_PATTERN_NAMES)
+    return names.get(int(period), f'{int(period)}-period')
+
+
+def infer_step(times: Any) -> Tuple[Any, Optional[str]]:
+    """
+    推断数据间隔
+
+    Args:
+        times: 已排序的时间值（日期或数值）
+
+    Returns:
+        (间隔, 频率代码)；日期按中位间隔推断，数值时间返回 (中位间隔, None)
+    """
+    times = pd.Series(times)
+    if pd.api.types.is_datetime64_any_dtype(times):
+        diffs = times.diff().dropna()
+        diffs = diffs[diffs > pd.Timedelta(0)]
+        step = diffs.median() if len(diffs) else pd.Timedelta(days=1)
+        days = step / pd.Timedelta(days=1)
+        if days <= 1.5:
+            freq = 'D'
+        elif days <= 10:
+            freq = 'W'
+        elif days <= 45:
+            freq = 'M'
+        else:
+            freq = 'Q'
+        return step, freq
+
+    diffs = np.diff(np.asarray(times, dtype=float))
+    diffs = diffs[diffs > 0]
+    return (float(np.median(diffs)) if len(diffs) else 1.0), None
+
+
+def time_steps(times: Any, starts: Any, step: Any) -> Any:
+    """
+    每个点相对所属序列起点的整数步数
+
+    Args:
+        times: 按序列连续排列、序列内已排序的时间值
+        starts: 每个点所属序列起点的时间值（与 times 等长）
+        step: 数据间隔
+
+    Returns:
+        整数步数数组
+    """
+    offsets = pd.Series(times).to_numpy() - pd.Series(starts).to_numpy()
+    return np.rint(offsets / step).astype(np.int64)
+
+
+def regularize_rows(values: Any, rows: Any, steps: Any, n_rows: int, span: int) -> Any:
+    """
+    将带缺口的序列放入 (n_rows, span) 矩阵并按行线性插值补齐缺失点
+
+    Args:
+        values: 数值
+        rows: 每个点所在行
+        steps: 每个点所在列（相对序列起点的步数）
+        n_rows: 行数
+        span: 列数
+
+    Returns:
+        补齐后的二维矩阵
+    """
+    matrix = np.full((n_rows, span), np.nan)
+    matrix[rows, steps] = values
+    if np.isnan(matrix).any():
+        matrix = pd.DataFrame(matrix).interpolate(axis=1, limit_direction='both').to_numpy()
+    return matrix
+
+
+def regularize_series(values: Any, times: Any = None) -> Tuple[Any, Optional[str]]:
+    """
+    将单条序列补齐为等间隔序列
+
+    Args:
+        values: 数值（若为带时间索引的 Series 且未给出 times，则使用其索引）
+        times: 时间值
+
+    Returns:
+        (等间隔数值数组, 频率代码)
+    """
+    if times is None and hasattr(values, 'index') and isinstance(values.index, pd.DatetimeIndex):
+        times = values.index
+    values = np.asarray(values, dtype=float)
+    if times is None or len(values) < 2:
+        return values, None
+
+    times = pd.Series(times).reset_index(drop=True)
+    if not (pd.api.types.is_datetime64_any_dtype(times) or pd.api.types.is_numeric_dtype(times)):
+        try:
+            times = pd.to_datetime(times)
+        except (ValueError, TypeError):
+            return values, None
+
+    order = np.argsort(times.to_numpy(), kind='stable')
+    times = times.iloc[order]
+    values = values[order]
+    step, freq = infer_step(times)
+    steps = time_steps(times, np.repeat(times.iloc[0], len(times)), step)
+    steps, first = np.unique(steps, return_index=True)  # 同一时间点保留首个值
+    matrix = regularize_rows(values[first], np.zeros(len(steps), dtype=np.int64), steps, 1, int(steps[-1]) + 1)
+    return matrix[0], freq
+
+
+def _detrend(matrix: Any) -> Any:
+    """去除每行的最小二乘线性趋势"""
+    n = matrix.shape[1]
+    x = np.arange(n, dtype=float) - (n - 1) / 2
+    centered = matrix - matrix.mean(axis=1, keepdims=True)
+    denominator = (x * x).sum()
+    slope = (centered @ x) / denominator if denominator else np.zeros(matrix.shape[0])
+    return centered - slope[:, None] * x
+
+
+def seasonality_batch(matrix: Any, top_k: int = TOP_CANDIDATES,
+                      max_period: Optional[int] = None) -> Dict[str, Any]:
+    """
+    对等长序列矩阵（每行一条序列）批量检测主周期
+
+    周期图峰值给出候选周期，再以 FFT 计算的全滞后自相关确认周期与强度
+
+    Args:
+        matrix: (序列数, 长度) 的等间隔数值矩阵
+        top_k: 每条序列评估的周期图峰值数
+        max_period: 最大周期，默认长度的一半
+
+    Returns:
+        {'period', 'strength', 'spectral_share', 'detected'}，每项为长度等于序列数的数组；
+        未检测到周期时 period 为 0
+    """
+    matrix = np.asarray(matrix, dtype=float)
+    n_series, n = matrix.shape
+    period = np.zeros(n_series, dtype=np.int64)
+    strength = np.zeros(n_series)
+    share = np.zeros(n_series)
+    if n < MIN_POINTS or n_series == 0:
+        return {'period': period, 'strength': strength, 'spectral_share': share,
+                'detected': np.zeros(n_series, dtype=bool)}
+
+    max_period = min(max_period or n // 2, n // 2)
+    detrended = _detrend(matrix)
+
+    # 周期图：频率 k/n 对应周期 n/k
+    spectrum = np.abs(np.fft.rfft(detrended, axis=1)) ** 2
+    spectrum[:, 0] = 0.0
+    raw_spectrum = spectrum.copy()
+    total_power = spectrum.sum(axis=1)
+    bins = np.arange(spectrum.shape[1])
+    bin_periods = np.zeros(len(bins), dtype=np.int64)
+    bin_periods[1:] = np.rint(n / bins[1:]).astype(np.int64)
+    admissible = (bin_periods >= 2) & (bin_periods <= max_period)
+    spectrum = np.where(admissible, spectrum, 0.0)
+
+    k = min(top_k, int(admissible.sum()))
+    if k == 0:
+        return {'period': period, 'strength': strength, 'spectral_share': share,
+                'detected': np.zeros(n_series, dtype=bool)}
+    peaks = np.argpartition(-spectrum, k - 1, axis=1)[:, :k]
+    candidates = bin_periods[peaks]
+
+    # 全滞后自相关（补零到 2n 以避免循环相关），按重叠长度做无偏修正
+    nfft = 1 << (2 * n - 1).bit_length()
+    power = np.abs(np.fft.rfft(detrended, n=nfft, axis=1)) ** 2
+    acov = np.fft.irfft(power, n=nfft, axis=1)[:, :n]
+    variance = acov[:, :1]
+    acf = np.zeros_like(acov)
+    np.divide(acov * n, variance * (n - np.arange(n)), out=acf, where=variance > 0)
+    acf = np.clip(acf, -1.0, 1.0)
+
+    rows = np.arange(n_series)[:, None]
+    candidate_acf = acf[rows, candidates]
+    best = np.argmax(candidate_acf, axis=1)
+    best_period = candidates[np.arange(n_series), best]
+    best_acf = candidate_acf[np.arange(n_series), best]
+
+    # 若较短候选周期能整除最优周期且自相关接近，取较短周期
+    divides = (best_period[:, None] % candidates == 0) & (candidates < best_period[:, None])
+    near = candidate_acf >= HARMONIC_RATIO * best_acf[:, None]
+    shorter = np.where(divides & near, candidates, np.iinfo(np.int64).max).min(axis=1)
+    use_shorter = shorter < best_period
+    best_period = np.where(use_shorter, shorter, best_period)
+    best_acf = acf[np.arange(n_series), best_period]
+
+    # 频谱占比：主周期基频及其谐波的功率占总功率的比例
+    fundamental = np.maximum(np.rint(n / best_period).astype(np.int64), 1)
+    harmonic_bins = (bins[None, :] % fundamental[:, None] == 0) & (bins[None, :] > 0)
+    peak_power = np.where(harmonic_bins, raw_spectrum, 0.0).sum(axis=1)
+    np.divide(peak_power, total_power, out=share, where=total_power > 0)
+
+    threshold = max(STRENGTH_THRESHOLD, 2 / np.sqrt(n))
+    detected = (best_acf >= threshold) & (n >= 2 * best_period)
+    period = np.where(detected, best_period, 0)
+    strength = np.where(detected, best_acf, np.maximum(best_acf, 0.0))
+    return {'period': period, 'strength': strength, 'spectral_share': share, 'detected': detected}
+
+
+def detect_seasonality(values: Any, times: Any = None, top_k: int = TOP_CANDIDATES) -> Dict[str, Any]:
+    """
+    单条序列的季节性检测
+
+    Args:
+        values: 数值序列（带时间索引的 Series 会自动按索引补齐缺失日期）
+        times: 时间值，给出时先补齐缺失日期
+        top_k: 评估的周期图峰值数
+
+    Returns:
+        {'detected', 'strength', 'period', 'pattern', 'spectral_share', 'frequency'}
+    """
+    regular, freq = regularize_series(values, times)
+    result = seasonality_batch(regular[None, :], top_k=top_k)
+    period = int(result['period'][0]) or None
+    return {
+        'detected': bool(result['detected'][0]),
+        'strength': float(result['strength'][0]),
+        'period': period,
+        'pattern': pattern_name(period, freq),
+        'spectral_share': float(result['spectral_share'][0]),
+        'frequency': freq
+    }
@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+"""
+分群结果存储
+分群标签按结果 ID 以列式文件（每列一个 .npy）保存在服务端，另存按分群排序的行号索引；
+读取时以内存映射只加载请求的区间，分页 / 流式接口的耗时与响应大小和数据总行数无关；
+保存新结果时清理过期结果与超出数量上限的最旧结果，磁盘占用有界
+"""
+
+import os
+import json
+import uuid
+import shutil
+import time
+import tempfile
+import threading
+from datetime import datetime
+from typing import Dict, List, Any, Optional, Iterator
+
+# 条件导入
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+METADATA_FILE = 'metadata.json'
+SEGMENT_FILE = 'segment.npy'
+ROW_ID_FILE = 'row_id.npy'
+# 按分群排序的行位置，分群 s 的成员位于 [offset_s, offset_s + count_s)
+SEGMENT_ORDER_FILE = 'segment_order.npy'
+DEFAULT_PAGE_SIZE = 1000
+MAX_PAGE_SIZE = 10000
+DEFAULT_STREAM_CHUNK = 50_000
+# 结果保留时长与保留数量上限
+DEFAULT_TTL_HOURS = 24.0
+DEFAULT_MAX_RESULTS = 100
+
+
+def _is_result_id(name: str) -> bool:
+    return bool(name) and all(c in '0123456789abcdef' for c in name)
+
+
+class SegmentAssignmentStore:
+    """按结果 ID 管理分群标签的列式存储"""
+
+    def __init__(self, root_dir: str, ttl_hours: Optional[float] = DEFAULT_TTL_HOURS,
+                 max_results: Optional[int] = DEFAULT_MAX_RESULTS):
+        """
+        初始化分群结果存储
+
+        Args:
+            root_dir: 存储目录（每个结果一个子目录）
+            ttl_hours: 结果保留时长（小时），为空时不按时间清理
+            max_results: 最多保留的结果数，为空时不按数量清理
+        """
+        self.root_dir = root_dir
+        self.ttl_hours = ttl_hours
+        self.max_results = max_results
+        self._metadata = {}
+        self._lock = threading.Lock()
+
+    def _result_dir(self, result_id: str) -> str:
+        if not _is_result_id(result_id):
+            raise KeyError(result_id)
+        return os.path.join(self.root_dir, result_id)
+
+    def save(self, labels: Any, row_ids: Optional[Any] = None,
+             metadata: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        保存一次分群的全部标签
+
+        先写入临时目录再改名为结果目录，读取方不会看到写了一半的结果；保存后清理过期与超量的旧结果
+
+        Args:
+            labels: 每行的分群标签（DBSCAN 的噪声点为 -1）
+            row_ids: 行标识（如客户 ID），为空时使用行位置
+            metadata: 其他元数据（method、id_column 等）
+
+        Returns:
+            元数据（含 result_id、n_rows、segments: {标签: {count, offset}}）
+        """
+        labels = np.asarray(labels).astype(np.int32, copy=False)
+        order = np.argsort(labels, kind='stable')
+        values, counts = np.unique(labels, return_counts=True)
+        offsets = np.concatenate([[0], np.cumsum(counts)[:-1]])
+
+        result_id = uuid.uuid4().hex
+        meta = dict(metadata or {})
+        meta.update({
+            'result_id': result_id,
+            'created_at': datetime.now().isoformat(),
+            'n_rows': int(len(labels)),
+            'has_row_ids': row_ids is not None,
+            'segments': {str(int(v)): {'count': int(c), 'offset': int(o)}
+                         for v, c, o in zip(values, counts, offsets)}
+        })
+
+        os.makedirs(self.root_dir, exist_ok=True)
+        temp_dir = tempfile.mkdtemp(prefix='.tmp-', dir=self.root_dir)
+        try:
+            np.save(os.path.join(temp_dir, SEGMENT_FILE), labels)
+            np.save(os.path.join(temp_dir, SEGMENT_ORDER_FILE), order.astype(np.int64))
+            if row_ids is not None:
+                row_ids = np.asarray(row_ids)
+                if row_ids.dtype == object:
+                    row_ids = row_ids.astype(str)
+                np.save(os.path.join(temp_dir, ROW_ID_FILE), row_ids)
+            with open(os.path.join(temp_dir, METADATA_FILE), 'w', encoding='utf-8') as f:
+                json.dump(meta, f, ensure_ascii=False, indent=2)
+            os.rename(temp_dir, os.path.join(self.root_dir, result_id))
+        except Exception:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+            raise
+
+        with self._lock:
+            self._metadata[result_id] = meta
+        self.evict(keep=result_id)
+        return meta
+
+    def metadata(self, result_id: str) -> Dict[str, Any]:
+        """
+        结果元数据
+
+        Args:
+            result_id: 结果 ID
+
+        Returns:
+            元数据；结果不存在时抛出 KeyError
+        """
+        with self._lock:
+            if result_id in self._metadata:
+                return self._metadata[result_id]
+        path = os.path.join(self._result_dir(result_id), METADATA_FILE)
+        if not os.path.exists(path):
+            raise KeyError(result_id)
+        with open(path, encoding='utf-8') as f:
+            meta = json.load(f)
+        with self._lock:
+            self._metadata[result_id] = meta
+        return meta
+
+    def _column(self, result_id: str, name: str) -> Any:
+        """以内存映射方式打开一列"""
+        return np.load(os.path.join(self._result_dir(result_id), name), mmap_mode='r')
+
+    def _positions(self, result_id: str, start: int, stop: int, segment: Optional[int]) -> Any:
+        """[start, stop) 区间对应的行位置；指定分群时在该分群成员内取区间"""
+        if segment is None:
+            return np.arange(start, stop)
+        return np.asarray(self._column(result_id, SEGMENT_ORDER_FILE)[start:stop])
+
+    def _rows(self, result_id: str, positions: Any) -> Dict[str, List[Any]]:
+        """按行位置读取行标识与标签"""
+        meta = self.metadata(result_id)
+        if len(positions) and np.all(np.diff(positions) == 1):
+            window = slice(int(positions[0]), int(positions[-1]) + 1)
+        else:
+            window = positions
+        segments = np.asarray(self._column(result_id, SEGMENT_FILE)[window])
+        if meta['has_row_ids']:
+            row_ids = np.asarray(self._column(result_id, ROW_ID_FILE)[window]).tolist()
+        else:
+            row_ids = np.asarray(positions).tolist()
+        return {'row_id': row_ids, 'segment': segments.tolist()}
+
+    def _range(self, result_id: str, segment: Optional[int]) -> Any:
+        """(起始位置, 行数)：全部行，或按分群排序后该分群成员所在的区间"""
+        meta = self.metadata(result_id)
+        if segment is None:
+            return 0, meta['n_rows']
+        info = meta['segments'].get(str(int(segment)), {'offset': 0, 'count': 0})
+        return info['offset'], info['count']
+
+    def page(self, result_id: str, offset: int = 0, limit: int = DEFAULT_PAGE_SIZE,
+             segment: Optional[int] = None) -> Dict[str, Any]:
+        """
+        分页读取分群标签
+
+        Args:
+            result_id: 结果 ID
+            offset: 起始位置（全部行或指定分群成员内）
+            limit: 每页行数，不超过 MAX_PAGE_SIZE
+            segment: 只返回该分群的成员
+
+        Returns:
+            {'result_id', 'segment', 'total', 'offset', 'limit', 'next_offset', 'rows': {'row_id', 'segment'}}；
+            next_offset 在最后一页为 None
+        """
+        limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+        offset = max(0, int(offset))
+        base, total = self._range(result_id, segment)
+        start = base + offset
+        count = max(0, min(limit, total - offset))
+        rows = self._rows(result_id, self._positions(result_id, start, start + count, segment))
+        return {
+            'result_id': result_id,
+            'segment': segment,
+            'total': total,
+            'offset': offset,
+            'limit': limit,
+            'next_offset': offset + count if offset + count < total else None,
+            'rows': rows
+        }
+
+    def iter_rows(self, result_id: str, segment: Optional[int] = None,
+                  chunk_size: int = DEFAULT_STREAM_CHUNK) -> Iterator[Dict[str, List[Any]]]:
+        """
+        分块遍历全部（或某个分群的）标签，用于流式响应
+
+        Args:
+            result_id: 结果 ID
+            segment: 只遍历该分群的成员
+            chunk_size: 每块行数
+
+        Yields:
+            {'row_id': [...], 'segment': [...]}
+        """
+        base, total = self._range(result_id, segment)
+        for offset in range(0, total, chunk_size):
+            start = base + offset
+            stop = base + min(total, offset + chunk_size)
+            yield self._rows(result_id, self._positions(result_id, start, stop, segment))
+
+    def _saved(self) -> List[Any]:
+        """已保存结果的 (保存时间戳, 结果 ID)，按保存时间从旧到新"""
+        if not os.path.isdir(self.root_dir):
+            return []
+        saved = []
+        for name in os.listdir(self.root_dir):
+            if not _is_result_id(name):
+                continue
+            try:
+                saved.append((os.path.getmtime(os.path.join(self.root_dir, name, METADATA_FILE)), name))
+            except OSError:
+                continue
+        return sorted(saved)
+
+    def result_ids(self) -> List[str]:
+        """已保存的结果 ID（从旧到新）"""
+        return [result_id for _, result_id in self._saved()]
+
+    def evict(self, keep: Optional[str] = None) -> List[str]:
+        """
+        清理超过保留时长的结果，以及超出数量上限时最旧的结果
+
+        Args:
+            keep: 不清理的结果 ID（如刚保存的结果）
+
+        Returns:
+            被删除的结果 ID
+        """
+        saved = self._saved()
+        cutoff = time.time() - self.ttl_hours * 3600 if self.ttl_hours is not None else None
+        removed = [result_id for saved_at, result_id in saved
+                   if result_id != keep and cutoff is not None and saved_at < cutoff]
+        remaining = [result_id for _, result_id in saved if result_id not in removed]
+        if self.max_results is not None and len(remaining) > self.max_results:
+            candidates = [result_id for result_id in remaining if result_id != keep]
+            removed.extend(candidates[:len(remaining) - self.max_results])
+        for result_id in removed:
+            self._remove(result_id)
+        return removed
+
+    def _remove(self, result_id: str) -> None:
+        shutil.rmtree(self._result_dir(result_id), ignore_errors=True)
+        with self._lock:
+            self._metadata.pop(result_id, None)
+
+    def delete(self, result_id: str) -> None:
+        """
+        删除结果
+
+        Args:
+            result_id: 结果 ID；结果不存在时抛出 KeyError
+        """
+        if not os.path.isdir(self._result_dir(result_id)):
+            raise KeyError(result_id)
+        self._remove(result_id)
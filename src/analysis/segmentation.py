@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+可扩展用户分群
+大数据量时在分层样本上训练 KMeans 或按块增量训练 MiniBatchKMeans，再按块为全量数据分配标签；
+分群画像以分组聚合一次计算，不再逐分群过滤
+"""
+
+from typing import Dict, List, Any, Optional
+
+# 条件导入
+try:
+    import pandas as pd
+    import numpy as np
+    PANDAS_AVAILABLE = True
+except ImportError:
+    PANDAS_AVAILABLE = False
+
+try:
+    from sklearn.cluster import KMeans, MiniBatchKMeans
+    from sklearn.preprocessing import StandardScaler
+    SKLEARN_AVAILABLE = True
+except ImportError:
+    SKLEARN_AVAILABLE = False
+
+SEGMENTATION_MODES = ['auto', 'full', 'sample', 'minibatch']
+# 行数超过该值时自动切换到可扩展模式
+SCALABLE_ROW_THRESHOLD = 200_000
+DEFAULT_SAMPLE_SIZE = 100_000
+DEFAULT_BATCH_SIZE = 10_000
+DEFAULT_CHUNK_SIZE = 500_000
+
+
+def resolve_mode(mode: str, n_rows: int, has_strata: bool = False) -> str:
+    """
+    确定实际使用的分群模式
+
+    Args:
+        mode: auto / full / sample / minibatch
+        n_rows: 数据行数
+        has_strata: 是否提供了分层列
+
+    Returns:
+        full / sample / minibatch；auto 时小数据用 full，大数据有分层列用 sample，否则用 minibatch
+    """
+    if mode not in SEGMENTATION_MODES:
+        raise ValueError(f"不支持的分群模式: {mode}")
+    if mode != 'auto':
+        return mode
+    if n_rows <= SCALABLE_ROW_THRESHOLD:
+        return 'full'
+    return 'sample' if has_strata else 'minibatch'
+
+
+def stratified_sample_index(strata: Optional[Any], n_rows: int, sample_size: int,
+                            random_state: int = 42) -> Any:
+    """
+    分层抽样行号（各层按比例抽取，每层至少1行）
+
+    Args:
+        strata: 分层标签，为空时简单随机抽样
+        n_rows: 总行数
+        sample_size: 样本量
+        random_state: 随机种子
+
+    Returns:
+        已排序的行号数组
+    """
+    rng = np.random.default_rng(random_state)
+    if sample_size >= n_rows:
+        return np.arange(n_rows)
+    if strata is None:
+        return np.sort(rng.choice(n_rows, sample_size, replace=False))
+
+    codes = pd.factorize(pd.Series(strata), use_na_sentinel=False)[0]
+    sizes = np.bincount(codes)
+    quotas = np.minimum(np.maximum(np.rint(sizes * sample_size / n_rows).astype(np.int64), 1), sizes)
+
+    # 每层内按随机键排序取前 quota 个
+    order = np.lexsort((rng.random(n_rows), codes))
+    starts = np.r_[0, np.cumsum(sizes)[:-1]]
+    rank = np.arange(n_rows) - np.repeat(starts, sizes)
+    chosen = order[rank < np.repeat(quotas, sizes)]
+    return np.sort(chosen)
+
+
+class ScalableSegmenter:
+    """可扩展 KMeans 分群器（全量 / 分层样本 / MiniBatch）"""
+
+    def __init__(self, n_segments: int = 4, mode: str = 'auto', sample_size: int = DEFAULT_SAMPLE_SIZE,
+                 batch_size: int = DEFAULT_BATCH_SIZE, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                 random_state: int = 42):
+        """
+        初始化分群器
+
+        Args:
+            n_segments: 分群数
+            mode: auto / full / sample / minibatch
+            sample_size: sample 模式的训练样本量
+            batch_size: minibatch 模式每次增量训练的行数
+            chunk_size: 标准化统计与标签分配的分块行数
+            random_state: 随机种子
+        """
+        if mode not in SEGMENTATION_MODES:
+            raise ValueError(f"不支持的分群模式: {mode}")
+        self.n_segments = n_segments
+        self.mode = mode
+        self.sample_size = sample_size
+        self.batch_size = batch_size
+        self.chunk_size = chunk_size
+        self.random_state = random_state
+        self.fitted_mode = None
+        self.model = None
+        self.mean_ = None
+        self.scale_ = None
+
+    def fit_predict(self, features: Any, strata: Optional[Any] = None) -> Any:
+        """
+        训练并为全部行分配分群标签
+
+        Args:
+            features: 数值特征 DataFrame 或矩阵（缺失值按0处理）
+            strata: 分层标签（sample 模式按其比例抽样）
+
+        Returns:
+            int 标签数组
+        """
+        values = np.nan_to_num(np.asarray(features, dtype=float), nan=0.0)
+        self.fitted_mode = resolve_mode(self.mode, len(values), strata is not None)
+
+        if self.fitted_mode == 'full':
+            scaler = StandardScaler()
+            scaled = scaler.fit_transform(values)
+            self.mean_, self.scale_ = scaler.mean_, scaler.scale_
+            self.model = KMeans(n_clusters=self.n_segments, random_state=self.random_state)
+            return self.model.fit_predict(scaled)
+
+        self._fit_scaler(values)
+        if self.fitted_mode == 'sample':
+            index = stratified_sample_index(strata, len(values), self.sample_size, self.random_state)
+            self.model = KMeans(n_clusters=self.n_segments, random_state=self.random_state)
+            self.model.fit(self._scale(values[index]))
+        else:
+            self._fit_minibatch(values)
+        return self.predict(values)
+
+    def _fit_scaler(self, values: Any):
+        """分块累积均值与方差（与 StandardScaler 口径一致）"""
+        n = len(values)
+        total = np.zeros(values.shape[1])
+        for start in range(0, n, self.chunk_size):
+            total += values[start:start + self.chunk_size].sum(axis=0)
+        self.mean_ = total / n
+        squares = np.zeros(values.shape[1])
+        for start in range(0, n, self.chunk_size):
+            centered = values[start:start + self.chunk_size] - self.mean_
+            squares += (centered * centered).sum(axis=0)
+        scale = np.sqrt(squares / n)
+        self.scale_ = np.where(scale == 0, 1.0, scale)
+
+    def _scale(self, values: Any) -> Any:
+        """按已拟合的均值与标准差标准化"""
+        return (values - self.mean_) / self.scale_
+
+    def _fit_minibatch(self, values: Any):
+        """按随机顺序的小批量增量训练 MiniBatchKMeans（单遍）"""
+        rng = np.random.default_rng(self.random_state)
+        order = rng.permutation(len(values))
+        batch_size = max(self.batch_size, self.n_segments * 3)
+        self.model = MiniBatchKMeans(n_clusters=self.n_segments, random_state=self.random_state,
+                                     batch_size=batch_size, n_init=3)
+        for start in range(0, len(order), batch_size):
+            batch = order[start:start + batch_size]
+            if len(batch) < self.n_segments:
+                break
+            self.model.partial_fit(self._scale(values[np.sort(batch)]))
+
+    def predict(self, features: Any) -> Any:
+        """
+        分块分配分群标签
+
+        Args:
+            features: 数值特征 DataFrame 或矩阵
+
+        Returns:
+            int 标签数组
+        """
+        values = np.nan_to_num(np.asarray(features, dtype=float), nan=0.0)
+        labels = np.empty(len(values), dtype=np.int32)
+        for start in range(0, len(values), self.chunk_size):
+            labels[start:start + self.chunk_size] = self.model.predict(
+                self._scale(values[start:start + self.chunk_size])
+            )
+        return labels
+
+
+def segment_profiles(data: Any, labels: Any, features: List[str], n_segments: int) -> Dict[str, Any]:
+    """
+    以分组聚合计算分群规模与画像
+
+    Args:
+        data: 原始数据
+        labels: 分群标签
+        features: 画像特征（数值列给出均值/中位数/标准差，其余列给出众数与取值数）
+        n_segments: 分群数（无成员的分群也会输出）
+
+    Returns:
+        {'segments': {segment_i: {size, percentage}}, 'segment_profiles': {segment_i: {feature: ...}}}
+    """
+    segment_index = pd.RangeIndex(n_segments)
+    labels = pd.Series(np.asarray(labels), index=data.index, name='segment')
+    sizes = labels.value_counts().reindex(segment_index, fill_value=0)
+
+    feature_stats = {}
+    for feature in features:
+        if feature not in data.columns:
+            continue
+        column = data[feature]
+        if pd.api.types.is_numeric_dtype(column) and not pd.api.types.is_bool_dtype(column):
+            stats = column.groupby(labels).agg(['mean', 'median', 'std']).reindex(segment_index)
+            feature_stats[feature] = {
+                segment: {'mean': row['mean'], 'median': row['median'], 'std': row['std']}
+                for segment, row in stats.iterrows()
+            }
+        else:
+            frame = pd.DataFrame({'segment': labels, 'value': column}).dropna(subset=['value'])
+            counts = frame.groupby(['segment', 'value'], observed=True).size().rename('count').reset_index()
+            # 众数：次数最多，并列时取最小值（与 Series.mode().iloc[0] 一致）
+            modes = counts.sort_values(['segment', 'count', 'value'], ascending=[True, False, True]) \
+                .drop_duplicates('segment').set_index('segment')['value']
+            unique_counts = counts.groupby('segment').size()
+            feature_stats[feature] = {
+                segment: {'mode': modes.get(segment, 'Unknown'), 'unique_count': int(unique_counts.get(segment, 0))}
+                for segment in segment_index
+            }
+
+    total = len(labels)
+    segments, profiles = {}, {}
+    for segment in segment_index:
+        key = f'segment_{segment}'
+        segments[key] = {'size': int(sizes[segment]), 'percentage': sizes[segment] / total * 100 if total else 0.0}
+        profiles[key] = {feature: stats[segment] for feature, stats in feature_stats.items()}
+    return {'segments': segments, 'segment_profiles': profiles}
@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+"""
+可合并的数据概要（Sketch）
+HyperLogLog 去重计数、相对误差分位数草图（DDSketch）与按列的流式高阶矩，
+均按数据块增量更新，分区结果可精确合并（合并结果与顺序处理全部数据一致）
+"""
+
+from typing import Dict, List, Any, Optional
+
+# 条件导入
+try:
+    import pandas as pd
+    import numpy as np
+    PANDAS_AVAILABLE = True
+except ImportError:
+    PANDAS_AVAILABLE = False
+
+HLL_PRECISION = 14
+QUANTILE_RELATIVE_ACCURACY = 0.01
+# 绝对值小于该值的数记入零桶
+MIN_INDEXABLE = 1e-9
+
+
+class HyperLogLog:
+    """HyperLogLog 去重计数（64位哈希，标准误差约 1.04/√(2^precision)）"""
+
+    def __init__(self, precision: int = HLL_PRECISION):
+        """
+        初始化
+
+        Args:
+            precision: 寄存器数为 2^precision
+        """
+        self.precision = precision
+        self.registers = np.zeros(1 << precision, dtype=np.uint8)
+
+    def add(self, values: Any):
+        """
+        加入一批值（缺失值忽略，数值统一按 float64 哈希，使不同分区的 int/float 一致）
+
+        Args:
+            values: 一维数组或 Series
+        """
+        values = pd.Series(values)
+        values = values[values.notna()]
+        if len(values) == 0:
+            return
+        if pd.api.types.is_numeric_dtype(values) and not pd.api.types.is_bool_dtype(values):
+            hashed = pd.util.hash_array(values.to_numpy(dtype=np.float64))
+        else:
+            hashed = pd.util.hash_array(values.astype(str).to_numpy(dtype=object))
+        self.add_hashes(hashed)
+
+    def add_hashes(self, hashed: Any):
+        """加入已计算的 64 位哈希值"""
+        p = self.precision
+        index = (hashed >> np.uint64(64 - p)).astype(np.int64)
+        # 剩余 64-p 位（≤53 位，转 float64 无损）的前导零个数 + 1
+        remainder = (hashed & np.uint64((1 << (64 - p)) - 1)).astype(np.float64)
+        bit_length = np.frexp(remainder)[1]
+        rank = (64 - p - bit_length + 1).astype(np.uint8)
+        np.maximum.at(self.registers, index, rank)
+
+    def merge(self, other: 'HyperLogLog') -> 'HyperLogLog':
+        """合并另一个 HyperLogLog（逐寄存器取最大值）"""
+        if other.precision != self.precision:
+            raise ValueError("HyperLogLog 精度不一致")
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    def count(self) -> float:
+        """估计去重数量（小基数时使用线性计数修正）"""
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / np.sum(np.ldexp(1.0, -self.registers.astype(np.int64)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if estimate <= 2.5 * m and zeros > 0:
+            estimate = m * np.log(m / zeros)
+        return float(estimate)
+
+
+class QuantileSketch:
+    """
+    相对误差分位数草图（DDSketch）
+
+    值按 ⌈log_γ|x|⌉ 分桶计数，任一分位数的相对误差不超过 relative_accuracy；
+    合并即桶计数相加，结果与顺序处理一致
+    """
+
+    def __init__(self, relative_accuracy: float = QUANTILE_RELATIVE_ACCURACY):
+        """
+        初始化
+
+        Args:
+            relative_accuracy: 分位数相对误差上限
+        """
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = np.log(self.gamma)
+        self.positive = {}
+        self.negative = {}
+        self.zero_count = 0
+        self.count = 0
+
+    def _keys(self, magnitudes: Any) -> Any:
+        return np.ceil(np.log(magnitudes) / self._log_gamma).astype(np.int64)
+
+    @staticmethod
+    def _add_keys(store: Dict[int, int], keys: Any):
+        """按块内键范围计数后并入存储"""
+        if len(keys) == 0:
+            return
+        low = int(keys.min())
+        counts = np.bincount(keys - low)
+        for offset in np.flatnonzero(counts):
+            key = low + int(offset)
+            store[key] = store.get(key, 0) + int(counts[offset])
+
+    def add(self, values: Any):
+        """
+        加入一批值（缺失值与无穷值忽略）
+
+        Args:
+            values: 数值数组
+        """
+        values = np.asarray(values, dtype=float)
+        values = values[np.isfinite(values)]
+        if len(values) == 0:
+            return
+        magnitudes = np.abs(values)
+        small = magnitudes < MIN_INDEXABLE
+        self.zero_count += int(small.sum())
+        self._add_keys(self.positive, self._keys(magnitudes[(values > 0) & ~small]))
+        self._add_keys(self.negative, self._keys(magnitudes[(values < 0) & ~small]))
+        self.count += len(values)
+
+    def merge(self, other: 'QuantileSketch') -> 'QuantileSketch':
+        """合并另一个草图（桶计数相加）"""
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("分位数草图精度不一致")
+        for store, other_store in ((self.positive, other.positive), (self.negative, other.negative)):
+            for key, count in other_store.items():
+                store[key] = store.get(key, 0) + count
+        self.zero_count += other.zero_count
+        self.count += other.count
+        return self
+
+    def _value(self, key: int) -> float:
+        """桶的代表值（相对误差不超过 relative_accuracy）"""
+        return 2 * self.gamma ** key / (self.gamma + 1)
+
+    def _buckets(self):
+        """按数值从小到大排列的 (代表值, 计数)"""
+        negative = sorted(self.negative.items(), reverse=True)
+        positive = sorted(self.positive.items())
+        values = [-self._value(k) for k, _ in negative] + [0.0] + [self._value(k) for k, _ in positive]
+        counts = [c for _, c in negative] + [self.zero_count] + [c for _, c in positive]
+        return np.array(values), np.array(counts, dtype=np.int64)
+
+    def quantiles(self, qs: List[float]) -> List[Optional[float]]:
+        """
+        分位数
+
+        Args:
+            qs: 分位点列表（0~1）
+
+        Returns:
+            分位数列表，草图为空时为 None
+        """
+        if self.count == 0:
+            return [None for _ in qs]
+        values, counts = self._buckets()
+        cumulative = np.cumsum(counts)
+        ranks = np.asarray(qs, dtype=float) * (self.count - 1)
+        positions = np.searchsorted(cumulative, ranks, side='right')
+        return [float(values[min(p, len(values) - 1)]) for p in positions]
+
+    def quantile(self, q: float) -> Optional[float]:
+        """单个分位数"""
+        return self.quantiles([q])[0]
+
+    def count_outside(self, lower: float, upper: float) -> int:
+        """
+        落在 [lower, upper] 之外的近似数量（按桶代表值判断）
+
+        Args:
+            lower: 下界
+            upper: 上界
+
+        Returns:
+            近似数量
+        """
+        if self.count == 0:
+            return 0
+        values, counts = self._buckets()
+        return int(counts[(values < lower) | (values > upper)].sum())
+
+
+class ColumnMoments:
+    """多列流式矩（计数、均值、二到四阶中心矩、最小/最大值），可精确合并"""
+
+    def __init__(self, n_columns: int):
+        """
+        初始化
+
+        Args:
+            n_columns: 列数
+        """
+        self.n = np.zeros(n_columns)
+        self.mean = np.zeros(n_columns)
+        self.m2 = np.zeros(n_columns)
+        self.m3 = np.zeros(n_columns)
+        self.m4 = np.zeros(n_columns)
+        self.min = np.full(n_columns, np.inf)
+        self.max = np.full(n_columns, -np.inf)
+
+    def add(self, values: Any):
+        """
+        加入一批行（缺失值按列忽略）
+
+        Args:
+            values: (行数, 列数) 数值矩阵
+        """
+        values = np.asarray(values, dtype=float)
+        if len(values) == 0:
+            return
+        valid = ~np.isnan(values)
+        batch = ColumnMoments(values.shape[1])
+        batch.n = valid.sum(axis=0).astype(float)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            totals = np.where(valid, values, 0.0).sum(axis=0)
+            batch.mean = np.where(batch.n > 0, totals / np.maximum(batch.n, 1), 0.0)
+        deviation = np.where(valid, values - batch.mean, 0.0)
+        squared = deviation * deviation
+        batch.m2 = squared.sum(axis=0)
+        batch.m3 = (squared * deviation).sum(axis=0)
+        batch.m4 = (squared * squared).sum(axis=0)
+        batch.min = np.where(valid, values, np.inf).min(axis=0)
+        batch.max = np.where(valid, values, -np.inf).max(axis=0)
+        self.merge(batch)
+
+    def merge(self, other: 'ColumnMoments') -> 'ColumnMoments':
+        """按 Pébay 公式合并两组矩"""
+        na, nb = self.n, other.n
+        n = na + nb
+        safe_n = np.where(n > 0, n, 1.0)
+        delta = other.mean - self.mean
+        delta2 = delta * delta
+
+        mean = self.mean + delta * nb / safe_n
+        m2 = self.m2 + other.m2 + delta2 * na * nb / safe_n
+        m3 = (self.m3 + other.m3 + delta2 * delta * na * nb * (na - nb) / safe_n ** 2
+              + 3 * delta * (na * other.m2 - nb * self.m2) / safe_n)
+        m4 = (self.m4 + other.m4
+              + delta2 * delta2 * na * nb * (na * na - na * nb + nb * nb) / safe_n ** 3
+              + 6 * delta2 * (na * na * other.m2 + nb * nb * self.m2) / safe_n ** 2
+              + 4 * delta * (na * other.m3 - nb * self.m3) / safe_n)
+
+        self.n, self.mean, self.m2, self.m3, self.m4 = n, mean, m2, m3, m4
+        self.min = np.minimum(self.min, other.min)
+        self.max = np.maximum(self.max, other.max)
+        return self
+
+    def std(self) -> Any:
+        """样本标准差（ddof=1）"""
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(self.n > 1, np.sqrt(self.m2 / np.maximum(self.n - 1, 1)), np.nan)
+
+    def skewness(self) -> Any:
+        """偏度（与 scipy.stats.skew 默认口径一致）"""
+        with np.errstate(invalid='ignore', divide='ignore'):
+            m2 = self.m2 / self.n
+            return np.where((self.n > 0) & (m2 > 0), (self.m3 / self.n) / m2 ** 1.5, 0.0)
+
+    def kurtosis(self) -> Any:
+        """超额峰度（与 scipy.stats.kurtosis 默认口径一致）"""
+        with np.errstate(invalid='ignore', divide='ignore'):
+            m2 = self.m2 / self.n
+            return np.where((self.n > 0) & (m2 > 0), (self.m4 / self.n) / (m2 * m2) - 3, -3.0)
@@ -0,0 +1,329 @@
+#!/usr/bin/env python3
+"""
+基于 Sketch 的流式数据剖析
+按数据块累积每列的缺失计数、HyperLogLog 去重计数、分位数草图与高阶矩，以及缺失共现矩阵与相关性统计量；
+内存只与列数相关，各分区（如 Parquet 文件）的剖析结果可在多进程中计算后精确合并
+"""
+
+import os
+from typing import Dict, List, Any, Optional, Callable
+from concurrent.futures import ProcessPoolExecutor
+
+# 条件导入
+try:
+    import pandas as pd
+    import numpy as np
+    PANDAS_AVAILABLE = True
+except ImportError:
+    PANDAS_AVAILABLE = False
+
+from .sketches import HyperLogLog, QuantileSketch, ColumnMoments, HLL_PRECISION, QUANTILE_RELATIVE_ACCURACY
+from .correlation import StreamingCorrelation
+from .model_registry import iter_chunks
+
+PROFILE_QUANTILES = [0.01, 0.05, 0.25, 0.5, 0.75, 0.95, 0.99]
+DEFAULT_CHUNK_SIZE = 500_000
+MISSING_CORRELATION_THRESHOLD = 0.5
+
+
+def missing_correlations(null_counts: Any, cooccurrence: Any, n_rows: int) -> Any:
+    """
+    由缺失计数与缺失共现计数计算缺失指示变量之间的相关系数（与 isnull().corr() 一致）
+
+    Args:
+        null_counts: 每列缺失数
+        cooccurrence: (列数, 列数) 两列同时缺失的行数
+        n_rows: 总行数
+
+    Returns:
+        相关系数矩阵，某列无缺失或全部缺失时对应行列为 NaN
+    """
+    counts = np.asarray(null_counts, dtype=float)
+    numerator = n_rows * np.asarray(cooccurrence, dtype=float) - np.outer(counts, counts)
+    spread = counts * (n_rows - counts)
+    denominator = np.sqrt(np.outer(spread, spread))
+    result = np.full(numerator.shape, np.nan)
+    np.divide(numerator, denominator, out=result, where=denominator > 0)
+    return np.clip(result, -1.0, 1.0)
+
+
+def missing_patterns(columns: List[str], null_counts: Any, cooccurrence: Any, n_rows: int) -> List[Dict[str, Any]]:
+    """
+    缺失值模式（完全缺失、高缺失率、相关缺失）
+
+    Args:
+        columns: 列名
+        null_counts: 每列缺失数
+        cooccurrence: 缺失共现计数矩阵
+        n_rows: 总行数
+
+    Returns:
+        模式列表，格式与 ProfessionalAnalytics._identify_missing_patterns 一致
+    """
+    patterns = []
+    null_counts = np.asarray(null_counts)
+    rates = null_counts / n_rows if n_rows else np.zeros(len(columns))
+
+    completely_missing = [c for c, count in zip(columns, null_counts) if count == n_rows]
+    if completely_missing:
+        patterns.append({'type': 'completely_missing', 'columns': completely_missing, 'severity': 'high'})
+
+    high_missing = [c for c, rate in zip(columns, rates) if rate > 0.5]
+    if high_missing:
+        patterns.append({'type': 'high_missing_rate', 'columns': high_missing, 'severity': 'medium'})
+
+    if len(columns) > 1:
+        corr = missing_correlations(null_counts, cooccurrence, n_rows)
+        mask = np.triu(np.abs(np.nan_to_num(corr)) > MISSING_CORRELATION_THRESHOLD, k=1)
+        rows, cols = np.nonzero(mask)
+        strong = [{'col1': columns[i], 'col2': columns[j], 'correlation': float(corr[i, j])}
+                  for i, j in zip(rows, cols)]
+        if strong:
+            patterns.append({'type': 'correlated_missing', 'correlations': strong, 'severity': 'medium'})
+
+    return patterns
+
+
+def _distribution_type(skewness: float) -> str:
+    """按偏度判断分布类型（与完整剖析口径一致）"""
+    if abs(skewness) < 0.5:
+        return 'symmetric'
+    return 'right_skewed' if skewness > 0.5 else 'left_skewed'
+
+
+class StreamingProfile:
+    """可合并的流式数据剖析"""
+
+    def __init__(self, relative_accuracy: float = QUANTILE_RELATIVE_ACCURACY,
+                 hll_precision: int = HLL_PRECISION, correlations: bool = True):
+        """
+        初始化
+
+        Args:
+            relative_accuracy: 分位数草图相对误差
+            hll_precision: HyperLogLog 精度
+            correlations: 是否累积数值列相关性统计量
+        """
+        self.relative_accuracy = relative_accuracy
+        self.hll_precision = hll_precision
+        self.track_correlations = correlations
+        self.columns = None
+        self.numeric_columns = None
+        self.data_types = {}
+        self.rows = 0
+
+    def _initialize(self, chunk: Any):
+        """按首个数据块确定列与数值列"""
+        self.columns = [str(c) for c in chunk.columns]
+        self.numeric_columns = [
+            str(c) for c in chunk.columns
+            if pd.api.types.is_numeric_dtype(chunk[c]) and not pd.api.types.is_bool_dtype(chunk[c])
+        ]
+        self.data_types = {str(c): str(chunk[c].dtype) for c in chunk.columns}
+        self.null_counts = np.zeros(len(self.columns), dtype=np.int64)
+        self.null_cooccurrence = np.zeros((len(self.columns), len(self.columns)), dtype=np.int64)
+        self.distinct = [HyperLogLog(self.hll_precision) for _ in self.columns]
+        self.quantile_sketches = [QuantileSketch(self.relative_accuracy) for _ in self.numeric_columns]
+        self.moments = ColumnMoments(len(self.numeric_columns))
+        self.correlation = StreamingCorrelation(self.numeric_columns) if self.track_correlations else None
+
+    def update(self, chunk: Any) -> 'StreamingProfile':
+        """
+        累积一个数据块
+
+        Args:
+            chunk: DataFrame 数据块（缺少的列按缺失处理，多出的列忽略）
+
+        Returns:
+            自身，便于链式调用
+        """
+        chunk = chunk.rename(columns=str)
+        if self.columns is None:
+            self._initialize(chunk)
+        chunk = chunk.reindex(columns=self.columns)
+        if len(chunk) == 0:
+            return self
+
+        nulls = chunk.isnull().to_numpy()
+        self.null_counts += nulls.sum(axis=0)
+        null_matrix = nulls.astype(np.float64)
+        self.null_cooccurrence += np.rint(null_matrix.T @ null_matrix).astype(np.int64)
+
+        for sketch, column in zip(self.distinct, self.columns):
+            sketch.add(chunk[column])
+
+        if self.numeric_columns:
+            numeric = chunk[self.numeric_columns].apply(pd.to_numeric, errors='coerce').to_numpy(dtype=float)
+            self.moments.add(numeric)
+            for position, sketch in enumerate(self.quantile_sketches):
+                sketch.add(numeric[:, position])
+            if self.correlation is not None:
+                self.correlation.update(numeric)
+
+        self.rows += len(chunk)
+        return self
+
+    def merge(self, other: 'StreamingProfile') -> 'StreamingProfile':
+        """
+        合并另一个分区的剖析结果
+
+        Args:
+            other: 相同列结构的剖析结果
+
+        Returns:
+            自身
+        """
+        if other.columns is None:
+            return self
+        if self.columns is None:
+            self.__dict__.update({k: v for k, v in other.__dict__.items()})
+            return self
+        if other.columns != self.columns:
+            raise ValueError("合并的剖析结果列不一致")
+
+        self.rows += other.rows
+        self.null_counts += other.null_counts
+        self.null_cooccurrence += other.null_cooccurrence
+        for sketch, other_sketch in zip(self.distinct, other.distinct):
+            sketch.merge(other_sketch)
+        for sketch, other_sketch in zip(self.quantile_sketches, other.quantile_sketches):
+            sketch.merge(other_sketch)
+        self.moments.merge(other.moments)
+        if self.correlation is not None and other.correlation is not None:
+            self.correlation.merge(other.correlation)
+        return self
+
+    def result(self) -> Dict[str, Any]:
+        """
+        生成剖析结果
+
+        Returns:
+            与 comprehensive_data_profile 结构一致的字典（basic_info、statistical_summary、data_quality、
+            outliers、distribution_analysis），另含 correlation_matrix（DataFrame）与 profile_mode='sketch'
+        """
+        profile = {
+            'basic_info': {'rows': self.rows, 'columns': len(self.columns or []), 'data_types': self.data_types},
+            'statistical_summary': {},
+            'data_quality': {},
+            'outliers': {'by_column': {}, 'total_outliers': 0, 'methods_used': ['iqr_sketch']},
+            'distribution_analysis': {'by_column': {}},
+            'profile_mode': 'sketch'
+        }
+        if self.columns is None:
+            return profile
+
+        rows = self.rows
+        completeness = 1 - self.null_counts.sum() / (rows * len(self.columns)) if rows else 1.0
+        profile['data_quality'] = {
+            'completeness': {
+                'overall_rate': float(completeness),
+                'by_column': {c: float(1 - n / rows) if rows else 1.0 for c, n in zip(self.columns, self.null_counts)},
+                'missing_patterns': missing_patterns(self.columns, self.null_counts, self.null_cooccurrence, rows)
+            },
+            'uniqueness': {
+                'by_column': {c: min(sketch.count(), rows - n) / rows if rows else 0.0
+                              for c, sketch, n in zip(self.columns, self.distinct, self.null_counts)}
+            }
+        }
+
+        std = self.moments.std()
+        skewness = self.moments.skewness()
+        kurtosis = self.moments.kurtosis()
+        total_outliers = 0
+        for position, column in enumerate(self.numeric_columns):
+            count = int(self.moments.n[position])
+            if count == 0:
+                continue
+            sketch = self.quantile_sketches[position]
+            quantiles = dict(zip(PROFILE_QUANTILES, sketch.quantiles(PROFILE_QUANTILES)))
+            q1, median, q3 = quantiles[0.25], quantiles[0.5], quantiles[0.75]
+            profile['statistical_summary'][column] = {
+                'count': float(count), 'mean': float(self.moments.mean[position]), 'std': float(std[position]),
+                'min': float(self.moments.min[position]), '25%': q1, '50%': median, '75%': q3,
+                'max': float(self.moments.max[position])
+            }
+            profile['distribution_analysis']['by_column'][column] = {
+                'mean': float(self.moments.mean[position]),
+                'median': median,
+                'std': float(std[position]),
+                'skewness': float(skewness[position]),
+                'kurtosis': float(kurtosis[position]),
+                'quantiles': quantiles,
+                'distribution_type': _distribution_type(float(skewness[position]))
+            }
+
+            iqr = q3 - q1
+            lower, upper = q1 - 1.5 * iqr, q3 + 1.5 * iqr
+            outliers = sketch.count_outside(lower, upper) if count > 4 else 0
+            total_outliers += outliers
+            profile['outliers']['by_column'][column] = {
+                'count': outliers, 'percentage': outliers / count * 100,
+                'lower_bound': float(lower), 'upper_bound': float(upper), 'method': 'iqr_sketch'
+            }
+        profile['outliers']['total_outliers'] = total_outliers
+
+        if self.correlation is not None and len(self.numeric_columns) > 1:
+            profile['correlation_matrix'] = pd.DataFrame(
+                self.correlation.correlation(), index=self.numeric_columns, columns=self.numeric_columns
+            )
+        return profile
+
+
+def profile_chunks(chunks: Any, chunk_size: int = DEFAULT_CHUNK_SIZE, **options) -> StreamingProfile:
+    """
+    逐块剖析 DataFrame 或 DataFrame 分块迭代器
+
+    Args:
+        chunks: DataFrame（按 chunk_size 切块）或分块可迭代对象
+        chunk_size: DataFrame 输入时的分块行数
+        **options: StreamingProfile 参数
+
+    Returns:
+        StreamingProfile
+    """
+    profile = StreamingProfile(**options)
+    if hasattr(chunks, 'iloc'):
+        frame = chunks
+        chunks = (frame.iloc[start:start + chunk_size] for start in range(0, len(frame), chunk_size))
+    for chunk in chunks:
+        profile.update(chunk)
+    return profile
+
+
+def _profile_partition(path: str, reader: Optional[Callable], chunk_size: int,
+                       options: Dict[str, Any]) -> StreamingProfile:
+    """进程池工作函数：读取并剖析一个分区文件（未指定 reader 时按块流式读取）"""
+    chunks = reader(path) if reader is not None else iter_chunks(path, chunk_size)
+    return profile_chunks(chunks, chunk_size=chunk_size, **options)
+
+
+def profile_partitions(paths: List[str], reader: Optional[Callable] = None, n_jobs: int = -1,
+                       chunk_size: int = DEFAULT_CHUNK_SIZE, **options) -> StreamingProfile:
+    """
+    并行剖析多个分区文件并合并
+
+    Args:
+        paths: 分区文件路径（如 Parquet 数据集的各个文件）
+        reader: 读取函数，返回 DataFrame 或分块迭代器，需可被子进程序列化；默认按块流式读取
+                （Parquet 按批次、CSV 按 chunksize），每个进程的内存峰值与 chunk_size 而非分区大小相关
+        n_jobs: 进程数，-1 表示全部CPU，1 表示在当前进程内计算
+        chunk_size: 分区内的分块行数
+        **options: StreamingProfile 参数
+
+    Returns:
+        合并后的 StreamingProfile（按路径顺序合并）
+    """
+    n_jobs = (os.cpu_count() or 1) if n_jobs == -1 else max(1, n_jobs)
+    n_jobs = min(n_jobs, max(1, len(paths)))
+
+    if n_jobs == 1:
+        parts = [_profile_partition(path, reader, chunk_size, options) for path in paths]
+    else:
+        with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+            parts = list(executor.map(_profile_partition, paths, [reader] * len(paths),
+                                      [chunk_size] * len(paths), [options] * len(paths)))
+
+    profile = StreamingProfile(**options)
+    for part in parts:
+        profile.merge(part)
+    return profile
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+趋势分析向量化内核
+最小二乘斜率与变化点检测（累积和滑窗 / PELT 惩罚最优划分），均为线性或近线性时间
+"""
+
+from typing import Dict, List, Any, Optional
+
+# 条件导入
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+CHANGE_POINT_METHODS = ['window', 'pelt']
+
+
+def least_squares_slope(values: Any) -> Any:
+    """
+    等间隔序列的最小二乘斜率（沿最后一维计算，忽略 NaN）
+
+    Args:
+        values: 一维序列或二维矩阵（每行一个序列）
+
+    Returns:
+        一维输入返回浮点数，二维输入返回每行斜率数组；有效点少于2个时为0
+    """
+    y = np.asarray(values, dtype=float)
+    x = np.broadcast_to(np.arange(y.shape[-1], dtype=float), y.shape)
+    valid = ~np.isnan(y)
+    count = valid.sum(axis=-1)
+    safe_count = np.maximum(count, 1)
+
+    x_mean = np.where(valid, x, 0.0).sum(axis=-1) / safe_count
+    y_mean = np.where(valid, y, 0.0).sum(axis=-1) / safe_count
+    dx = np.where(valid, x - x_mean[..., None], 0.0)
+    dy = np.where(valid, y - y_mean[..., None], 0.0)
+    numerator = (dx * dy).sum(axis=-1)
+    denominator = (dx * dx).sum(axis=-1)
+
+    slope = np.zeros_like(numerator)
+    np.divide(numerator, denominator, out=slope, where=(denominator != 0) & (count >= 2))
+    return float(slope) if slope.ndim == 0 else slope
+
+
+def window_change_scores(values: Any, window: int) -> Dict[str, Any]:
+    """
+    基于累积和的前后窗口均值对比（沿最后一维计算）
+
+    第 i 个位置比较 [i-window, i) 与 [i, i+window) 两个窗口的均值，
+    每个位置 O(1)，整体 O(n)
+
+    Args:
+        values: 一维序列或二维矩阵（每行一个序列）
+        window: 窗口长度
+
+    Returns:
+        {'positions', 'before', 'after', 'magnitude'}，before/after/magnitude 沿最后一维对应 positions
+    """
+    y = np.asarray(values, dtype=float)
+    n = y.shape[-1]
+    positions = np.arange(window, max(window, n - window))
+    if len(positions) == 0:
+        empty = np.zeros(y.shape[:-1] + (0,))
+        return {'positions': positions, 'before': empty, 'after': empty, 'magnitude': empty}
+
+    cumsum = np.concatenate([np.zeros(y.shape[:-1] + (1,)), np.cumsum(y, axis=-1)], axis=-1)
+    before = (cumsum[..., positions] - cumsum[..., positions - window]) / window
+    after = (cumsum[..., positions + window] - cumsum[..., positions]) / window
+
+    magnitude = np.zeros_like(before)
+    np.divide(np.abs(after - before), before, out=magnitude, where=before > 0)
+    return {'positions': positions, 'before': before, 'after': after, 'magnitude': magnitude}
+
+
+def pelt_change_points(values: Any, penalty: Optional[float] = None, min_size: int = 2) -> List[int]:
+    """
+    PELT 惩罚最优划分（均值变化、高斯代价），剪枝后期望线性时间
+
+    Args:
+        values: 一维序列
+        penalty: 每增加一个变化点的惩罚，默认按 BIC 取 2·σ²·ln(n)，σ 由一阶差分稳健估计
+        min_size: 最短分段长度
+
+    Returns:
+        变化点位置列表（新分段的起始下标）
+    """
+    y = np.asarray(values, dtype=float)
+    n = len(y)
+    if n < 2 * min_size:
+        return []
+
+    if penalty is None:
+        diffs = np.diff(y)
+        sigma = np.median(np.abs(diffs - np.median(diffs))) * 1.4826 / np.sqrt(2)
+        if sigma == 0:
+            sigma = np.std(y) or 1.0
+        penalty = 2 * sigma ** 2 * np.log(n)
+
+    s1 = np.concatenate([[0.0], np.cumsum(y)])
+    s2 = np.concatenate([[0.0], np.cumsum(y * y)])
+
+    def cost(starts: Any, end: int) -> Any:
+        length = end - starts
+        total = s1[end] - s1[starts]
+        return (s2[end] - s2[starts]) - total * total / length
+
+    best = np.full(n + 1, np.inf)
+    best[0] = -penalty
+    last_change = np.zeros(n + 1, dtype=np.int64)
+    candidates = np.array([0], dtype=np.int64)
+
+    for end in range(min_size, n + 1):
+        ready = end - candidates >= min_size
+        admissible = candidates[ready]
+        totals = best[admissible] + cost(admissible, end) + penalty
+        i = int(np.argmin(totals))
+        best[end] = totals[i]
+        last_change[end] = admissible[i]
+
+        # 剪枝：F(s) + C(s, t) > F(t) 的起点之后不可能再成为最优起点
+        keep = ~ready
+        keep[ready] = totals - penalty <= best[end]
+        candidates = np.append(candidates[keep], end)
+
+    points = []
+    end = n
+    while end > 0:
+        start = int(last_change[end])
+        if start > 0:
+            points.append(start)
+        end = start
+    return sorted(points)
+
+
+def describe_change_points(values: Any, points: List[int]) -> List[Dict[str, Any]]:
+    """
+    以相邻分段均值描述变化点
+
+    Args:
+        values: 一维序列
+        points: 变化点位置列表
+
+    Returns:
+        变化点字典列表（position/change_magnitude/direction/before_value/after_value）
+    """
+    y = np.asarray(values, dtype=float)
+    bounds = [0] + list(points) + [len(y)]
+    means = [float(y[bounds[i]:bounds[i + 1]].mean()) for i in range(len(bounds) - 1)]
+
+    result = []
+    for i, position in enumerate(points):
+        before, after = means[i], means[i + 1]
+        result.append({
+            'position': int(position),
+            'change_magnitude': abs(after - before) / before if before > 0 else 0,
+            'direction': 'increase' if after > before else 'decrease',
+            'before_value': before,
+            'after_value': after
+        })
+    return result
@@ -24,6 +24,8 @@ project_root = str(Path(__file__).parent.parent.parent)
 if project_root not in sys.path:
     sys.path.append(project_root)
 
+from config.settings import settings
+
 # 条件导入，优雅处理缺失依赖
 try:
     from main import AnalysisReportSystem
@@ -323,11 +325,39 @@ def get_system_stats():
         }
 
 # 在app创建后添加专业分析实例
+# 已训练模型、预测状态与分群结果持久化到配置的输出目录
 if PROFESSIONAL_ANALYTICS_AVAILABLE:
-    analytics_engine = ProfessionalAnalytics()
+    analytics_engine = ProfessionalAnalytics(AnalysisConfig(
+        model_registry_dir=str(settings.MODELS_DIR),
+        forecast_state_dir=str(settings.FORECAST_STATE_DIR),
+        segment_store_dir=str(settings.SEGMENTS_DIR),
+        segment_ttl_hours=settings.SEGMENT_RESULT_TTL_HOURS,
+        segment_max_results=settings.SEGMENT_MAX_RESULTS
+    ))
 else:
     analytics_engine = None
 
+# 批量预测只读取数据目录下的文件，结果只写入预测输出目录
+BATCH_DATA_DIR = str(settings.DATA_DIR)
+BATCH_OUTPUT_DIR = str(settings.PREDICTIONS_DIR)
+
+def resolve_contained_path(path: str, base_dir: str) -> Optional[str]:
+    """
+    把请求中的路径解析到 base_dir 之内（相对路径相对 base_dir，解析符号链接）
+
+    Args:
+        path: 请求中的路径
+        base_dir: 允许访问的目录
+
+    Returns:
+        解析后的绝对路径；路径越出 base_dir 时返回 None
+    """
+    base = os.path.realpath(base_dir)
+    resolved = os.path.realpath(os.path.join(base, str(path)))
+    if resolved == base or os.path.commonpath([base, resolved]) != base:
+        return None
+    return resolved
+
 # 新增系统设置相关的数据模型
 class SystemSettings(BaseModel):
     """系统设置模型"""
@@ -1366,10 +1396,17 @@ async def analyze_customer_segmentation(request: Request):
         method = body.get('method', 'kmeans')
         
         if analytics_engine:
-            result = analytics_engine.advanced_customer_segmentation(
-                data=body.get('data', {}),
+            data = body.get('data', {})
+            if isinstance(data, list):
+                import pandas as pd
+                data = pd.DataFrame(data)
+            # 逐行标签保存在服务端，响应只含汇总画像与 result_id
+            result = await asyncio.to_thread(
+                analytics_engine.advanced_customer_segmentation,
+                data=data,
                 features=features,
-                method=method
+                method=method,
+                id_column=body.get('id_column')
             )
         else:
             # 简化版本
@@ -1395,6 +1432,53 @@ async def analyze_customer_segmentation(request: Request):
             status_code=500
         )
 
+@app.get("/api/analysis/segments/{result_id}")
+async def get_segment_assignments(result_id: str, offset: int = 0, limit: int = 1000,
+                                  segment: Optional[int] = None):
+    """分页获取分群标签（按全部行或指定分群的成员区间读取）"""
+    if not analytics_engine:
+        return JSONResponse(content={'error': '专业分析工具不可用'}, status_code=503)
+    try:
+        page = analytics_engine.segment_assignments(result_id, offset=offset, limit=limit, segment=segment)
+        return JSONResponse(content=page)
+    except KeyError:
+        return JSONResponse(content={'error': f"分群结果不存在: {result_id}"}, status_code=404)
+    except Exception as e:
+        return JSONResponse(content={'error': f"获取分群标签失败: {str(e)}"}, status_code=500)
+
+@app.delete("/api/analysis/segments/{result_id}")
+async def delete_segment_assignments(result_id: str):
+    """删除已保存的分群结果"""
+    if not analytics_engine or analytics_engine.segment_store is None:
+        return JSONResponse(content={'error': '分群结果存储不可用'}, status_code=503)
+    try:
+        analytics_engine.delete_segment_result(result_id)
+        return JSONResponse(content={'result_id': result_id, 'deleted': True})
+    except KeyError:
+        return JSONResponse(content={'error': f"分群结果不存在: {result_id}"}, status_code=404)
+    except Exception as e:
+        return JSONResponse(content={'error': f"删除分群结果失败: {str(e)}"}, status_code=500)
+
+@app.get("/api/analysis/segments/{result_id}/stream")
+async def stream_segment_assignments(result_id: str, segment: Optional[int] = None):
+    """以 NDJSON 流式导出分群标签（每行一个 {row_id, segment}），按块读取，内存占用与总行数无关"""
+    if not analytics_engine or analytics_engine.segment_store is None:
+        return JSONResponse(content={'error': '分群结果存储不可用'}, status_code=503)
+    store = analytics_engine.segment_store
+    try:
+        store.metadata(result_id)
+    except KeyError:
+        return JSONResponse(content={'error': f"分群结果不存在: {result_id}"}, status_code=404)
+
+    def lines():
+        for chunk in store.iter_rows(result_id, segment=segment):
+            yield ''.join(
+                json.dumps({'row_id': row_id, 'segment': label}, ensure_ascii=False) + '\n'
+                for row_id, label in zip(chunk['row_id'], chunk['segment'])
+            )
+
+    return StreamingResponse(lines(), media_type='application/x-ndjson')
+
 @app.post("/api/analysis/predictive-modeling")
 async def analyze_predictive_modeling(request: Request):
     """预测建模API"""
@@ -1436,6 +1520,54 @@ async def analyze_predictive_modeling(request: Request):
             status_code=500
         )
 
+@app.post("/api/analysis/batch-predict")
+async def analyze_batch_predict(request: Request):
+    """批量预测API（使用已注册模型分块打分，大文件请传 data_path 与 output_path，分别相对数据目录与预测输出目录）"""
+    try:
+        body = await request.json()
+        target_column = body.get('target_column', 'target')
+
+        if not analytics_engine:
+            return JSONResponse(content={'error': '专业分析工具不可用'}, status_code=503)
+
+        source = body.get('data_path')
+        if source:
+            source = resolve_contained_path(source, BATCH_DATA_DIR)
+            if source is None:
+                return JSONResponse(content={'error': '数据文件必须位于数据目录下'}, status_code=400)
+        else:
+            import pandas as pd
+            source = pd.DataFrame(body.get('data', []))
+
+        output_path = body.get('output_path')
+        if output_path:
+            output_path = resolve_contained_path(output_path, BATCH_OUTPUT_DIR)
+            if output_path is None:
+                return JSONResponse(content={'error': '输出文件必须位于预测输出目录下'}, status_code=400)
+            os.makedirs(os.path.dirname(output_path), exist_ok=True)
+
+        # 分块打分为CPU密集型任务，放到线程中执行以免阻塞事件循环
+        result = await asyncio.to_thread(
+            analytics_engine.batch_predict,
+            source,
+            target_column,
+            version=body.get('version'),
+            chunk_size=body.get('chunk_size', 100000),
+            output_path=output_path,
+            id_column=body.get('id_column')
+        )
+        if 'predictions' in result:
+            result['predictions'] = result['predictions'].tolist()
+
+        return JSONResponse(content=result)
+    except KeyError as e:
+        return JSONResponse(content={'error': f"模型不存在: {str(e)}"}, status_code=404)
+    except Exception as e:
+        return JSONResponse(
+            content={'error': f"批量预测失败: {str(e)}"},
+            status_code=500
+        )
+
 @app.post("/api/analysis/ab-test")
 async def analyze_ab_test(request: Request):
     """A/B测试分析API"""
@@ -1,10 +1,14 @@
 import os
-from typing import Dict, List, Any, Optional
+import threading
+from typing import Dict, List, Any, Optional, Tuple
 from datetime import datetime
 
 # 条件导入，优雅处理缺失依赖
 try:
-    import matplotlib.pyplot as plt
+    import matplotlib
+    import matplotlib.style
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
     import seaborn as sns
     MATPLOTLIB_AVAILABLE = True
 except ImportError:
@@ -28,6 +32,141 @@ except ImportError:
     STREAMLIT_AVAILABLE = False
     print("⚠️  警告: streamlit 未安装，交互式仪表盘将不可用")
 
+from .render_pool import RenderPool, renderer, render_spec, chart_spec, get_render_pool
+from .render_cache import ChartRenderCache, CACHE_DIRNAME, cached_render, get_render_cache
+from .downsampling import DEFAULT_POINT_BUDGET, DEFAULT_MAX_ANNOTATIONS, MARKER_MAX_POINTS, downsample_series
+
+# 图表渲染失败时文本图表使用的示例数据
+TEXT_FALLBACKS = {
+    'gmv_contribution': ('GMV贡献度分析', {'DAU': 5.2, '频次': -2.1, '客单价': 3.8, '转化率': -1.5}),
+    'category_analysis': ('品类分析', {'Electronics': 5.2, 'Clothing': -2.1, 'Books': 3.8}),
+    'region_analysis': ('区域分析', {'北京': 5.2, '上海': -2.1, '广州': 3.8})
+}
+
+DEFAULT_DPI = 300
+
+_matplotlib_configured = False
+_configure_lock = threading.Lock()
+
+
+def configure_matplotlib() -> None:
+    """设置图表样式与中文字体（每个进程只需一次）"""
+    global _matplotlib_configured
+    if not MATPLOTLIB_AVAILABLE or _matplotlib_configured:
+        return
+    with _configure_lock:
+        if _matplotlib_configured:
+            return
+        try:
+            # 设置图表样式
+            matplotlib.style.use('seaborn-v0_8' if 'seaborn-v0_8' in matplotlib.style.available else 'default')
+            if sns:
+                sns.set_palette("husl")
+
+            # 设置中文字体（如果可用）
+            try:
+                matplotlib.rcParams['font.sans-serif'] = ['SimHei', 'DejaVu Sans']
+                matplotlib.rcParams['axes.unicode_minus'] = False
+            except:
+                pass  # 字体设置失败时不影响功能
+        except Exception as e:
+            print(f"⚠️  matplotlib配置警告: {e}")
+        _matplotlib_configured = True
+
+
+def _new_figure(figsize: Tuple[float, float]) -> Any:
+    """
+    创建独立的 Figure（绑定 Agg 画布，不注册到 pyplot），
+    渲染函数之间不共享任何全局状态，可在多个线程中并发渲染；
+    渲染失败时 Figure 没有被全局引用，随函数返回被回收
+    """
+    fig = Figure(figsize=figsize)
+    FigureCanvasAgg(fig)
+    return fig
+
+
+def _save_figure(fig: Any, spec: Dict[str, Any]) -> str:
+    """按规格的 dpi 选项保存为图片"""
+    fig.savefig(spec['output_path'], dpi=spec['options'].get('dpi', DEFAULT_DPI), bbox_inches='tight')
+    return spec['output_path']
+
+
+@renderer('bar_pair')
+def render_bar_pair(spec: Dict[str, Any]) -> str:
+    """
+    左右两个条形图（同一组标签的两项指标）
+
+    spec['data']: {'labels', 'left', 'right'}
+    spec['options']: {'titles', 'ylabels', 'label_formats', 'rotate_labels', 'dpi'}
+    """
+    configure_matplotlib()
+    data, options = spec['data'], spec['options']
+    fig = _new_figure((15, 6))
+    axes = fig.subplots(1, 2)
+    for ax, values, title, ylabel, label_format in zip(
+            axes, (data['left'], data['right']), options['titles'], options['ylabels'], options['label_formats']):
+        bars = ax.bar(data['labels'], values)
+        ax.set_title(title)
+        ax.set_ylabel(ylabel)
+        if options.get('rotate_labels'):
+            ax.tick_params(axis='x', rotation=45)
+
+        # 添加数值标签
+        for bar in bars:
+            height = bar.get_height()
+            ax.text(bar.get_x() + bar.get_width()/2., height,
+                    label_format.format(height),
+                    ha='center', va='bottom')
+
+    fig.tight_layout()
+    return _save_figure(fig, spec)
+
+
+@renderer('heatmap')
+def render_heatmap(spec: Dict[str, Any]) -> str:
+    """
+    透视表热力图
+
+    spec['data']: {'index', 'columns', 'values'}（values 为二维列表）
+    spec['options']: {'title', 'dpi'}
+    """
+    configure_matplotlib()
+    data = spec['data']
+    table = pd.DataFrame(data['values'], index=data['index'], columns=data['columns'])
+    fig = _new_figure((10, 8))
+    ax = fig.subplots()
+    sns.heatmap(table, annot=True, fmt='.2f', cmap='YlOrRd', ax=ax)
+    ax.set_title(spec['options']['title'])
+    return _save_figure(fig, spec)
+
+
+@renderer('trend')
+def render_trend(spec: Dict[str, Any]) -> str:
+    """
+    带关键点数值标签的折线趋势图
+
+    spec['data']: {'x', 'y', 'x_is_datetime', 'annotations'}（日期以 ISO 字符串传递，
+        annotations 为需要标注数值的点位置）
+    spec['options']: {'title', 'xlabel', 'ylabel', 'show_markers', 'dpi'}
+    """
+    configure_matplotlib()
+    data, options = spec['data'], spec['options']
+    x = list(pd.to_datetime(data['x'])) if data.get('x_is_datetime') else data['x']
+    fig = _new_figure((12, 6))
+    ax = fig.subplots()
+    ax.plot(x, data['y'], marker='o' if options.get('show_markers', True) else None)
+    ax.set_title(options['title'])
+    ax.set_xlabel(options['xlabel'])
+    ax.set_ylabel(options['ylabel'])
+    ax.tick_params(axis='x', rotation=45)
+
+    # 只标注关键点（最新值、最高/最低点等）
+    for i in data['annotations']:
+        ax.text(x[i], data['y'][i], f"{data['y'][i]:.2f}", ha='center', va='bottom')
+
+    fig.tight_layout()
+    return _save_figure(fig, spec)
+
 class TextChartGenerator:
     """文本图表生成器，用于在缺少matplotlib时生成简单的文本图表"""
     
@@ -66,33 +205,87 @@ class TextChartGenerator:
 class ChartGenerator:
     """图表生成器（支持多种模式）"""
     
-    def __init__(self, output_dir: str):
+    def __init__(self, output_dir: str, render_pool: Optional[RenderPool] = None,
+                 render_cache: Optional[ChartRenderCache] = None, use_cache: bool = True):
         """
         初始化图表生成器
         
         Args:
             output_dir: 输出目录路径
+            render_pool: 渲染进程池；单个图表默认在当前进程渲染，
+                generate_all_charts 默认使用进程内共享的渲染进程池
+            render_cache: 渲染缓存，默认使用输出目录下的 .render_cache
+            use_cache: 是否启用渲染缓存
         """
         self.output_dir = output_dir
         os.makedirs(output_dir, exist_ok=True)
         self.text_generator = TextChartGenerator()
+        self.render_pool = render_pool
+        if use_cache and render_cache is None:
+            render_cache = get_render_cache(os.path.join(output_dir, CACHE_DIRNAME))
+        self.render_cache = render_cache if use_cache else None
         
         # 仅在matplotlib可用时进行设置
-        if MATPLOTLIB_AVAILABLE:
-            try:
-                # 设置图表样式
-                plt.style.use('seaborn-v0_8' if hasattr(plt.style, 'available') and 'seaborn-v0_8' in plt.style.available else 'default')
-                if sns:
-                    sns.set_palette("husl")
-                
-                # 设置中文字体（如果可用）
-                try:
-                    plt.rcParams['font.sans-serif'] = ['SimHei', 'DejaVu Sans']
-                    plt.rcParams['axes.unicode_minus'] = False
-                except:
-                    pass  # 字体设置失败时不影响功能
-            except Exception as e:
-                print(f"⚠️  matplotlib配置警告: {e}")
+        configure_matplotlib()
+
+    def _render(self, spec: Dict[str, Any]) -> str:
+        """渲染单个图表规格（规格未变时复用缓存；有渲染进程池时在池中渲染）"""
+        return cached_render(spec, self._render_uncached, self.render_cache)
+
+    def _render_uncached(self, spec: Dict[str, Any]) -> str:
+        if self.render_pool is not None:
+            return self.render_pool.render(spec)
+        return render_spec(spec)
+
+    def _text_fallback(self, name: str) -> str:
+        """图表渲染失败时写入示例数据的文本图表"""
+        title, data = TEXT_FALLBACKS[name]
+        text_chart = self.text_generator.generate_text_bar_chart(data, title)
+        output_path = os.path.join(self.output_dir, f'{name}.txt')
+        with open(output_path, 'w', encoding='utf-8') as f:
+            f.write(text_chart)
+        return output_path
+
+    def _gmv_contribution_spec(self, metrics: Dict) -> Dict[str, Any]:
+        """GMV贡献度图表规格"""
+        gmv_metrics = metrics.get('gmv_metrics', metrics) if 'gmv_metrics' in metrics else metrics
+        changes = []
+        contributions = []
+        for key in ['dau', 'frequency', 'order_price', 'conversion_rate']:
+            if key in gmv_metrics and hasattr(gmv_metrics[key], 'change_rate'):
+                changes.append(float(gmv_metrics[key].change_rate))
+                contributions.append(float(gmv_metrics[key].contribution))
+            else:
+                changes.append(0.0)
+                contributions.append(0.0)
+        return chart_spec(
+            'bar_pair', os.path.join(self.output_dir, 'gmv_contribution.png'),
+            {'labels': ['DAU', '频次', '客单价', '转化率'], 'left': changes, 'right': contributions},
+            titles=['各指标变化率', '各指标贡献度'], ylabels=['变化率 (%)', '贡献度 (%)'],
+            label_formats=['{:.1f}%', '{:.1f}%'], rotate_labels=False
+        )
+
+    def _category_analysis_spec(self, metrics: List[Dict]) -> Dict[str, Any]:
+        """品类分析图表规格"""
+        return chart_spec(
+            'bar_pair', os.path.join(self.output_dir, 'category_analysis.png'),
+            {'labels': [str(m.get('name', f'Category{i}')) for i, m in enumerate(metrics)],
+             'left': [float(m.get('change_rate', 0)) for m in metrics],
+             'right': [float(m.get('structure_change', 0)) for m in metrics]},
+            titles=['品类价格变化率', '品类结构变化'], ylabels=['变化率 (%)', '变化百分点'],
+            label_formats=['{:.1f}%', '{:.1f}'], rotate_labels=True
+        )
+
+    def _region_analysis_spec(self, metrics: List[Dict]) -> Dict[str, Any]:
+        """区域分析图表规格"""
+        return chart_spec(
+            'bar_pair', os.path.join(self.output_dir, 'region_analysis.png'),
+            {'labels': [str(m.get('name', f'Region{i}')) for i, m in enumerate(metrics)],
+             'left': [float(m.get('change_rate', 0)) for m in metrics],
+             'right': [float(m.get('current_rate', 0) - m.get('previous_rate', 0)) for m in metrics]},
+            titles=['区域价格变化率', '区域转化率变化'], ylabels=['变化率 (%)', '变化百分点'],
+            label_formats=['{:.1f}%', '{:.3f}'], rotate_labels=True
+        )
         
     def generate_gmv_contribution_chart(self, metrics: Dict) -> str:
         """
@@ -122,67 +315,11 @@ class ChartGenerator:
             return output_path
         
         try:
-            # 准备数据
-            components = ['DAU', '频次', '客单价', '转化率']
-            gmv_metrics = metrics.get('gmv_metrics', metrics) if 'gmv_metrics' in metrics else metrics
-            
-            changes = []
-            contributions = []
-            
-            for key in ['dau', 'frequency', 'order_price', 'conversion_rate']:
-                if key in gmv_metrics and hasattr(gmv_metrics[key], 'change_rate'):
-                    changes.append(gmv_metrics[key].change_rate)
-                    contributions.append(gmv_metrics[key].contribution)
-                else:
-                    changes.append(0)
-                    contributions.append(0)
-            
-            # 创建图表
-            fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(15, 6))
-            
-            # 绘制变化率
-            bars1 = ax1.bar(components, changes)
-            ax1.set_title('各指标变化率')
-            ax1.set_ylabel('变化率 (%)')
-            
-            # 添加数值标签
-            for bar in bars1:
-                height = bar.get_height()
-                ax1.text(bar.get_x() + bar.get_width()/2., height,
-                        f'{height:.1f}%',
-                        ha='center', va='bottom')
-            
-            # 绘制贡献度
-            bars2 = ax2.bar(components, contributions)
-            ax2.set_title('各指标贡献度')
-            ax2.set_ylabel('贡献度 (%)')
-            
-            # 添加数值标签
-            for bar in bars2:
-                height = bar.get_height()
-                ax2.text(bar.get_x() + bar.get_width()/2., height,
-                        f'{height:.1f}%',
-                        ha='center', va='bottom')
-            
-            # 调整布局
-            plt.tight_layout()
-            
-            # 保存图表
-            output_path = os.path.join(self.output_dir, 'gmv_contribution.png')
-            plt.savefig(output_path, dpi=300, bbox_inches='tight')
-            plt.close()
-            
-            return output_path
-            
+            return self._render(self._gmv_contribution_spec(metrics))
         except Exception as e:
             # 降级到文本模式
             print(f"⚠️  图表生成失败，使用文本模式: {e}")
-            data = {'DAU': 5.2, '频次': -2.1, '客单价': 3.8, '转化率': -1.5}
-            text_chart = self.text_generator.generate_text_bar_chart(data, "GMV贡献度分析")
-            output_path = os.path.join(self.output_dir, 'gmv_contribution.txt')
-            with open(output_path, 'w', encoding='utf-8') as f:
-                f.write(text_chart)
-            return output_path
+            return self._text_fallback('gmv_contribution')
         
     def generate_category_analysis_chart(self, metrics: List[Dict]) -> str:
         """
@@ -208,59 +345,11 @@ class ChartGenerator:
             return output_path
         
         try:
-            # 准备数据
-            categories = [m.get('name', f'Category{i}') for i, m in enumerate(metrics)]
-            price_changes = [m.get('change_rate', 0) for m in metrics]
-            share_changes = [m.get('structure_change', 0) for m in metrics]
-            
-            # 创建图表
-            fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(15, 6))
-            
-            # 绘制价格变化
-            bars1 = ax1.bar(categories, price_changes)
-            ax1.set_title('品类价格变化率')
-            ax1.set_ylabel('变化率 (%)')
-            plt.xticks(rotation=45)
-            
-            # 添加数值标签
-            for bar in bars1:
-                height = bar.get_height()
-                ax1.text(bar.get_x() + bar.get_width()/2., height,
-                        f'{height:.1f}%',
-                        ha='center', va='bottom')
-            
-            # 绘制结构变化
-            bars2 = ax2.bar(categories, share_changes)
-            ax2.set_title('品类结构变化')
-            ax2.set_ylabel('变化百分点')
-            plt.xticks(rotation=45)
-            
-            # 添加数值标签
-            for bar in bars2:
-                height = bar.get_height()
-                ax2.text(bar.get_x() + bar.get_width()/2., height,
-                        f'{height:.1f}',
-                        ha='center', va='bottom')
-            
-            # 调整布局
-            plt.tight_layout()
-            
-            # 保存图表
-            output_path = os.path.join(self.output_dir, 'category_analysis.png')
-            plt.savefig(output_path, dpi=300, bbox_inches='tight')
-            plt.close()
-            
-            return output_path
-            
+            return self._render(self._category_analysis_spec(metrics))
         except Exception as e:
             # 降级到文本模式
             print(f"⚠️  品类图表生成失败，使用文本模式: {e}")
-            data = {'Electronics': 5.2, 'Clothing': -2.1, 'Books': 3.8}
-            text_chart = self.text_generator.generate_text_bar_chart(data, "品类分析")
-            output_path = os.path.join(self.output_dir, 'category_analysis.txt')
-            with open(output_path, 'w', encoding='utf-8') as f:
-                f.write(text_chart)
-            return output_path
+            return self._text_fallback('category_analysis')
         
     def generate_region_analysis_chart(self, metrics: List[Dict]) -> str:
         """
@@ -286,62 +375,11 @@ class ChartGenerator:
             return output_path
         
         try:
-            # 准备数据
-            regions = [m.get('name', f'Region{i}') for i, m in enumerate(metrics)]
-            price_changes = [m.get('change_rate', 0) for m in metrics]
-            conversion_changes = [
-                m.get('current_rate', 0) - m.get('previous_rate', 0) 
-                for m in metrics
-            ]
-            
-            # 创建图表
-            fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(15, 6))
-            
-            # 绘制价格变化
-            bars1 = ax1.bar(regions, price_changes)
-            ax1.set_title('区域价格变化率')
-            ax1.set_ylabel('变化率 (%)')
-            plt.xticks(rotation=45)
-            
-            # 添加数值标签
-            for bar in bars1:
-                height = bar.get_height()
-                ax1.text(bar.get_x() + bar.get_width()/2., height,
-                        f'{height:.1f}%',
-                        ha='center', va='bottom')
-            
-            # 绘制转化率变化
-            bars2 = ax2.bar(regions, conversion_changes)
-            ax2.set_title('区域转化率变化')
-            ax2.set_ylabel('变化百分点')
-            plt.xticks(rotation=45)
-            
-            # 添加数值标签
-            for bar in bars2:
-                height = bar.get_height()
-                ax2.text(bar.get_x() + bar.get_width()/2., height,
-                        f'{height:.3f}',
-                        ha='center', va='bottom')
-            
-            # 调整布局
-            plt.tight_layout()
-            
-            # 保存图表
-            output_path = os.path.join(self.output_dir, 'region_analysis.png')
-            plt.savefig(output_path, dpi=300, bbox_inches='tight')
-            plt.close()
-            
-            return output_path
-            
+            return self._render(self._region_analysis_spec(metrics))
         except Exception as e:
             # 降级到文本模式
             print(f"⚠️  区域图表生成失败，使用文本模式: {e}")
-            data = {'北京': 5.2, '上海': -2.1, '广州': 3.8}
-            text_chart = self.text_generator.generate_text_bar_chart(data, "区域分析")
-            output_path = os.path.join(self.output_dir, 'region_analysis.txt')
-            with open(output_path, 'w', encoding='utf-8') as f:
-                f.write(text_chart)
-            return output_path
+            return self._text_fallback('region_analysis')
         
     def generate_heatmap(self, data: Any, x_col: str, y_col: str, value_col: str) -> str:
         """
@@ -376,17 +414,12 @@ class ChartGenerator:
                 aggfunc='mean'
             )
             
-            # 创建图表
-            plt.figure(figsize=(10, 8))
-            sns.heatmap(pivot_table, annot=True, fmt='.2f', cmap='YlOrRd')
-            plt.title(f'{value_col}热力图')
-            
-            # 保存图表
-            output_path = os.path.join(self.output_dir, f'{value_col}_heatmap.png')
-            plt.savefig(output_path, dpi=300, bbox_inches='tight')
-            plt.close()
-            
-            return output_path
+            return self._render(chart_spec(
+                'heatmap', os.path.join(self.output_dir, f'{value_col}_heatmap.png'),
+                {'index': pivot_table.index.tolist(), 'columns': pivot_table.columns.tolist(),
+                 'values': pivot_table.to_numpy(dtype=float).tolist()},
+                title=f'{value_col}热力图'
+            ))
         except Exception as e:
             # 降级到文本模式
             print(f"⚠️  热力图生成失败，使用文本模式: {e}")
@@ -399,14 +432,21 @@ class ChartGenerator:
                 f.write(text_chart)
             return output_path
         
-    def generate_trend_chart(self, data: Any, date_col: str, value_col: str) -> str:
+    def generate_trend_chart(self, data: Any, date_col: str, value_col: str,
+                             max_points: int = DEFAULT_POINT_BUDGET,
+                             max_annotations: int = DEFAULT_MAX_ANNOTATIONS) -> str:
         """
         生成趋势图（支持多种模式）
         
+        点数超过 max_points 时按时间排序后降采样（最小/最大值分桶 + LTTB），
+        数值标签只标注最新值、最高/最低点等关键点
+        
         Args:
             data: 数据框或任何可处理的数据格式
             date_col: 日期列名
             value_col: 值列名
+            max_points: 绘制的点数上限
+            max_annotations: 数值标签数上限
             
         Returns:
             图表文件路径或文本图表
@@ -423,27 +463,7 @@ class ChartGenerator:
             return output_path
         
         try:
-            # 创建图表
-            plt.figure(figsize=(12, 6))
-            plt.plot(data[date_col], data[value_col], marker='o')
-            plt.title(f'{value_col}趋势图')
-            plt.xlabel('日期')
-            plt.ylabel(value_col)
-            plt.xticks(rotation=45)
-            
-            # 添加数值标签
-            for x, y in zip(data[date_col], data[value_col]):
-                plt.text(x, y, f'{y:.2f}', ha='center', va='bottom')
-            
-            # 调整布局
-            plt.tight_layout()
-            
-            # 保存图表
-            output_path = os.path.join(self.output_dir, f'{value_col}_trend.png')
-            plt.savefig(output_path, dpi=300, bbox_inches='tight')
-            plt.close()
-            
-            return output_path
+            return self._render(self._trend_spec(data, date_col, value_col, max_points, max_annotations))
         except Exception as e:
             # 降级到文本模式
             print(f"⚠️  趋势图生成失败，使用文本模式: {e}")
@@ -490,9 +510,84 @@ class ChartGenerator:
         except Exception as e:
             print(f"⚠️  仪表盘生成失败: {e}")
     
+    def _trend_spec(self, data: Any, date_col: str, value_col: str, max_points: int,
+                    max_annotations: int) -> Dict[str, Any]:
+        """趋势图规格（超过点数预算时按时间排序后降采样）"""
+        frame = pd.DataFrame({'x': pd.Series(data[date_col]).to_numpy(),
+                              'y': pd.Series(data[value_col]).astype(float).to_numpy()})
+        if len(frame) > max_points:
+            frame = frame.sort_values('x', kind='stable')
+        x_is_datetime = pd.api.types.is_datetime64_any_dtype(frame['x'])
+        sampled = downsample_series(frame['x'].to_numpy(), frame['y'].to_numpy(),
+                                    max_points, max_annotations)
+        if x_is_datetime:
+            x = pd.DatetimeIndex(sampled['x']).strftime('%Y-%m-%dT%H:%M:%S').tolist()
+        else:
+            x = sampled['x'].tolist()
+        return chart_spec(
+            'trend', os.path.join(self.output_dir, f'{value_col}_trend.png'),
+            {'x': x, 'y': sampled['y'].tolist(), 'x_is_datetime': bool(x_is_datetime),
+             'annotations': sampled['annotations']},
+            title=f'{value_col}趋势图', xlabel='日期', ylabel=value_col,
+            show_markers=len(x) <= MARKER_MAX_POINTS
+        )
+
+    def _render_charts(self, chart_inputs: Dict[str, Any]) -> Dict[str, str]:
+        """
+        并发渲染多个图表：构造图表规格，缓存未命中的提交到渲染进程池，单个图表失败时降级为文本图表
+        
+        Args:
+            chart_inputs: {图表名: 输入数据}
+            
+        Returns:
+            {图表名: 文件路径}
+        """
+        spec_builders = {
+            'gmv_contribution': self._gmv_contribution_spec,
+            'category_analysis': self._category_analysis_spec,
+            'region_analysis': self._region_analysis_spec
+        }
+        text_generators = {
+            'gmv_contribution': self.generate_gmv_contribution_chart,
+            'category_analysis': self.generate_category_analysis_chart,
+            'region_analysis': self.generate_region_analysis_chart
+        }
+        if not MATPLOTLIB_AVAILABLE:
+            return {name: text_generators[name](inputs) for name, inputs in chart_inputs.items()}
+        
+        chart_paths = {}
+        specs = {}
+        for name, inputs in chart_inputs.items():
+            try:
+                specs[name] = spec_builders[name](inputs)
+            except Exception as e:
+                print(f"⚠️  {name} 图表数据准备失败，使用文本模式: {e}")
+                chart_paths[name] = self._text_fallback(name)
+        
+        pending = {}
+        for name, spec in specs.items():
+            cached = self.render_cache.fetch(spec) if self.render_cache is not None else None
+            if cached is not None:
+                chart_paths[name] = cached
+            else:
+                pending[name] = spec
+        if not pending:
+            return chart_paths
+        
+        pool = self.render_pool or get_render_pool()
+        for name, result in pool.render_many(pending).items():
+            if isinstance(result, Exception):
+                print(f"⚠️  {name} 图表渲染失败，使用文本模式: {result}")
+                chart_paths[name] = self._text_fallback(name)
+            else:
+                if self.render_cache is not None:
+                    self.render_cache.store(pending[name], result)
+                chart_paths[name] = result
+        return chart_paths
+    
     def generate_all_charts(self, analysis_results: Dict[str, Any]) -> Dict[str, str]:
         """
-        生成所有图表（支持多种模式）
+        生成所有图表（支持多种模式），各图表在渲染进程池中并发渲染
         
         Args:
             analysis_results: 分析结果
@@ -503,11 +598,12 @@ class ChartGenerator:
         chart_paths = {}
         
         try:
+            # 各图表的输入数据，之后并发渲染
+            chart_inputs = {}
+            
             # 生成GMV贡献度分析图表
             if 'gmv_metrics' in analysis_results:
-                chart_paths['gmv_contribution'] = self.generate_gmv_contribution_chart(
-                    analysis_results
-                )
+                chart_inputs['gmv_contribution'] = analysis_results
             
             # 生成品类分析图表
             if 'category_metrics' in analysis_results:
@@ -525,9 +621,7 @@ class ChartGenerator:
                         {'name': 'Clothing', 'change_rate': -2.1, 'structure_change': -1.5}
                     ]
                 
-                chart_paths['category_analysis'] = self.generate_category_analysis_chart(
-                    category_data
-                )
+                chart_inputs['category_analysis'] = category_data
             
             # 生成区域分析图表
             if 'region_metrics' in analysis_results:
@@ -545,9 +639,9 @@ class ChartGenerator:
                         {'name': '上海', 'change_rate': -2.1, 'current_rate': 11.8, 'previous_rate': 12.2}
                     ]
                 
-                chart_paths['region_analysis'] = self.generate_region_analysis_chart(
-                    region_data
-                )
+                chart_inputs['region_analysis'] = region_data
+            
+            chart_paths.update(self._render_charts(chart_inputs))
             
             # 生成文本摘要
             if 'gmv_metrics' in analysis_results:
@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+时间序列降采样
+超过点数预算的序列在绘图前降采样：先按桶保留最小/最大值（保证尖峰不丢失），
+再用 Largest-Triangle-Three-Buckets（LTTB）选出视觉上最能保持形状的点；
+数值标注只保留关键点（首末值、最高/最低点）
+"""
+
+from typing import Dict, List, Any
+
+# 条件导入
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+DEFAULT_POINT_BUDGET = 2000
+DEFAULT_MAX_ANNOTATIONS = 4
+# 点数超过预算的该倍数时，先用最小/最大值分桶缩减到该倍数再做 LTTB
+MINMAX_RATIO = 4
+DOWNSAMPLING_METHODS = ['auto', 'lttb', 'minmax']
+# 点数不超过该值时折线图绘制数据点标记
+MARKER_MAX_POINTS = 100
+
+
+def numeric_axis(x: Any) -> Any:
+    """
+    把横轴转换为可计算面积的浮点数组
+
+    Args:
+        x: 数值、datetime64 或其他（如字符串标签）序列
+
+    Returns:
+        浮点数组；非数值、非日期的横轴使用位置序号
+    """
+    values = np.asarray(x)
+    if np.issubdtype(values.dtype, np.datetime64):
+        return values.astype('datetime64[ns]').astype(np.int64).astype(float)
+    if np.issubdtype(values.dtype, np.number):
+        return values.astype(float)
+    return np.arange(len(values), dtype=float)
+
+
+def lttb_indices(x: Any, y: Any, n_out: int) -> Any:
+    """
+    Largest-Triangle-Three-Buckets 降采样
+
+    首末点固定保留，中间的点均分为 n_out - 2 个桶，每个桶选出与上一个已选点、
+    下一个桶均值构成三角形面积最大的点
+
+    Args:
+        x: 横轴（单调递增的浮点数组）
+        y: 纵轴
+        n_out: 输出点数
+
+    Returns:
+        选中点的位置（递增）
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    anchor = 0
+    for i in range(n_out - 2):
+        start, stop = edges[i], edges[i + 1]
+        if i + 2 < len(edges):
+            next_start, next_stop = edges[i + 1], edges[i + 2]
+        else:
+            next_start, next_stop = n - 1, n
+        avg_x = x[next_start:next_stop].mean()
+        avg_y = y[next_start:next_stop].mean()
+        area = np.abs((x[anchor] - avg_x) * (y[start:stop] - y[anchor])
+                      - (x[anchor] - x[start:stop]) * (avg_y - y[anchor]))
+        anchor = start + int(np.argmax(area))
+        selected[i + 1] = anchor
+    return selected
+
+
+def minmax_indices(y: Any, n_buckets: int) -> Any:
+    """
+    最小/最大值分桶降采样：每个桶保留最小值与最大值所在的点，另保留首末点
+
+    Args:
+        y: 纵轴
+        n_buckets: 桶数（输出不超过 2 * n_buckets + 2 个点）
+
+    Returns:
+        选中点的位置（递增、去重）
+    """
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+    if 2 * n_buckets + 2 >= n:
+        return np.arange(n)
+    edges = np.linspace(0, n, n_buckets + 1).astype(np.int64)
+    selected = [0, n - 1]
+    for start, stop in zip(edges[:-1], edges[1:]):
+        bucket = y[start:stop]
+        selected.append(start + int(np.argmin(bucket)))
+        selected.append(start + int(np.argmax(bucket)))
+    return np.unique(selected)
+
+
+def downsample_indices(x: Any, y: Any, max_points: int = DEFAULT_POINT_BUDGET,
+                       method: str = 'auto') -> Any:
+    """
+    选出降采样后保留的点（点数不超过预算时保留全部）
+
+    Args:
+        x: 横轴（数值、日期或标签，须已按时间排序）
+        y: 纵轴
+        max_points: 点数预算
+        method: 'lttb'、'minmax'，或 'auto'（点数远超预算时先做最小/最大值分桶再做 LTTB）；
+            各方法都保留首末点与全局最高/最低点
+
+    Returns:
+        保留点的位置（递增）；需要降采样时缺失值不参与选择
+    """
+    if method not in DOWNSAMPLING_METHODS:
+        raise ValueError(f"不支持的降采样方法: {method}，可选 {DOWNSAMPLING_METHODS}")
+    y = np.asarray(y, dtype=float)
+    if len(y) <= max_points:
+        return np.arange(len(y))
+    finite = np.flatnonzero(np.isfinite(y))
+    if len(finite) <= max_points:
+        return finite
+    xs = numeric_axis(x)[finite]
+    ys = y[finite]
+
+    if method == 'minmax':
+        return finite[minmax_indices(ys, max(1, (max_points - 2) // 2))]
+    positions = np.arange(len(ys))
+    if method == 'auto' and len(ys) > MINMAX_RATIO * max_points:
+        positions = minmax_indices(ys, MINMAX_RATIO * max_points // 2)
+    # LTTB 不保证保留全局极值，预留两个点给最高/最低点
+    chosen = positions[lttb_indices(xs[positions], ys[positions], max_points - 2)]
+    return finite[np.union1d(chosen, [np.argmin(ys), np.argmax(ys)])]
+
+
+def key_point_indices(y: Any, max_annotations: int = DEFAULT_MAX_ANNOTATIONS) -> List[int]:
+    """
+    需要数值标注的关键点：按最新值、最高点、最低点、首个值的优先级取前 max_annotations 个
+
+    Args:
+        y: 纵轴
+        max_annotations: 标注数上限
+
+    Returns:
+        关键点位置（递增、去重）
+    """
+    y = np.asarray(y, dtype=float)
+    finite = np.flatnonzero(np.isfinite(y))
+    if len(finite) == 0 or max_annotations <= 0:
+        return []
+    candidates = [finite[-1], finite[np.argmax(y[finite])], finite[np.argmin(y[finite])], finite[0]]
+    keys = []
+    for index in candidates:
+        if int(index) not in keys:
+            keys.append(int(index))
+    return sorted(keys[:max_annotations])
+
+
+def downsample_series(x: Any, y: Any, max_points: int = DEFAULT_POINT_BUDGET,
+                      max_annotations: int = DEFAULT_MAX_ANNOTATIONS,
+                      method: str = 'auto') -> Dict[str, Any]:
+    """
+    降采样一条序列并选出标注点
+
+    Args:
+        x: 横轴（须已按时间排序）
+        y: 纵轴
+        max_points: 点数预算
+        max_annotations: 标注数上限
+        method: 降采样方法
+
+    Returns:
+        {'x', 'y'（numpy 数组）, 'annotations'（降采样后序列中的位置）,
+         'original_points', 'downsampled'}
+    """
+    x = np.asarray(x)
+    y = np.asarray(y, dtype=float)
+    keep = downsample_indices(x, y, max_points, method)
+    sampled_y = y[keep]
+    return {
+        'x': x[keep],
+        'y': sampled_y,
+        'annotations': key_point_indices(sampled_y, max_annotations),
+        'original_points': int(len(y)),
+        'downsampled': bool(len(keep) < len(y))
+    }
+
+
+def downsample_mapping(series: Dict[Any, float], max_points: int = DEFAULT_POINT_BUDGET,
+                       method: str = 'auto') -> Dict[Any, float]:
+    """
+    降采样 {时间标签: 值} 形式的序列（按原有顺序）
+
+    Args:
+        series: 有序映射
+        max_points: 点数预算
+        method: 降采样方法
+
+    Returns:
+        保留点组成的新映射；点数不超过预算时原样返回
+    """
+    if len(series) <= max_points:
+        return series
+    keys = list(series.keys())
+    keep = downsample_indices(keys, list(series.values()), max_points, method)
+    return {keys[i]: series[keys[i]] for i in keep}
@@ -13,7 +13,6 @@ from pathlib import Path
 
 # 条件导入
 try:
-    import matplotlib.pyplot as plt
     import matplotlib.dates as mdates
     from matplotlib.patches import Rectangle, Circle
     import seaborn as sns
@@ -30,18 +29,253 @@ try:
 except ImportError:
     PLOTLY_AVAILABLE = False
 
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+from .render_pool import RenderPool, renderer, render_spec, chart_spec
+from .chart_generator import configure_matplotlib, _new_figure, DEFAULT_DPI
+from .render_cache import ChartRenderCache, CACHE_DIRNAME, cached_render, get_render_cache
+from .downsampling import (DEFAULT_POINT_BUDGET, DEFAULT_MAX_ANNOTATIONS, MARKER_MAX_POINTS,
+                           downsample_series, downsample_mapping)
+
+
+@renderer('advanced_dashboard')
+def render_advanced_dashboard(spec: Dict[str, Any]) -> str:
+    """
+    Matplotlib高级仪表板（使用独立的 Figure，可在渲染进程或多个线程中执行）
+
+    spec['data']: {'gmv_trend', 'dau_trend', 'category_analysis'}
+    spec['options']: {'color_palette', 'dpi'}
+    """
+    data, options = spec['data'], spec['options']
+    palette = options['color_palette']
+
+    # 设置样式
+    configure_matplotlib()
+
+    # 创建图形
+    fig = _new_figure((16, 12))
+    fig.suptitle('业务分析综合仪表板', fontsize=24, fontweight='bold', y=0.95)
+    
+    # 1. GMV趋势分析 (2x3网格的左上)
+    ax1 = fig.add_subplot(3, 3, (1, 2))
+    gmv_data = data['gmv_trend']
+    dates = list(gmv_data.keys())
+    values = list(gmv_data.values())
+    
+    ax1.plot(dates, values, marker='o' if len(values) <= MARKER_MAX_POINTS else None,
+             linewidth=3, markersize=8, color=palette[0])
+    ax1.set_title('GMV趋势分析', fontsize=16, fontweight='bold')
+    ax1.grid(True, alpha=0.3)
+    ax1.tick_params(axis='x', rotation=45)
+    
+    # 添加趋势线
+    if len(values) > 1:
+        z = np.polyfit(range(len(values)), values, 1)
+        p = np.poly1d(z)
+        ax1.plot(dates, p(range(len(values))), "--", alpha=0.8, color=palette[1])
+    
+    # 2. DAU分布 (右上)
+    ax2 = fig.add_subplot(3, 3, 3)
+    dau_data = data['dau_trend']
+    
+    ax2.bar(dau_data.keys(), dau_data.values(), color=palette[2], alpha=0.8)
+    ax2.set_title('DAU区域分布', fontsize=16, fontweight='bold')
+    ax2.tick_params(axis='x', rotation=45)
+    
+    # 3. 品类分析饼图 (中左)
+    ax3 = fig.add_subplot(3, 3, 4)
+    category_data = data['category_analysis']
+    
+    wedges, texts, autotexts = ax3.pie(
+        category_data.values(), 
+        labels=category_data.keys(),
+        autopct='%1.1f%%',
+        colors=palette[:len(category_data)],
+        explode=[0.05 if max(category_data.values()) == v else 0 for v in category_data.values()]
+    )
+    ax3.set_title('品类分析', fontsize=16, fontweight='bold')
+    
+    # 4. 热力图 (中中)
+    ax4 = fig.add_subplot(3, 3, 5)
+    
+    # 创建模拟热力图数据
+    heatmap_data = [
+        [0.8, 0.9, 0.7, 0.6],
+        [0.9, 0.8, 0.8, 0.7],
+        [0.7, 0.8, 0.9, 0.8],
+        [0.6, 0.7, 0.8, 0.9]
+    ]
+    
+    im = ax4.imshow(heatmap_data, cmap='YlOrRd', aspect='auto')
+    ax4.set_title('区域-品类热力图', fontsize=16, fontweight='bold')
+    ax4.set_xticks(range(4))
+    ax4.set_yticks(range(4))
+    ax4.set_xticklabels(['电子', '服装', '家居', '其他'])
+    ax4.set_yticklabels(['北京', '上海', '广州', '深圳'])
+    
+    # 添加数值标注
+    for i in range(4):
+        for j in range(4):
+            ax4.text(j, i, f'{heatmap_data[i][j]:.1f}', ha="center", va="center", color="black")
+    
+    # 5. 预测分析 (中右)
+    ax5 = fig.add_subplot(3, 3, 6)
+    
+    forecast_dates = ['今天', '明天', '后天', '第4天', '第5天']
+    actual_values = [880000, 870000, 890000, None, None]
+    predicted_values = [880000, 870000, 890000, 895000, 902000]
+    
+    ax5.plot(forecast_dates[:3], actual_values[:3], marker='o', label='实际值', 
+            linewidth=2, color=palette[0])
+    ax5.plot(forecast_dates, predicted_values, marker='s', label='预测值', 
+            linewidth=2, linestyle='--', color=palette[1])
+    
+    ax5.set_title('GMV预测分析', fontsize=16, fontweight='bold')
+    ax5.legend()
+    ax5.grid(True, alpha=0.3)
+    ax5.tick_params(axis='x', rotation=45)
+    
+    # 6. 关键指标仪表 (下排)
+    ax6 = fig.add_subplot(3, 3, (7, 9))
+    
+    # 创建关键指标卡片
+    metrics = [
+        {'name': '总GMV', 'value': '850万', 'change': '+12.5%', 'color': '#2ecc71'},
+        {'name': '总DAU', 'value': '4,300', 'change': '+8.3%', 'color': '#3498db'},
+        {'name': '转化率', 'value': '3.2%', 'change': '+0.5pp', 'color': '#f39c12'},
+        {'name': '客单价', 'value': '1,977', 'change': '+15.2%', 'color': '#9b59b6'}
+    ]
+    
+    ax6.axis('off')
+    
+    for i, metric in enumerate(metrics):
+        x = i * 0.25
+        y = 0.5
+        
+        # 创建指标卡片
+        rect = Rectangle((x, y-0.3), 0.2, 0.6, linewidth=2, 
+                       edgecolor=metric['color'], facecolor='white', alpha=0.9)
+        ax6.add_patch(rect)
+        
+        # 添加文本
+        ax6.text(x+0.1, y+0.15, metric['name'], ha='center', va='center', 
+                fontsize=12, fontweight='bold')
+        ax6.text(x+0.1, y, metric['value'], ha='center', va='center', 
+                fontsize=16, fontweight='bold', color=metric['color'])
+        ax6.text(x+0.1, y-0.15, metric['change'], ha='center', va='center', 
+                fontsize=10, color=metric['color'])
+    
+    ax6.set_xlim(-0.05, 1.05)
+    ax6.set_ylim(0, 1)
+    ax6.set_title('关键业务指标', fontsize=16, fontweight='bold', y=0.9)
+    
+    # 调整布局
+    fig.tight_layout()
+    fig.subplots_adjust(top=0.92, hspace=0.3, wspace=0.3)
+
+    # 保存图片
+    fig.savefig(spec['output_path'], dpi=options.get('dpi', DEFAULT_DPI), bbox_inches='tight',
+                facecolor='white', edgecolor='none')
+    return spec['output_path']
+
+
+@renderer('correlation_heatmap')
+def render_correlation_heatmap(spec: Dict[str, Any]) -> str:
+    """
+    相关性热力图（使用独立的 Figure，可在渲染进程或多个线程中执行）
+
+    spec['data']: {'features', 'correlation_matrix'}
+    """
+    features = spec['data']['features']
+    correlation_matrix = spec['data']['correlation_matrix']
+
+    configure_matplotlib()
+    fig = _new_figure((10, 8))
+    ax = fig.subplots()
+    
+    im = ax.imshow(correlation_matrix, cmap='RdYlBu_r', aspect='auto', vmin=-1, vmax=1)
+    
+    # 设置标签
+    ax.set_xticks(range(len(features)))
+    ax.set_yticks(range(len(features)))
+    ax.set_xticklabels(features)
+    ax.set_yticklabels(features)
+    
+    # 添加数值标注
+    for i in range(len(features)):
+        for j in range(len(features)):
+            text = ax.text(j, i, f'{correlation_matrix[i][j]:.2f}',
+                         ha="center", va="center", color="black", fontweight='bold')
+    
+    ax.set_title('业务指标相关性分析', fontsize=16, fontweight='bold', pad=20)
+    
+    # 添加颜色条
+    cbar = fig.colorbar(im, ax=ax, shrink=0.8)
+    cbar.set_label('相关系数', rotation=270, labelpad=20)
+    
+    fig.tight_layout()
+    
+    fig.savefig(spec['output_path'], dpi=spec['options'].get('dpi', DEFAULT_DPI), bbox_inches='tight')
+    return spec['output_path']
+
+
 class EnhancedChartGenerator:
     """增强版图表生成器"""
     
-    def __init__(self):
+    def __init__(self, render_pool: Optional[RenderPool] = None,
+                 render_cache: Optional[ChartRenderCache] = None, use_cache: bool = True):
+        """
+        初始化增强版图表生成器
+        
+        Args:
+            render_pool: 渲染进程池，为空时在当前线程渲染 Matplotlib 图表（不使用 pyplot 全局状态）
+            render_cache: 渲染缓存，默认使用各输出目录下的 .render_cache
+            use_cache: 是否启用渲染缓存
+        """
+        self.render_pool = render_pool
+        self.render_cache = render_cache
+        self.use_cache = use_cache
         self.chart_configs = {
             'style': 'modern',
             'color_palette': ['#3498db', '#e74c3c', '#2ecc71', '#f39c12', '#9b59b6', '#1abc9c'],
             'figure_size': (12, 8),
-            'dpi': 300
+            'dpi': 300,
+            # 时间序列超过该点数时降采样，数值标注不超过 max_annotations 个
+            'max_points': DEFAULT_POINT_BUDGET,
+            'max_annotations': DEFAULT_MAX_ANNOTATIONS
         }
         self.generated_charts = []
         
+    def _render(self, spec: Dict[str, Any]) -> str:
+        """渲染单个图表规格（规格未变时复用缓存；有渲染进程池时在池中渲染）"""
+        cache = self.render_cache
+        if cache is None and self.use_cache:
+            cache = get_render_cache(os.path.join(os.path.dirname(spec['output_path']), CACHE_DIRNAME))
+        return cached_render(spec, self._render_uncached, cache if self.use_cache else None)
+    
+    def _render_uncached(self, spec: Dict[str, Any]) -> str:
+        if self.render_pool is not None:
+            return self.render_pool.render(spec)
+        return render_spec(spec)
+    
+    def _downsample(self, x: List[Any], y: List[float]) -> Dict[str, Any]:
+        """按配置的点数预算降采样一条序列（x/y 转为列表，便于写入图表）"""
+        series = downsample_series(x, y, self.chart_configs['max_points'], self.chart_configs['max_annotations'])
+        series['x'] = series['x'].tolist()
+        series['y'] = series['y'].tolist()
+        return series
+    
+    def _render_options(self) -> Dict[str, Any]:
+        """传给渲染器的样式选项"""
+        return {
+            'color_palette': list(self.chart_configs['color_palette']),
+            'dpi': self.chart_configs['dpi']
+        }
+        
     def create_advanced_dashboard(self, data: Dict[str, Any], output_dir: str = "output/charts") -> Dict[str, Any]:
         """创建高级仪表板"""
         dashboard_result = {
@@ -79,17 +313,22 @@ class EnhancedChartGenerator:
         # 1. GMV趋势分析（左上）
         gmv_data = data.get('gmv_trend', {})
         if gmv_data:
+            gmv_series = self._downsample(list(gmv_data.keys()), list(gmv_data.values()))
             fig.add_trace(
                 go.Scatter(
-                    x=list(gmv_data.keys()),
-                    y=list(gmv_data.values()),
-                    mode='lines+markers',
+                    x=gmv_series['x'],
+                    y=gmv_series['y'],
+                    mode='lines+markers' if len(gmv_series['x']) <= MARKER_MAX_POINTS else 'lines',
                     name='GMV趋势',
                     line=dict(color='#3498db', width=3),
                     marker=dict(size=8)
                 ),
                 row=1, col=1
             )
+            # 只标注关键点（最新值、最高/最低点等）
+            for i in gmv_series['annotations']:
+                fig.add_annotation(x=gmv_series['x'][i], y=gmv_series['y'][i], text=f"{gmv_series['y'][i]:,.0f}",
+                                   showarrow=True, arrowhead=2, row=1, col=1)
         
         # 2. DAU变化图（右上）
         dau_data = data.get('dau_trend', {})
@@ -160,15 +399,15 @@ class EnhancedChartGenerator:
         forecast_data = data.get('forecast', {})
         if forecast_data:
             dates = list(forecast_data.keys())
-            actual = [forecast_data[d].get('actual', 0) for d in dates]
-            predicted = [forecast_data[d].get('predicted', 0) for d in dates]
+            actual = self._downsample(dates, [forecast_data[d].get('actual', 0) for d in dates])
+            predicted = self._downsample(dates, [forecast_data[d].get('predicted', 0) for d in dates])
             
             fig.add_trace(
-                go.Scatter(x=dates, y=actual, mode='lines', name='实际值', line=dict(color='#3498db')),
+                go.Scatter(x=actual['x'], y=actual['y'], mode='lines', name='实际值', line=dict(color='#3498db')),
                 row=3, col=2
             )
             fig.add_trace(
-                go.Scatter(x=dates, y=predicted, mode='lines', name='预测值', 
+                go.Scatter(x=predicted['x'], y=predicted['y'], mode='lines', name='预测值', 
                           line=dict(color='#e74c3c', dash='dash')),
                 row=3, col=2
             )
@@ -201,134 +440,19 @@ class EnhancedChartGenerator:
     
     def _create_matplotlib_dashboard(self, data: Dict[str, Any], output_dir: str) -> Dict[str, Any]:
         """创建Matplotlib高级仪表板"""
-        # 设置样式
-        plt.style.use('seaborn-v0_8' if 'seaborn-v0_8' in plt.style.available else 'default')
-        
-        # 创建图形
-        fig = plt.figure(figsize=(16, 12))
-        fig.suptitle('业务分析综合仪表板', fontsize=24, fontweight='bold', y=0.95)
-        
-        # 1. GMV趋势分析 (2x3网格的左上)
-        ax1 = plt.subplot(3, 3, (1, 2))
-        gmv_data = data.get('gmv_trend', {'2024-01': 800000, '2024-02': 850000, '2024-03': 820000, '2024-04': 880000})
-        dates = list(gmv_data.keys())
-        values = list(gmv_data.values())
-        
-        ax1.plot(dates, values, marker='o', linewidth=3, markersize=8, color=self.chart_configs['color_palette'][0])
-        ax1.set_title('GMV趋势分析', fontsize=16, fontweight='bold')
-        ax1.grid(True, alpha=0.3)
-        ax1.tick_params(axis='x', rotation=45)
-        
-        # 添加趋势线
-        if len(values) > 1:
-            z = np.polyfit(range(len(values)), values, 1)
-            p = np.poly1d(z)
-            ax1.plot(dates, p(range(len(values))), "--", alpha=0.8, color=self.chart_configs['color_palette'][1])
-        
-        # 2. DAU分布 (右上)
-        ax2 = plt.subplot(3, 3, 3)
-        dau_data = data.get('dau_trend', {'北京': 1200, '上海': 1100, '广州': 950, '深圳': 1050})
-        
-        ax2.bar(dau_data.keys(), dau_data.values(), color=self.chart_configs['color_palette'][2], alpha=0.8)
-        ax2.set_title('DAU区域分布', fontsize=16, fontweight='bold')
-        ax2.tick_params(axis='x', rotation=45)
-        
-        # 3. 品类分析饼图 (中左)
-        ax3 = plt.subplot(3, 3, 4)
-        category_data = data.get('category_analysis', {'电子产品': 35, '服装': 25, '家居': 20, '其他': 20})
-        
-        wedges, texts, autotexts = ax3.pie(
-            category_data.values(), 
-            labels=category_data.keys(),
-            autopct='%1.1f%%',
-            colors=self.chart_configs['color_palette'][:len(category_data)],
-            explode=[0.05 if max(category_data.values()) == v else 0 for v in category_data.values()]
-        )
-        ax3.set_title('品类分析', fontsize=16, fontweight='bold')
-        
-        # 4. 热力图 (中中)
-        ax4 = plt.subplot(3, 3, 5)
-        
-        # 创建模拟热力图数据
-        heatmap_data = [
-            [0.8, 0.9, 0.7, 0.6],
-            [0.9, 0.8, 0.8, 0.7],
-            [0.7, 0.8, 0.9, 0.8],
-            [0.6, 0.7, 0.8, 0.9]
-        ]
-        
-        im = ax4.imshow(heatmap_data, cmap='YlOrRd', aspect='auto')
-        ax4.set_title('区域-品类热力图', fontsize=16, fontweight='bold')
-        ax4.set_xticks(range(4))
-        ax4.set_yticks(range(4))
-        ax4.set_xticklabels(['电子', '服装', '家居', '其他'])
-        ax4.set_yticklabels(['北京', '上海', '广州', '深圳'])
-        
-        # 添加数值标注
-        for i in range(4):
-            for j in range(4):
-                ax4.text(j, i, f'{heatmap_data[i][j]:.1f}', ha="center", va="center", color="black")
-        
-        # 5. 预测分析 (中右)
-        ax5 = plt.subplot(3, 3, 6)
-        
-        forecast_dates = ['今天', '明天', '后天', '第4天', '第5天']
-        actual_values = [880000, 870000, 890000, None, None]
-        predicted_values = [880000, 870000, 890000, 895000, 902000]
-        
-        ax5.plot(forecast_dates[:3], actual_values[:3], marker='o', label='实际值', 
-                linewidth=2, color=self.chart_configs['color_palette'][0])
-        ax5.plot(forecast_dates, predicted_values, marker='s', label='预测值', 
-                linewidth=2, linestyle='--', color=self.chart_configs['color_palette'][1])
-        
-        ax5.set_title('GMV预测分析', fontsize=16, fontweight='bold')
-        ax5.legend()
-        ax5.grid(True, alpha=0.3)
-        ax5.tick_params(axis='x', rotation=45)
-        
-        # 6. 关键指标仪表 (下排)
-        ax6 = plt.subplot(3, 3, (7, 9))
-        
-        # 创建关键指标卡片
-        metrics = [
-            {'name': '总GMV', 'value': '850万', 'change': '+12.5%', 'color': '#2ecc71'},
-            {'name': '总DAU', 'value': '4,300', 'change': '+8.3%', 'color': '#3498db'},
-            {'name': '转化率', 'value': '3.2%', 'change': '+0.5pp', 'color': '#f39c12'},
-            {'name': '客单价', 'value': '1,977', 'change': '+15.2%', 'color': '#9b59b6'}
-        ]
-        
-        ax6.axis('off')
-        
-        for i, metric in enumerate(metrics):
-            x = i * 0.25
-            y = 0.5
-            
-            # 创建指标卡片
-            rect = Rectangle((x, y-0.3), 0.2, 0.6, linewidth=2, 
-                           edgecolor=metric['color'], facecolor='white', alpha=0.9)
-            ax6.add_patch(rect)
-            
-            # 添加文本
-            ax6.text(x+0.1, y+0.15, metric['name'], ha='center', va='center', 
-                    fontsize=12, fontweight='bold')
-            ax6.text(x+0.1, y, metric['value'], ha='center', va='center', 
-                    fontsize=16, fontweight='bold', color=metric['color'])
-            ax6.text(x+0.1, y-0.15, metric['change'], ha='center', va='center', 
-                    fontsize=10, color=metric['color'])
-        
-        ax6.set_xlim(-0.05, 1.05)
-        ax6.set_ylim(0, 1)
-        ax6.set_title('关键业务指标', fontsize=16, fontweight='bold', y=0.9)
-        
-        # 调整布局
-        plt.tight_layout()
-        plt.subplots_adjust(top=0.92, hspace=0.3, wspace=0.3)
-        
-        # 保存图片
-        dashboard_file = os.path.join(output_dir, f"advanced_dashboard_{datetime.now().strftime('%Y%m%d_%H%M%S')}.png")
-        plt.savefig(dashboard_file, dpi=self.chart_configs['dpi'], bbox_inches='tight', 
-                   facecolor='white', edgecolor='none')
-        plt.close()
+        dashboard_file = self._render(chart_spec(
+            'advanced_dashboard',
+            os.path.join(output_dir, f"advanced_dashboard_{datetime.now().strftime('%Y%m%d_%H%M%S')}.png"),
+            {
+                'gmv_trend': downsample_mapping(
+                    dict(data.get('gmv_trend', {'2024-01': 800000, '2024-02': 850000, '2024-03': 820000, '2024-04': 880000})),
+                    self.chart_configs['max_points']
+                ),
+                'dau_trend': dict(data.get('dau_trend', {'北京': 1200, '上海': 1100, '广州': 950, '深圳': 1050})),
+                'category_analysis': dict(data.get('category_analysis', {'电子产品': 35, '服装': 25, '家居': 20, '其他': 20}))
+            },
+            **self._render_options()
+        ))
         
         return {
             'charts_created': ['advanced_dashboard'],
@@ -554,33 +678,12 @@ class EnhancedChartGenerator:
             [0.73, 0.68, 0.51, 0.28, 1.00]
         ]
         
-        fig, ax = plt.subplots(figsize=(10, 8))
-        
-        im = ax.imshow(correlation_matrix, cmap='RdYlBu_r', aspect='auto', vmin=-1, vmax=1)
-        
-        # 设置标签
-        ax.set_xticks(range(len(features)))
-        ax.set_yticks(range(len(features)))
-        ax.set_xticklabels(features)
-        ax.set_yticklabels(features)
-        
-        # 添加数值标注
-        for i in range(len(features)):
-            for j in range(len(features)):
-                text = ax.text(j, i, f'{correlation_matrix[i][j]:.2f}',
-                             ha="center", va="center", color="black", fontweight='bold')
-        
-        ax.set_title('业务指标相关性分析', fontsize=16, fontweight='bold', pad=20)
-        
-        # 添加颜色条
-        cbar = plt.colorbar(im, ax=ax, shrink=0.8)
-        cbar.set_label('相关系数', rotation=270, labelpad=20)
-        
-        plt.tight_layout()
-        
-        filename = os.path.join(output_dir, f"correlation_heatmap_{datetime.now().strftime('%Y%m%d_%H%M%S')}.png")
-        plt.savefig(filename, dpi=300, bbox_inches='tight')
-        plt.close()
+        filename = self._render(chart_spec(
+            'correlation_heatmap',
+            os.path.join(output_dir, f"correlation_heatmap_{datetime.now().strftime('%Y%m%d_%H%M%S')}.png"),
+            {'features': features, 'correlation_matrix': correlation_matrix},
+            dpi=300
+        ))
         
         return {
             'files': [filename],
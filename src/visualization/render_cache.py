@@ -0,0 +1,344 @@
+#!/usr/bin/env python3
+"""
+图表渲染缓存
+以图表规格（类型 + 选项 + 数据）的哈希为键保存渲染结果；规格不变时直接把缓存文件
+硬链接（不支持时复制）到请求的输出路径，跳过渲染。每个缓存项记录引用它的输出文件，
+仍被引用的缓存项与输出文件共享磁盘空间，淘汰时只按最近使用时间（LRU）清理无引用的缓存项。
+每个缓存项的元数据单独保存为 <键>.json 并在使用时从磁盘读取，多个进程共享同一缓存目录时
+互不覆盖对方的缓存项
+"""
+
+import os
+import json
+import shutil
+import hashlib
+import tempfile
+import threading
+from datetime import datetime
+from typing import Dict, List, Any, Optional, Callable
+
+META_SUFFIX = '.json'
+# 旧版本的单一索引文件，打开缓存目录时拆分为逐项元数据
+LEGACY_INDEX_FILE = 'index.json'
+# 没有元数据的缓存文件（写入中途进程退出）超过该时长后在淘汰时删除
+ORPHAN_GRACE_SECONDS = 60 * 60
+# 缓存目录名（位于图表输出目录下）
+CACHE_DIRNAME = '.render_cache'
+# 渲染器输出格式变化时递增，使旧缓存失效
+RENDER_CACHE_VERSION = 2
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+
+def spec_key(spec: Dict[str, Any]) -> str:
+    """
+    图表规格的内容哈希（不含输出路径，只保留其扩展名）
+
+    Args:
+        spec: 图表规格
+
+    Returns:
+        sha256 十六进制串
+    """
+    payload = {
+        'version': RENDER_CACHE_VERSION,
+        'kind': spec['kind'],
+        'format': os.path.splitext(spec['output_path'])[1].lower(),
+        'options': spec.get('options', {}),
+        'data': spec.get('data', {})
+    }
+    encoded = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str, separators=(',', ':'))
+    return hashlib.sha256(encoded.encode('utf-8')).hexdigest()
+
+
+def _place(source: str, target: str) -> None:
+    """把缓存文件放到输出路径：优先硬链接，跨文件系统等情况下复制"""
+    if os.path.exists(target):
+        if os.path.samefile(source, target):
+            return
+        os.remove(target)
+    os.makedirs(os.path.dirname(os.path.abspath(target)), exist_ok=True)
+    try:
+        os.link(source, target)
+    except OSError:
+        shutil.copy2(source, target)
+
+
+class ChartRenderCache:
+    """内容寻址的图表渲染缓存"""
+
+    def __init__(self, cache_dir: str, max_bytes: Optional[int] = DEFAULT_MAX_BYTES):
+        """
+        初始化渲染缓存
+
+        Args:
+            cache_dir: 缓存目录（缓存文件与逐项元数据）
+            max_bytes: 缓存总大小上限，写入新缓存项后超出时按 LRU 淘汰无引用的缓存项；为空时不限制
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'evicted': 0}
+        self._migrate_index()
+
+    def _migrate_index(self) -> None:
+        """把旧版本的 index.json 拆分为逐项元数据"""
+        path = os.path.join(self.cache_dir, LEGACY_INDEX_FILE)
+        if not os.path.exists(path):
+            return
+        try:
+            with open(path, encoding='utf-8') as f:
+                entries = json.load(f)
+        except (OSError, ValueError):
+            entries = {}
+        with self._lock:
+            for key, entry in entries.items():
+                if not os.path.exists(self._meta_path(key)):
+                    self._write(key, entry)
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def _meta_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key + META_SUFFIX)
+
+    def _blob(self, entry: Dict[str, Any]) -> str:
+        return os.path.join(self.cache_dir, entry['file'])
+
+    def _read(self, key: str) -> Optional[Dict[str, Any]]:
+        """读取缓存项元数据；元数据或缓存文件不存在时为 None"""
+        try:
+            with open(self._meta_path(key), encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if not os.path.exists(self._blob(entry)):
+            return None
+        return entry
+
+    def _write(self, key: str, entry: Dict[str, Any]) -> None:
+        """原子替换缓存项元数据"""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(prefix='.tmp-', dir=self.cache_dir)
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(entry, f, ensure_ascii=False)
+            os.replace(temp_path, self._meta_path(key))
+        except Exception:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+    def _remove(self, key: str, entry: Optional[Dict[str, Any]]) -> None:
+        for path in ([self._blob(entry)] if entry else []) + [self._meta_path(key)]:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def _entries(self) -> Dict[str, Dict[str, Any]]:
+        """磁盘上全部有效的缓存项（包括其他进程写入的）"""
+        if not os.path.isdir(self.cache_dir):
+            return {}
+        entries = {}
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(META_SUFFIX) and not name.startswith('.'):
+                key = name[:-len(META_SUFFIX)]
+                entry = self._read(key)
+                if entry is not None:
+                    entries[key] = entry
+        return entries
+
+    def fetch(self, spec: Dict[str, Any]) -> Optional[str]:
+        """
+        查找规格对应的缓存，命中时放到规格的输出路径
+
+        Args:
+            spec: 图表规格
+
+        Returns:
+            输出路径；未命中时为 None（并删除输出路径上的旧文件）
+        """
+        key = spec_key(spec)
+        output_path = os.path.abspath(spec['output_path'])
+        with self._lock:
+            entry = self._read(key)
+            if entry is None:
+                self.stats['misses'] += 1
+                # 输出路径可能是其他缓存项的硬链接，先解除链接，避免渲染时覆盖缓存文件
+                if os.path.exists(output_path):
+                    os.remove(output_path)
+                return None
+            _place(self._blob(entry), output_path)
+            # 硬链接共享 mtime：刷新后按修改时间清理输出文件时不会误删刚复用的图表
+            os.utime(self._blob(entry))
+            entry['last_used'] = datetime.now().timestamp()
+            entry['hits'] += 1
+            if output_path not in entry['refs']:
+                entry['refs'].append(output_path)
+            self.stats['hits'] += 1
+            self._write(key, entry)
+        return spec['output_path']
+
+    def store(self, spec: Dict[str, Any], output_path: str) -> None:
+        """
+        把刚渲染的输出文件加入缓存
+
+        Args:
+            spec: 图表规格
+            output_path: 渲染结果文件
+        """
+        if not os.path.exists(output_path):
+            return
+        key = spec_key(spec)
+        entry = {
+            'file': key + os.path.splitext(output_path)[1].lower(),
+            'kind': spec['kind'],
+            'size': os.path.getsize(output_path),
+            'created_at': datetime.now().timestamp(),
+            'last_used': datetime.now().timestamp(),
+            'hits': 0,
+            'refs': [os.path.abspath(output_path)]
+        }
+        with self._lock:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            _place(output_path, self._blob(entry))
+            self._write(key, entry)
+            if self.max_bytes is not None:
+                entries = self._entries()
+                if sum(item['size'] for item in entries.values()) > self.max_bytes:
+                    self._evict(entries, self.max_bytes, None)
+
+    def release(self, output_path: str) -> None:
+        """输出文件被删除后解除其对缓存项的引用"""
+        output_path = os.path.abspath(output_path)
+        with self._lock:
+            for key, entry in self._entries().items():
+                if output_path in entry['refs']:
+                    entry['refs'].remove(output_path)
+                    self._write(key, entry)
+
+    def refcount(self, spec: Dict[str, Any]) -> int:
+        """规格对应缓存项的有效引用数（仍存在的输出文件）"""
+        with self._lock:
+            entry = self._read(spec_key(spec))
+            if entry is None:
+                return 0
+            self._prune_refs(entry)
+            return len(entry['refs'])
+
+    def _prune_refs(self, entry: Dict[str, Any]) -> None:
+        """去掉已删除或已被其他内容覆盖的输出文件引用"""
+        blob = self._blob(entry)
+        live = []
+        for path in entry['refs']:
+            try:
+                if os.path.exists(path) and (os.path.samefile(path, blob)
+                                             or os.path.getsize(path) == entry['size']):
+                    live.append(path)
+            except OSError:
+                continue
+        entry['refs'] = live
+
+    def _sweep_orphans(self, entries: Dict[str, Dict[str, Any]]) -> None:
+        """删除没有元数据的缓存文件与缺少缓存文件的元数据（写入中途退出的残留）"""
+        cutoff = datetime.now().timestamp() - ORPHAN_GRACE_SECONDS
+        known = {entry['file'] for entry in entries.values()}
+        for name in os.listdir(self.cache_dir):
+            path = os.path.join(self.cache_dir, name)
+            if name in known or (name.endswith(META_SUFFIX) and name[:-len(META_SUFFIX)] in entries):
+                continue
+            try:
+                if os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+            except OSError:
+                continue
+
+    def _evict(self, entries: Dict[str, Dict[str, Any]], max_bytes: Optional[int],
+               max_age_days: Optional[float]) -> List[str]:
+        """按 LRU 淘汰无引用的缓存项（调用方持有锁）"""
+        cutoff = None
+        if max_age_days is not None:
+            cutoff = datetime.now().timestamp() - max_age_days * 24 * 60 * 60
+        for entry in entries.values():
+            self._prune_refs(entry)
+
+        total = sum(entry['size'] for entry in entries.values())
+        evicted = []
+        for key, entry in sorted(entries.items(), key=lambda item: item[1]['last_used']):
+            if entry['refs']:
+                continue
+            expired = cutoff is not None and entry['last_used'] < cutoff
+            oversized = max_bytes is not None and total > max_bytes
+            if not expired and not oversized:
+                continue
+            self._remove(key, entry)
+            total -= entry['size']
+            evicted.append(key)
+        self.stats['evicted'] += len(evicted)
+        return evicted
+
+    def evict(self, max_bytes: Optional[int] = None, max_age_days: Optional[float] = None) -> List[str]:
+        """
+        淘汰缓存项：无引用且超过 max_age_days 未使用的缓存项，以及总大小超过 max_bytes 时
+        最久未使用的无引用缓存项；同时清理写入中途退出留下的残留文件
+
+        Args:
+            max_bytes: 缓存总大小上限，默认使用初始化时的上限
+            max_age_days: 未使用天数上限
+
+        Returns:
+            被淘汰的缓存键
+        """
+        with self._lock:
+            entries = self._entries()
+            if os.path.isdir(self.cache_dir):
+                self._sweep_orphans(entries)
+            return self._evict(entries, self.max_bytes if max_bytes is None else max_bytes, max_age_days)
+
+    def info(self) -> Dict[str, Any]:
+        """缓存概况"""
+        with self._lock:
+            entries = self._entries()
+            return {
+                'entries': len(entries),
+                'total_bytes': sum(entry['size'] for entry in entries.values()),
+                'max_bytes': self.max_bytes,
+                **self.stats
+            }
+
+
+def cached_render(spec: Dict[str, Any], render: Callable[[Dict[str, Any]], str],
+                  cache: Optional[ChartRenderCache]) -> str:
+    """
+    有缓存时先查缓存，未命中再渲染并写入缓存
+
+    Args:
+        spec: 图表规格
+        render: 渲染函数（返回输出路径）
+        cache: 渲染缓存，为空时直接渲染
+
+    Returns:
+        输出路径
+    """
+    if cache is None:
+        return render(spec)
+    cached = cache.fetch(spec)
+    if cached is not None:
+        return cached
+    output_path = render(spec)
+    cache.store(spec, output_path)
+    return output_path
+
+
+_caches: Dict[str, ChartRenderCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_render_cache(cache_dir: str) -> ChartRenderCache:
+    """进程内按目录共享的渲染缓存"""
+    cache_dir = os.path.abspath(cache_dir)
+    with _caches_lock:
+        if cache_dir not in _caches:
+            _caches[cache_dir] = ChartRenderCache(cache_dir)
+        return _caches[cache_dir]
@@ -0,0 +1,321 @@
+#!/usr/bin/env python3
+"""
+图表渲染进程池
+matplotlib/seaborn 的绘图在常驻的渲染进程中完成（进程启动时预先导入绘图库），
+请求进程只提交可序列化的图表规格（kind + 数据 + 选项 + 输出路径），不触碰 pyplot 全局状态；
+每个任务有超时（超时即终止该进程并补充新进程），进程在完成一定数量的任务或内存峰值超限后回收，
+以约束绘图库的内存泄漏
+"""
+
+import os
+import sys
+import queue
+import atexit
+import asyncio
+import importlib
+import threading
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import Dict, List, Any, Optional, Callable
+
+try:
+    import resource
+    RESOURCE_AVAILABLE = True
+except ImportError:
+    RESOURCE_AVAILABLE = False
+
+DEFAULT_TIMEOUT = 60.0
+DEFAULT_MAX_JOBS_PER_WORKER = 50
+DEFAULT_MAX_MEMORY_MB = 1024
+# 渲染进程启动（导入绘图库）的超时，不计入任务超时
+STARTUP_TIMEOUT = 120.0
+# 渲染进程启动时导入的渲染器模块（相对本包）
+DEFAULT_RENDERER_MODULES = ['chart_generator', 'enhanced_chart_generator']
+
+RENDERERS: Dict[str, Callable[[Dict[str, Any]], Any]] = {}
+
+
+def renderer(kind: str) -> Callable:
+    """注册渲染函数的装饰器：渲染函数接收图表规格，返回输出文件路径"""
+    def register(func: Callable) -> Callable:
+        RENDERERS[kind] = func
+        return func
+    return register
+
+
+def chart_spec(kind: str, output_path: str, data: Dict[str, Any], **options) -> Dict[str, Any]:
+    """
+    构造图表规格
+
+    Args:
+        kind: 渲染器名称
+        output_path: 输出文件路径
+        data: 绘图数据（列表、数值、字符串组成的字典）
+        **options: 标题、格式等选项
+
+    Returns:
+        {'kind', 'output_path', 'data', 'options'}
+    """
+    return {'kind': kind, 'output_path': output_path, 'data': data, 'options': options}
+
+
+def render_spec(spec: Dict[str, Any]) -> Any:
+    """在当前进程中按规格渲染"""
+    if spec['kind'] not in RENDERERS:
+        raise KeyError(f"未注册的图表类型: {spec['kind']}")
+    return RENDERERS[spec['kind']](spec)
+
+
+def _renderer_modules(extra: Optional[List[str]] = None) -> List[str]:
+    package = __name__.rpartition('.')[0]
+    modules = [f'{package}.{name}' if package else name for name in DEFAULT_RENDERER_MODULES]
+    return modules + list(extra or [])
+
+
+def _peak_memory_mb() -> Optional[float]:
+    """本进程的内存峰值（MB）"""
+    if not RESOURCE_AVAILABLE:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss 在 macOS 上以字节计，在 Linux 上以 KB 计
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def _worker_main(conn: Any, modules: List[str]) -> None:
+    """渲染进程主循环：预先导入绘图库与渲染器，逐个接收规格并回传结果"""
+    try:
+        import matplotlib
+        matplotlib.use('Agg')
+        import matplotlib.pyplot  # noqa: F401
+    except ImportError:
+        pass
+    for module in modules:
+        importlib.import_module(module)
+    conn.send({'ready': True, 'pid': os.getpid()})
+
+    while True:
+        try:
+            spec = conn.recv()
+        except EOFError:
+            break
+        if spec is None:
+            break
+        try:
+            reply = {'ok': True, 'result': render_spec(spec)}
+        except Exception as e:
+            reply = {'ok': False, 'error': f'{type(e).__name__}: {e}'}
+        reply['peak_memory_mb'] = _peak_memory_mb()
+        conn.send(reply)
+    conn.close()
+
+
+class _Worker:
+    """一个渲染进程及其管道"""
+
+    def __init__(self, context: Any, modules: List[str]):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(target=_worker_main, args=(child_conn, modules), daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.jobs = 0
+        # 等待进程完成预导入
+        try:
+            ready = self.conn.poll(STARTUP_TIMEOUT) and self.conn.recv().get('ready')
+        except (EOFError, OSError):
+            ready = False
+        if not ready:
+            self.kill()
+            self.conn.close()
+            raise RuntimeError("渲染进程启动失败")
+
+    @property
+    def pid(self) -> int:
+        return self.process.pid
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """通知退出，超时未退出则终止"""
+        try:
+            self.conn.send(None)
+        except (OSError, ValueError):
+            pass
+        self.process.join(timeout)
+        if self.process.is_alive():
+            self.kill()
+        self.conn.close()
+
+    def kill(self) -> None:
+        self.process.kill()
+        self.process.join()
+
+
+class RenderPool:
+    """常驻渲染进程池"""
+
+    def __init__(self, max_workers: Optional[int] = None, timeout: float = DEFAULT_TIMEOUT,
+                 max_jobs_per_worker: int = DEFAULT_MAX_JOBS_PER_WORKER,
+                 max_memory_mb: Optional[float] = DEFAULT_MAX_MEMORY_MB,
+                 renderer_modules: Optional[List[str]] = None, start_method: str = 'spawn'):
+        """
+        初始化渲染进程池（进程在首次使用时启动，之后常驻）
+
+        Args:
+            max_workers: 渲染进程数，默认 min(4, CPU核数)
+            timeout: 单个任务的超时（秒），超时的进程被终止并替换
+            max_jobs_per_worker: 每个进程完成该数量的任务后回收
+            max_memory_mb: 进程内存峰值超过该值后回收，为空时不按内存回收
+            renderer_modules: 渲染进程额外导入的渲染器模块
+            start_method: 进程启动方式；默认 spawn，避免在多线程的服务进程中 fork
+        """
+        self.max_workers = max_workers or min(4, os.cpu_count() or 1)
+        self.timeout = timeout
+        self.max_jobs_per_worker = max_jobs_per_worker
+        self.max_memory_mb = max_memory_mb
+        self.modules = _renderer_modules(renderer_modules)
+        self._context = multiprocessing.get_context(start_method)
+        self._idle = queue.LifoQueue()
+        self._workers = set()
+        self._lock = threading.Lock()
+        self._executor = None
+        self._closed = False
+        self.stats = {'jobs': 0, 'timeouts': 0, 'errors': 0, 'recycled': 0}
+
+    def _start(self) -> None:
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("渲染进程池已关闭")
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                    thread_name_prefix='chart-render')
+                for _ in range(self.max_workers):
+                    self._idle.put(None)  # 占位，取出时再启动进程
+
+    def _checkout(self) -> _Worker:
+        worker = self._idle.get()
+        if worker is None or not worker.process.is_alive():
+            try:
+                worker = _Worker(self._context, self.modules)
+            except Exception:
+                self._idle.put(None)
+                raise
+            with self._lock:
+                self._workers.add(worker)
+        return worker
+
+    def _retire(self, worker: _Worker, kill: bool = False) -> None:
+        with self._lock:
+            self._workers.discard(worker)
+        if kill:
+            worker.kill()
+            worker.conn.close()
+        else:
+            worker.stop()
+        self._idle.put(None)
+
+    def _count(self, key: str) -> None:
+        with self._lock:
+            self.stats[key] += 1
+
+    def _run(self, spec: Dict[str, Any]) -> Any:
+        """在一个渲染进程中执行任务（由调度线程调用）"""
+        worker = self._checkout()
+        try:
+            worker.conn.send(spec)
+            finished = worker.conn.poll(self.timeout)
+            reply = worker.conn.recv() if finished else None
+        except (EOFError, OSError) as e:
+            self._retire(worker, kill=True)
+            raise RuntimeError(f"渲染进程异常退出: {e}")
+        if not finished:
+            self._count('timeouts')
+            self._retire(worker, kill=True)
+            raise TimeoutError(f"图表渲染超时（{self.timeout}s）: {spec.get('kind')}")
+
+        worker.jobs += 1
+        self._count('jobs')
+        memory = reply.get('peak_memory_mb')
+        if worker.jobs >= self.max_jobs_per_worker or (
+                self.max_memory_mb is not None and memory is not None and memory > self.max_memory_mb):
+            self._count('recycled')
+            self._retire(worker)
+        else:
+            self._idle.put(worker)
+
+        if not reply['ok']:
+            self._count('errors')
+            raise RuntimeError(reply['error'])
+        return reply['result']
+
+    def submit(self, spec: Dict[str, Any]) -> Future:
+        """
+        提交渲染任务
+
+        Args:
+            spec: 图表规格（见 chart_spec）
+
+        Returns:
+            Future，结果为渲染器的返回值（输出路径）；超时抛出 TimeoutError，渲染失败抛出 RuntimeError
+        """
+        self._start()
+        return self._executor.submit(self._run, spec)
+
+    def render(self, spec: Dict[str, Any]) -> Any:
+        """同步渲染一个图表"""
+        return self.submit(spec).result()
+
+    async def render_async(self, spec: Dict[str, Any]) -> Any:
+        """在事件循环中等待渲染结果，不阻塞其他请求"""
+        return await asyncio.wrap_future(self.submit(spec))
+
+    def render_many(self, specs: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        并发渲染多个图表
+
+        Args:
+            specs: {名称: 图表规格}
+
+        Returns:
+            {名称: 输出路径或异常对象}
+        """
+        futures = {name: self.submit(spec) for name, spec in specs.items()}
+        results = {}
+        for name, future in futures.items():
+            try:
+                results[name] = future.result()
+            except Exception as e:
+                results[name] = e
+        return results
+
+    def close(self) -> None:
+        """关闭进程池（等待进行中的任务完成）"""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            executor = self._executor
+        if executor is not None:
+            executor.shutdown(wait=True)
+        with self._lock:
+            workers = list(self._workers)
+            self._workers.clear()
+        for worker in workers:
+            worker.stop()
+
+    def __enter__(self) -> 'RenderPool':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+_default_pool = None
+_default_lock = threading.Lock()
+
+
+def get_render_pool() -> RenderPool:
+    """进程内共享的默认渲染进程池（首次调用时创建，退出时关闭）"""
+    global _default_pool
+    with _default_lock:
+        if _default_pool is None:
+            _default_pool = RenderPool()
+            atexit.register(_default_pool.close)
+        return _default_pool
@@ -11,26 +11,33 @@ from datetime import datetime
 from pathlib import Path
 import logging
 
-from src.config.settings import settings
+from config.settings import settings
 from src.utils.logger import system_logger
 from .chart_generator import ChartGenerator, TextChartGenerator
 from .enhanced_chart_generator import EnhancedChartGenerator
+from .render_pool import RenderPool
+from .render_cache import CACHE_DIRNAME, get_render_cache
 
 class VisualizationManager:
     """可视化管理器"""
 
-    def __init__(self, output_dir: str = None):
+    def __init__(self, output_dir: str = None, render_pool: Optional[RenderPool] = None):
         """
         初始化可视化管理器
 
         Args:
             output_dir: 输出目录，默认使用配置中的目录
+            render_pool: 图表生成器共用的渲染进程池
         """
         self.output_dir = Path(output_dir or settings.CHARTS_DIR)
         self.output_dir.mkdir(parents=True, exist_ok=True)
 
-        self.chart_generator = ChartGenerator(str(self.output_dir))
-        self.enhanced_generator = EnhancedChartGenerator()
+        # 两个图表生成器共用输出目录下的渲染缓存
+        self.render_cache = get_render_cache(str(self.output_dir / CACHE_DIRNAME))
+        self.chart_generator = ChartGenerator(str(self.output_dir), render_pool=render_pool,
+                                              render_cache=self.render_cache)
+        self.enhanced_generator = EnhancedChartGenerator(render_pool=render_pool,
+                                                         render_cache=self.render_cache)
         self.text_generator = TextChartGenerator()
 
         self.generated_charts = []
@@ -421,9 +428,9 @@ class VisualizationManager:
                 # 格式化数值
                 if isinstance(current, (int, float)):
                     if current > 1000000:
-                        formatted_value = ".1f"{current/1000000}M"
+                        formatted_value = f"{current/1000000:.1f}M"
                     elif current > 1000:
-                        formatted_value = ".1f"{current/1000}K"
+                        formatted_value = f"{current/1000:.1f}K"
                     else:
                         formatted_value = str(current)
                 else:
@@ -520,12 +527,16 @@ class VisualizationManager:
 
         return summary
 
-    def cleanup_old_charts(self, days: int = 30):
+    def cleanup_old_charts(self, days: int = 30, max_cache_mb: Optional[float] = None):
         """
-        清理旧的图表文件
+        清理旧的图表文件，并淘汰渲染缓存
+
+        输出文件删除后解除对缓存项的引用；无引用的缓存项超过保留天数未使用即删除，
+        缓存总大小超过上限时再按最近使用时间（LRU）删除无引用的缓存项
 
         Args:
             days: 保留天数
+            max_cache_mb: 渲染缓存大小上限（MB），默认使用缓存自身的上限
         """
         try:
             cutoff_date = datetime.now().timestamp() - (days * 24 * 60 * 60)
@@ -534,8 +545,14 @@ class VisualizationManager:
                 if file_path.is_file():
                     if file_path.stat().st_mtime < cutoff_date:
                         file_path.unlink()
+                        self.render_cache.release(str(file_path))
                         system_logger.info("清理旧图表文件", file_path=str(file_path))
 
+            max_bytes = int(max_cache_mb * 1024 * 1024) if max_cache_mb is not None else None
+            evicted = self.render_cache.evict(max_bytes=max_bytes, max_age_days=days)
+            if evicted:
+                system_logger.info("淘汰图表渲染缓存", evicted=len(evicted))
+
         except Exception as e:
             system_logger.error("清理旧图表文件失败", error=e)
 
@@ -546,7 +563,8 @@ class VisualizationManager:
             'output_directory': str(self.output_dir),
             'available_themes': ['modern', 'classic', 'dark', 'light'],
             'supported_formats': ['html', 'png', 'svg', 'pdf', 'txt'],
-            'charts_by_type': {}
+            'charts_by_type': {},
+            'render_cache': self.render_cache.info()
         }
 
         # 统计图表类型
@@ -0,0 +1,95 @@
+import pytest
+import pandas as pd
+import numpy as np
+from scipy import stats
+from src.analysis.professional_analytics import ProfessionalAnalytics
+from src.analysis.ab_testing import (
+    sufficient_statistics, compare_variants, adjust_p_values, bootstrap_intervals,
+    multi_metric_ab_test, SequentialABTest
+)
+
+@pytest.fixture
+def experiment():
+    """创建带分群的实验明细：B 组 GMV 提升约 10%"""
+    rng = np.random.default_rng(21)
+    n = 30000
+    data = pd.DataFrame({
+        'variant': rng.choice(['control', 'B', 'C'], n),
+        'city': rng.choice(['BJ', 'SH', 'GZ', 'SZ', 'CD'], n)
+    })
+    data['orders'] = rng.poisson(1.2, n)
+    uplift = np.where(data['variant'] == 'B', 1.10, 1.0)
+    data['gmv'] = data['orders'] * rng.gamma(2, 50, n) * uplift
+    data['converted'] = (data['orders'] > 0).astype(int)
+    return data
+
+def test_welch_matches_scipy(experiment):
+    """向量化 Welch t 检验与 scipy 一致（所有分群与指标）"""
+    results = multi_metric_ab_test(experiment, 'variant', ['gmv', 'converted'], control='control',
+                                   segment_col='city', n_boot=0)
+    assert len(results) == 6 * 2 * 2
+    for row in results.sample(8, random_state=0).itertuples():
+        rows = experiment if row.segment == 'overall' else experiment[experiment['city'] == row.segment]
+        treatment = rows.loc[rows['variant'] == row.variant, row.metric]
+        control = rows.loc[rows['variant'] == 'control', row.metric]
+        expected = stats.ttest_ind(treatment, control, equal_var=False)
+        assert row.t_statistic == pytest.approx(expected.statistic)
+        assert row.p_value == pytest.approx(expected.pvalue)
+        assert row.treatment_size == len(treatment)
+
+def test_p_value_corrections():
+    """Holm / BH / Bonferroni 校正与定义一致"""
+    p = np.array([0.01, 0.04, 0.03, np.nan, 0.2])
+    np.testing.assert_allclose(adjust_p_values(p, 'bonferroni'), [0.04, 0.16, 0.12, np.nan, 0.8])
+    np.testing.assert_allclose(adjust_p_values(p, 'holm'), [0.04, 0.09, 0.09, np.nan, 0.2])
+    np.testing.assert_allclose(adjust_p_values(p, 'bh'), [0.04, 0.04 * 4 / 3, 0.04 * 4 / 3 * 1, np.nan, 0.2])
+    with pytest.raises(ValueError):
+        adjust_p_values(p, 'sidak')
+
+def test_ratio_metric_and_bootstrap(experiment):
+    """比率指标的 delta 方法区间与 Bootstrap 区间接近，显著性识别正确"""
+    results = multi_metric_ab_test(experiment, 'variant', ['gmv'], control='control',
+                                   ratio_metrics={'aov': ('gmv', 'orders')}, n_boot=800)
+    overall = results.set_index(['metric', 'variant'])
+    aov = overall.loc[('aov', 'B')]
+    treated = experiment[experiment['variant'] == 'B']
+    assert aov['treatment_mean'] == pytest.approx(treated['gmv'].sum() / treated['orders'].sum())
+    assert aov['bootstrap_ci_lower'] == pytest.approx(aov['ci_lower'], rel=0.25)
+    assert aov['bootstrap_ci_upper'] == pytest.approx(aov['ci_upper'], rel=0.25)
+    assert overall.loc[('gmv', 'B'), 'is_significant']
+    assert not overall.loc[('gmv', 'C'), 'is_significant']
+    assert overall.loc[('gmv', 'B'), 'relative_ci_lower'] > 0
+
+    again = bootstrap_intervals(experiment, 'variant', ['gmv'], 'control', n_boot=800)
+    assert again['bootstrap_ci_lower'].iloc[0] == results['bootstrap_ci_lower'].iloc[0]
+
+def test_sequential_monitoring_accumulates(experiment):
+    """序贯监控逐批累加的结果与一次性计算一致，随时有效 p 值单调不增"""
+    monitor = SequentialABTest('variant', ['gmv', 'converted'], control='control', segment_col='city')
+    previous = None
+    for rows in np.array_split(np.arange(len(experiment)), 5):
+        current = monitor.update(experiment.iloc[rows]).results()
+        if previous is not None:
+            assert (current['always_valid_p_value'].to_numpy() <= previous['always_valid_p_value'].to_numpy()).all()
+        previous = current
+    assert previous['look'].iloc[0] == 5
+
+    full = compare_variants(
+        sufficient_statistics(experiment, 'variant', ['gmv', 'converted'], 'city').sort_index(),
+        ['gmv', 'converted'], 'control', correction='none'
+    )
+    np.testing.assert_allclose(previous['p_value'], full['p_value'])
+    gmv_b = previous[(previous['segment'] == 'overall') & (previous['metric'] == 'gmv') & (previous['variant'] == 'B')]
+    assert gmv_b['is_significant'].iloc[0]
+
+    with pytest.raises(ValueError):
+        compare_variants(sufficient_statistics(experiment, 'variant', ['gmv']), ['gmv'], 'missing')
+
+def test_professional_analytics_wrapper(experiment):
+    """分析入口汇总显著结果并给出建议"""
+    analysis = ProfessionalAnalytics().multi_metric_ab_analysis(
+        experiment, 'variant', ['gmv', 'converted'], control='control', segment_col='city', n_boot=200
+    )
+    assert analysis['summary']['total_tests'] == 24
+    assert analysis['summary']['segments'] == 6
+    assert any('B 组 gmv 整体提升' in text for text in analysis['recommendations'])
@@ -0,0 +1,78 @@
+import pytest
+import pandas as pd
+import numpy as np
+from src.analysis.advanced_analytics_engine import AdvancedAnalyticsEngine
+from src.analysis.anomaly_detection import detect_anomalies, OnlineAnomalyDetector
+
+@pytest.fixture
+def series_data():
+    """创建多门店日度序列，并注入少量突增点"""
+    rng = np.random.default_rng(3)
+    stores = ['S1', 'S2', 'S3', 'S4']
+    dates = pd.date_range('2025-01-01', periods=120, freq='D')
+    data = pd.DataFrame({
+        'store_id': np.repeat(stores, len(dates)),
+        'date': np.tile(dates, len(stores)),
+        'gmv': rng.normal(1000, 50, len(stores) * len(dates))
+    })
+    data.loc[data['store_id'] == 'S2', 'gmv'] += 5000
+    spikes = [60, 200, 300, 450]
+    data.loc[spikes, 'gmv'] += 2000
+    return data.sample(frac=1, random_state=0), spikes
+
+def test_statistical_and_iqr_match_reference():
+    """单序列 3σ / IQR 结果与逐点判定一致"""
+    values = np.array([10.0, 11, 9, 10, 12, 10, 11, 9, 10, 60, 10, -30])
+    engine = AdvancedAnalyticsEngine()
+    data = pd.DataFrame({'gmv': values})
+
+    result = engine.anomaly_detection(data, 'gmv', method='statistical', threshold=2)
+    expected = [i for i, v in enumerate(values) if abs(v - values.mean()) > 2 * values.std()]
+    assert [a['index'] for a in result['anomalies_detected']] == expected
+
+    result = engine.anomaly_detection(data, 'gmv', method='iqr')
+    q1, q3 = np.percentile(values, [25, 75])
+    expected = [i for i, v in enumerate(values) if v < q1 - 1.5 * (q3 - q1) or v > q3 + 1.5 * (q3 - q1)]
+    assert [a['index'] for a in result['anomalies_detected']] == expected
+    assert {a['type'] for a in result['anomalies_detected']} == {'high', 'low'}
+
+def test_grouped_detection_uses_per_series_baseline(series_data):
+    """按门店分组计算基准，能发现被整体分布掩盖的突增点"""
+    data, spikes = series_data
+    engine = AdvancedAnalyticsEngine()
+
+    pooled = engine.anomaly_detection(data, 'gmv', method='iqr')
+    grouped = engine.anomaly_detection(data, 'gmv', method='iqr', group_column='store_id')
+
+    pooled_flagged = {data.index[a['index']] for a in pooled['anomalies_detected']}
+    flagged = {data.index[a['index']] for a in grouped['anomalies_detected']}
+    assert not set(spikes) <= pooled_flagged
+    assert set(spikes) <= flagged
+    assert sum(grouped['anomalies_by_group'].values()) == len(grouped['anomalies_detected'])
+
+@pytest.mark.parametrize('method', ['rolling_mad', 'ewma'])
+def test_rolling_methods_flag_spikes(series_data, method):
+    """滚动基准方法能定位注入的突增点"""
+    data, spikes = series_data
+    result = detect_anomalies(data['gmv'], data['store_id'], data['date'], method=method)
+    flagged = set(data.index[result['mask']])
+    assert set(spikes) <= flagged
+
+@pytest.mark.parametrize('method', ['rolling_mad', 'ewma'])
+def test_online_detector_matches_batch(series_data, method, tmp_path):
+    """分批增量检测（含状态落盘恢复）与一次性检测结果一致"""
+    data, _ = series_data
+    batch = detect_anomalies(data['gmv'], data['store_id'], data['date'], method=method)
+    expected = set(data.index[batch['mask']])
+
+    detector = OnlineAnomalyDetector(method)
+    flagged = set()
+    cutoffs = pd.date_range('2025-01-01', periods=5, freq='30D')
+    for i, start in enumerate(cutoffs[:-1]):
+        chunk = data[(data['date'] >= start) & (data['date'] < cutoffs[i + 1])]
+        flagged |= set(detector.update(chunk, 'gmv', 'store_id', 'date').index)
+        detector.save(tmp_path / 'detector.pkl')
+        detector = OnlineAnomalyDetector.load(tmp_path / 'detector.pkl')
+
+    assert flagged == expected
+    assert detector.points_seen == len(data)
@@ -0,0 +1,67 @@
+import pytest
+import pandas as pd
+import numpy as np
+from src.analysis.metrics_analyzer import MetricsAnalyzer
+from src.analysis.batch_metrics import BatchMetricsAnalyzer, BatchAnalysisResult
+
+@pytest.fixture
+def store_data():
+    """创建多门店测试数据"""
+    rng = np.random.default_rng(7)
+    rows = []
+    for date in ['2025-01-01', '2025-01-08']:
+        for store in ['S1', 'S2', 'S3', 'S4']:
+            for category in ['品类A', '品类B', '品类C']:
+                for region in ['区域1', '区域2']:
+                    rows.append({
+                        'date': date,
+                        'store_id': store,
+                        'category': category,
+                        'region': region,
+                        'gmv': rng.uniform(1000, 5000),
+                        'dau': rng.integers(100, 1000),
+                        'frequency': rng.uniform(1.5, 3.0),
+                        'order_price': rng.uniform(100, 500),
+                        'conversion_rate': rng.uniform(0.01, 0.05)
+                    })
+    data = pd.DataFrame(rows)
+    return data[data['date'] == '2025-01-08'], data[data['date'] == '2025-01-01']
+
+def test_batch_matches_per_store_analyzer(store_data):
+    """批量结果应与逐门店 MetricsAnalyzer 结果一致"""
+    current, previous = store_data
+    result = BatchMetricsAnalyzer(current, previous).analyze()
+
+    assert isinstance(result, BatchAnalysisResult)
+    assert sorted(result.groups) == ['S1', 'S2', 'S3', 'S4']
+
+    for store in result.groups:
+        expected = MetricsAnalyzer(
+            current[current['store_id'] == store], previous[previous['store_id'] == store]
+        ).analyze()
+        actual = result.get_group_analysis(store)
+
+        for metric, value in expected['gmv_metrics'].items():
+            assert actual['gmv_metrics'][metric].change_rate == pytest.approx(value.change_rate)
+            assert actual['gmv_metrics'][metric].contribution == pytest.approx(value.contribution)
+
+        expected_categories = {m.name: m for m in expected['category_metrics']}
+        for m in actual['category_metrics']:
+            assert m.current_share == pytest.approx(expected_categories[m.name].current_share)
+            assert m.contribution == pytest.approx(expected_categories[m.name].contribution)
+
+        assert actual['top_declining_categories'] == expected['top_declining_categories']
+        assert actual['top_declining_regions'] == expected['top_declining_regions']
+        assert actual['improvement_suggestions'] == expected['improvement_suggestions']
+        assert actual['gini']['category_gini'] == pytest.approx(expected['category_gini'])
+        assert actual['gini']['region_gini'] == pytest.approx(expected['region_gini'])
+
+def test_sharded_analysis_matches_single_process(store_data):
+    """多进程分片结果应与单进程结果一致"""
+    current, previous = store_data
+    single = MetricsAnalyzer.analyze_by_group(current, previous)
+    sharded = MetricsAnalyzer.analyze_by_group(current, previous, n_jobs=2)
+
+    pd.testing.assert_frame_equal(single.gmv_metrics.sort_index(), sharded.gmv_metrics.sort_index())
+    assert len(sharded.category_metrics) == len(single.category_metrics)
+    assert sharded.improvement_triggers.sort_index().equals(single.improvement_triggers.sort_index())
@@ -0,0 +1,54 @@
+import pytest
+import numpy as np
+import pandas as pd
+from sklearn.datasets import make_blobs
+from src.analysis.cluster_search import search_cluster_count, evaluate_k, silhouette_sample_index
+from src.analysis.professional_analytics import ProfessionalAnalytics, AnalysisConfig
+
+@pytest.fixture
+def blobs():
+    """创建5个分离良好的簇"""
+    data, _ = make_blobs(n_samples=6000, centers=5, cluster_std=0.6, random_state=7)
+    return data
+
+def test_search_finds_cluster_count_and_stops_early(blobs):
+    """样本轮廓系数选出真实簇数，得分持续下降后提前停止"""
+    result = search_cluster_count(blobs, max_k=12, sample_size=1000, n_jobs=1)
+    assert result['best_k'] == 5
+    assert result['stopped_early']
+    assert [s['k'] for s in result['scores']] == list(range(2, 2 + len(result['scores'])))
+    assert len(result['scores']) < 11
+
+def test_sampled_silhouette_close_to_full(blobs):
+    """固定样本上的轮廓系数与全量轮廓系数接近"""
+    full = evaluate_k(blobs, 5, np.arange(len(blobs)))
+    sampled = evaluate_k(blobs, 5, silhouette_sample_index(len(blobs), 1000))
+    assert sampled['inertia'] == full['inertia']
+    assert sampled['silhouette'] == pytest.approx(full['silhouette'], abs=0.02)
+
+def test_parallel_search_matches_sequential(blobs, monkeypatch):
+    """多进程分批评估的结果与顺序评估一致"""
+    import src.analysis.cluster_search as cluster_search
+    monkeypatch.setattr(cluster_search, 'PARALLEL_MIN_ROWS', 0)
+    sequential = search_cluster_count(blobs, max_k=12, sample_size=1000, n_jobs=1)
+    parallel = search_cluster_count(blobs, max_k=12, sample_size=1000, n_jobs=3)
+    assert parallel == sequential
+
+def test_search_bounds_are_configurable(blobs):
+    """搜索范围与样本量可配置，数据过少时返回默认聚类数"""
+    analytics = ProfessionalAnalytics(AnalysisConfig(cluster_min_k=3, cluster_max_k=4, silhouette_sample_size=500))
+    assert analytics._find_optimal_clusters(blobs) == 4
+    assert [s['k'] for s in analytics.last_cluster_search['scores']] == [3, 4]
+    assert analytics._find_optimal_clusters(blobs[:2]) == 4
+    assert analytics.last_cluster_search['scores'] == []
+
+def test_customer_segmentation_uses_search(blobs, tmp_path):
+    """客户细分使用搜索得到的聚类数并报告搜索明细"""
+    data = pd.DataFrame(blobs * 10 + 100, columns=['revenue', 'frequency'])
+    config = AnalysisConfig(cluster_n_jobs=1, segment_store_dir=str(tmp_path))
+    result = ProfessionalAnalytics(config).advanced_customer_segmentation(
+        data, ['revenue', 'frequency'])
+    assert result['segments']['total_segments'] == 5
+    performance = result['model_performance']
+    assert performance['silhouette_score'] > 0.7
+    assert max(performance['cluster_search'], key=lambda s: s['silhouette'])['k'] == 5
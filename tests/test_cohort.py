@@ -0,0 +1,87 @@
+import pytest
+import pandas as pd
+import numpy as np
+from src.analysis.advanced_analytics_engine import AdvancedAnalyticsEngine
+from src.analysis.cohort import CohortAccumulator, cohort_retention, period_codes, period_labels
+
+@pytest.fixture
+def engine():
+    """创建分析引擎实例"""
+    return AdvancedAnalyticsEngine()
+
+@pytest.fixture
+def orders():
+    """创建跨年的订单数据（用户在首单后随机复购）"""
+    rng = np.random.default_rng(11)
+    n = 20000
+    users = rng.integers(0, 3000, n)
+    first = pd.Timestamp('2023-10-01') + pd.to_timedelta(rng.integers(0, 200, 3000), unit='D')
+    dates = first[users] + pd.to_timedelta(rng.exponential(60, n).astype(int), unit='D')
+    return pd.DataFrame({
+        'user_id': [f'U{u}' for u in users],
+        'date': dates.strftime('%Y-%m-%d'),
+        'gmv': rng.gamma(2, 50, n).round(2)
+    }).sample(frac=1, random_state=2).reset_index(drop=True)
+
+def _reference(orders, freq):
+    """基于 Period 对象的逐行实现，作为对照"""
+    data = orders.copy()
+    data['period'] = pd.to_datetime(data['date']).dt.to_period(freq)
+    data['cohort'] = data.groupby('user_id')['period'].transform('min')
+    data['period_number'] = [(p - c).n for p, c in zip(data['period'], data['cohort'])]
+    table = data.groupby(['cohort', 'period_number']).agg(users=('user_id', 'nunique'), revenue=('gmv', 'sum'))
+    return table.reset_index()
+
+def test_period_codes_roundtrip():
+    """整数编码与 Period 口径一致，周从周一开始"""
+    dates = pd.Series(pd.to_datetime(['2024-01-31', '2024-02-01', '2023-12-31', '2024-01-01', None]))
+    months = period_codes(dates, 'M')
+    assert list(months[1:4] - months[0]) == [1, -1, 0]
+    weeks = period_codes(dates, 'W')
+    assert weeks[2] + 1 == weeks[3]  # 周日与次周一分属两周
+    assert list(period_labels(weeks[2:4], 'W')) == ['2023-12-25', '2024-01-01']
+    assert list(period_labels(months[:2], 'M')) == ['2024-01', '2024-02']
+    assert months[4] < -(1 << 60)
+
+@pytest.mark.parametrize('freq', ['M', 'W', 'D'])
+def test_long_table_matches_reference(orders, freq):
+    """各周期口径的用户数与收入与逐行实现一致"""
+    expected = _reference(orders, freq)
+    actual = cohort_retention(orders, 'user_id', 'date', 'gmv', freq=freq)
+
+    assert len(actual) == len(expected)
+    np.testing.assert_array_equal(actual['period_number'], expected['period_number'])
+    np.testing.assert_array_equal(actual['users'], expected['users'])
+    np.testing.assert_allclose(actual['revenue'], expected['revenue'])
+    assert list(actual['cohort'].unique()) == [str(p.start_time.date()) if freq != 'M' else str(p)
+                                               for p in expected['cohort'].unique()]
+    assert (actual.loc[actual['period_number'] == 0, 'retention_rate'] == 1).all()
+
+def test_chunked_accumulation_matches_single_pass(orders, monkeypatch):
+    """小分块（含跨块重复用户及多次压缩）与一次性计算结果一致"""
+    import src.analysis.cohort as cohort
+    monkeypatch.setattr(cohort, '_COMPACT_ROWS', 1000)
+    single = cohort_retention(orders, 'user_id', 'date', 'gmv')
+
+    accumulator = CohortAccumulator('user_id', 'date', 'gmv')
+    for start in range(0, len(orders), 777):
+        accumulator.update(orders.iloc[start:start + 777])
+    pd.testing.assert_frame_equal(accumulator.result(), single)
+    assert accumulator.rows_seen == len(orders)
+
+def test_engine_cohort_analysis(engine, orders):
+    """引擎返回稀疏长表、宽表与洞察，并支持分块迭代输入"""
+    result = engine.cohort_analysis(orders, 'user_id', 'date', 'gmv')
+    long_table = result['cohort_long']
+
+    assert result['cohort_count'] == long_table['cohort'].nunique()
+    assert result['retention_rates'][0]['2023-10'] == 1.0
+    first = long_table[long_table['period_number'] == 1]['retention_rate'].mean()
+    assert result['cohort_insights'][0] == f"平均首月留存率: {first:.1%}"
+    assert 'revenue_retention' in result
+
+    chunks = (orders.iloc[s:s + 5000] for s in range(0, len(orders), 5000))
+    streamed = engine.cohort_analysis(chunks, 'user_id', 'date', 'gmv', freq='D', max_dense_cohorts=10)
+    assert streamed['cohort_table'] == {}
+    assert streamed['cohort_count'] > 10
+    assert streamed['cohort_long']['users'].sum() == _reference(orders, 'D')['users'].sum()
@@ -0,0 +1,107 @@
+import pytest
+import pandas as pd
+import numpy as np
+from src.analysis.professional_analytics import ProfessionalAnalytics
+from src.analysis import column_stats
+from src.analysis.column_stats import compute_column_statistics, missing_cooccurrence, pack_masks
+
+@pytest.fixture
+def frame():
+    """创建含缺失、异常值与比率列的数据"""
+    rng = np.random.default_rng(5)
+    n = 3001
+    data = pd.DataFrame({
+        'gmv': rng.lognormal(5, 1, n),
+        'orders': rng.poisson(3, n),
+        'conversion_rate': rng.uniform(0, 120, n),
+        'delta': rng.normal(0, 1, n),
+        'empty': np.nan,
+        'city': rng.choice(['BJ', 'SH', None], n)
+    }, index=pd.RangeIndex(100, 100 + n))
+    data.loc[data.index[rng.random(n) < 0.2], 'gmv'] = np.nan
+    data['delta'] = data['delta'].where(data['gmv'].notna() | (rng.random(n) < 0.5))
+    return data
+
+def test_missing_cooccurrence_matches_matrix_product(frame):
+    """位图共现计数与矩阵乘积一致（部分缺失的列之间）"""
+    nulls = frame.isnull().to_numpy()
+    expected = nulls.T.astype(int) @ nulls.astype(int)
+    result = missing_cooccurrence(nulls)
+    partial = [0, 3, 5]
+    assert (result[np.ix_(partial, partial)] == expected[np.ix_(partial, partial)]).all()
+    assert (np.diag(result) == nulls.sum(axis=0)).all()
+    assert pack_masks(nulls).shape == (nulls.shape[1], (len(frame) + 63) // 64)
+
+def test_popcount_lookup_fallback():
+    """无 np.bitwise_count 时的查表实现结果一致"""
+    words = np.random.default_rng(0).integers(0, 2**63, 100, dtype=np.uint64)
+    expected = [bin(int(w)).count('1') for w in words]
+    assert column_stats._popcount_lookup(words).tolist() == expected
+    assert column_stats.popcount(words).tolist() == expected
+
+def test_missing_patterns_match_isnull_corr(frame):
+    """缺失模式与 isnull().corr() 的结果一致"""
+    analytics = ProfessionalAnalytics()
+    patterns = {p['type']: p for p in analytics._identify_missing_patterns(frame)}
+    assert patterns['completely_missing']['columns'] == ['empty']
+    assert patterns['high_missing_rate']['columns'] == ['empty']
+
+    corr = frame.isnull().corr()
+    expected = [(a, b, corr.loc[a, b]) for i, a in enumerate(corr.columns) for b in corr.columns[i + 1:]
+                if abs(corr.loc[a, b]) > 0.5]
+    found = [(c['col1'], c['col2'], c['correlation']) for c in patterns['correlated_missing']['correlations']]
+    assert [f[:2] for f in found] == [e[:2] for e in expected] == [('gmv', 'delta')]
+    assert found[0][2] == pytest.approx(expected[0][2])
+
+def test_profile_matches_per_column_computation(frame):
+    """共享统计得到的摘要、异常值与有效性结果与逐列计算一致"""
+    analytics = ProfessionalAnalytics()
+    profile = analytics.comprehensive_data_profile(frame)
+    numeric = frame.select_dtypes(include=[np.number])
+
+    summary = pd.DataFrame(profile['statistical_summary'])
+    pd.testing.assert_frame_equal(summary, numeric.describe(), check_exact=False, rtol=1e-9)
+
+    for col in ['gmv', 'orders', 'conversion_rate', 'delta']:
+        series = numeric[col].dropna()
+        q1, q3 = series.quantile([0.25, 0.75])
+        mask = (series < q1 - 1.5 * (q3 - q1)) | (series > q3 + 1.5 * (q3 - q1))
+        info = profile['outliers']['by_column'][col]
+        assert info['count'] == mask.sum()
+        assert info['indices'] == series[mask].index[:10].tolist()
+        assert info['percentage'] == pytest.approx(mask.mean() * 100)
+        assert info['upper_bound'] == pytest.approx(q3 + 1.5 * (q3 - q1))
+    assert 'empty' not in profile['outliers']['by_column']
+
+    uniqueness = profile['data_quality']['uniqueness']['by_column']
+    assert uniqueness == (frame.nunique() / len(frame)).to_dict()
+    validity = profile['data_quality']['validity']
+    out_of_range = ((frame['conversion_rate'] < 0) | (frame['conversion_rate'] > 100)).sum()
+    assert validity['range_violations']['conversion_rate']['count'] == out_of_range
+    expected_invalid = []
+    for col in ['gmv', 'orders', 'conversion_rate', 'delta']:
+        q1, q3 = frame[col].quantile([0.25, 0.75])
+        extreme = ((frame[col] < q1 - 3 * (q3 - q1)) | (frame[col] > q3 + 3 * (q3 - q1))).sum()
+        if extreme > frame[col].count() * 0.05:
+            expected_invalid.append(col)
+    assert sorted(validity['invalid_values']) == sorted(expected_invalid)
+
+    from scipy import stats
+    dist = profile['distribution_analysis']['by_column']['gmv']
+    assert dist['skewness'] == pytest.approx(stats.skew(frame['gmv'].dropna()))
+    assert dist['median'] == pytest.approx(frame['gmv'].median())
+
+def test_statistics_computed_once(frame, monkeypatch):
+    """完整剖析只计算一次共享统计"""
+    import src.analysis.professional_analytics as professional_analytics
+    calls = []
+    original = professional_analytics.compute_column_statistics
+
+    def counting(*args, **kwargs):
+        calls.append(1)
+        return original(*args, **kwargs)
+
+    monkeypatch.setattr(professional_analytics, 'compute_column_statistics', counting)
+    ProfessionalAnalytics().comprehensive_data_profile(frame)
+    assert len(calls) == 1
+    assert compute_column_statistics(frame[['city']]).describe() == {}
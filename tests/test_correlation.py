@@ -0,0 +1,90 @@
+import pytest
+import pandas as pd
+import numpy as np
+from src.analysis.advanced_analytics_engine import AdvancedAnalyticsEngine
+from src.analysis.correlation import blocked_correlation, matrix_pairs, StreamingCorrelation
+
+@pytest.fixture
+def engine():
+    """创建分析引擎实例"""
+    return AdvancedAnalyticsEngine()
+
+@pytest.fixture
+def wide_data():
+    """创建含强相关列组、常数列与缺失值的宽表"""
+    rng = np.random.default_rng(3)
+    base = rng.normal(size=(500, 4))
+    values = np.repeat(base, 10, axis=1) + rng.normal(0, 0.5, (500, 40))
+    values[:, 5] = -values[:, 5] + 1e6
+    data = pd.DataFrame(values, columns=[f'f{i}' for i in range(40)])
+    data['constant'] = 7.0
+    return data
+
+def _legacy_pairs(corr_matrix, threshold=0.7):
+    """原双重循环实现，作为对照"""
+    pairs = []
+    for i in range(len(corr_matrix.columns)):
+        for j in range(i + 1, len(corr_matrix.columns)):
+            if abs(corr_matrix.iloc[i, j]) > threshold:
+                pairs.append((i, j, corr_matrix.iloc[i, j]))
+    return pairs
+
+@pytest.mark.parametrize('method', ['pearson', 'spearman'])
+@pytest.mark.parametrize('missing', [False, True])
+def test_blocked_matches_pandas(wide_data, method, missing):
+    """分块结果（含跨块强相关对提取）与 pandas.corr 一致"""
+    data = wide_data.copy()
+    if missing:
+        data = data.mask(np.random.default_rng(1).random(data.shape) < 0.1)
+    expected = data.corr(method=method)
+    result = blocked_correlation(data.to_numpy(), method=method, block_size=7, threshold=0.7)
+
+    if not missing or method == 'pearson':
+        np.testing.assert_allclose(result['matrix'], expected.values, atol=1e-10)
+        legacy = _legacy_pairs(expected)
+        assert list(zip(result['pairs']['i'], result['pairs']['j'])) == [(i, j) for i, j, _ in legacy]
+    else:
+        # 含缺失值时 Spearman 每列只排序一次，与成对重新排序的结果近似
+        np.testing.assert_allclose(result['matrix'], expected.values, atol=0.05)
+
+    light = blocked_correlation(data.to_numpy(), method=method, block_size=7, threshold=0.7, return_matrix=False)
+    assert light['matrix'] is None
+    np.testing.assert_array_equal(light['pairs']['correlation'], result['pairs']['correlation'])
+
+def test_streaming_chunks_and_merge(wide_data):
+    """按行分块累积与分区合并的结果与整体计算一致"""
+    data = wide_data.mask(np.random.default_rng(2).random(wide_data.shape) < 0.05)
+    columns = list(data.columns)
+    expected = data.corr().values
+
+    streamed = StreamingCorrelation(columns)
+    for start in range(0, len(data), 64):
+        streamed.update(data.iloc[start:start + 64])
+    np.testing.assert_allclose(streamed.correlation(), expected, atol=1e-9)
+
+    left = StreamingCorrelation(columns).update(data.iloc[:200])
+    right = StreamingCorrelation(columns).update(data.iloc[200:] * 3 + 100)
+    combined = pd.concat([data.iloc[:200], data.iloc[200:] * 3 + 100])
+    np.testing.assert_allclose(left.merge(right).correlation(), combined.corr().values, atol=1e-9)
+    assert left.rows == len(data)
+
+    pairs = streamed.strong_pairs(0.7)
+    reference = matrix_pairs(expected, lower=0.7)
+    np.testing.assert_array_equal(pairs['i'], reference['i'])
+    np.testing.assert_array_equal(pairs['j'], reference['j'])
+
+def test_engine_correlation_analysis(engine, wide_data):
+    """引擎输出格式不变，强相关对与原实现一致"""
+    result = engine.correlation_analysis(wide_data, list(wide_data.columns))
+    legacy = _legacy_pairs(wide_data.corr())
+
+    assert len(result['strong_correlations']) == len(legacy)
+    first = result['strong_correlations'][0]
+    assert (first['feature1'], first['feature2']) == (wide_data.columns[legacy[0][0]], wide_data.columns[legacy[0][1]])
+    assert first['correlation'] == pytest.approx(legacy[0][2])
+    assert result['correlation_matrix']['f0']['f1'] == pytest.approx(wide_data['f0'].corr(wide_data['f1']))
+    assert result['insights'][0] == f"发现 {len(legacy)} 对强相关特征"
+
+    compact = engine.correlation_analysis(wide_data, list(wide_data.columns), include_matrix=False)
+    assert compact['correlation_matrix'] == {}
+    assert len(compact['strong_correlations']) == len(legacy)
@@ -0,0 +1,65 @@
+import pytest
+import pandas as pd
+import numpy as np
+from src.visualization.chart_generator import ChartGenerator
+from src.visualization.enhanced_chart_generator import EnhancedChartGenerator
+from src.visualization.downsampling import (downsample_indices, downsample_series, key_point_indices,
+                                            lttb_indices, minmax_indices)
+
+@pytest.fixture
+def long_series():
+    """五年的分钟级随机游走，中间有一个尖峰"""
+    rng = np.random.default_rng(3)
+    values = np.cumsum(rng.normal(size=500_000))
+    values[123_457] = values.max() + 500
+    return np.arange(len(values)), values
+
+def test_downsampling_respects_budget_and_keeps_extremes(long_series):
+    """降采样后点数不超过预算，保留首末点与全局极值"""
+    x, y = long_series
+    for method in ('auto', 'lttb', 'minmax'):
+        keep = downsample_indices(x, y, 1000, method)
+        assert len(keep) <= 1000 and keep[0] == 0 and keep[-1] == len(y) - 1
+        assert np.all(np.diff(keep) > 0)
+        assert np.argmax(y) in keep and np.argmin(y) in keep
+    assert len(downsample_indices(x[:500], y[:500], 1000)) == 500
+    with pytest.raises(ValueError):
+        downsample_indices(x, y, 1000, 'random')
+
+def test_lttb_follows_shape():
+    """LTTB 选中正弦波的波峰与波谷"""
+    x = np.linspace(0, 4 * np.pi, 4000)
+    keep = lttb_indices(x, np.sin(x), 40)
+    assert len(keep) == 40
+    assert np.sin(x[keep]).max() > 0.99 and np.sin(x[keep]).min() < -0.99
+    assert len(minmax_indices(np.sin(x), 10)) <= 22
+
+def test_annotations_capped_to_key_points():
+    """标注点为最新值与最高/最低点，数量受上限约束"""
+    y = np.array([3.0, 9.0, np.nan, -4.0, 5.0, 1.0])
+    assert key_point_indices(y, 3) == [1, 3, 5]
+    assert key_point_indices(y, 1) == [5]
+    sampled = downsample_series(pd.date_range('2024-01-01', periods=6).to_numpy(), y, max_points=10)
+    assert not sampled['downsampled'] and sampled['annotations'] == [0, 1, 3, 5]
+
+def test_trend_and_plotly_charts_are_downsampled(tmp_path):
+    """静态趋势图与交互式仪表板只写入降采样后的点"""
+    dates = pd.date_range('2015-01-01', periods=3650)
+    values = 1000 + np.cumsum(np.random.default_rng(0).normal(size=3650))
+    frame = pd.DataFrame({'date': dates, 'gmv': values}).sample(frac=1, random_state=0)
+
+    generator = ChartGenerator(str(tmp_path), use_cache=False)
+    spec = generator._trend_spec(frame, 'date', 'gmv', max_points=500, max_annotations=3)
+    assert generator.generate_trend_chart(frame, 'date', 'gmv', max_points=500).endswith('.png')
+    assert 498 <= len(spec['data']['y']) <= 500 and len(spec['data']['annotations']) == 3
+    assert spec['data']['x'] == sorted(spec['data']['x']) and spec['options']['show_markers'] is False
+    assert max(spec['data']['y']) == pytest.approx(values.max())
+
+    enhanced = EnhancedChartGenerator()
+    enhanced.chart_configs['max_points'] = 300
+    gmv_trend = {d.strftime('%Y-%m-%d'): float(v) for d, v in zip(dates, values)}
+    result = enhanced._create_plotly_dashboard({'gmv_trend': gmv_trend}, str(tmp_path))
+    html = open(result['dashboard_file'], encoding='utf-8').read()
+    assert '2015-01-01' in html and dates[-1].strftime('%Y-%m-%d') in html
+    kept = sum(key in html for key in gmv_trend)
+    assert kept <= 300 + 3
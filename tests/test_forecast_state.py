@@ -0,0 +1,113 @@
+import pytest
+import pandas as pd
+import numpy as np
+from src.analysis.professional_analytics import ProfessionalAnalytics, AnalysisConfig
+from src.analysis.holt_winters import HoltWintersForecaster
+from src.analysis.forecast_state import ForecastStateStore
+
+@pytest.fixture
+def daily_gmv():
+    """创建带周季节性的日度 GMV"""
+    rng = np.random.default_rng(1)
+    n = 260
+    values = 200 + 40 * np.sin(2 * np.pi * np.arange(n) / 7) + rng.normal(0, 4, n)
+    return pd.DataFrame({'date': pd.date_range('2024-01-01', periods=n), 'gmv': values})
+
+@pytest.fixture
+def analytics(tmp_path):
+    """使用临时目录保存预测状态的分析实例"""
+    return ProfessionalAnalytics(AnalysisConfig(forecast_state_dir=str(tmp_path / 'states'),
+                                                forecast_refit_interval=10))
+
+def _forecast(analytics, data, key='gmv:1'):
+    return analytics.time_series_forecasting(data, 'date', 'gmv', periods=14, method='holt_winters',
+                                             series_key=key)
+
+def test_incremental_update_matches_state_advance(analytics, daily_gmv):
+    """新观测只推进已存状态，结果与在内存中推进同一预测器一致；可只传新增数据"""
+    initial = _forecast(analytics, daily_gmv.iloc[:200])
+    assert initial['state_update']['mode'] == 'initial'
+
+    model = HoltWintersForecaster.from_state(analytics.forecast_states.load('gmv:1')['model'])
+    for day in range(200, 205):
+        result = _forecast(analytics, daily_gmv.iloc[day:day + 1])
+        assert result['state_update'] == {'mode': 'incremental', 'reason': None, 'new_points': 1,
+                                          'drift_ratio': None}
+    model.update(daily_gmv['gmv'].to_numpy()[200:205])
+    expected = model.forecast(14)['forecast'][0]
+    assert [f['value'] for f in result['forecast_values']] == pytest.approx(expected)
+    assert result['model_performance'] == initial['model_performance']
+    assert result['seasonality_analysis']['period'] == 7
+
+    repeated = _forecast(analytics, daily_gmv.iloc[:205])
+    assert repeated['state_update']['new_points'] == 0
+    assert [f['value'] for f in repeated['forecast_values']] == pytest.approx(expected)
+    history = analytics.forecast_states.history('gmv:1')
+    np.testing.assert_allclose(history, daily_gmv['gmv'].to_numpy()[:205])
+
+def test_missing_days_advance_state(analytics, daily_gmv):
+    """新数据跳过的日期以缺失值推进状态"""
+    _forecast(analytics, daily_gmv.iloc[:200])
+    result = _forecast(analytics, daily_gmv.iloc[[200, 203]])
+    assert result['state_update']['new_points'] == 2
+    record = analytics.forecast_states.load('gmv:1')
+    assert record['n_obs'] == 204
+    assert np.isnan(analytics.forecast_states.history('gmv:1')[201:203]).all()
+
+def test_points_within_half_step_of_last_are_ignored(analytics, daily_gmv):
+    """晚于最后已存点但不足半个步长的观测（如日度数据的当日晚些记录）不推进状态、不覆盖历史"""
+    _forecast(analytics, daily_gmv.iloc[:200])
+    last = daily_gmv['date'].iloc[199]
+    late = pd.DataFrame({'date': [last + pd.Timedelta(hours=6)], 'gmv': [-1000.0]})
+    result = _forecast(analytics, late)
+    assert result['state_update']['mode'] == 'incremental' and result['state_update']['new_points'] == 0
+    assert analytics.forecast_states.load('gmv:1')['n_obs'] == 200
+
+    mixed = pd.concat([late, daily_gmv.iloc[200:203]])
+    assert _forecast(analytics, mixed)['state_update']['new_points'] == 3
+    np.testing.assert_allclose(analytics.forecast_states.history('gmv:1'), daily_gmv['gmv'].to_numpy()[:203])
+
+def test_scheduled_and_drift_refit(tmp_path, daily_gmv):
+    """距上次全量拟合达到计划点数或误差显著放大时重新拟合"""
+    analytics = ProfessionalAnalytics(AnalysisConfig(forecast_state_dir=str(tmp_path), forecast_refit_interval=10))
+    _forecast(analytics, daily_gmv.iloc[:200])
+    modes = [_forecast(analytics, daily_gmv.iloc[day:day + 1])['state_update']['mode'] for day in range(200, 211)]
+    assert modes == ['incremental'] * 9 + ['refit', 'incremental']
+    record = analytics.forecast_states.load('gmv:1')
+    assert record['fit_n_obs'] == 210 and record['n_obs'] == 211
+    np.testing.assert_allclose(analytics.forecast_states.history('gmv:1'), daily_gmv['gmv'].to_numpy()[:211])
+
+    patient = ProfessionalAnalytics(AnalysisConfig(forecast_state_dir=str(tmp_path / 'drift'),
+                                                   forecast_refit_interval=1000))
+    _forecast(patient, daily_gmv.iloc[:200])
+    shifted = daily_gmv.iloc[200:210].assign(gmv=lambda frame: frame['gmv'] + 150)
+    updates = [_forecast(patient, shifted.iloc[i:i + 1])['state_update'] for i in range(10)]
+    assert updates[-1]['mode'] == 'incremental' and updates[-1]['drift_ratio'] is None
+    drift = [u for u in updates if u['mode'] == 'refit']
+    assert drift and drift[0]['reason'] == 'drift' and drift[0]['drift_ratio'] > 4
+
+def test_refresh_only_touches_series_with_new_data(analytics, daily_gmv):
+    """批量刷新只处理新数据中出现的序列"""
+    stores = pd.concat([daily_gmv.iloc[:200].assign(store_id=store) for store in (1, 2, 3)])
+    initial = analytics.refresh_forecasts(stores, 'store_id', 'date', 'gmv', periods=7)
+    assert sorted(initial) == [1, 2, 3]
+    before = analytics.forecast_states.load('gmv:3')
+
+    update = daily_gmv.iloc[200:202].assign(store_id=1)
+    refreshed = analytics.refresh_forecasts(update, 'store_id', 'date', 'gmv', periods=7)
+    assert list(refreshed) == [1] and refreshed[1]['state_update']['new_points'] == 2
+    assert analytics.forecast_states.load('gmv:3') == before
+    assert analytics.forecast_states.load('gmv:1')['n_obs'] == 202
+
+def test_store_truncates_uncommitted_tail(tmp_path):
+    """历史文件中未提交的尾部在下次写入时被截断"""
+    store = ForecastStateStore(str(tmp_path))
+    store.save('a/b', {'n_obs': 3}, [1.0, 2.0, 3.0])
+    with open(tmp_path / 'a_b.values', 'ab') as f:
+        np.array([99.0]).tofile(f)
+    assert store.history('a/b').tolist() == [1.0, 2.0, 3.0]
+
+    store.save('a/b', {'n_obs': 4}, [4.0], offset=3)
+    assert store.history('a/b').tolist() == [1.0, 2.0, 3.0, 4.0]
+    store.delete('a/b')
+    assert store.load('a/b') is None
@@ -0,0 +1,151 @@
+import pytest
+import pandas as pd
+import numpy as np
+from src.analysis.metrics_analyzer import MetricsAnalyzer
+from src.analysis.gmv_decomposition import (
+    GMVDecomposer, lmdi_decompose, log_mean, DRIVER_FACTORS, RESIDUAL
+)
+
+@pytest.fixture
+def period_data():
+    """创建两期测试数据，GMV 严格等于各因子乘积"""
+    rng = np.random.default_rng(11)
+    rows = []
+    for date in ['2025-01-01', '2025-01-08']:
+        for store in ['S1', 'S2', 'S3']:
+            for category in ['品类A', '品类B']:
+                for region in ['区域1', '区域2']:
+                    dau = rng.integers(100, 1000)
+                    conversion_rate = rng.uniform(0.01, 0.05)
+                    frequency = rng.uniform(1.5, 3.0)
+                    order_price = rng.uniform(100, 500)
+                    rows.append({
+                        'date': date,
+                        'store_id': store,
+                        'category': category,
+                        'region': region,
+                        'gmv': dau * conversion_rate * frequency * order_price,
+                        'dau': dau,
+                        'frequency': frequency,
+                        'order_price': order_price,
+                        'conversion_rate': conversion_rate
+                    })
+    data = pd.DataFrame(rows)
+    return data[data['date'] == '2025-01-08'], data[data['date'] == '2025-01-01']
+
+def test_lmdi_single_row_is_exact():
+    """单行乘法恒等式下残差为0，各效应之和等于变化量"""
+    current = {'a': 4.0, 'b': 3.0}
+    previous = {'a': 2.0, 'b': 5.0}
+    effects = lmdi_decompose(12.0, 10.0, current, previous)
+
+    assert sum(float(v) for v in effects.values()) == pytest.approx(2.0)
+    assert float(effects[RESIDUAL]) == pytest.approx(0.0, abs=1e-9)
+    assert float(effects['a']) == pytest.approx(log_mean(12.0, 10.0) * np.log(2.0))
+    assert float(log_mean(5.0, 5.0)) == 5.0
+
+def test_decompose_is_additive_at_every_level(period_data):
+    """每个分组内效应之和等于分组变化量，同层分组变化量之和等于总变化量"""
+    current, previous = period_data
+    levels = GMVDecomposer(current, previous).decompose_levels()
+    total_change = current['gmv'].sum() - previous['gmv'].sum()
+
+    assert set(levels) == {'total', 'category', 'region', 'store_id'}
+    effect_columns = [f'{name}_effect' for name in DRIVER_FACTORS + [RESIDUAL]]
+    for table in levels.values():
+        np.testing.assert_allclose(table[effect_columns].sum(axis=1), table['gmv_change'])
+        assert table['gmv_change'].sum() == pytest.approx(total_change)
+        assert table[effect_columns].to_numpy().sum() == pytest.approx(total_change)
+        assert table['share_of_total'].sum() == pytest.approx(100.0)
+
+def test_decompose_handles_new_groups(period_data):
+    """上期不存在的分组全部变化计入该分组，分解仍然精确"""
+    current, previous = period_data
+    previous = previous[previous['store_id'] != 'S3']
+    table = GMVDecomposer(current, previous).decompose(['store_id'])
+
+    assert table.loc['S3', 'gmv_previous'] == 0
+    effect_columns = [f'{name}_effect' for name in DRIVER_FACTORS + [RESIDUAL]]
+    assert table.loc['S3', effect_columns].sum() == pytest.approx(table.loc['S3', 'gmv_change'])
+
+@pytest.fixture
+def realistic_data():
+    """多门店两期数据：转化率为百分数，GMV 含噪声且四舍五入，与因子乘积不严格相等"""
+    rng = np.random.default_rng(29)
+    frames = []
+    for week, lift in [('2025-03-03', 1.0), ('2025-03-10', 1.04)]:
+        n = 600
+        dau = rng.integers(800, 3000, n)
+        conversion_rate = np.round(rng.uniform(2.5, 4.5, n) * lift, 2)
+        frequency = np.round(rng.uniform(1.0, 1.6, n), 2)
+        order_price = np.round(rng.uniform(60, 180, n) / lift ** 2, 2)
+        gmv = dau * conversion_rate / 100 * frequency * order_price * rng.uniform(0.9, 1.1, n)
+        frames.append(pd.DataFrame({
+            'date': week,
+            'store_id': rng.choice([f'ST{i:03d}' for i in range(60)], n),
+            'category': rng.choice(['生鲜', '日百', '母婴', '酒饮'], n),
+            'region': rng.choice(['华东一区', '华东二区', '华南区'], n),
+            'gmv': np.round(gmv, 2),
+            'dau': dau,
+            'frequency': frequency,
+            'order_price': order_price,
+            'conversion_rate': conversion_rate
+        }))
+    data = pd.concat(frames, ignore_index=True)
+    return data[data['date'] == '2025-03-10'], data[data['date'] == '2025-03-03']
+
+def test_gmv_metrics_contributions_are_additive(period_data):
+    """MetricsAnalyzer 驱动因素贡献度之和为100%，与总体层级分解一致"""
+    current, previous = period_data
+    analyzer = MetricsAnalyzer(current, previous)
+    metrics = analyzer.calculate_gmv_metrics()
+    total = analyzer.decompose_gmv({'total': []})['total']
+
+    drivers = ['dau', 'frequency', 'order_price', 'conversion_rate']
+    assert sum(metrics[m].contribution for m in drivers) == pytest.approx(100.0)
+    assert total[f'{RESIDUAL}_contribution'].iloc[0] == pytest.approx(0.0, abs=1e-9)
+    for metric in drivers:
+        assert metrics[metric].contribution == pytest.approx(total[f'{metric}_contribution'].iloc[0])
+
+def test_shown_contributions_sum_to_100_on_realistic_data(realistic_data, tmp_path):
+    """GMV与因子乘积不严格相等时，展示的四项贡献度之和仍为100%，各层级残差为0"""
+    current, previous = realistic_data
+    analyzer = MetricsAnalyzer(current, previous)
+    metrics = analyzer.calculate_gmv_metrics()
+
+    drivers = ['dau', 'frequency', 'order_price', 'conversion_rate']
+    assert sum(metrics[m].contribution for m in drivers) == pytest.approx(100.0)
+    assert 60 <= metrics['order_price'].current <= 180
+    assert 2.5 <= metrics['conversion_rate'].current <= 4.7
+    assert metrics['conversion_rate'].change_rate == pytest.approx(4.0, abs=1.5)
+
+    from src.visualization.chart_generator import ChartGenerator
+    spec = ChartGenerator(str(tmp_path))._gmv_contribution_spec({'gmv_metrics': metrics})
+    assert sum(spec['data']['right']) == pytest.approx(100.0)
+
+    for table in analyzer.decompose_gmv().values():
+        np.testing.assert_allclose(table[f'{RESIDUAL}_effect'], 0.0, atol=1e-6)
+
+def test_simple_mode_matches_pandas(period_data):
+    """简化模式（字典列表）与pandas模式的驱动指标和贡献度一致"""
+    current, previous = period_data
+    expected = MetricsAnalyzer(current, previous).calculate_gmv_metrics()
+    actual = MetricsAnalyzer(current.to_dict('records'), previous.to_dict('records')).calculate_gmv_metrics()
+    for metric, value in expected.items():
+        assert actual[metric].current == pytest.approx(value.current)
+        assert actual[metric].contribution == pytest.approx(value.contribution)
+
+def test_report_renders_drill_level_decomposition(realistic_data):
+    """报告模板渲染品类/区域层级的分解表，每行效应之和等于该行GMV变化"""
+    jinja2 = pytest.importorskip('jinja2')
+    current, previous = realistic_data
+    results = MetricsAnalyzer(current, previous).analyze()
+    env = jinja2.Environment(loader=jinja2.FileSystemLoader('src/templates'))
+    report = env.get_template('report_template.md').render(chart_paths={}, **results)
+
+    section = report.split('### GMV驱动因素分解')[1].split('## 改进建议')[0]
+    rows = [line.split('|')[1:-1] for line in section.splitlines() if line.startswith('| ')]
+    rows = {cells[0].strip(): [float(cell) for cell in cells[1:]] for cells in rows if cells[0].strip() not in ('品类', '区域')}
+    assert sorted(rows) == sorted(['生鲜', '日百', '母婴', '酒饮', '华东一区', '华东二区', '华南区'])
+    for cells in rows.values():
+        assert sum(cells[2:]) == pytest.approx(cells[0], abs=0.05)
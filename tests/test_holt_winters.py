@@ -0,0 +1,140 @@
+import time
+import pytest
+import pandas as pd
+import numpy as np
+from src.analysis.advanced_analytics_engine import AdvancedAnalyticsEngine
+from src.analysis.professional_analytics import ProfessionalAnalytics
+from src.analysis.holt_winters import (
+    HoltWintersForecaster, rolling_origin_backtest, initial_state, series_matrix
+)
+
+def _store_matrix(n_series, length, seed=0):
+    """创建带趋势与周季节性的门店日序列矩阵"""
+    rng = np.random.default_rng(seed)
+    t = np.arange(length)
+    base = rng.uniform(50, 500, (n_series, 1))
+    slope = rng.normal(0, 0.2, (n_series, 1))
+    amplitude = rng.uniform(0, 0.3, (n_series, 1))
+    return base + slope * t + amplitude * base * np.sin(2 * np.pi * t / 7) + rng.normal(0, 5, (n_series, length))
+
+@pytest.fixture
+def store_sales():
+    """创建门店日度长表，部分日期缺失"""
+    matrix = _store_matrix(30, 200, seed=3)
+    dates = pd.date_range('2024-01-01', periods=200)
+    data = pd.DataFrame({
+        'store_id': np.repeat(np.arange(30), 200),
+        'date': np.tile(dates, 30),
+        'gmv': matrix.ravel()
+    })
+    return data.sample(frac=0.97, random_state=1), matrix
+
+def _reference_smoothing(values, period, alpha, beta, gamma, phi):
+    """逐点实现的误差修正形式递推，作为对照"""
+    init = initial_state(values[None], period)
+    level, trend = init['level'][0], init['trend'][0]
+    season = list(init['season'][:, 0])
+    sse = 0.0
+    for t, y in enumerate(values):
+        fitted = level + phi * trend + season[t % period]
+        error = y - fitted
+        sse += error ** 2
+        level = level + phi * trend + alpha * error
+        trend = phi * trend + beta * error
+        season[t % period] += gamma * error
+    return level, trend, season, sse
+
+def test_vectorized_recurrence_matches_reference():
+    """向量化递推与逐点实现一致，逐序列选出误差最小的参数"""
+    matrix = _store_matrix(5, 60)
+    grid = {'alpha': [0.1, 0.4], 'beta': [0.0, 0.05], 'gamma': [0.1], 'phi': [0.95]}
+    model = HoltWintersForecaster(7, grid, chunk_size=2).fit(matrix)
+
+    for i, row in enumerate(matrix):
+        candidates = {
+            (alpha, beta): _reference_smoothing(row, 7, alpha, beta, 0.1, 0.95)
+            for alpha in grid['alpha'] for beta in grid['beta']
+        }
+        (alpha, beta), (level, trend, season, sse) = min(candidates.items(), key=lambda item: item[1][3])
+        assert (model.state['alpha'][i], model.state['beta'][i]) == (alpha, beta)
+        assert model.state['level'][i] == pytest.approx(level)
+        assert model.state['trend'][i] == pytest.approx(trend)
+        assert model.state['sse'][i] == pytest.approx(sse)
+        np.testing.assert_allclose(model.state['season'][:, i], season)
+
+def test_forecast_accuracy_and_intervals():
+    """季节性序列的预测误差接近噪声水平，95% 区间覆盖率合理"""
+    matrix = _store_matrix(400, 400)
+    model = HoltWintersForecaster(7).fit(matrix[:, :370])
+    result = model.forecast(30)
+    actual = matrix[:, 370:]
+
+    assert result['forecast'].shape == (400, 30)
+    assert np.abs(result['forecast'] - actual).mean() < 7
+    coverage = ((actual >= result['lower']) & (actual <= result['upper'])).mean()
+    assert 0.85 < coverage <= 1.0
+    assert (result['upper'][:, -1] - result['lower'][:, -1] > result['upper'][:, 0] - result['lower'][:, 0]).all()
+
+def test_backtest_reuses_fitted_state():
+    """滚动起点回测：首个起点等于直接拟合，后续起点推进状态与用同一参数重新拟合一致"""
+    matrix = _store_matrix(50, 200)
+    matrix[3, 150:160] = np.nan
+    backtest = rolling_origin_backtest(matrix, 14, n_origins=3, step=7, period=7)
+    assert [o['origin'] for o in backtest['origins']] == [172, 179, 186]
+
+    fresh = HoltWintersForecaster(7).fit(matrix[:, :172])
+    first = np.abs(fresh.forecast(14)['forecast'] - matrix[:, 172:186]).mean()
+    assert backtest['origins'][0]['mae'] == pytest.approx(first)
+
+    fresh.update(matrix[:, 172:179]).update(matrix[:, 179:186])
+    chosen = fresh.parameters().iloc[3]
+    grid = {name: [chosen[name]] for name in ('alpha', 'beta', 'gamma', 'phi')}
+    refit = HoltWintersForecaster(7, grid).fit(matrix[3:4, :186])
+    np.testing.assert_allclose(fresh.forecast(14)['forecast'][3], refit.forecast(14)['forecast'][0])
+    assert backtest['series_mae'].shape == (50,)
+    assert 0.8 < backtest['interval_coverage'] <= 1.0
+
+    with pytest.raises(ValueError):
+        rolling_origin_backtest(matrix[:, :20], 14, n_origins=3)
+
+def test_batch_forecast_long_table(store_sales):
+    """长表批量预测：缺失日期对齐到统一时间轴，输出每条序列的未来日期"""
+    data, matrix = store_sales
+    table = series_matrix(data, 'store_id', 'date', 'gmv')
+    assert table['matrix'].shape == (30, 200) and table['freq'] == 'D'
+    observed = ~np.isnan(table['matrix'])
+    np.testing.assert_allclose(table['matrix'][observed], matrix[observed])
+
+    result = AdvancedAnalyticsEngine().batch_forecast(data, 'store_id', 'gmv', horizon=10)
+    assert len(result) == 300
+    assert result.columns.tolist() == ['store_id', 'date', 'step', 'forecast', 'lower', 'upper']
+    first = result[result['store_id'] == 0]
+    assert first['date'].tolist() == list(pd.date_range('2024-07-19', periods=10))
+    assert (first['lower'] < first['forecast']).all() and (first['forecast'] < first['upper']).all()
+
+def test_time_series_forecasting_holt_winters():
+    """单序列预测入口：Holt-Winters 方法使用检测到的周期并给出滚动回测性能"""
+    rng = np.random.default_rng(4)
+    dates = pd.date_range('2024-01-01', periods=180)
+    values = 200 + 40 * np.sin(2 * np.pi * np.arange(180) / 7) + rng.normal(0, 4, 180)
+    data = pd.DataFrame({'date': dates, 'gmv': values})
+    analytics = ProfessionalAnalytics()
+
+    result = analytics.time_series_forecasting(data, 'date', 'gmv', periods=14, method='holt_winters')
+    assert result['model_parameters']['period'] == 7
+    assert len(result['forecast_values']) == 14 and len(result['confidence_intervals']) == 14
+    assert result['model_performance']['method'] == 'rolling_origin'
+    assert len(result['model_performance']['origins']) == 3
+    simple = analytics.time_series_forecasting(data, 'date', 'gmv', periods=14)
+    assert result['model_performance']['mae'] < simple['model_performance']['mae']
+
+    with pytest.raises(ValueError):
+        analytics.time_series_forecasting(data, 'date', 'gmv', method='arima')
+
+def test_twenty_thousand_series_within_budget():
+    """2 万条门店日序列（一年）30 天预测在一分钟内完成"""
+    matrix = _store_matrix(20000, 365)
+    started = time.perf_counter()
+    result = HoltWintersForecaster(7).fit(matrix).forecast(30)
+    assert time.perf_counter() - started < 60
+    assert np.isfinite(result['forecast']).all()
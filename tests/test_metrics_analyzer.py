@@ -2,7 +2,7 @@ import pytest
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
-from src.analysis.metrics_analyzer import MetricsAnalyzer, GMVMetrics, CategoryMetrics, RegionMetrics
+from src.analysis.metrics_analyzer import MetricsAnalyzer, GMVMetrics, CategoryMetrics, RegionMetrics, grouped_gini
 
 @pytest.fixture
 def sample_data():
@@ -106,6 +106,31 @@ def test_calculate_gini_coefficient(analyzer):
     assert 0 <= gini <= 1
     assert gini > 0  # 对于非均匀分布的数据，基尼系数应该大于0
 
+def test_grouped_gini_matches_single_series():
+    """测试分组加权基尼系数与逐组计算一致"""
+    rng = np.random.default_rng(0)
+    values = rng.uniform(0, 100, 1000)
+    groups = rng.integers(0, 50, 1000)
+    weights = rng.integers(1, 5, 1000)
+
+    result = grouped_gini(values, groups, weights)
+    for g in [0, 17, 49]:
+        mask = groups == g
+        # 整数权重等价于将样本重复 w 次
+        expanded = pd.Series(np.repeat(values[mask], weights[mask]))
+        assert result[g] == pytest.approx(grouped_gini(expanded)[0])
+
+    assert grouped_gini([1, 1, 1, 1])[0] == pytest.approx(0.0)
+    assert grouped_gini([0, 0, 0, 1])[0] == pytest.approx(0.75)
+    assert grouped_gini([0, 0])[0] == 0.0
+
+def test_calculate_grouped_gini(analyzer):
+    """测试分析器分组基尼系数接口"""
+    gini = analyzer.calculate_grouped_gini('order_price', 'region', across_column='category')
+
+    assert set(gini) == {'区域1', '区域2', '区域3'}
+    assert all(0 <= v <= 1 for v in gini.values())
+
 def test_identify_top_declining_categories(analyzer):
     """测试下降品类识别"""
     metrics = analyzer.calculate_category_metrics()
@@ -148,6 +173,8 @@ def test_analyze(analyzer):
     assert 'region_metrics' in results
     assert 'category_gini' in results
     assert 'region_gini' in results
+    assert 'gini_by_region' in results
+    assert 'category_conversion_gini' in results
     assert 'top_declining_categories' in results
     assert 'top_declining_regions' in results
     assert 'improvement_suggestions' in results 
\ No newline at end of file
@@ -0,0 +1,103 @@
+import pytest
+import pandas as pd
+import numpy as np
+from src.analysis.professional_analytics import ProfessionalAnalytics, AnalysisConfig
+from src.analysis.model_registry import ModelRegistry, iter_chunks
+
+@pytest.fixture
+def sales():
+    """创建带数值特征与回归目标的数据"""
+    rng = np.random.default_rng(8)
+    n = 600
+    data = pd.DataFrame({
+        'customer_id': np.arange(n),
+        'visits': rng.poisson(5, n).astype(float),
+        'spend': rng.gamma(2, 50, n),
+        'tenure': rng.integers(1, 60, n)
+    })
+    data['revenue'] = 3 * data['spend'] + 10 * data['visits'] + rng.normal(0, 5, n)
+    data.loc[::17, 'visits'] = np.nan
+    return data
+
+@pytest.fixture
+def analytics(tmp_path):
+    """使用临时目录作为模型注册表的分析实例"""
+    return ProfessionalAnalytics(AnalysisConfig(model_registry_dir=str(tmp_path / 'models')))
+
+def test_model_persisted_and_reused(analytics, sales, tmp_path):
+    """模型按版本持久化，相同数据在新实例中直接复用"""
+    first = analytics.predictive_modeling(sales, 'revenue')
+    assert first['model_version'] == 1 and first['reused_model'] is False
+
+    restarted = ProfessionalAnalytics(AnalysisConfig(model_registry_dir=str(tmp_path / 'models')))
+    reused = restarted.predictive_modeling(sales.copy(), 'revenue')
+    assert reused['reused_model'] is True and reused['model_version'] == 1
+    assert reused['performance_metrics'] == pytest.approx(first['performance_metrics'])
+    assert restarted.models['revenue']['features'] == ['customer_id', 'visits', 'spend', 'tenure']
+
+    changed = sales.copy()
+    changed.loc[0, 'spend'] += 1
+    assert restarted.predictive_modeling(changed, 'revenue')['model_version'] == 2
+    assert restarted.predictive_modeling(sales, 'revenue', model_type='regression')['model_version'] == 3
+    assert restarted.predictive_modeling(sales, 'revenue', reuse=False)['model_version'] == 4
+
+    versions = restarted.model_registry.versions('revenue')
+    assert [meta['version'] for meta in versions] == [1, 2, 3, 4]
+    assert versions[0]['training_rows'] == len(sales)
+    assert versions[0]['preprocessing']['fill_values']['visits'] == pytest.approx(sales['visits'].mean())
+
+def test_batch_predict_matches_in_memory_model(analytics, sales, tmp_path):
+    """分块批量预测与直接预测一致，可逐块写出到文件"""
+    analytics.predictive_modeling(sales, 'revenue')
+    model = analytics.models['revenue']['model']
+    features = sales.drop(columns=['revenue'])
+    expected = model.predict(features.fillna(features.mean()))
+
+    result = analytics.batch_predict(sales, 'revenue', chunk_size=128)
+    assert (result['rows'], result['chunks'], result['model_version']) == (600, 5, 1)
+    np.testing.assert_allclose(result['predictions'], expected)
+
+    source = tmp_path / 'score.csv'
+    sales.drop(columns=['revenue']).to_csv(source, index=False)
+    output = tmp_path / 'predictions.csv'
+    fresh = ProfessionalAnalytics(AnalysisConfig(model_registry_dir=str(tmp_path / 'models')))
+    written = fresh.batch_predict(str(source), 'revenue', chunk_size=100, output_path=str(output),
+                                  id_column='customer_id')
+    assert written['chunks'] == 6 and 'predictions' not in written
+    scored = pd.read_csv(output)
+    assert scored.columns.tolist() == ['customer_id', 'prediction']
+    np.testing.assert_allclose(scored['prediction'], expected)
+
+def test_batch_predict_without_registry(sales):
+    """未启用注册表时使用内存中的模型，缺少特征列时报错"""
+    analytics = ProfessionalAnalytics(AnalysisConfig(model_registry_dir=None))
+    result = analytics.predictive_modeling(sales, 'revenue')
+    assert result['model_version'] is None
+    assert analytics.batch_predict(iter([sales.iloc[:50], sales.iloc[50:]]), 'revenue')['rows'] == 600
+
+    with pytest.raises(ValueError):
+        analytics.batch_predict(sales.drop(columns=['spend']), 'revenue')
+    with pytest.raises(KeyError):
+        analytics.batch_predict(sales, 'unknown')
+
+def test_registry_versions_and_load(tmp_path):
+    """注册表按名称隔离版本，加载结果在进程内复用"""
+    from sklearn.linear_model import LinearRegression
+    registry = ModelRegistry(str(tmp_path))
+    X = pd.DataFrame({'x': [1.0, 2.0, 3.0]})
+    model = LinearRegression().fit(X, [2.0, 4.0, 6.0])
+    preprocessing = {'features': ['x'], 'fill_values': {'x': 2.0}}
+
+    meta = registry.register('gmv/daily', model, preprocessing, {'data_fingerprint': 'abc', 'params': {'k': 1}})
+    registry.register('other', model, preprocessing)
+    assert meta['version'] == 1 and registry.find('gmv/daily', 'abc', {'k': 1})['version'] == 1
+    assert registry.find('gmv/daily', 'abc', {'k': 2}) is None
+
+    reloaded = ModelRegistry(str(tmp_path)).load('gmv/daily')
+    assert reloaded['model'].predict(pd.DataFrame({'x': [4.0]}))[0] == pytest.approx(8.0)
+    assert registry.load('gmv/daily')['model'] is model
+    with pytest.raises(KeyError):
+        registry.load('gmv/daily', version=3)
+
+    frame = pd.DataFrame({'x': range(10)})
+    assert [len(chunk) for chunk in iter_chunks(frame, 4)] == [4, 4, 2]
@@ -0,0 +1,82 @@
+import pytest
+import pandas as pd
+import numpy as np
+from sklearn.ensemble import RandomForestRegressor, RandomForestClassifier
+from src.analysis.professional_analytics import ProfessionalAnalytics, AnalysisConfig
+from src.analysis import model_search
+from src.analysis.model_search import halving_search, candidate_params, cv_splits, RANDOM_FOREST_PARAM_GRID
+
+@pytest.fixture
+def regression_data():
+    """创建回归数据"""
+    rng = np.random.default_rng(3)
+    X = rng.normal(size=(3000, 5))
+    y = 4 * X[:, 0] - 2 * X[:, 1] ** 2 + rng.normal(0, 0.5, 3000)
+    return X, y
+
+def test_candidates_and_splits():
+    """候选参数数受上限约束，分类任务样本足够时分层划分"""
+    assert len(candidate_params(RANDOM_FOREST_PARAM_GRID, max_candidates=9)) == 9
+    assert len(candidate_params({'a': [1, 2]}, max_candidates=9)) == 2
+
+    y = np.array([0] * 90 + [1] * 10)
+    for train, test in cv_splits(y, 5, classification=True):
+        assert y[test].sum() == 2
+    assert len(cv_splits(np.array([0] * 9 + [1] * 2), 5, classification=True)) == 5
+
+def test_halving_prunes_candidates(regression_data):
+    """每轮保留约 1/3 候选，最后一轮使用全部样本"""
+    X, y = regression_data
+    grid = {'max_depth': [1, 2, 4, 8, None], 'n_estimators': [10, 20]}
+    result = halving_search(RandomForestRegressor(random_state=0), X, y, grid, 'r2',
+                            classification=False, folds=3, n_jobs=1, max_candidates=9)
+
+    assert [r['n_candidates'] for r in result['rungs']] == [9, 3, 1]
+    assert result['rungs'][-1]['rows'] == len(X)
+    assert result['rungs'][0]['rows'] < result['rungs'][1]['rows'] < len(X)
+    assert result['n_fits'] == (9 + 3 + 1) * 3
+    assert result['best_params']['max_depth'] not in (1, 2)
+    assert len(result['fold_scores']) == 3 and result['best_score'] > 0.8
+    assert not result['stopped_by_budget']
+
+def test_time_budget_stops_search(regression_data, monkeypatch):
+    """预计超出时间预算时停止后续轮次，保留已完成轮次的最优参数"""
+    X, y = regression_data
+    clock = iter(np.arange(0, 1000, 5.0))
+    monkeypatch.setattr(model_search.time, 'perf_counter', lambda: next(clock))
+    result = halving_search(RandomForestRegressor(n_estimators=5, random_state=0), X, y,
+                            {'max_depth': [1, 2, 3, 4, 5, 6, 7, 8, 9]}, 'r2', classification=False,
+                            folds=3, n_jobs=1, time_budget=12)
+    assert result['stopped_by_budget'] is True
+    assert len(result['rungs']) == 1 and result['best_params']
+
+def test_parallel_matches_sequential(regression_data):
+    """并行与串行搜索结果一致"""
+    X, y = regression_data
+    grid = {'max_depth': [2, 6], 'min_samples_leaf': [1, 20]}
+    estimator = RandomForestRegressor(n_estimators=10, random_state=0)
+    sequential = halving_search(estimator, X, y, grid, 'r2', classification=False, folds=3, n_jobs=1)
+    parallel = halving_search(estimator, X, y, grid, 'r2', classification=False, folds=3, n_jobs=2)
+    assert parallel['best_params'] == sequential['best_params']
+    assert parallel['fold_scores'] == pytest.approx(sequential['fold_scores'])
+
+def test_predictive_modeling_search_mode(tmp_path):
+    """search 模式报告交叉验证与搜索过程，并按搜索参数注册模型版本"""
+    rng = np.random.default_rng(1)
+    data = pd.DataFrame(rng.normal(size=(1500, 4)), columns=['a', 'b', 'c', 'd'])
+    data['label'] = (data['a'] + data['b'] > 0).astype(int)
+    config = AnalysisConfig(model_registry_dir=str(tmp_path), cv_folds=3, model_n_jobs=1)
+    analytics = ProfessionalAnalytics(config)
+
+    result = analytics.predictive_modeling(data, 'label', search=True)
+    assert result['cross_validation']['folds'] == 3
+    assert result['cross_validation']['scoring'] == 'accuracy'
+    assert result['cross_validation']['mean_score'] > 0.85
+    search = result['hyperparameter_search']
+    assert search['n_candidates'] == 9 and search['best_params']
+    model = analytics.models['label']['model']
+    assert isinstance(model, RandomForestClassifier)
+    assert all(model.get_params()[k] == v for k, v in search['best_params'].items())
+
+    assert analytics.predictive_modeling(data, 'label', search=True)['reused_model'] is True
+    assert analytics.predictive_modeling(data, 'label')['reused_model'] is False
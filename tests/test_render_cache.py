@@ -0,0 +1,101 @@
+import os
+import pytest
+from src.visualization.chart_generator import ChartGenerator
+from src.visualization.enhanced_chart_generator import EnhancedChartGenerator
+from src.visualization.render_pool import RenderPool, chart_spec
+from src.visualization.render_cache import ChartRenderCache, spec_key
+
+@pytest.fixture
+def analysis_results():
+    """品类与区域指标"""
+    return {
+        'category_metrics': [{'name': '电子', 'change_rate': 5.0, 'structure_change': 1.2},
+                             {'name': '服装', 'change_rate': -3.0, 'structure_change': -0.8}],
+        'region_metrics': [{'name': '北京', 'change_rate': 2.0, 'current_rate': 0.12, 'previous_rate': 0.1}]
+    }
+
+def _write(path, size):
+    with open(path, 'wb') as f:
+        f.write(b'x' * size)
+    return path
+
+def test_rerun_with_unchanged_data_skips_rendering(tmp_path, analysis_results):
+    """数据不变时再次生成全部图表不提交任何渲染任务"""
+    with RenderPool(max_workers=1) as pool:
+        first = ChartGenerator(str(tmp_path), render_pool=pool).generate_all_charts(analysis_results)
+        assert pool.stats['jobs'] == 2
+
+        generator = ChartGenerator(str(tmp_path), render_pool=pool)
+        second = generator.generate_all_charts(analysis_results)
+        assert pool.stats['jobs'] == 2 and second == first
+        assert generator.render_cache.info()['hits'] >= 2
+
+        analysis_results['region_metrics'][0]['change_rate'] = 9.0
+        generator.generate_all_charts(analysis_results)
+        assert pool.stats['jobs'] == 3
+
+def test_rerender_does_not_corrupt_cached_file(tmp_path):
+    """输出路径上的硬链接在重新渲染前被解除，缓存文件内容不变"""
+    generator = ChartGenerator(str(tmp_path))
+    old = [{'name': 'A', 'change_rate': 1.0, 'structure_change': 0.5}]
+    new = [{'name': 'B', 'change_rate': 7.0, 'structure_change': -2.0}]
+    path = generator.generate_category_analysis_chart(old)
+    spec = generator._category_analysis_spec(old)
+    blob = os.path.join(generator.render_cache.cache_dir, spec_key(spec) + '.png')
+    cached_bytes = open(blob, 'rb').read()
+
+    generator.generate_category_analysis_chart(new)
+    assert open(blob, 'rb').read() == cached_bytes
+    assert open(path, 'rb').read() != cached_bytes
+    assert generator.render_cache.refcount(spec) == 0
+
+    assert generator.generate_category_analysis_chart(old) == path
+    assert open(path, 'rb').read() == cached_bytes
+    assert generator.render_cache.refcount(spec) == 1
+
+def test_eviction_is_lru_and_skips_referenced_entries(tmp_path):
+    """淘汰只删除无引用的缓存项，按最近使用顺序直到低于大小上限"""
+    cache = ChartRenderCache(str(tmp_path / 'cache'), max_bytes=None)
+    specs = [chart_spec('bar_pair', str(tmp_path / f'chart{i}.png'), {'i': i}) for i in range(4)]
+    for spec in specs:
+        cache.store(spec, _write(spec['output_path'], 1000))
+    for spec in specs[:3]:
+        os.remove(spec['output_path'])
+    cache.release(specs[0]['output_path'])
+    assert cache.fetch(specs[0]) is not None  # 重新引用并刷新使用时间
+
+    evicted = cache.evict(max_bytes=2500)
+    assert evicted == [spec_key(specs[1]), spec_key(specs[2])]
+    assert cache.fetch(specs[1]) is None and cache.fetch(specs[3]) is not None
+
+    reloaded = ChartRenderCache(cache.cache_dir)
+    assert reloaded.info()['entries'] == 2
+    os.remove(specs[0]['output_path'])
+    assert reloaded.evict(max_age_days=0) == [spec_key(specs[0])]
+
+def test_enhanced_generator_reuses_cached_heatmap(tmp_path):
+    """增强版图表按规格复用缓存文件"""
+    cache = ChartRenderCache(str(tmp_path / 'cache'))
+    generator = EnhancedChartGenerator(render_cache=cache)
+    first = generator._matplotlib_correlation_heatmap({}, str(tmp_path))['files'][0]
+    os.remove(first)
+    second = generator._matplotlib_correlation_heatmap({}, str(tmp_path))['files'][0]
+    assert os.path.exists(second)
+    assert cache.info()['hits'] == 1 and cache.info()['entries'] == 1
+
+def test_caches_sharing_a_directory_keep_each_others_entries(tmp_path):
+    """多个进程（实例）共享缓存目录时互不覆盖缓存项，淘汰覆盖全部缓存项与残留文件"""
+    cache_dir = str(tmp_path / 'cache')
+    first, second = ChartRenderCache(cache_dir, max_bytes=None), ChartRenderCache(cache_dir, max_bytes=None)
+    specs = [chart_spec('bar_pair', str(tmp_path / f'chart{i}.png'), {'i': i}) for i in range(4)]
+    for i, spec in enumerate(specs):
+        (first if i % 2 else second).store(spec, _write(spec['output_path'], 1000))
+    assert first.info()['entries'] == second.info()['entries'] == 4
+    assert second.fetch(specs[1]) is not None
+
+    orphan = _write(os.path.join(cache_dir, 'f' * 64 + '.png'), 1000)
+    os.utime(orphan, (0, 0))
+    for spec in specs:
+        os.remove(spec['output_path'])
+    assert len(first.evict(max_bytes=0)) == 4
+    assert sorted(os.listdir(cache_dir)) == [] and second.info()['entries'] == 0
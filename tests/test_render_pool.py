@@ -0,0 +1,78 @@
+import os
+import time
+import pytest
+from src.visualization.chart_generator import ChartGenerator
+from src.visualization.enhanced_chart_generator import EnhancedChartGenerator
+from src.visualization.render_pool import RenderPool, renderer, chart_spec
+
+@renderer('test_sleep')
+def render_sleep(spec):
+    """测试用渲染器：等待指定秒数后返回进程号"""
+    time.sleep(spec['data']['seconds'])
+    return os.getpid()
+
+@renderer('test_fail')
+def render_fail(spec):
+    """测试用渲染器：总是失败"""
+    raise ValueError('bad spec')
+
+@pytest.fixture(scope='module')
+def pool():
+    """两个渲染进程、额外加载本模块中测试渲染器的进程池"""
+    with RenderPool(max_workers=2, timeout=20, max_jobs_per_worker=3, renderer_modules=[__name__]) as pool:
+        yield pool
+
+def _sleep(seconds):
+    return chart_spec('test_sleep', '', {'seconds': seconds})
+
+def test_generate_all_charts_renders_through_pool(tmp_path, pool):
+    """generate_all_charts 通过进程池并发渲染各图表"""
+    generator = ChartGenerator(str(tmp_path), render_pool=pool)
+    results = {
+        'gmv_metrics': {},
+        'category_metrics': [{'name': '电子', 'change_rate': 5.0, 'structure_change': 1.2},
+                             {'name': '服装', 'change_rate': -3.0, 'structure_change': -0.8}],
+        'region_metrics': [{'name': '北京', 'change_rate': 2.0, 'current_rate': 0.12, 'previous_rate': 0.1}]
+    }
+    paths = generator.generate_all_charts(results)
+    for name in ('gmv_contribution', 'category_analysis', 'region_analysis'):
+        assert paths[name].endswith('.png') and os.path.getsize(paths[name]) > 0
+
+    dashboard = EnhancedChartGenerator(render_pool=pool)._create_matplotlib_dashboard({}, str(tmp_path))
+    assert os.path.exists(dashboard['dashboard_file'])
+
+def test_renderer_errors_propagate(pool):
+    """渲染器异常以 RuntimeError 返回，进程继续可用"""
+    with pytest.raises(RuntimeError, match='bad spec'):
+        pool.render(chart_spec('test_fail', '', {}))
+    assert pool.render(_sleep(0)) > 0
+
+def test_timeout_replaces_worker():
+    """超时的任务终止所在进程，之后的任务由新进程执行"""
+    with RenderPool(max_workers=1, timeout=2, renderer_modules=[__name__]) as pool:
+        first = pool.render(_sleep(0))
+        with pytest.raises(TimeoutError):
+            pool.render(_sleep(30))
+        assert pool.render(_sleep(0)) != first
+        assert pool.stats['timeouts'] == 1
+
+def test_workers_recycled_after_max_jobs():
+    """进程完成 max_jobs_per_worker 个任务后被回收"""
+    with RenderPool(max_workers=1, max_jobs_per_worker=2, renderer_modules=[__name__]) as pool:
+        pids = [pool.render(_sleep(0)) for _ in range(4)]
+        assert pids[0] == pids[1] and pids[2] == pids[3] and pids[1] != pids[2]
+        assert pool.stats['recycled'] == 2
+
+def test_peak_memory_units_by_platform(monkeypatch):
+    """ru_maxrss 在 Linux 上以 KB、在 macOS 上以字节计，统一换算为 MB"""
+    import types
+    import src.visualization.render_pool as render_pool
+    usage = types.SimpleNamespace(ru_maxrss=512 * 1024 * 1024)
+    monkeypatch.setattr(render_pool, 'resource', types.SimpleNamespace(
+        getrusage=lambda who: usage, RUSAGE_SELF=0), raising=False)
+    monkeypatch.setattr(render_pool, 'RESOURCE_AVAILABLE', True)
+    monkeypatch.setattr(render_pool.sys, 'platform', 'darwin')
+    assert render_pool._peak_memory_mb() == 512
+    monkeypatch.setattr(render_pool.sys, 'platform', 'linux')
+    usage.ru_maxrss = 512 * 1024
+    assert render_pool._peak_memory_mb() == 512
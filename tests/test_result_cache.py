@@ -0,0 +1,129 @@
+import time
+import pytest
+import pandas as pd
+import numpy as np
+from src.analysis.advanced_analytics_engine import AdvancedAnalyticsEngine
+from src.analysis.result_cache import ResultCache, data_fingerprint
+
+@pytest.fixture
+def sales():
+    """创建日度销售数据"""
+    rng = np.random.default_rng(4)
+    return pd.DataFrame({
+        'date': pd.date_range('2024-01-01', periods=400),
+        'gmv': rng.normal(1000, 50, 400),
+        'dau': rng.normal(300, 20, 400),
+        'store_id': rng.choice(['S1', 'S2'], 400)
+    })
+
+def test_fingerprint_detects_changes(sales):
+    """指纹对形状、类型、内容与索引变化敏感，对相同内容的副本稳定"""
+    base = data_fingerprint(sales)
+    assert data_fingerprint(sales.copy()) == base
+
+    changed = sales.copy()
+    changed.loc[123, 'gmv'] += 0.01
+    assert data_fingerprint(changed) != base
+    assert data_fingerprint(sales.astype({'dau': 'float32'})) != base
+    assert data_fingerprint(sales.iloc[:-1]) != base
+    assert data_fingerprint(sales.set_axis(sales.index + 1)) != base
+    assert data_fingerprint([1, 2, 3]) is None
+
+def test_fingerprint_covers_every_row_of_large_frames():
+    """大表同样逐行哈希：任意行的字符串修改、数值互换都会改变指纹"""
+    n = 300_000
+    large = pd.DataFrame({'value': np.arange(n, dtype=float), 'store_id': np.where(np.arange(n) % 2, 'S1', 'S2')})
+    base = data_fingerprint(large)
+
+    renamed = large.copy()
+    renamed.loc[12_345, 'store_id'] = 'S9'
+    assert data_fingerprint(renamed) != base
+
+    swapped = large.copy()
+    swapped.loc[[7, 200_003], 'value'] = swapped.loc[[200_003, 7], 'value'].to_numpy()
+    assert data_fingerprint(swapped) != base
+
+def test_lru_eviction_by_size_and_stats():
+    """按序列化大小淘汰最久未使用的结果，并统计命中"""
+    cache = ResultCache(max_bytes=3000)
+    for key in 'abc':
+        cache.put(key, np.zeros(100))  # 约 900 字节
+    assert cache.get('a') is not None  # a 变为最近使用
+    cache.put('d', np.zeros(100))
+
+    assert 'b' not in cache and 'a' in cache and 'd' in cache
+    assert cache.get('b') is None
+    cache.put('huge', np.zeros(10000))
+    assert 'huge' not in cache
+
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['evictions']) == (1, 1, 1)
+    assert stats['bytes'] <= 3000 and stats['hit_rate'] == 0.5
+
+def test_disk_persistence(tmp_path):
+    """磁盘缓存可被新实例读取，清空时删除文件"""
+    ResultCache(cache_dir=str(tmp_path)).put('k', {'value': [1, 2, 3]})
+    fresh = ResultCache(cache_dir=str(tmp_path))
+    assert fresh.get('k') == {'value': [1, 2, 3]}
+    assert fresh.stats()['disk_hits'] == 1
+    assert fresh.get('k') == {'value': [1, 2, 3]}
+    assert fresh.stats()['hits'] == 1
+
+    # 命中返回独立副本，修改结果不影响缓存
+    fresh.get('k')['value'].append(4)
+    assert fresh.get('k') == {'value': [1, 2, 3]}
+
+    fresh.clear()
+    assert list(tmp_path.iterdir()) == []
+    assert ResultCache(cache_dir=str(tmp_path)).get('k') is None
+
+def test_engine_reuses_results(sales):
+    """相同数据与参数命中缓存，参数或数据变化时重新计算"""
+    engine = AdvancedAnalyticsEngine()
+    first = engine.trend_analysis(sales, 'gmv')
+    start = time.perf_counter()
+    second = engine.trend_analysis(sales.copy(), 'gmv')
+    assert time.perf_counter() - start < 0.05
+    assert second is not first and second.keys() == first.keys()
+
+    engine.trend_analysis(sales, 'gmv', change_point_method='pelt')
+    engine.trend_analysis(sales, metric='gmv', time_column='date')
+    modified = sales.copy()
+    modified.loc[0, 'gmv'] = 0
+    engine.trend_analysis(modified, 'gmv')
+    engine.correlation_analysis(sales, ['gmv', 'dau'])
+
+    stats = engine.cache_stats()
+    assert (stats['hits'], stats['misses']) == (2, 4)
+    engine.clear_cache()
+    assert engine.cache_stats()['entries'] == 0
+
+def test_cache_hit_latency():
+    """命中耗时（逐行指纹 + 反序列化副本）：20 万行数据远低于重新计算，且在时间预算内"""
+    n = 200_000
+    rng = np.random.default_rng(9)
+    large = pd.DataFrame({
+        'date': pd.date_range('2020-01-01', periods=n, freq='min'),
+        'gmv': rng.normal(1000, 50, n),
+        'store_id': rng.choice(['S1', 'S2'], n)
+    })
+    engine = AdvancedAnalyticsEngine()
+    start = time.perf_counter()
+    engine.trend_analysis(large, 'gmv')
+    miss = time.perf_counter() - start
+
+    hits = []
+    for _ in range(3):
+        start = time.perf_counter()
+        engine.trend_analysis(large, 'gmv')
+        hits.append(time.perf_counter() - start)
+    assert engine.cache_stats()['hits'] == 3
+    assert min(hits) < 0.5 and min(hits) < miss / 2
+
+def test_engine_skips_unfingerprintable_input(sales):
+    """分块迭代器等无法生成指纹的输入不走缓存"""
+    engine = AdvancedAnalyticsEngine()
+    orders = pd.DataFrame({'user_id': [1, 1, 2], 'date': ['2024-01-01', '2024-02-01', '2024-01-05'], 'gmv': [1, 2, 3]})
+    result = engine.cohort_analysis(iter([orders]), 'user_id', 'date', 'gmv')
+    assert result['cohort_count'] == 1
+    assert engine.cache_stats()['misses'] == 0
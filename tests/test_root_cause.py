@@ -0,0 +1,57 @@
+import pytest
+import pandas as pd
+import numpy as np
+from src.analysis.root_cause import RootCauseAnalyzer
+from src.analysis.metrics_analyzer import MetricsAnalyzer
+
+@pytest.fixture
+def periods():
+    """创建包含一个集中下降细分的两期数据"""
+    rng = np.random.default_rng(3)
+    rows = []
+    for region in ['华东一区', '华东二区', '华东三区']:
+        for category in ['水产类', '猪肉类', '蔬菜类', '水果类']:
+            for store_type in ['标准店', '大店']:
+                for channel in ['线下门店', '线上销售']:
+                    rows.append({
+                        'region': region, 'category': category, 'store_type': store_type,
+                        'channel': channel, 'gmv': 1000 + rng.normal(0, 5),
+                        'dau': 100, 'frequency': 2.0, 'order_price': 200.0, 'conversion_rate': 0.03
+                    })
+    previous = pd.DataFrame(rows)
+    current = previous.copy()
+    current['gmv'] += rng.normal(0, 5, len(current))
+    # 华东二区 × 水产类 大幅下滑
+    mask = (current['region'] == '华东二区') & (current['category'] == '水产类')
+    current.loc[mask, 'gmv'] *= 0.3
+    return current, previous
+
+def test_root_cause_finds_concentrated_segment(periods):
+    """测试根因定位能找到最精确的下降细分"""
+    current, previous = periods
+    result = RootCauseAnalyzer(current, previous).analyze()
+
+    assert result['total_change'] < 0
+    top = result['root_causes'][0]
+    assert top['segment'] == {'region': '华东二区', 'category': '水产类'}
+    assert result['explained_ratio'] >= 0.8
+    assert result['insights']
+
+def test_root_cause_simple_mode_matches_pandas(periods):
+    """测试简化模式与pandas模式结果一致"""
+    current, previous = periods
+    pandas_result = RootCauseAnalyzer(current, previous).analyze()
+    simple_result = RootCauseAnalyzer(
+        current.to_dict('records'), previous.to_dict('records')
+    ).analyze()
+
+    assert [c['segment'] for c in simple_result['root_causes']] == \
+        [c['segment'] for c in pandas_result['root_causes']]
+    assert simple_result['total_change'] == pytest.approx(pandas_result['total_change'])
+
+def test_analyze_includes_root_cause(periods):
+    """测试完整分析结果包含根因定位"""
+    current, previous = periods
+    results = MetricsAnalyzer(current, previous).analyze()
+
+    assert results['root_cause']['root_causes']
@@ -0,0 +1,61 @@
+import pytest
+import pandas as pd
+import numpy as np
+from src.analysis.seasonality import detect_seasonality, seasonality_batch, regularize_series
+from src.analysis.professional_analytics import ProfessionalAnalytics
+from src.analysis.advanced_analytics_engine import AdvancedAnalyticsEngine
+
+@pytest.fixture
+def weekly_sales():
+    """创建两年的日度数据：周末高峰 + 线性增长 + 噪声"""
+    rng = np.random.default_rng(21)
+    dates = pd.date_range('2023-01-01', periods=730)
+    weekday_factor = np.array([1.0, 1.0, 1.0, 1.0, 1.3, 1.6, 1.5])
+    values = 1000 * weekday_factor[dates.dayofweek] + 0.5 * np.arange(730) + rng.normal(0, 40, 730)
+    return pd.DataFrame({'date': dates, 'gmv': values})
+
+def test_detects_weekly_period_with_missing_dates(weekly_sales):
+    """缺失约两成日期时补齐后仍能识别周周期"""
+    sparse = weekly_sales.sample(frac=0.8, random_state=2)
+    result = detect_seasonality(sparse['gmv'].to_numpy(), sparse['date'])
+
+    assert result['detected']
+    assert result['period'] == 7
+    assert result['pattern'] == 'weekly'
+    assert result['frequency'] == 'D'
+
+    regular, _ = regularize_series(sparse['gmv'].to_numpy(), sparse['date'])
+    assert len(regular) == (sparse['date'].max() - sparse['date'].min()).days + 1
+    assert not np.isnan(regular).any()
+
+def test_noise_has_no_seasonality():
+    """纯噪声序列不应检测出季节性"""
+    rng = np.random.default_rng(0)
+    result = seasonality_batch(rng.normal(0, 1, (50, 365)))
+    assert result['detected'].mean() < 0.1
+
+def test_batch_matches_single_series():
+    """批量检测与逐条检测一致"""
+    rng = np.random.default_rng(4)
+    t = np.arange(120)
+    matrix = np.stack([
+        np.sin(2 * np.pi * t / 12) * 10 + rng.normal(0, 1, 120),
+        np.sin(2 * np.pi * t / 4) * 10 + rng.normal(0, 1, 120),
+        rng.normal(0, 1, 120)
+    ])
+    batch = seasonality_batch(matrix)
+    for i, row in enumerate(matrix):
+        single = detect_seasonality(row)
+        assert (single['period'] or 0) == batch['period'][i]
+        assert single['strength'] == pytest.approx(batch['strength'][i])
+    assert list(batch['period'][:2]) == [12, 4]
+
+def test_engines_report_fft_seasonality(weekly_sales):
+    """两个分析引擎的季节性输出都来自周期图检测"""
+    forecast = ProfessionalAnalytics().time_series_forecasting(weekly_sales, 'date', 'gmv', periods=7)
+    assert forecast['seasonality_analysis']['period'] == 7
+    assert forecast['seasonality_analysis']['pattern'] == 'weekly'
+
+    trend = AdvancedAnalyticsEngine().trend_analysis(weekly_sales, 'gmv')
+    assert trend['seasonal_pattern']['cycle_length'] == 7
+    assert trend['seasonal_pattern']['detected']
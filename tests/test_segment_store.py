@@ -0,0 +1,108 @@
+import os
+import time
+import pytest
+import pandas as pd
+import numpy as np
+from src.analysis.professional_analytics import ProfessionalAnalytics, AnalysisConfig
+from src.analysis.segment_store import SegmentAssignmentStore, MAX_PAGE_SIZE
+
+@pytest.fixture
+def customers():
+    """创建三个明显分离的客户群"""
+    rng = np.random.default_rng(6)
+    centers = np.array([[100, 2], [500, 10], [1500, 30]])
+    groups = rng.integers(0, 3, 3000)
+    values = centers[groups] * rng.normal(1, 0.05, (3000, 2))
+    return pd.DataFrame({
+        'customer_id': [f'c{i:05d}' for i in range(3000)],
+        'revenue': values[:, 0],
+        'frequency': values[:, 1]
+    })
+
+@pytest.fixture
+def store(tmp_path):
+    """临时目录中的分群结果存储"""
+    return SegmentAssignmentStore(str(tmp_path))
+
+def test_pages_cover_all_rows(store):
+    """按区间分页读取全部行，末页 next_offset 为空，页大小受上限约束"""
+    labels = np.random.default_rng(0).integers(-1, 4, 2500)
+    meta = store.save(labels, metadata={'method': 'dbscan'})
+    assert meta['n_rows'] == 2500 and meta['segments']['-1']['count'] == int((labels == -1).sum())
+
+    rows, offset = [], 0
+    while offset is not None:
+        page = store.page(meta['result_id'], offset=offset, limit=1000)
+        rows.extend(page['rows']['segment'])
+        offset = page['next_offset']
+    assert rows == labels.tolist()
+    assert page['rows']['row_id'][0] == 2000 and page['total'] == 2500
+    assert store.page(meta['result_id'], limit=10 ** 9)['limit'] == MAX_PAGE_SIZE
+    assert store.page(meta['result_id'], offset=5000)['rows'] == {'row_id': [], 'segment': []}
+
+def test_segment_filter_and_streaming(store):
+    """按分群分页与流式遍历只返回该分群成员，行标识保持原顺序"""
+    labels = np.tile([0, 1, 2, 1], 500)
+    ids = np.array([f'u{i}' for i in range(2000)], dtype=object)
+    result_id = SegmentAssignmentStore(store.root_dir).save(labels, row_ids=ids)['result_id']
+
+    page = store.page(result_id, offset=10, limit=5, segment=1)
+    assert page['total'] == 1000
+    assert page['rows']['row_id'] == ids[labels == 1][10:15].tolist()
+    assert set(page['rows']['segment']) == {1}
+
+    streamed = [row_id for chunk in store.iter_rows(result_id, segment=2, chunk_size=128)
+                for row_id in chunk['row_id']]
+    assert streamed == ids[labels == 2].tolist()
+    assert store.page(result_id, segment=7)['total'] == 0
+
+    store.delete(result_id)
+    with pytest.raises(KeyError):
+        store.page(result_id)
+    with pytest.raises(KeyError):
+        store.metadata('../etc')
+
+def test_old_and_excess_results_are_evicted(tmp_path):
+    """保存时清理过期结果与超出数量上限的最旧结果，删除不存在的结果抛出 KeyError"""
+    store = SegmentAssignmentStore(str(tmp_path), ttl_hours=1, max_results=3)
+    first = store.save([0, 1])['result_id']
+    stale = time.time() - 2 * 3600
+    os.utime(os.path.join(store.root_dir, first, 'metadata.json'), (stale, stale))
+    kept = [store.save([0, 1])['result_id'] for _ in range(2)]
+    assert first not in store.result_ids()
+    with pytest.raises(KeyError):
+        store.page(first)
+
+    for i, result_id in enumerate(kept):
+        os.utime(os.path.join(store.root_dir, result_id, 'metadata.json'), (time.time() - 60 + i,) * 2)
+    newest = [store.save([0, 1])['result_id'] for _ in range(2)]
+    assert sorted(store.result_ids()) == sorted(kept[1:] + newest)
+
+    store.delete(newest[-1])
+    with pytest.raises(KeyError):
+        store.delete(newest[-1])
+    assert len(os.listdir(tmp_path)) == 2
+
+def test_segmentation_result_is_summary_only(tmp_path, customers):
+    """细分结果只含汇总画像与 result_id，标签按 ID 分页读取"""
+    analytics = ProfessionalAnalytics(AnalysisConfig(cluster_n_jobs=1, segment_store_dir=str(tmp_path)))
+    result = analytics.advanced_customer_segmentation(customers, ['revenue', 'frequency'], id_column='customer_id')
+    segments = result['segments']
+    assert 'labels' not in segments and segments['total_rows'] == 3000
+    assert len(result['visualization_data']['scatter_plot']) == 2000
+
+    page = analytics.segment_assignments(segments['result_id'], offset=0, limit=3000)
+    labels = np.array(page['rows']['segment'])
+    assert page['rows']['row_id'][:2] == ['c00000', 'c00001']
+    sizes = sorted(profile['size'] for profile in result['segment_profiles'].values())
+    assert sorted(np.bincount(labels).tolist()) == sizes
+
+    legacy = ProfessionalAnalytics(AnalysisConfig(cluster_n_jobs=1, segment_store_dir=None))
+    inline = legacy.advanced_customer_segmentation(customers.iloc[:300], ['revenue', 'frequency'])
+    assert len(inline['segments']['labels']) == 300
+    with pytest.raises(ValueError):
+        legacy.segment_assignments('abc')
+
+    analytics.delete_segment_result(segments['result_id'])
+    with pytest.raises(KeyError):
+        analytics.segment_assignments(segments['result_id'])
@@ -0,0 +1,101 @@
+import pytest
+import pandas as pd
+import numpy as np
+from sklearn.metrics import adjusted_rand_score
+from src.analysis.advanced_analytics_engine import AdvancedAnalyticsEngine
+from src.analysis.segmentation import ScalableSegmenter, segment_profiles, stratified_sample_index
+
+@pytest.fixture
+def engine():
+    """创建分析引擎实例"""
+    return AdvancedAnalyticsEngine()
+
+@pytest.fixture
+def customers():
+    """创建4个明显分离的客户群"""
+    rng = np.random.default_rng(21)
+    centers = np.array([[100, 5], [400, 20], [900, 2], [250, 60]])
+    truth = rng.integers(0, 4, 20000)
+    values = centers[truth] + rng.normal(0, [20, 1.5], (20000, 2))
+    data = pd.DataFrame({'gmv': values[:, 0], 'orders': values[:, 1]})
+    data['region'] = np.where(rng.random(20000) < 0.8, '华东', '西北')
+    data['category'] = rng.choice(['服装', '家居', '电子产品'], 20000)
+    data.loc[::97, 'gmv'] = np.nan
+    return data, truth
+
+def _reference_profiles(data, clusters, features, n_segments):
+    """原逐分群过滤实现，作为对照"""
+    data = data.copy()
+    data['segment'] = clusters
+    segments, profiles = {}, {}
+    for segment_id in range(n_segments):
+        segment_data = data[data['segment'] == segment_id]
+        profile = {}
+        for feature in features:
+            if segment_data[feature].dtype in ['int64', 'float64']:
+                profile[feature] = {'mean': segment_data[feature].mean(), 'median': segment_data[feature].median(),
+                                    'std': segment_data[feature].std()}
+            else:
+                mode = segment_data[feature].mode()
+                profile[feature] = {'mode': mode.iloc[0] if not mode.empty else 'Unknown',
+                                    'unique_count': segment_data[feature].nunique()}
+        segments[f'segment_{segment_id}'] = {'size': len(segment_data), 'percentage': len(segment_data) / len(data) * 100}
+        profiles[f'segment_{segment_id}'] = profile
+    return segments, profiles
+
+def test_grouped_profiles_match_filtering(customers):
+    """分组聚合画像与逐分群过滤结果一致（含空分群）"""
+    data, truth = customers
+    features = ['gmv', 'orders', 'category', 'region']
+    result = segment_profiles(data, truth, features, 5)
+    segments, profiles = _reference_profiles(data, truth, features, 5)
+
+    assert result['segments'] == segments
+    for key, profile in profiles.items():
+        for feature, stats in profile.items():
+            actual = result['segment_profiles'][key][feature]
+            assert actual.keys() == stats.keys()
+            for name, value in stats.items():
+                if isinstance(value, str):
+                    assert actual[name] == value
+                else:
+                    assert actual[name] == pytest.approx(value, nan_ok=True)
+
+def test_stratified_sample_keeps_proportions(customers):
+    """分层样本保持各层比例，小层至少保留1行"""
+    data, _ = customers
+    index = stratified_sample_index(data['region'], len(data), 2000)
+    share = (data['region'].iloc[index] == '西北').mean()
+    assert abs(share - (data['region'] == '西北').mean()) < 0.01
+    assert len(np.unique(index)) == len(index)
+
+    tiny = stratified_sample_index(np.r_[np.zeros(999), 1], 1000, 10)
+    assert 999 in tiny
+
+@pytest.mark.parametrize('mode', ['sample', 'minibatch'])
+def test_scalable_modes_recover_clusters(customers, mode):
+    """样本训练与 MiniBatch 训练都能恢复真实分群，分块分配标签与整体预测一致"""
+    data, truth = customers
+    segmenter = ScalableSegmenter(n_segments=4, mode=mode, sample_size=2000, batch_size=1000, chunk_size=3000)
+    labels = segmenter.fit_predict(data[['gmv', 'orders']], strata=data['region'])
+
+    assert segmenter.fitted_mode == mode
+    assert adjusted_rand_score(truth, labels) > 0.95
+    scaled = (np.nan_to_num(data[['gmv', 'orders']].to_numpy()) - segmenter.mean_) / segmenter.scale_
+    np.testing.assert_array_equal(labels, segmenter.model.predict(scaled))
+
+def test_engine_auto_switches_by_row_count(engine, customers, monkeypatch):
+    """小数据沿用全量 KMeans，超过阈值自动切换到可扩展模式"""
+    import src.analysis.segmentation as segmentation
+    data, truth = customers
+    result = engine.advanced_segmentation(data, ['gmv', 'orders', 'category'])
+    assert result['segmentation_mode'] == 'full'
+    assert sum(s['size'] for s in result['segments'].values()) == len(data)
+    assert result['segment_insights'][0] == "识别出 4 个用户群体"
+
+    monkeypatch.setattr(segmentation, 'SCALABLE_ROW_THRESHOLD', 10000)
+    assert engine.advanced_segmentation(data, ['gmv', 'orders'])['segmentation_mode'] == 'minibatch'
+    stratified = engine.advanced_segmentation(data, ['gmv', 'orders'], strata_column='region', sample_size=3000)
+    assert stratified['segmentation_mode'] == 'sample'
+    assert sorted(s['size'] for s in stratified['segments'].values()) == pytest.approx(
+        sorted(np.bincount(truth)), rel=0.02)
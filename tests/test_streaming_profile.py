@@ -0,0 +1,168 @@
+import pytest
+import pandas as pd
+import numpy as np
+from scipy import stats
+from src.analysis.professional_analytics import ProfessionalAnalytics
+from src.analysis.sketches import HyperLogLog, QuantileSketch, ColumnMoments
+from src.analysis.streaming_profile import StreamingProfile, profile_chunks, profile_partitions
+
+@pytest.fixture
+def frame():
+    """创建含缺失值与类别列的数据"""
+    rng = np.random.default_rng(11)
+    n = 20000
+    data = pd.DataFrame({
+        'gmv': rng.lognormal(5, 1, n),
+        'orders': rng.poisson(3, n).astype(float),
+        'delta': rng.normal(0, 10, n),
+        'user_id': rng.integers(0, 8000, n),
+        'city': rng.choice(['BJ', 'SH', 'GZ', 'SZ'], n)
+    })
+    data.loc[rng.random(n) < 0.1, 'gmv'] = np.nan
+    missing = rng.random(n) < 0.05
+    data.loc[missing, 'orders'] = np.nan
+    data.loc[missing, 'delta'] = np.nan
+    return data
+
+def test_hyperloglog_accuracy_and_merge():
+    """去重计数误差在 2% 以内，合并结果与整体计算一致"""
+    values = np.random.default_rng(0).integers(0, 10**9, 200000)
+    whole = HyperLogLog()
+    whole.add(values)
+    exact = len(np.unique(values))
+    assert abs(whole.count() - exact) / exact < 0.02
+
+    left, right = HyperLogLog(), HyperLogLog()
+    left.add(values[:50000])
+    right.add(values[50000:].astype(float))
+    assert left.merge(right).count() == whole.count()
+
+    small = HyperLogLog()
+    small.add(pd.Series(['a', 'b', 'a', None]))
+    assert round(small.count()) == 2
+
+def test_quantile_sketch_relative_error(frame):
+    """分位数相对误差不超过 1%，分区合并与整体一致"""
+    values = frame['delta'].dropna().to_numpy()
+    sketch = QuantileSketch(0.01)
+    sketch.add(values)
+    qs = [0.01, 0.25, 0.5, 0.75, 0.99]
+    for q, estimate in zip(qs, sketch.quantiles(qs)):
+        exact = np.quantile(values, q, method='lower')
+        assert abs(estimate - exact) <= 0.01 * abs(exact) + 1e-9
+
+    left, right = QuantileSketch(0.01), QuantileSketch(0.01)
+    left.add(values[:7000])
+    right.add(values[7000:])
+    assert left.merge(right).quantiles(qs) == sketch.quantiles(qs)
+    assert QuantileSketch().quantile(0.5) is None
+
+def test_column_moments_match_scipy(frame):
+    """分块合并的矩与 pandas/scipy 一致"""
+    matrix = frame[['gmv', 'orders', 'delta']].to_numpy()
+    moments = ColumnMoments(3)
+    for start in range(0, len(matrix), 3000):
+        moments.add(matrix[start:start + 3000])
+
+    for position, column in enumerate(['gmv', 'orders', 'delta']):
+        values = frame[column].dropna()
+        assert moments.n[position] == len(values)
+        assert moments.mean[position] == pytest.approx(values.mean())
+        assert moments.std()[position] == pytest.approx(values.std())
+        assert moments.skewness()[position] == pytest.approx(stats.skew(values))
+        assert moments.kurtosis()[position] == pytest.approx(stats.kurtosis(values))
+
+def test_partition_merge_equals_sequential(frame):
+    """分区剖析合并后与顺序逐块剖析结果相同"""
+    sequential = profile_chunks(frame, chunk_size=4000).result()
+    merged = StreamingProfile()
+    for part in np.array_split(np.arange(len(frame)), 3):
+        merged.merge(profile_chunks(frame.iloc[part], chunk_size=2500))
+    merged = merged.result()
+
+    assert merged['basic_info']['rows'] == len(frame)
+    assert merged['data_quality'] == sequential['data_quality']
+    assert merged['outliers'] == sequential['outliers']
+    for column, summary in sequential['statistical_summary'].items():
+        assert merged['statistical_summary'][column] == pytest.approx(summary)
+
+    with pytest.raises(ValueError):
+        merged_profile = profile_chunks(frame[['gmv']])
+        merged_profile.merge(profile_chunks(frame[['orders']]))
+
+def test_sketch_profile_matches_full_profile(frame):
+    """近似剖析与完整剖析的关键统计量一致"""
+    analytics = ProfessionalAnalytics()
+    sketch = analytics.comprehensive_data_profile(frame, mode='sketch', chunk_size=5000)
+    full = analytics.comprehensive_data_profile(frame)
+
+    assert sketch['profile_mode'] == 'sketch'
+    completeness = sketch['data_quality']['completeness']
+    assert completeness['by_column'] == pytest.approx(full['data_quality']['completeness']['by_column'])
+    assert completeness['missing_patterns'] == full['data_quality']['completeness']['missing_patterns']
+    uniqueness = sketch['data_quality']['uniqueness']['by_column']
+    for column, ratio in full['data_quality']['uniqueness']['by_column'].items():
+        assert uniqueness[column] == pytest.approx(ratio, rel=0.03)
+
+    for column in ['gmv', 'orders', 'delta']:
+        exact = full['statistical_summary'][column]
+        approx = sketch['statistical_summary'][column]
+        assert approx['mean'] == pytest.approx(exact['mean'])
+        assert approx['50%'] == pytest.approx(exact['50%'], rel=0.02)
+        assert sketch['distribution_analysis']['by_column'][column]['skewness'] == pytest.approx(
+            full['distribution_analysis']['by_column'][column]['skewness'])
+        assert sketch['outliers']['by_column'][column]['count'] == pytest.approx(
+            full['outliers']['by_column'][column]['count'], rel=0.15, abs=5)
+    assert sketch['correlations']['matrix']['gmv'] == pytest.approx(full['correlations']['matrix']['gmv'])
+    assert sketch['recommendations']
+
+def test_sketch_profile_accepts_chunk_iterator(frame):
+    """sketch 模式可直接消费分块迭代器"""
+    chunks = (frame.iloc[start:start + 6000] for start in range(0, len(frame), 6000))
+    profile = ProfessionalAnalytics().comprehensive_data_profile(chunks, mode='sketch')
+    assert profile['basic_info']['rows'] == len(frame)
+    with pytest.raises(ValueError):
+        ProfessionalAnalytics().comprehensive_data_profile(frame, mode='approximate')
+
+def test_profile_partitions_from_files(frame, tmp_path):
+    """多个分区文件并行剖析后合并"""
+    paths = []
+    for number, part in enumerate(np.array_split(np.arange(len(frame)), 4)):
+        path = tmp_path / f'part-{number}.csv'
+        frame.iloc[part].to_csv(path, index=False)
+        paths.append(str(path))
+
+    parallel = profile_partitions(paths, reader=pd.read_csv, n_jobs=2).result()
+    sequential = profile_chunks(pd.concat(map(pd.read_csv, paths))).result()
+    assert parallel['basic_info']['rows'] == len(frame)
+    assert parallel['data_quality'] == sequential['data_quality']
+    assert parallel['statistical_summary']['gmv']['50%'] == sequential['statistical_summary']['gmv']['50%']
+
+def test_partitions_are_read_incrementally(frame, tmp_path, monkeypatch):
+    """分区按块读取：默认读取器返回分块迭代器，块的读取与剖析交替进行"""
+    import src.analysis.streaming_profile as streaming_profile
+    path = tmp_path / 'part.csv'
+    frame.to_csv(path, index=False)
+
+    seen = []
+    profile_chunks_ = streaming_profile.profile_chunks
+
+    def recording(chunks, **kwargs):
+        seen.append(hasattr(chunks, 'iloc'))
+        return profile_chunks_(chunks, **kwargs)
+
+    monkeypatch.setattr(streaming_profile, 'profile_chunks', recording)
+    streamed = profile_partitions([str(path)], n_jobs=1, chunk_size=3000).result()
+    assert seen == [False] and streamed['basic_info']['rows'] == len(frame)
+
+    events = []
+
+    def reader(partition):
+        for start in range(0, len(frame), 5000):
+            events.append('read')
+            yield frame.iloc[start:start + 5000]
+
+    update = StreamingProfile.update
+    monkeypatch.setattr(StreamingProfile, 'update', lambda self, chunk: events.append('update') or update(self, chunk))
+    profile_partitions([str(path)], reader=reader, n_jobs=1)
+    assert events == ['read', 'update'] * 4
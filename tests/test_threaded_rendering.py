@@ -0,0 +1,103 @@
+import gc
+import os
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+import matplotlib.pyplot as plt
+from src.visualization import chart_generator, enhanced_chart_generator
+from src.visualization.render_pool import render_spec, chart_spec
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+def _specs(output_dir, count, offset=0):
+    """三种图表交替的低分辨率规格，每个规格的数据不同"""
+    specs = []
+    for i in range(offset, offset + count):
+        path = os.path.join(output_dir, f'chart_{i}.png')
+        if i % 3 == 0:
+            specs.append(chart_spec('bar_pair', path, {'labels': ['A', 'B', 'C'], 'left': [i, 2, 3], 'right': [1, -i, 2]},
+                                    titles=['L', 'R'], ylabels=['%', '%'], label_formats=['{:.1f}', '{:.1f}'],
+                                    rotate_labels=True, dpi=20))
+        elif i % 3 == 1:
+            specs.append(chart_spec('heatmap', path, {'index': ['x', 'y'], 'columns': ['p', 'q'],
+                                                     'values': [[i, 1.0], [2.0, 3.0]]}, title='H', dpi=20))
+        else:
+            specs.append(chart_spec('trend', path, {'x': list(range(50)), 'y': [float(i + k) for k in range(50)],
+                                                   'x_is_datetime': False, 'annotations': [0, 49]},
+                                    title='T', xlabel='d', ylabel='v', show_markers=False, dpi=20))
+    return specs
+
+def _render_all(specs, workers=8):
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(render_spec, specs))
+
+@pytest.fixture
+def created_figures(monkeypatch):
+    """记录本测试中渲染器创建的 Figure（弱引用，不延长其生命周期）"""
+    figures = []
+    new_figure = chart_generator._new_figure
+
+    def tracked(*args, **kwargs):
+        fig = new_figure(*args, **kwargs)
+        figures.append(weakref.ref(fig))
+        return fig
+
+    monkeypatch.setattr(chart_generator, '_new_figure', tracked)
+    monkeypatch.setattr(enhanced_chart_generator, '_new_figure', tracked)
+    return figures
+
+def _live(figures):
+    gc.collect()
+    return sum(ref() is not None for ref in figures)
+
+def test_parallel_threads_render_hundreds_of_charts(tmp_path, created_figures):
+    """多线程分批并发渲染 200 个图表：输出完整、不经过 pyplot 全局状态，每批渲染的 Figure 全部释放"""
+    for batch in range(4):
+        specs = _specs(str(tmp_path), 50, offset=batch * 50)
+        assert _render_all(specs) == [spec['output_path'] for spec in specs]
+        assert _live(created_figures) == 0
+    assert len(created_figures) == 200
+
+    for i in range(200):
+        with open(tmp_path / f'chart_{i}.png', 'rb') as f:
+            assert f.read(8) == PNG_SIGNATURE
+    assert plt.get_fignums() == []
+
+def _enhanced_specs(output_dir, count):
+    """增强版仪表板与相关性热力图交替的低分辨率规格"""
+    specs = []
+    for i in range(count):
+        path = os.path.join(output_dir, f'enhanced_{i}.png')
+        if i % 2 == 0:
+            specs.append(chart_spec('advanced_dashboard', path, {
+                'gmv_trend': {f'd{k}': float(i + k) for k in range(10)},
+                'dau_trend': {'北京': 1.0 + i, '上海': 2.0},
+                'category_analysis': {'电子': 3.0, '服装': 1.0 + i}
+            }, color_palette=['#3498db', '#e74c3c', '#2ecc71', '#f39c12'], dpi=10))
+        else:
+            specs.append(chart_spec('correlation_heatmap', path, {
+                'features': ['gmv', 'dau'], 'correlation_matrix': [[1.0, i / count], [i / count, 1.0]]
+            }, dpi=20))
+    return specs
+
+def test_enhanced_renderers_run_in_parallel_threads(tmp_path, created_figures):
+    """增强版渲染器同样使用独立 Figure：多线程渲染不经过 pyplot，Figure 全部释放"""
+    specs = _enhanced_specs(str(tmp_path), 8)
+    assert _render_all(specs, workers=4) == [spec['output_path'] for spec in specs]
+    assert len(created_figures) == 8 and _live(created_figures) == 0
+    for spec in specs:
+        with open(spec['output_path'], 'rb') as f:
+            assert f.read(8) == PNG_SIGNATURE
+    assert plt.get_fignums() == []
+
+def test_failed_renders_do_not_leak_figures(tmp_path, created_figures):
+    """保存失败的渲染不遗留 Figure"""
+    broken = _specs(str(tmp_path), 12) + _enhanced_specs(str(tmp_path), 4)
+    for spec in broken:
+        spec['output_path'] = str(tmp_path / 'missing' / 'chart.png')
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        futures = [executor.submit(render_spec, spec) for spec in broken]
+    errors = [type(future.exception()) for future in futures]
+    del futures  # 异常的 traceback 引用渲染帧中的 Figure
+    assert all(issubclass(error, OSError) for error in errors)
+    assert _live(created_figures) == 0 and plt.get_fignums() == []
@@ -0,0 +1,105 @@
+import statistics
+import pytest
+import pandas as pd
+import numpy as np
+from src.analysis.advanced_analytics_engine import AdvancedAnalyticsEngine
+from src.analysis.trend_kernels import least_squares_slope, pelt_change_points
+
+@pytest.fixture
+def engine():
+    """创建分析引擎实例"""
+    return AdvancedAnalyticsEngine()
+
+@pytest.fixture
+def level_shift_series():
+    """创建含两次水平突变的日度序列"""
+    rng = np.random.default_rng(5)
+    values = np.concatenate([
+        rng.normal(100, 3, 200), rng.normal(140, 3, 150), rng.normal(90, 3, 250)
+    ])
+    return pd.DataFrame({'date': pd.date_range('2023-01-01', periods=len(values)), 'gmv': values})
+
+def _reference_change_points(values, window_size):
+    """原滑窗实现，作为对照"""
+    points = []
+    for i in range(window_size, len(values) - window_size):
+        before = statistics.mean(values[i - window_size:i])
+        after = statistics.mean(values[i:i + window_size])
+        magnitude = abs(after - before) / before if before > 0 else 0
+        if magnitude > 0.2:
+            points.append((i, magnitude))
+    return points
+
+def test_slope_matches_polyfit():
+    """最小二乘斜率与 np.polyfit 一致，二维输入逐行计算"""
+    rng = np.random.default_rng(0)
+    values = rng.normal(0, 1, (3, 50)) + np.arange(50) * np.array([[0.5], [-1.0], [0.0]])
+
+    for row in values:
+        assert least_squares_slope(row) == pytest.approx(np.polyfit(np.arange(50), row, 1)[0])
+    np.testing.assert_allclose(least_squares_slope(values), [np.polyfit(np.arange(50), r, 1)[0] for r in values])
+    assert least_squares_slope([5.0]) == 0.0
+
+def test_window_change_points_match_reference(engine, level_shift_series):
+    """累积和实现与原滑窗实现结果一致"""
+    values = level_shift_series['gmv'].values
+    expected = _reference_change_points(list(values), max(3, len(values) // 10))
+    actual = engine._detect_change_points(values)
+
+    assert [p['position'] for p in actual] == [p for p, _ in expected]
+    assert [p['change_magnitude'] for p in actual] == pytest.approx([m for _, m in expected])
+
+def test_pelt_locates_level_shifts(engine, level_shift_series):
+    """PELT 模式只返回真实的突变位置"""
+    values = level_shift_series['gmv'].values
+    assert pelt_change_points(values, min_size=5) == [200, 350]
+
+    result = engine.trend_analysis(level_shift_series, 'gmv', change_point_method='pelt')
+    points = result['change_points']
+    assert [p['position'] for p in points] == [200, 350]
+    assert [p['direction'] for p in points] == ['increase', 'decrease']
+
+@pytest.fixture
+def store_series():
+    """创建不同长度的多门店多指标长表"""
+    rng = np.random.default_rng(9)
+    frames = []
+    for store, (length, drift) in {'S1': (90, 0.3), 'S2': (90, -0.4), 'S3': (40, 0.0), 'S4': (2, 0.0)}.items():
+        frame = pd.DataFrame({
+            'store_id': store,
+            'date': pd.date_range('2024-01-01', periods=length),
+            'gmv': 1000 + drift * np.arange(length) + rng.normal(0, 5, length),
+            'dau': rng.normal(300, 10, length)
+        })
+        frame.loc[length // 2:, 'dau'] *= 1.5
+        frames.append(frame)
+    return pd.concat(frames).sample(frac=1, random_state=1)
+
+@pytest.mark.parametrize('method', ['window', 'pelt'])
+def test_batch_trend_matches_single_series(engine, store_series, method):
+    """批量结果与逐条 trend_analysis 结果一致"""
+    table = engine.batch_trend_analysis(store_series, 'store_id', ['gmv', 'dau'], change_point_method=method)
+    assert len(table) == 8
+
+    for row in table.itertuples():
+        series = store_series[store_series['store_id'] == row.store_id]
+        single = engine.trend_analysis(series, row.metric, change_point_method=method)
+
+        assert row.n_points == len(series)
+        assert row.trend_direction == single['trend_direction']
+        assert row.trend_strength == pytest.approx(single['trend_strength'])
+        assert row.change_point_count == len(single['change_points'])
+        if single['change_points']:
+            latest = single['change_points'][-1]
+            assert row.last_change_position == latest['position']
+            assert row.last_change_direction == latest['direction']
+        if single['forecast']:
+            assert row.forecast_3 == pytest.approx(single['forecast'][2]['predicted_value'])
+        if single['seasonal_pattern']:
+            assert row.seasonal_strength == pytest.approx(single['seasonal_pattern']['strength'])
+
+def test_batch_trend_sharded_matches_single_process(engine, store_series):
+    """多进程分片结果与单进程结果一致"""
+    single = engine.batch_trend_analysis(store_series, 'store_id', ['gmv', 'dau'])
+    sharded = engine.batch_trend_analysis(store_series, 'store_id', ['gmv', 'dau'], n_jobs=2)
+    pd.testing.assert_frame_equal(single, sharded)
@@ -0,0 +1,45 @@
+import os
+import time
+import pytest
+from src.visualization.visualization_manager import VisualizationManager
+from src.visualization.render_pool import chart_spec
+from src.visualization.render_cache import spec_key
+
+@pytest.fixture
+def manager(tmp_path):
+    """临时输出目录中的可视化管理器"""
+    return VisualizationManager(str(tmp_path))
+
+def _cached_chart(manager, name, size=1000):
+    """在输出目录写入一个图表文件并加入渲染缓存"""
+    path = manager.output_dir / f'{name}.png'
+    path.write_bytes(b'x' * size)
+    spec = chart_spec('bar_pair', str(path), {'name': name})
+    manager.render_cache.store(spec, str(path))
+    return spec
+
+def _age(path, days):
+    stamp = time.time() - days * 24 * 60 * 60
+    os.utime(path, (stamp, stamp))
+
+def test_cleanup_releases_deleted_outputs_and_evicts(manager):
+    """清理旧图表后解除缓存引用；超出大小上限时按 LRU 淘汰无引用缓存项，过期的缓存项按天数淘汰"""
+    specs = {name: _cached_chart(manager, name) for name in ('a', 'b', 'c')}
+    for name in ('a', 'b'):
+        _age(specs[name]['output_path'], 40)
+
+    manager.cleanup_old_charts(days=30)
+    assert sorted(path.name for path in manager.output_dir.glob('*.png')) == ['c.png']
+    assert [manager.render_cache.refcount(specs[name]) for name in 'abc'] == [0, 0, 1]
+    assert manager.get_visualization_stats()['render_cache']['entries'] == 3
+
+    manager.cleanup_old_charts(days=30, max_cache_mb=2500 / 1024 / 1024)
+    assert manager.render_cache.refcount(specs['c']) == 1
+    assert manager.render_cache.fetch(specs['a']) is None
+    remaining = manager.render_cache.info()
+    assert remaining['entries'] == 2 and remaining['evicted'] == 1
+
+    manager.cleanup_old_charts(days=0)
+    assert list(manager.output_dir.glob('*.png')) == []
+    assert manager.render_cache.info()['entries'] == 0
+    assert not os.path.exists(os.path.join(manager.render_cache.cache_dir, spec_key(specs['c']) + '.png'))